@@ -0,0 +1 @@
+"""Offline microbenchmarks of the SDK's per-call overhead, run with `python -m benchmarks.run`."""
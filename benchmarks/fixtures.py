@@ -0,0 +1,72 @@
+"""Benchmark models wired to an `httpx.MockTransport`, answering with the canned responses of `tests.unit.mock_provider`."""
+import base64
+import itertools
+import json
+import os
+from typing import Any, Dict, List
+
+os.environ.setdefault("OPIK_TRACK_DISABLE", "true")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+
+import httpx
+from pydantic import BaseModel
+from ai_sdk.core.types import Message, SystemMessage, UserMessage, AssistantMessage, ToolMessage, ToolCallPart, TextPart, ImagePart, Tool
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from ai_sdk.openrouter import create_openrouter_provider, OpenRouterProviderSettings
+from tests.unit.mock_provider import openai_completion, anthropic_message, client_factories
+
+
+class Weather(BaseModel):
+    location: str
+    unit: str = "celsius"
+
+
+class Recipe(BaseModel):
+    name: str
+    ingredients: List[str]
+    steps: List[str]
+
+
+RECIPE = {"name": "Pancakes", "ingredients": ["flour", "milk", "eggs"], "steps": ["Mix", "Cook"]}
+
+
+def transport(bodies: List[Dict[str, Any]]) -> httpx.MockTransport:
+    """Answers with `bodies` in a loop, encoded once up front so the handler costs as little as possible."""
+    encoded = itertools.cycle([json.dumps(body).encode("utf-8") for body in bodies])
+    headers = {"content-type": "application/json"}
+    return httpx.MockTransport(lambda request: httpx.Response(200, content=next(encoded), headers=headers))
+
+
+def openai_model(bodies: List[Dict[str, Any]], model_id: str = "gpt-4o"):
+    return create_openai_provider(OpenAIProviderSettings(**client_factories(transport(bodies))))(model_id)
+
+
+def anthropic_model(bodies: List[Dict[str, Any]], model_id: str = "claude-3-5-sonnet-20241022"):
+    return create_anthropic_provider(AnthropicProviderSettings(**client_factories(transport(bodies))))(model_id)
+
+
+def openrouter_model(bodies: List[Dict[str, Any]], model_id: str = "openai/gpt-4o"):
+    return create_openrouter_provider(OpenRouterProviderSettings(**client_factories(transport(bodies))))(model_id)
+
+
+def weather_tools() -> Dict[str, Tool]:
+    return {"weather": Tool(description="Get the weather in a location", parameters=Weather, execute=lambda location, unit="celsius": f"Sunny in {location}")}
+
+
+def conversation(turns: int, tool_output_kb: int = 4) -> List[Message]:
+    """A tool-heavy history of `turns` assistant / tool round trips."""
+    messages: List[Message] = [SystemMessage(content="You are a helpful assistant."), UserMessage(content="Plan my week.")]
+    for turn in range(turns):
+        tool_call = ToolCallPart(tool_call_id=f"call_{turn}", tool_name="weather", args={"location": f"City {turn}"})
+        messages.append(AssistantMessage(content="", tool_calls=[tool_call]))
+        messages.append(ToolMessage(tool_call_id=tool_call.tool_call_id, content="x" * (tool_output_kb * 1024)))
+    messages.append(UserMessage(content="Thanks, summarize."))
+    return messages
+
+
+def image_message(size_kb: int) -> UserMessage:
+    image = base64.b64encode(os.urandom(size_kb * 1024)).decode("ascii")
+    return UserMessage(content=[TextPart(text="Describe this image."), ImagePart(image=image, mime_type="image/png")])
@@ -0,0 +1,217 @@
+"""
+Offline microbenchmarks of the SDK's hot paths.
+
+Every case runs against canned provider responses served by an
+`httpx.MockTransport`, so the numbers are the time and memory the SDK itself
+adds on top of the network. Results can be saved as JSON and compared with
+the results of another commit:
+
+    python -m benchmarks.run --json before.json
+    git checkout my-branch
+    python -m benchmarks.run --compare before.json
+
+Use `--filter` to run a subset of the cases, for example `--filter conversion`.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from . import fixtures
+from ai_sdk import generate_text, generate_object
+from ai_sdk.core import fast_json
+from ai_sdk.core.language_model import LanguageModelCallOptions
+from ai_sdk.core.message_cache import clear_message_cache
+
+Case = Callable[[], Callable[[], Any]]
+
+CASES: Dict[str, Case] = {}
+
+LARGE_RESPONSE_BYTES = 64 * 1024
+
+def case(name: str) -> Callable[[Case], Case]:
+    """Registers a case: a function doing the setup and returning the callable that is measured."""
+    def register(setup: Case) -> Case:
+        CASES[name] = setup
+        return setup
+    return register
+
+@case("generate_text.single")
+def _generate_text_single():
+    model = fixtures.openai_model([fixtures.openai_completion("Hello!")])
+    return lambda: generate_text(model=model, prompt="Hi")
+
+@case("generate_text.single.lean")
+def _generate_text_single_lean():
+    model = fixtures.openai_model([fixtures.openai_completion("Hello!")])
+    return lambda: generate_text(model=model, prompt="Hi", lean=True)
+
+def _generate_text_large_response(lean: bool):
+    # Large prompts and responses are where lean mode saves the most
+    model = fixtures.openai_model([fixtures.openai_completion("x" * LARGE_RESPONSE_BYTES)])
+    prompt = "y" * LARGE_RESPONSE_BYTES
+    return lambda: generate_text(model=model, prompt=prompt, lean=lean)
+
+case("generate_text.large_response")(lambda: _generate_text_large_response(lean=False))
+case("generate_text.large_response.lean")(lambda: _generate_text_large_response(lean=True))
+
+@case("generate_text.multi_step")
+def _generate_text_multi_step():
+    steps = 5
+    bodies = [
+        fixtures.openai_completion(None, [{"id": f"call_{i}", "name": "weather", "args": {"location": f"City {i}"}}])
+        for i in range(steps - 1)
+    ] + [fixtures.openai_completion("Done")]
+    model = fixtures.openai_model(bodies)
+    tools = fixtures.weather_tools()
+    return lambda: generate_text(model=model, prompt="Weather?", tools=tools, max_steps=steps)
+
+@case("generate_object.json")
+def _generate_object_json():
+    model = fixtures.openai_model([fixtures.openai_completion(json.dumps(fixtures.RECIPE))])
+    return lambda: generate_object(model=model, schema=fixtures.Recipe, prompt="A recipe")
+
+@case("generate_object.tool_call")
+def _generate_object_tool_call():
+    model = fixtures.anthropic_model([
+        fixtures.anthropic_message(None, [{"id": "toolu_1", "name": "json_object", "args": fixtures.RECIPE}])
+    ])
+    return lambda: generate_object(model=model, schema=fixtures.Recipe, prompt="A recipe")
+
+@case("generate_object.text")
+def _generate_object_text():
+    model = fixtures.openai_model([fixtures.openai_completion(json.dumps(fixtures.RECIPE))], model_id="o1-mini")
+    return lambda: generate_object(model=model, schema=fixtures.Recipe, prompt="A recipe")
+
+def _conversion(model, cold: bool):
+    options = LanguageModelCallOptions(messages=fixtures.conversation(turns=20), tools=fixtures.weather_tools())
+
+    def run():
+        if cold:
+            clear_message_cache()
+        return model._get_args(options)
+    return run
+
+for _provider, _factory in [
+    ("openai", lambda: fixtures.openai_model([])),
+    ("anthropic", lambda: fixtures.anthropic_model([])),
+    ("openrouter", lambda: fixtures.openrouter_model([])),
+]:
+    case(f"conversion.{_provider}.cold")(lambda factory=_factory: _conversion(factory(), cold=True))
+    case(f"conversion.{_provider}.warm")(lambda factory=_factory: _conversion(factory(), cold=False))
+
+@case("image.openai")
+def _image_openai():
+    model = fixtures.openai_model([fixtures.openai_completion("A cat")])
+    image = fixtures.image_message(size_kb=512)
+    return lambda: generate_text(model=model, messages=[image.model_copy()])
+
+@case("image.anthropic")
+def _image_anthropic():
+    model = fixtures.anthropic_model([fixtures.anthropic_message("A cat")])
+    image = fixtures.image_message(size_kb=512)
+    return lambda: generate_text(model=model, messages=[image.model_copy()])
+
+def measure(fn: Callable[[], Any], iterations: int, memory_iterations: int, warmup: int) -> Dict[str, float]:
+    """Returns per-call wall time, CPU time and memory statistics of `fn`."""
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    durations: List[float] = []
+    cpu_start = time.process_time()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    cpu = (time.process_time() - cpu_start) / iterations
+
+    # Memory is measured separately, tracemalloc slows every allocation down
+    gc.collect()
+    tracemalloc.start()
+    peaks: List[int] = []
+    blocks_before = sys.getallocatedblocks()
+    for _ in range(memory_iterations):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn()
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    gc.collect()
+    retained_blocks = (sys.getallocatedblocks() - blocks_before) / memory_iterations
+
+    durations.sort()
+    return {
+        "median_us": statistics.median(durations) * 1e6,
+        "p90_us": durations[int(len(durations) * 0.9) - 1] * 1e6,
+        "cpu_us": cpu * 1e6,
+        "peak_kb": statistics.median(peaks) / 1024,
+        "retained_blocks": retained_blocks,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def environment() -> Dict[str, Any]:
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "json_backend": fast_json.JSON_BACKEND,
+    }
+
+def _format_row(name: str, stats: Dict[str, float], baseline: Optional[Dict[str, float]]) -> str:
+    row = (
+        f"{name:<32} {stats['median_us']:>10.1f} {stats['p90_us']:>10.1f} {stats['cpu_us']:>10.1f} "
+        f"{stats['peak_kb']:>10.1f} {stats['retained_blocks']:>9.1f}"
+    )
+    if baseline is not None:
+        change = (stats["median_us"] / baseline["median_us"] - 1) * 100
+        row += f" {change:>+8.1f}%"
+    return row
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Only run the cases whose name contains this string")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--memory-iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    parser.add_argument("--compare", help="Results of a previous run to compare the median times with")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    env = environment()
+    print(f"commit {env['commit']}, python {env['python']}, json backend {env['json_backend']}")
+    header = f"{'case':<32} {'median us':>10} {'p90 us':>10} {'cpu us':>10} {'peak KB':>10} {'blocks':>9}"
+    print(header + (f" {'vs base':>9}" if baseline is not None else ""))
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, setup in CASES.items():
+        if args.filter not in name:
+            continue
+        stats = measure(setup(), args.iterations, args.memory_iterations, args.warmup)
+        results[name] = stats
+        print(_format_row(name, stats, baseline.get(name) if baseline else None))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"environment": env, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,5 @@ export default {
   models: 'Models and Providers',
   text_generation: 'Text Generation',
   structured_outputs: 'Structured Outputs',
+  embeddings: 'Embeddings',
 } 
\ No newline at end of file
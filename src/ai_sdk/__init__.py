@@ -1,9 +1,21 @@
-from .core.generate_text import generate_text
-from .core.generate_object import generate_object
-from .core.utils import is_opik_configured
+from .core.generate_text import generate_text, generate_text_async
+from .core.generate_object import generate_object, generate_object_async
+from .core.generate_batch import generate_text_batch, generate_text_batch_async, generate_object_batch, generate_object_batch_async
+from .core.batch_job import create_text_batch_job, create_object_batch_job, resume_batch_job
+from .core.stream_text import stream_text, stream_text_async
+from .core.stream_object import stream_object, stream_object_async
+from .core.tracing import configure_tracing
+from .core.retry_strategy import RetryStrategy
+from .core.rate_limit import RateLimiter
+from .core.fallback import FallbackModel, CircuitBreaker
+from .core.cache import MemoryCache, SQLiteCache, TieredCache
+from .core.context_window import ContextPolicy, DropOldest, KeepSystemAndLastN, RejectOverflow
+from .core.tokens import register_context_window
+from .core.embed import embed, embed_async, embed_many, embed_many_async
+from .core.embedding_store import EmbeddingStore
+from .core.images import ImagePreprocessor, ImageLimits
+from .core.compaction import CompactionStrategy, CollapseToolResults, RollingWindow, SummarizeHistory
 
-is_opik_configured()
-
-__all__ = ["generate_text", "generate_object"]
+__all__ = ["generate_text", "generate_text_async", "generate_object", "generate_object_async", "generate_text_batch", "generate_text_batch_async", "generate_object_batch", "generate_object_batch_async", "create_text_batch_job", "create_object_batch_job", "resume_batch_job", "stream_text", "stream_text_async", "stream_object", "stream_object_async", "configure_tracing", "RetryStrategy", "RateLimiter", "FallbackModel", "CircuitBreaker", "MemoryCache", "SQLiteCache", "TieredCache", "ContextPolicy", "DropOldest", "KeepSystemAndLastN", "RejectOverflow", "register_context_window", "CompactionStrategy", "CollapseToolResults", "RollingWindow", "SummarizeHistory", "embed", "embed_async", "embed_many", "embed_many_async", "EmbeddingStore", "ImagePreprocessor", "ImageLimits"]
 
 __version__ = "0.1.11"
\ No newline at end of file
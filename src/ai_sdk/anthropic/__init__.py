@@ -1,3 +1,4 @@
 from .provider import anthropic, create_anthropic_provider, AnthropicProviderSettings
+from .chat_model import AnthropicChatSettings
 
-__all__ = ["anthropic", "create_anthropic_provider", "AnthropicProviderSettings"]
\ No newline at end of file
+__all__ = ["anthropic", "create_anthropic_provider", "AnthropicProviderSettings", "AnthropicChatSettings"]
\ No newline at end of file
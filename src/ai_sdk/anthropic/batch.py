@@ -0,0 +1,89 @@
+from typing import List, Dict, Any, Iterator, Tuple, Optional, TYPE_CHECKING
+from ..core.batch_job import BatchAPI, BatchRequest, BatchJobStatus
+from ..core.errors import AI_APICallError, AI_BatchJobError
+from ..core import fast_json
+
+if TYPE_CHECKING:
+    from .chat_model import AnthropicChatModel
+
+class AnthropicBatchAPI(BatchAPI):
+    """Runs the requests through the Message Batches endpoint (`/v1/messages/batches`)."""
+    def __init__(self, model: "AnthropicChatModel"):
+        self.model = model
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        response = self.model.config.client().request(
+            method,
+            url = url,
+            headers = self.model.config.headers(),
+            timeout = 60,
+            **kwargs
+        )
+        if response.status_code != 200:
+            raise AI_APICallError(
+                url = url,
+                request_body_values = kwargs.get("json") or {},
+                status_code = response.status_code,
+                response_headers = response.headers,
+                response_body = response.text,
+                is_retryable = self.model._is_retryable(response.status_code)
+            )
+        return response
+
+    def submit(self, requests: List[BatchRequest]) -> Dict[str, Any]:
+        return self._request(
+            "POST",
+            self.model.config.url("/v1/messages/batches"),
+            json = {
+                "requests": [{"custom_id": request.custom_id, "params": request.args} for request in requests]
+            }
+        ).json()
+
+    def retrieve(self, job_id: str) -> Dict[str, Any]:
+        return self._request("GET", self.model.config.url(f"/v1/messages/batches/{job_id}")).json()
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        return self._request("POST", self.model.config.url(f"/v1/messages/batches/{job_id}/cancel")).json()
+
+    def status(self, job: Dict[str, Any]) -> BatchJobStatus:
+        # Cancelled and expired requests are reported per request once the batch has ended
+        if job["processing_status"] == "ended":
+            return "completed"
+        return "in_progress"
+
+    def request_count(self, job: Dict[str, Any]) -> Optional[int]:
+        # processing, succeeded, errored, canceled and expired add up to the batch size
+        counts = job.get("request_counts")
+        if not counts:
+            return None
+        return sum(counts.values())
+
+    def results(self, job: Dict[str, Any]) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]]:
+        if not job.get("results_url"):
+            return
+
+        content = self._request("GET", job["results_url"]).text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+
+            line = fast_json.loads(line)
+            custom_id = line["custom_id"]
+            result = line["result"]
+
+            if result["type"] == "succeeded":
+                yield custom_id, result["message"], None
+            elif result["type"] == "errored":
+                error = result.get("error", {}).get("error", result.get("error", {}))
+                yield custom_id, None, AI_BatchJobError(
+                    job_id = job["id"],
+                    message = error.get("message", "Request failed"),
+                    custom_id = custom_id,
+                    data = result.get("error")
+                )
+            else:
+                yield custom_id, None, AI_BatchJobError(
+                    job_id = job["id"],
+                    message = f"Request {result['type']}",
+                    custom_id = custom_id
+                )
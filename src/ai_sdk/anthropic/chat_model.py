@@ -1,16 +1,24 @@
-from ..core.language_model import LanguageModel, LanguageModelCallOptions, LanguageModelCallResult, LanguageModelUsage, LanguageModelRequest, LanguageModelResponse
-from typing import Optional, Dict, Any, List
+from ..core.language_model import LanguageModel, LanguageModelCallOptions, LanguageModelCallResult, LanguageModelUsage, LanguageModelRequest, LanguageModelResponse, LanguageModelStreamPart
+from typing import Optional, Dict, Any, List, Iterator, AsyncIterator, Literal
 from enum import Enum
 from pydantic import BaseModel
-from ..core.types import UnsupportedSettingWarning, Message, ToolCallPart, FinishReason
+from ..core.types import UnsupportedSettingWarning, Message, ToolCallPart, FinishReason, TextDeltaPart, ToolCallDeltaPart, ResponseMetadataPart, FinishPart, Usage
 from ..core.errors import AI_UnsupportedFunctionalityError, AI_APICallError
+from .batch import AnthropicBatchAPI
+from ..core.sse import iter_sse_events, aiter_sse_events
+from ..core.schema_cache import compile_schema_payload
+from ..core.message_cache import convert_message
+from ..core import fast_json
+from ..core.fast_json import json_request, request_text
+from ..core.timing import timed
+from ..core.tokens import ContextWindow, TokenEstimator, CharacterTokenEstimator
+from ..core.images import ImageLimits
+from ..core.utils import build_model
 import validators
-import json
 import datetime
 import uuid
 from typing import Tuple
-import opik
-from opik import opik_context
+from ..core.tracing import update_current_span
 
 SUPPORTED_MODELS = [
     "claude-3-7-sonnet-20250219",
@@ -22,6 +30,22 @@ SUPPORTED_MODELS = [
     "claude-3-haiku-20240307"
 ]
 
+# Images with a long edge over 1568 pixels or more than about 1.15 megapixels are downscaled
+IMAGE_LIMITS = ImageLimits(max_long_side=1568, max_pixels=1150000)
+
+CONTEXT_WINDOWS = {
+    "claude-3-7-sonnet-20250219": ContextWindow(context_window=200000, max_output_tokens=64000),
+    "claude-3-5-sonnet-20241022": ContextWindow(context_window=200000, max_output_tokens=8192),
+    "claude-3-5-sonnet-20240620": ContextWindow(context_window=200000, max_output_tokens=8192),
+    "claude-3-5-haiku-20241022": ContextWindow(context_window=200000, max_output_tokens=8192),
+    "claude-3-opus-20240229": ContextWindow(context_window=200000, max_output_tokens=4096),
+    "claude-3-sonnet-20240229": ContextWindow(context_window=200000, max_output_tokens=4096),
+    "claude-3-haiku-20240307": ContextWindow(context_window=200000, max_output_tokens=4096)
+}
+
+# Claude's tokenizer is not public, its tokens are a little shorter than OpenAI's
+TOKEN_ESTIMATOR = CharacterTokenEstimator(chars_per_token=3.5)
+
 SUPPORTED_IMAGE_MODELS = [
     "claude-3-7-sonnet-20250219",
     "claude-3-5-sonnet-20241022",
@@ -42,17 +66,116 @@ SUPPORTED_TOOL_MODELS =  [
 
 class AnthropicChatSettings(BaseModel):
     sendReasoning: Optional[bool] = True
+    prompt_caching: Optional[Literal["auto"]] = None
+
+# Anthropic accepts at most this many cache_control breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+
+def _get_cache_control(provider_options: Optional[Dict[str, Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Returns the `cache_control` set in `provider_options["anthropic"]`, if any."""
+    anthropic_options = (provider_options or {}).get("anthropic") or {}
+    return anthropic_options.get("cache_control") or anthropic_options.get("cacheControl")
+
+def _with_cache_control(block: Dict[str, Any], provider_options: Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    cache_control = _get_cache_control(provider_options)
+    if cache_control is not None:
+        block["cache_control"] = dict(cache_control)
+    return block
 
 class AnthropicChatConfig(BaseModel):
     provider: str
     url: Any
     headers: Any
-    fetch: Any
+    client: Any
+    async_client: Any
 
 class MessageBlock(BaseModel):
     type: str
     messages: List[Message]
 
+class AnthropicChatStreamState:
+    """Accumulates the events of a streamed message into stream parts."""
+    def __init__(self, model: "AnthropicChatModel", args: Dict[str, Any], response: Any, warnings: List[Any]):
+        self.model = model
+        self.args = args
+        self.response = response
+        self.warnings = warnings
+        self.content_blocks: Dict[int, Dict[str, Any]] = {}
+        self.stop_reason: Optional[str] = None
+        self.usage: Dict[str, Any] = {}
+
+    def process(self, event: Dict[str, Any]) -> List[LanguageModelStreamPart]:
+        parts = []
+        event_type = event.get("type")
+
+        if event_type == "message_start":
+            message = event["message"]
+            self.usage.update(message.get("usage") or {})
+            parts.append(ResponseMetadataPart(
+                id=message.get("id"),
+                model_id=message.get("model"),
+                timestamp=datetime.datetime.now(),
+                headers=self.response.headers
+            ))
+
+        elif event_type == "content_block_start":
+            block = dict(event["content_block"])
+            if block["type"] == "tool_use":
+                block["partial_json"] = ""
+            self.content_blocks[event["index"]] = block
+
+        elif event_type == "content_block_delta":
+            block = self.content_blocks[event["index"]]
+            delta = event["delta"]
+            if delta["type"] == "text_delta":
+                parts.append(TextDeltaPart(text_delta=delta["text"]))
+            elif delta["type"] == "input_json_delta":
+                block["partial_json"] += delta["partial_json"]
+                parts.append(ToolCallDeltaPart(
+                    tool_call_id=block["id"],
+                    tool_name=block["name"],
+                    args_text_delta=delta["partial_json"]
+                ))
+
+        elif event_type == "content_block_stop":
+            block = self.content_blocks[event["index"]]
+            if block["type"] == "tool_use":
+                parts.append(ToolCallPart(
+                    tool_call_id=block["id"],
+                    tool_name=block["name"],
+                    args=fast_json.loads(block["partial_json"] or "{}")
+                ))
+
+        elif event_type == "message_delta":
+            self.stop_reason = (event.get("delta") or {}).get("stop_reason") or self.stop_reason
+            self.usage.update(event.get("usage") or {})
+
+        elif event_type == "error":
+            raise AI_APICallError(
+                url = self.model.config.url("/v1/messages"),
+                request_body_values = self.args,
+                status_code = self.response.status_code,
+                response_headers = self.response.headers,
+                response_body = event,
+                is_retryable = False
+            )
+
+        return parts
+
+    def finish(self) -> List[LanguageModelStreamPart]:
+        prompt_tokens = self.usage.get("input_tokens", 0)
+        completion_tokens = self.usage.get("output_tokens", 0)
+        return [FinishPart(
+            finish_reason=self.model._convert_finish_reason({"stop_reason": self.stop_reason}),
+            usage=Usage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            ),
+            warnings=self.warnings,
+            provider_metadata=self.model._get_provider_metadata({"usage": self.usage})
+        )]
+
 class AnthropicChatModel(LanguageModel):
     def __init__(self, model_id: str, settings: AnthropicChatSettings, config: AnthropicChatConfig):
         if model_id not in SUPPORTED_MODELS:
@@ -103,10 +226,14 @@ class AnthropicChatModel(LanguageModel):
     def _convert_messages(self, messages: List[Message]) -> Tuple[List[Dict[str, Any]], Optional[List[Dict[str, Any]]]]:
         system = None
         blocks = self.group_into_blocks(messages)
-        print("blocks: ", blocks)
+        key = (self.provider, self.model_id)
 
         res = []
         for block in blocks:
+            content = []
+            for message in block.messages:
+                content.extend(convert_message(message, key, self._convert_message))
+
             if block.type == "system":
                 if system is not None:
                     raise AI_UnsupportedFunctionalityError(
@@ -117,78 +244,13 @@ class AnthropicChatModel(LanguageModel):
                         functionality="System messages must be the first messages",
                     )
                 else:
-                    system = [{"type": "text", "text": message.content} for message in block.messages]
-
+                    system = content
             elif block.type == "assistant":
-                content = []
-                for message in block.messages:
-                    if message.content != "":
-                        content.append({
-                            "type": "text",
-                            "text": message.content
-                        })
-                    if message.tool_calls:
-                        for tool_call in message.tool_calls:
-                            content.append({
-                                "type": "tool_use",
-                                "id": tool_call.tool_call_id,
-                                "name": tool_call.tool_name,
-                                "input": tool_call.args
-                            })
                 res.append({
                     "role": "assistant",
                     "content": content
                 })
-            elif block.type == "user":
-                content = []
-                for message in block.messages:
-                    if isinstance(message.content, str):
-                        content.append({
-                            "type": "text",
-                            "text": message.content
-                        })
-                    else:
-                        for part in message.content:
-                            if part.type == "text":
-                                content.append({
-                                    "type": "text",
-                                    "text": part.text
-                                })
-                            elif part.type == "image":
-                                if self.model_id not in SUPPORTED_IMAGE_MODELS:
-                                    raise AI_UnsupportedFunctionalityError(
-                                        functionality="Image input",
-                                        message="This model does not support image input"
-                                    )
-                                if validators.url(part.image):
-                                    content.append({
-                                        "type": "image",
-                                        "source": {
-                                            "type": "url",
-                                            "url": part.image
-                                        }
-                                    })
-                                else:
-                                    content.append({
-                                        "type": "image",
-                                        "source": {
-                                            "type": "base64",
-                                            "media_type": part.mime_type or "image/jpeg",
-                                            "data": part.image
-                                        }
-                                    })
-                res.append({
-                    "role": "user",
-                    "content": content
-                })
-            elif block.type == "tool":
-                content = []
-                for message in block.messages:
-                    content.append({
-                        "type": "tool_result",
-                        "tool_use_id": message.tool_call_id,
-                        "content": message.content
-                    })
+            elif block.type in ("user", "tool"):
                 res.append({
                     "role": "user",
                     "content": content
@@ -200,13 +262,79 @@ class AnthropicChatModel(LanguageModel):
 
         return res, system
 
-    @opik.track
+    def _convert_message(self, message: Message) -> List[Dict[str, Any]]:
+        """Converts one message to the content blocks it contributes to its block."""
+        content = []
+        if message.role == "system":
+            content.append({"type": "text", "text": message.content})
+        elif message.role == "assistant":
+            if message.content != "":
+                content.append({
+                    "type": "text",
+                    "text": message.content
+                })
+            if message.tool_calls:
+                for tool_call in message.tool_calls:
+                    content.append({
+                        "type": "tool_use",
+                        "id": tool_call.tool_call_id,
+                        "name": tool_call.tool_name,
+                        "input": tool_call.args
+                    })
+        elif message.role == "user":
+            if isinstance(message.content, str):
+                content.append({
+                    "type": "text",
+                    "text": message.content
+                })
+            else:
+                for part in message.content:
+                    if part.type == "text":
+                        content.append(_with_cache_control({
+                            "type": "text",
+                            "text": part.text
+                        }, part.provider_options))
+                    elif part.type == "image":
+                        if self.model_id not in SUPPORTED_IMAGE_MODELS:
+                            raise AI_UnsupportedFunctionalityError(
+                                functionality="Image input",
+                                message="This model does not support image input"
+                            )
+                        if validators.url(part.image):
+                            content.append(_with_cache_control({
+                                "type": "image",
+                                "source": {
+                                    "type": "url",
+                                    "url": part.image
+                                }
+                            }, part.provider_options))
+                        else:
+                            content.append(_with_cache_control({
+                                "type": "image",
+                                "source": {
+                                    "type": "base64",
+                                    "media_type": part.mime_type or "image/jpeg",
+                                    "data": part.image
+                                }
+                            }, part.provider_options))
+        elif message.role == "tool":
+            content.append({
+                "type": "tool_result",
+                "tool_use_id": message.tool_call_id,
+                "content": message.content
+            })
+
+        if content:
+            _with_cache_control(content[-1], message.provider_options)
+        return content
+
     def _get_args(self, options: LanguageModelCallOptions):
         warnings = []
 
         args = {}
         args["model"] = self.model_id
-        messages, system = self._convert_messages(options.messages)
+        with timed("convert_messages"):
+            messages, system = self._convert_messages(options.messages)
         args["messages"] = messages
         if system is not None:
             args["system"] = system
@@ -240,32 +368,59 @@ class AnthropicChatModel(LanguageModel):
             ))
 
         if options.tools is not None:
-            args["tools"] = [{
-                "name": tool_name,
-                "description": tool.description,
-                "input_schema": tool.parameters.model_json_schema()
-            } for tool_name, tool in options.tools.items()]
+            args["tools"] = [_with_cache_control(compile_schema_payload(
+                tool.parameters,
+                ("anthropic.tool", tool_name, tool.description),
+                lambda schema, tool_name=tool_name, tool=tool: {
+                    "name": tool_name,
+                    "description": tool.description,
+                    "input_schema": schema
+                }
+            ), tool.provider_options) for tool_name, tool in options.tools.items()]
+
+        if self.settings.prompt_caching == "auto":
+            self._add_cache_breakpoints(args)
 
         return args, warnings
-        
+
+    def _add_cache_breakpoints(self, args: Dict[str, Any]) -> None:
+        """
+        Marks the end of the tool definitions, of the system prompt and of the
+        last message before the newest turn as cache breakpoints, so the stable
+        prefix of the prompt is only billed and processed in full once. Explicit
+        breakpoints count towards the limit of the API and are kept.
+        """
+        blocks = list(args.get("tools") or []) + list(args.get("system") or [])
+        for message in args["messages"]:
+            blocks += message["content"] if isinstance(message["content"], list) else []
+        available = MAX_CACHE_BREAKPOINTS - sum(1 for block in blocks if "cache_control" in block)
+
+        # Converted blocks are shared with later calls, breakpoints go on copies
+        candidates = []
+        if args.get("tools"):
+            candidates.append(args["tools"])
+        if args.get("system"):
+            candidates.append(args["system"])
+        if len(args["messages"]) >= 2 and args["messages"][-2]["content"]:
+            candidates.append(args["messages"][-2]["content"])
+
+        for container in candidates:
+            if available <= 0:
+                break
+            if "cache_control" not in container[-1]:
+                container[-1] = {**container[-1], "cache_control": {"type": "ephemeral"}}
+                available -= 1
+
     def _get_provider_metadata(self, response: Dict[str, Any]) -> Dict[str, Any]:
         provider_metadata = {"anthropic": {}}
 
-        completion_token_details = response.get("usage", {}).get("completion_tokens_details")
-        prompt_token_details = response.get("usage", {}).get("prompt_tokens_details")
+        usage = response.get("usage") or {}
 
-        if completion_token_details:
-            if completion_token_details.get("reasoning_tokens") is not None:
-                provider_metadata["openai"]["reasoning_tokens"] = completion_token_details["reasoning_tokens"]
-            
-            if completion_token_details.get("accepted_prediction_tokens") is not None:
-                provider_metadata["openai"]["accepted_prediction_tokens"] = completion_token_details["accepted_prediction_tokens"]
-            
-            if completion_token_details.get("rejected_prediction_tokens") is not None:
-                provider_metadata["openai"]["rejected_prediction_tokens"] = completion_token_details["rejected_prediction_tokens"]
+        if usage.get("cache_creation_input_tokens") is not None:
+            provider_metadata["anthropic"]["cache_creation_input_tokens"] = usage["cache_creation_input_tokens"]
 
-        if prompt_token_details and prompt_token_details.get("cached_tokens") is not None:
-            provider_metadata["openai"]["cached_prompt_tokens"] = prompt_token_details["cached_tokens"]
+        if usage.get("cache_read_input_tokens") is not None:
+            provider_metadata["anthropic"]["cache_read_input_tokens"] = usage["cache_read_input_tokens"]
 
         return provider_metadata
 
@@ -300,6 +455,14 @@ class AnthropicChatModel(LanguageModel):
         
         return tool_calls
 
+    context_windows = CONTEXT_WINDOWS
+
+    def token_estimator(self) -> TokenEstimator:
+        return TOKEN_ESTIMATOR
+
+    def image_limits(self) -> Optional[ImageLimits]:
+        return IMAGE_LIMITS if self.model_id in SUPPORTED_IMAGE_MODELS else None
+
     def supports_json_mode(self) -> bool:
         return False
 
@@ -308,57 +471,155 @@ class AnthropicChatModel(LanguageModel):
             return True
         return False
 
-    @opik.track(type="llm")
-    def do_generate(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
-        args, warnings = self._get_args(options)
-        
-        with self.config.fetch() as client:
-            url = self.config.url("/v1/messages")
-            response = client.post(
+    def batch_api(self) -> AnthropicBatchAPI:
+        return AnthropicBatchAPI(self)
+
+    def _handle_response(self, args: Dict[str, Any], warnings: List[Any], response: Any, lean: bool = False) -> LanguageModelCallResult:
+        url = self.config.url("/v1/messages")
+        with timed("decode"):
+            result = fast_json.loads(response.content)
+        if response.status_code != 200:
+            raise AI_APICallError(
                 url = url,
-                headers = self.config.headers(),
-                json = args,
+                request_body_values = args,
+                status_code = response.status_code,
+                response_headers = response.headers,
+                response_body = result,
+                is_retryable = self._is_retryable(response.status_code)
+            )
+
+        if lean:
+            return self._parse_result(args, warnings, result, dict(response.headers), lean=True)
+        return self._parse_result(args, warnings, result, response.headers, request_text(response), response.text)
+
+    def _parse_result(
+        self,
+        args: Dict[str, Any],
+        warnings: List[Any],
+        result: Dict[str, Any],
+        headers: Optional[Dict[str, str]],
+        request_body: Optional[str] = None,
+        response_body: Optional[str] = None,
+        lean: bool = False
+    ) -> LanguageModelCallResult:
+        """Converts a Messages API response body, also used for the results of batch jobs."""
+        # Log the usage
+        update_current_span(
+            usage={
+                "prompt_tokens": result["usage"]["input_tokens"],
+                "completion_tokens": result["usage"]["output_tokens"]
+            }
+        )
+
+        return build_model(
+            LanguageModelCallResult,
+            lean,
+            text = result["content"][0]["text"] if result["content"][0]["type"] == "text" else "",
+            tool_calls = self._parse_tool_calls(result),
+            finish_reason = self._convert_finish_reason(result),
+            usage = build_model(
+                LanguageModelUsage,
+                lean,
+                prompt_tokens = result["usage"]["input_tokens"],
+                completion_tokens = result["usage"]["output_tokens"]
+            ),
+            request = None if lean else LanguageModelRequest(
+                body = request_body if request_body is not None else fast_json.dumps_text(args)
+            ),
+            response = build_model(
+                LanguageModelResponse,
+                lean,
+                id = result["id"],
+                finish_reason = self._convert_finish_reason(result),
+                timestamp = datetime.datetime.now(),
+                headers = headers,
+                model_id = result["model"],
+                body = None if lean else (response_body if response_body is not None else fast_json.dumps_text(result))
+            ),
+            warnings = warnings,
+            provider_metadata = self._get_provider_metadata(result)
+        )
+
+    def do_generate(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
+        with timed("build_args"):
+            args, warnings = self._get_args(options)
+        with timed("encode"):
+            request = json_request(self.config.headers(), args)
+
+        with timed("network"):
+            response = self.config.client().post(
+                url = self.config.url("/v1/messages"),
+                **request,
                 timeout = 60
             )
 
-            result = response.json()
-            if response.status_code != 200:
-                raise AI_APICallError(
-                    url = url,
-                    request_body_values = args,
-                    status_code = response.status_code,
-                    response_headers = response.headers,
-                    response_body = result,
-                    is_retryable = self._is_retryable(response.status_code)
-                )
-            
-            # Log the usage
-            opik_context.update_current_span(
-                usage={
-                    "prompt_tokens": result["usage"]["input_tokens"],
-                    "completion_tokens": result["usage"]["output_tokens"]
-                }
+        with timed("parse"):
+            return self._handle_response(args, warnings, response, options.lean)
+
+    async def do_generate_async(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
+        with timed("build_args"):
+            args, warnings = self._get_args(options)
+        with timed("encode"):
+            request = json_request(self.config.headers(), args)
+
+        with timed("network"):
+            response = await self.config.async_client().post(
+                url = self.config.url("/v1/messages"),
+                **request,
+                timeout = 60
             )
 
-            return LanguageModelCallResult(
-                text = result["content"][0]["text"] if result["content"][0]["type"] == "text" else "",
-                tool_calls = self._parse_tool_calls(result),
-                finish_reason = self._convert_finish_reason(result),
-                usage = LanguageModelUsage(
-                    prompt_tokens = result["usage"]["input_tokens"],
-                    completion_tokens = result["usage"]["output_tokens"]
-                ),
-                request = LanguageModelRequest(
-                    body = json.dumps(args)
-                ),
-                response = LanguageModelResponse(
-                    id = result["id"],
-                    finish_reason = self._convert_finish_reason(result),
-                    timestamp = datetime.datetime.now(),
-                    headers = response.headers,
-                    model_id = result["model"],
-                    body = json.dumps(result)
-                ),
-                warnings = warnings,
-                provider_metadata = self._get_provider_metadata(result)
-            )
\ No newline at end of file
+        with timed("parse"):
+            return self._handle_response(args, warnings, response, options.lean)
+
+    def _raise_stream_error(self, args: Dict[str, Any], response: Any) -> None:
+        raise AI_APICallError(
+            url = self.config.url("/v1/messages"),
+            request_body_values = args,
+            status_code = response.status_code,
+            response_headers = response.headers,
+            response_body = response.text,
+            is_retryable = self._is_retryable(response.status_code)
+        )
+
+    def do_stream(self, options: LanguageModelCallOptions) -> Iterator[LanguageModelStreamPart]:
+        args, warnings = self._get_args(options)
+        args["stream"] = True
+
+        with self.config.client().stream(
+            "POST",
+            url = self.config.url("/v1/messages"),
+            **json_request(self.config.headers(), args),
+            timeout = 60
+        ) as response:
+            if response.status_code != 200:
+                response.read()
+                self._raise_stream_error(args, response)
+
+            state = AnthropicChatStreamState(self, args, response, warnings)
+            for event in iter_sse_events(response.iter_lines()):
+                yield from state.process(fast_json.loads(event.data))
+
+            yield from state.finish()
+
+    async def do_stream_async(self, options: LanguageModelCallOptions) -> AsyncIterator[LanguageModelStreamPart]:
+        args, warnings = self._get_args(options)
+        args["stream"] = True
+
+        async with self.config.async_client().stream(
+            "POST",
+            url = self.config.url("/v1/messages"),
+            **json_request(self.config.headers(), args),
+            timeout = 60
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                self._raise_stream_error(args, response)
+
+            state = AnthropicChatStreamState(self, args, response, warnings)
+            async for event in aiter_sse_events(response.aiter_lines()):
+                for part in state.process(fast_json.loads(event.data)):
+                    yield part
+
+            for part in state.finish():
+                yield part
@@ -1,8 +1,10 @@
 from pydantic import BaseModel
 from typing import Dict, Callable, Any, Optional
 from ..core.utils import load_api_key
+from ..core.http_client import HTTPClientPool
 from .chat_model import AnthropicChatModel, AnthropicChatSettings, AnthropicChatConfig
 import httpx
+import threading
 from urllib.parse import urljoin
 
 class AnthropicProviderSettings(BaseModel):
@@ -10,11 +12,24 @@ class AnthropicProviderSettings(BaseModel):
     base_url: Optional[str] = "https://api.anthropic.com"
     api_key: Optional[str] = None
     headers: Optional[Dict[str, str]] = None
-    fetch: Optional[Callable[[str], Any]] = httpx.Client
+    fetch: Optional[Callable[..., Any]] = httpx.Client
+    fetch_async: Optional[Callable[..., Any]] = httpx.AsyncClient
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    keepalive_expiry: Optional[float] = 5.0
+    http2: bool = False
 
 class AnthropicProvider:
     def __init__(self, settings: AnthropicProviderSettings):
         self.settings = settings
+        self.http_client = HTTPClientPool(
+            fetch=settings.fetch,
+            fetch_async=settings.fetch_async,
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+            http2=settings.http2
+        )
 
         self.chat = self.create_chat_model
     
@@ -41,7 +56,7 @@ class AnthropicProvider:
 
         return base + path
     
-    def create_chat_model(self, model_id: str, settings: AnthropicChatSettings) -> AnthropicChatModel:
+    def create_chat_model(self, model_id: str, settings: AnthropicChatSettings = AnthropicChatSettings()) -> AnthropicChatModel:
         return AnthropicChatModel(
             model_id=model_id,
             settings=settings,
@@ -49,17 +64,46 @@ class AnthropicProvider:
                 provider=f"{self.settings.name}.chat",
                 url=self._join_url,
                 headers=self._get_headers,
-                fetch=self.settings.fetch
+                client=self.http_client.client,
+                async_client=self.http_client.async_client
             )
         )
     
-    def __call__(self, model_id: str, settings: AnthropicChatSettings) -> AnthropicChatModel:
+    def close(self) -> None:
+        self.http_client.close()
+
+    async def aclose(self) -> None:
+        await self.http_client.aclose()
+
+    def __enter__(self) -> "AnthropicProvider":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "AnthropicProvider":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def __call__(self, model_id: str, settings: AnthropicChatSettings = AnthropicChatSettings()) -> AnthropicChatModel:
         return self.chat(model_id, settings)
 
+_default_provider: Optional[AnthropicProvider] = None
+_default_provider_lock = threading.Lock()
+
+def _get_default_provider() -> AnthropicProvider:
+    global _default_provider
+    if _default_provider is None:
+        with _default_provider_lock:
+            if _default_provider is None:
+                _default_provider = AnthropicProvider(settings=AnthropicProviderSettings())
+    return _default_provider
+
 def anthropic(model_id: str, settings: AnthropicChatSettings = AnthropicChatSettings()) -> AnthropicChatModel:
-    return AnthropicProvider(
-        settings=AnthropicProviderSettings()
-    ).chat(model_id, settings)
+    # Models created through the default provider share its connection pool
+    return _get_default_provider().chat(model_id, settings)
 
 def create_anthropic_provider(settings: AnthropicProviderSettings) -> AnthropicProvider:
     return AnthropicProvider(settings)
\ No newline at end of file
@@ -0,0 +1,270 @@
+from typing import List, Optional, Dict, Any, Iterator, Tuple, Literal, Type
+from pydantic import BaseModel
+from .types import Tool, Usage, TextResult, ObjectResult
+from .language_model import LanguageModel, LanguageModelCallOptions, LanguageModelProviderMetadata, LanguageModelCallResult
+from .generate_text import _create_options as _create_text_options, _build_text_result
+from .generate_object import _create_options as _create_object_options, _parse_responses, _build_object_result
+from .generate_batch import BatchInput, BatchItem, BatchResult, _input_kwargs, _build_batch_result
+from .errors import AI_BatchJobError
+import time
+
+BatchJobStatus = Literal["in_progress", "completed", "failed", "cancelled", "expired"]
+
+class BatchRequest(BaseModel):
+    custom_id: str
+    args: Dict[str, Any]
+
+class BatchAPI:
+    """
+    Provider endpoints used by `BatchJob`. Chat models that support offline
+    batches return an implementation from `LanguageModel.batch_api`.
+    """
+    def submit(self, requests: List[BatchRequest]) -> Dict[str, Any]:
+        """Submits the requests and returns the provider's job object."""
+        raise NotImplementedError
+
+    def retrieve(self, job_id: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def status(self, job: Dict[str, Any]) -> BatchJobStatus:
+        raise NotImplementedError
+
+    def request_count(self, job: Dict[str, Any]) -> Optional[int]:
+        """Number of requests in the job as reported by the provider, if known."""
+        return None
+
+    def results(self, job: Dict[str, Any]) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Yields `(custom_id, response_body, error)` for each request of a finished job."""
+        raise NotImplementedError
+
+def _custom_id(index: int) -> str:
+    return f"request-{index}"
+
+def _index(custom_id: str) -> Optional[int]:
+    prefix, _, index = custom_id.rpartition("-")
+    if prefix != "request" or not index.isdigit():
+        return None
+    return int(index)
+
+class BatchJob:
+    """
+    Handle on an offline batch job submitted to the provider. Jobs usually take
+    minutes to hours: `wait` polls with exponential backoff and `results` maps
+    the responses back to `TextResult` or `ObjectResult` items, in input order.
+    A job can be picked up again from another process with `resume_batch_job`.
+    """
+    def __init__(
+        self,
+        model: LanguageModel,
+        job: Dict[str, Any],
+        object_generation_mode: Optional[str] = None,
+        schema: Optional[Type[BaseModel]] = None,
+        options: Optional[LanguageModelCallOptions] = None,
+        requests: Optional[Dict[str, Tuple[Dict[str, Any], List[Any]]]] = None
+    ):
+        self.model = model
+        self.api: BatchAPI = model.batch_api()
+        self.job = job
+        self.object_generation_mode = object_generation_mode
+        self.schema = schema
+        self.options = options or LanguageModelCallOptions(messages=[])
+        self._requests = requests or {}
+
+    @property
+    def id(self) -> str:
+        return self.job["id"]
+
+    @property
+    def status(self) -> BatchJobStatus:
+        """Status as of the last `refresh`."""
+        return self.api.status(self.job)
+
+    @property
+    def done(self) -> bool:
+        return self.status != "in_progress"
+
+    def refresh(self) -> BatchJobStatus:
+        self.job = self.api.retrieve(self.id)
+        return self.status
+
+    def cancel(self) -> BatchJobStatus:
+        self.job = self.api.cancel(self.id)
+        return self.status
+
+    def wait(
+        self,
+        poll_interval: float = 10.0,
+        max_poll_interval: float = 300.0,
+        backoff: float = 1.5,
+        timeout: Optional[float] = None
+    ) -> BatchResult:
+        """
+        Polls the job until it is no longer in progress and returns its results.
+
+        Args:
+            poll_interval: Seconds before the first poll
+            max_poll_interval: Upper bound of the delay between polls
+            backoff: Factor applied to the delay after each poll
+            timeout: Seconds after which a `TimeoutError` is raised, the job keeps running
+
+        Raises:
+            AI_BatchJobError: If the job failed as a whole
+            TimeoutError: If the job is still running after `timeout` seconds
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        delay = poll_interval
+
+        while self.refresh() == "in_progress":
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Batch job {self.id} is still in progress")
+            time.sleep(delay)
+            delay = min(delay * backoff, max_poll_interval)
+
+        return self.results()
+
+    def _to_result(self, custom_id: str, body: Dict[str, Any]) -> Any:
+        args, warnings = self._requests.get(custom_id, ({}, []))
+        res: LanguageModelCallResult = self.model._parse_result(args, warnings, body, None)
+        usage = Usage(
+            prompt_tokens=res.usage.prompt_tokens,
+            completion_tokens=res.usage.completion_tokens,
+            total_tokens=res.usage.prompt_tokens + res.usage.completion_tokens
+        )
+
+        if self.schema is None:
+            return _build_text_result(res, self.options.tools, [], usage)
+
+        object = _parse_responses(self.object_generation_mode, res, self.schema)
+        return _build_object_result(res, object, self.options)
+
+    def results(self) -> BatchResult:
+        """
+        Downloads the results of a finished job. Requests that failed, expired or
+        were cancelled carry the error in `error` instead of a result.
+        """
+        if self.status == "in_progress":
+            raise AI_BatchJobError(job_id=self.id, message="Batch job is still in progress", data=self.job)
+        if self.status == "failed":
+            raise AI_BatchJobError(job_id=self.id, message="Batch job failed", data=self.job.get("errors"))
+
+        items: Dict[int, BatchItem] = {}
+        for custom_id, body, error in self.api.results(self.job):
+            index = _index(custom_id)
+            # Lines that were not written by `_submit` can't be mapped to an input
+            if index is None:
+                continue
+            if error is not None:
+                items[index] = BatchItem(index=index, error=error)
+                continue
+            try:
+                items[index] = BatchItem(index=index, result=self._to_result(custom_id, body))
+            except Exception as e:
+                items[index] = BatchItem(index=index, error=e)
+
+        # Resumed jobs don't know their requests, the provider's count keeps trailing
+        # requests without a result in the output
+        count = max([len(self._requests), self.api.request_count(self.job) or 0] + [index + 1 for index in items])
+        return _build_batch_result([
+            items.get(index) or BatchItem(
+                index=index,
+                error=AI_BatchJobError(job_id=self.id, message="No result for request", custom_id=_custom_id(index))
+            )
+            for index in range(count)
+        ])
+
+def _submit(
+    model: LanguageModel,
+    options_list: List[LanguageModelCallOptions],
+    object_generation_mode: Optional[str],
+    schema: Optional[Type[BaseModel]]
+) -> BatchJob:
+    api = model.batch_api()
+
+    requests: Dict[str, Tuple[Dict[str, Any], List[Any]]] = {}
+    for index, options in enumerate(options_list):
+        requests[_custom_id(index)] = model._get_args(options)
+
+    job = api.submit([BatchRequest(custom_id=custom_id, args=args) for custom_id, (args, _) in requests.items()])
+    return BatchJob(model, job, object_generation_mode, schema, options_list[0] if options_list else None, requests)
+
+def create_text_batch_job(
+    model: LanguageModel,
+    inputs: List[BatchInput],
+    system: Optional[str] = None,
+    tools: Optional[Dict[str, Tool]] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+    presence_penalty: Optional[float] = None,
+    frequency_penalty: Optional[float] = None,
+    stop_sequences: Optional[List[str]] = None,
+    seed: Optional[int] = None,
+    provider_options: Optional[LanguageModelProviderMetadata] = None,
+) -> BatchJob:
+    """
+    Submits one `generate_text` request per input to the provider's batch API
+    (OpenAI `/v1/batches`, Anthropic Message Batches). Tools are sent to the
+    model but not executed, each request is a single step.
+    """
+    options_list = [
+        _create_text_options(
+            model, system, item.get("prompt"), item.get("messages"), tools, "auto", max_tokens, temperature,
+            top_p, top_k, presence_penalty, frequency_penalty, stop_sequences, seed, 1, None, provider_options
+        )
+        for item in map(_input_kwargs, inputs)
+    ]
+    return _submit(model, options_list, None, None)
+
+def create_object_batch_job(
+    model: LanguageModel,
+    schema: Type[BaseModel],
+    inputs: List[BatchInput],
+    schema_name: Optional[str] = None,
+    schema_description: Optional[str] = None,
+    system: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+    presence_penalty: Optional[float] = None,
+    frequency_penalty: Optional[float] = None,
+    seed: Optional[int] = None,
+    provider_options: Optional[LanguageModelProviderMetadata] = None,
+) -> BatchJob:
+    """Submits one `generate_object` request per input to the provider's batch API."""
+    object_generation_mode = None
+    options_list = []
+    for item in map(_input_kwargs, inputs):
+        options, object_generation_mode = _create_object_options(
+            model, schema, schema_name, schema_description, system, item.get("prompt"), item.get("messages"),
+            max_tokens, temperature, top_p, top_k, presence_penalty, frequency_penalty, seed, 1, None, provider_options
+        )
+        options_list.append(options)
+    return _submit(model, options_list, object_generation_mode, schema)
+
+def resume_batch_job(
+    model: LanguageModel,
+    job_id: str,
+    schema: Optional[Type[BaseModel]] = None,
+    schema_name: Optional[str] = None,
+    schema_description: Optional[str] = None,
+    tools: Optional[Dict[str, Tool]] = None,
+) -> BatchJob:
+    """
+    Picks up a batch job by id, for example after a restart. Pass the same
+    `schema` (and `schema_name`) as when the job was created for object jobs.
+    """
+    object_generation_mode = None
+    if schema is not None:
+        options, object_generation_mode = _create_object_options(
+            model, schema, schema_name, schema_description, None, None, None,
+            None, None, None, None, None, None, None, 1, None, None
+        )
+    else:
+        options = LanguageModelCallOptions(messages=[], tools=tools)
+
+    return BatchJob(model, model.batch_api().retrieve(job_id), object_generation_mode, schema, options)
@@ -0,0 +1,309 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from pydantic import BaseModel
+from .language_model import LanguageModel, LanguageModelCallOptions, LanguageModelCallResult, LanguageModelResponse
+from .rate_limit import RateLimiter, rate_limited_generate, rate_limited_generate_async
+from .fallback import FallbackModel
+from .schema_cache import get_json_schema
+from .timing import timed
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Bump when the key derivation or the stored format changes so stale entries are ignored
+CACHE_VERSION = 1
+
+class ResponseCache:
+    """
+    Base class of the response caches accepted by the `cache` argument of
+    `generate_text` and `generate_object`. Entries map a key computed by
+    `cache_key` to the `LanguageModelCallResult` returned by the provider.
+    """
+    def get(self, key: str) -> Optional[LanguageModelCallResult]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: LanguageModelCallResult) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    async def get_async(self, key: str) -> Optional[LanguageModelCallResult]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: LanguageModelCallResult) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+class MemoryCache(ResponseCache):
+    """
+    In-process LRU cache. The least recently used entry is evicted once
+    `max_size` entries are stored, entries older than `ttl` seconds are ignored.
+    """
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Optional[float], LanguageModelCallResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[LanguageModelCallResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: LanguageModelCallResult) -> None:
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    async def get_async(self, key: str) -> Optional[LanguageModelCallResult]:
+        return self.get(key)
+
+    async def set_async(self, key: str, value: LanguageModelCallResult) -> None:
+        self.set(key, value)
+
+class SQLiteCache(ResponseCache):
+    """
+    Persistent cache stored in a SQLite database. The database runs in WAL mode
+    so it can be shared by several processes on the same host. Entries older
+    than `ttl` seconds are ignored and removed by `prune`.
+    """
+    def __init__(self, path: str = ".ai_sdk_cache.sqlite", ttl: Optional[float] = None, timeout: float = 30.0):
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL)"
+        )
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[LanguageModelCallResult]:
+        row = self._connection().execute(
+            "SELECT value FROM responses WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return LanguageModelCallResult.model_validate_json(row[0])
+
+    def set(self, key: str, value: LanguageModelCallResult) -> None:
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, value.model_dump_json(), now, now + self.ttl if self.ttl is not None else None)
+        )
+        connection.commit()
+
+    def prune(self) -> int:
+        """Deletes the expired entries and returns how many were removed."""
+        connection = self._connection()
+        cursor = connection.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        connection.commit()
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        connection = self._connection()
+        connection.execute("DELETE FROM responses")
+        connection.commit()
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+class TieredCache(ResponseCache):
+    """
+    Chains several caches, usually a `MemoryCache` in front of a `SQLiteCache`.
+    Lookups go through the tiers in order and a hit in a slower tier is copied
+    into the faster ones, writes go to every tier.
+    """
+    def __init__(self, *tiers: ResponseCache):
+        if not tiers:
+            raise ValueError("TieredCache needs at least one tier")
+        self.tiers = tiers
+
+    def get(self, key: str) -> Optional[LanguageModelCallResult]:
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster_tier in self.tiers[:index]:
+                    faster_tier.set(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: LanguageModelCallResult) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    async def get_async(self, key: str) -> Optional[LanguageModelCallResult]:
+        for index, tier in enumerate(self.tiers):
+            value = await tier.get_async(key)
+            if value is not None:
+                for faster_tier in self.tiers[:index]:
+                    await faster_tier.set_async(key, value)
+                return value
+        return None
+
+    async def set_async(self, key: str, value: LanguageModelCallResult) -> None:
+        for tier in self.tiers:
+            await tier.set_async(key, value)
+
+def _schema(value: Any) -> Any:
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return get_json_schema(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    return value
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+def _normalize_options(options: LanguageModelCallOptions) -> Dict[str, Any]:
+    tools = None
+    if options.tools:
+        tools = {}
+        for name, tool in sorted(options.tools.items()):
+            if isinstance(tool, dict):
+                description, parameters = tool.get("description"), tool.get("parameters")
+            else:
+                description, parameters = tool.description, tool.parameters
+            tools[name] = {"description": description, "parameters": _schema(parameters)}
+
+    # Headers and max_retries do not change the generated response
+    return {
+        "messages": [message.model_dump(mode="json", exclude_none=True) for message in options.messages],
+        "tools": tools,
+        "response_format": _schema(options.response_format),
+        "max_tokens": options.max_tokens,
+        "temperature": options.temperature,
+        "stop_sequences": options.stop_sequences,
+        "top_p": options.top_p,
+        "top_k": options.top_k,
+        "presence_penalty": options.presence_penalty,
+        "frequency_penalty": options.frequency_penalty,
+        "seed": options.seed,
+        "provider_metadata": options.provider_metadata,
+        # Lean results carry no request or response body, they cannot serve a full result
+        "lean": options.lean,
+    }
+
+def cache_key(model: LanguageModel, options: LanguageModelCallOptions) -> str:
+    """Returns a canonical hash of the provider, model id and normalized call options."""
+    payload = {
+        "version": CACHE_VERSION,
+        "provider": model.provider,
+        "model_id": model.model_id,
+        "options": _normalize_options(options),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _mark_hit(res: LanguageModelCallResult) -> LanguageModelCallResult:
+    response = res.response.model_copy(update={"cache_hit": True}) if res.response else LanguageModelResponse(cache_hit=True)
+    return res.model_copy(update={"response": response})
+
+def cached_generate(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    cache: Optional[ResponseCache],
+    rate_limiter: Optional[RateLimiter] = None,
+    validate: Optional[Callable[[LanguageModelCallResult], Any]] = None
+) -> LanguageModelCallResult:
+    """
+    Calls `model.do_generate`, going through `cache` when one is given. The
+    models of a fallback chain are cached on their own, under the key of the
+    model that served the call. A new response is only cached once `validate`
+    accepted it, a response it raises on is not stored.
+    """
+    if cache is None:
+        return rate_limited_generate(model, options, rate_limiter)
+    if isinstance(model, FallbackModel):
+        return model.call(lambda inner: cached_generate(inner, options, cache, rate_limiter, validate))
+
+    key = cache_key(model, options)
+    with timed("cache_lookup"):
+        res = cache.get(key)
+    if res is not None:
+        return _mark_hit(res)
+
+    res = rate_limited_generate(model, options, rate_limiter)
+    if validate is not None:
+        validate(res)
+    with timed("cache_lookup"):
+        cache.set(key, res)
+    return res
+
+async def cached_generate_async(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    cache: Optional[ResponseCache],
+    rate_limiter: Optional[RateLimiter] = None,
+    validate: Optional[Callable[[LanguageModelCallResult], Any]] = None
+) -> LanguageModelCallResult:
+    """Async variant of `cached_generate`."""
+    if cache is None:
+        return await rate_limited_generate_async(model, options, rate_limiter)
+    if isinstance(model, FallbackModel):
+        return await model.call_async(lambda inner: cached_generate_async(inner, options, cache, rate_limiter, validate))
+
+    key = cache_key(model, options)
+    with timed("cache_lookup"):
+        res = await cache.get_async(key)
+    if res is not None:
+        return _mark_hit(res)
+
+    res = await rate_limited_generate_async(model, options, rate_limiter)
+    if validate is not None:
+        validate(res)
+    with timed("cache_lookup"):
+        await cache.set_async(key, res)
+    return res
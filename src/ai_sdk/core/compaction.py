@@ -0,0 +1,210 @@
+from typing import Dict, List, Optional, Set, Tuple
+from .types import Message, SystemMessage, UserMessage, AssistantMessage, ToolMessage, TextPart, ToolCallPart
+from .language_model import LanguageModel, LanguageModelCallOptions
+from .tokens import TokenEstimator
+from .retry_strategy import RetryStrategy
+from .rate_limit import RateLimiter, rate_limited_generate, rate_limited_generate_async
+from .tracing import span
+from . import fast_json
+
+# Marks the summaries written by `SummarizeHistory`, so they are not mistaken for the user's request
+SUMMARY_OPTIONS = {"ai_sdk": {"compaction_summary": True}}
+
+DEFAULT_SUMMARY_PROMPT = (
+    "You are compacting the history of an agent run. Summarize the conversation below: keep the facts, "
+    "decisions, tool results and open questions that are needed to continue the task, drop everything else. "
+    "Answer with the summary only."
+)
+
+def is_summary(message: Message) -> bool:
+    options = getattr(message, "provider_options", None) or {}
+    return bool(options.get("ai_sdk", {}).get("compaction_summary"))
+
+def _blocks(messages: List[Message]) -> Tuple[Set[int], List[List[int]]]:
+    """
+    Splits the indexes of `messages` into the pinned ones (system messages and
+    the user's last request) and blocks that can be compacted: a user message,
+    or an assistant message with the tool results that follow it.
+    """
+    request = next(
+        (index for index in range(len(messages) - 1, -1, -1)
+         if isinstance(messages[index], UserMessage) and not is_summary(messages[index])),
+        None
+    )
+    pinned = {index for index, message in enumerate(messages) if isinstance(message, SystemMessage)}
+    if request is not None:
+        pinned.add(request)
+
+    blocks: List[List[int]] = []
+    for index, message in enumerate(messages):
+        if index in pinned:
+            continue
+        if not isinstance(message, ToolMessage) or not blocks:
+            blocks.append([])
+        blocks[-1].append(index)
+    return pinned, blocks
+
+class CompactionStrategy:
+    """
+    Compacts the history of a multi-step `generate_text` run before each step,
+    so the requests stop growing with every tool result. System messages, the
+    user's last request and the last `keep_last` blocks (a user message, or an
+    assistant message with its tool results) are never compacted.
+
+    Args:
+        keep_last: Number of recent blocks left untouched
+        trigger_tokens: Only compact once the history is larger than this, always when None
+        estimator: Token estimator used for `trigger_tokens`, defaults to the model's
+    """
+    def __init__(self, keep_last: int = 2, trigger_tokens: Optional[int] = None, estimator: Optional[TokenEstimator] = None):
+        if keep_last < 0:
+            raise ValueError("keep_last must not be negative")
+        self.keep_last = keep_last
+        self.trigger_tokens = trigger_tokens
+        self.estimator = estimator
+
+    def should_compact(self, messages: List[Message], model: LanguageModel) -> bool:
+        if self.trigger_tokens is None:
+            return True
+        estimator = self.estimator or model.token_estimator()
+        return estimator.count_messages(messages) > self.trigger_tokens
+
+    def _old_blocks(self, messages: List[Message]) -> List[List[int]]:
+        _, blocks = _blocks(messages)
+        return blocks[:len(blocks) - self.keep_last] if self.keep_last else blocks
+
+    def compact_blocks(self, messages: List[Message], blocks: List[List[int]], model: LanguageModel, retry: Optional[RetryStrategy] = None, rate_limiter: Optional[RateLimiter] = None) -> List[Message]:
+        """
+        Returns the history with the old `blocks` compacted. Strategies sending
+        requests go through the `retry` strategy and `rate_limiter` of the run.
+        """
+        raise NotImplementedError
+
+    async def compact_blocks_async(self, messages: List[Message], blocks: List[List[int]], model: LanguageModel, retry: Optional[RetryStrategy] = None, rate_limiter: Optional[RateLimiter] = None) -> List[Message]:
+        return self.compact_blocks(messages, blocks, model, retry, rate_limiter)
+
+    def compact(self, messages: List[Message], model: LanguageModel, retry: Optional[RetryStrategy] = None, rate_limiter: Optional[RateLimiter] = None) -> List[Message]:
+        """Returns the compacted history, or `messages` itself when there is nothing to do."""
+        if not self.should_compact(messages, model):
+            return messages
+        blocks = self._old_blocks(messages)
+        if not blocks:
+            return messages
+        return self.compact_blocks(messages, blocks, model, retry, rate_limiter)
+
+    async def compact_async(self, messages: List[Message], model: LanguageModel, retry: Optional[RetryStrategy] = None, rate_limiter: Optional[RateLimiter] = None) -> List[Message]:
+        """Async variant of `compact`."""
+        if not self.should_compact(messages, model):
+            return messages
+        blocks = self._old_blocks(messages)
+        if not blocks:
+            return messages
+        return await self.compact_blocks_async(messages, blocks, model, retry, rate_limiter)
+
+class CollapseToolResults(CompactionStrategy):
+    """Replaces old tool results with a short stub, the tool calls themselves are kept."""
+    def __init__(self, placeholder: str = "[Result of {tool_name} omitted to save context]", **kwargs):
+        super().__init__(**kwargs)
+        self.placeholder = placeholder
+
+    def compact_blocks(self, messages: List[Message], blocks: List[List[int]], model: LanguageModel, retry: Optional[RetryStrategy] = None, rate_limiter: Optional[RateLimiter] = None) -> List[Message]:
+        tool_names: Dict[str, str] = {}
+        for message in messages:
+            if isinstance(message, AssistantMessage):
+                for tool_call in message.tool_calls or []:
+                    tool_names[tool_call.tool_call_id] = tool_call.tool_name
+
+        compacted = list(messages)
+        for block in blocks:
+            for index in block:
+                message = messages[index]
+                if not isinstance(message, ToolMessage):
+                    continue
+                stub = self.placeholder.format(tool_name=tool_names.get(message.tool_call_id, "tool"))
+                if len(message.content) > len(stub):
+                    compacted[index] = ToolMessage(tool_call_id=message.tool_call_id, content=stub)
+        return compacted
+
+class RollingWindow(CompactionStrategy):
+    """Drops every block but the last `keep_last`, the system messages and the user's last request are kept."""
+    def compact_blocks(self, messages: List[Message], blocks: List[List[int]], model: LanguageModel, retry: Optional[RetryStrategy] = None, rate_limiter: Optional[RateLimiter] = None) -> List[Message]:
+        dropped = {index for block in blocks for index in block}
+        return [message for index, message in enumerate(messages) if index not in dropped]
+
+def _render(message: Message) -> str:
+    """Plain text version of a message for the summarization prompt."""
+    if isinstance(message, ToolMessage):
+        return f"Tool result ({message.tool_call_id}): {message.content}"
+    if is_summary(message):
+        return message.content
+
+    content = message.content
+    if isinstance(content, str):
+        parts = [content] if content else []
+    else:
+        parts = [
+            part.text if isinstance(part, TextPart)
+            else f"[tool call {part.tool_name}({fast_json.dumps_text(part.args)})]" if isinstance(part, ToolCallPart)
+            else "[image]"
+            for part in content
+        ]
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        parts.append(f"[tool call {tool_call.tool_call_id} {tool_call.tool_name}({fast_json.dumps_text(tool_call.args)})]")
+    return f"{message.role.capitalize()}: {' '.join(parts)}"
+
+class SummarizeHistory(CompactionStrategy):
+    """
+    Replaces the old blocks with a summary written by `model` (typically a
+    cheaper model than the one running the task, defaults to the same one).
+    The summary is a user message and is itself summarized again with the
+    next old blocks, so the history stays bounded. Meant to be used with
+    `trigger_tokens`, every compaction costs one extra request.
+
+    Args:
+        model: Model writing the summaries
+        max_summary_tokens: `max_tokens` of the summarization request
+        prompt: System prompt of the summarization request
+    """
+    def __init__(
+        self,
+        model: Optional[LanguageModel] = None,
+        max_summary_tokens: int = 1000,
+        prompt: str = DEFAULT_SUMMARY_PROMPT,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.model = model
+        self.max_summary_tokens = max_summary_tokens
+        self.prompt = prompt
+
+    def _options(self, messages: List[Message], blocks: List[List[int]]) -> LanguageModelCallOptions:
+        transcript = "\n\n".join(_render(messages[index]) for block in blocks for index in block)
+        return LanguageModelCallOptions(
+            messages=[SystemMessage(content=self.prompt), UserMessage(content=transcript)],
+            max_tokens=self.max_summary_tokens
+        )
+
+    def _replace(self, messages: List[Message], blocks: List[List[int]], summary: str) -> List[Message]:
+        dropped = {index for block in blocks for index in block}
+        first = blocks[0][0]
+        compacted: List[Message] = []
+        for index, message in enumerate(messages):
+            if index == first:
+                compacted.append(UserMessage(content=f"Summary of earlier steps: {summary}", provider_options=SUMMARY_OPTIONS))
+            if index not in dropped:
+                compacted.append(message)
+        return compacted
+
+    def compact_blocks(self, messages: List[Message], blocks: List[List[int]], model: LanguageModel, retry: Optional[RetryStrategy] = None, rate_limiter: Optional[RateLimiter] = None) -> List[Message]:
+        summary_model = self.model or model
+        options = self._options(messages, blocks)
+        with span("compaction", "general", provider=summary_model.provider, model=summary_model.model_id):
+            res = (retry or RetryStrategy()).call(lambda: rate_limited_generate(summary_model, options, rate_limiter))
+        return self._replace(messages, blocks, res.text or "")
+
+    async def compact_blocks_async(self, messages: List[Message], blocks: List[List[int]], model: LanguageModel, retry: Optional[RetryStrategy] = None, rate_limiter: Optional[RateLimiter] = None) -> List[Message]:
+        summary_model = self.model or model
+        options = self._options(messages, blocks)
+        with span("compaction", "general", provider=summary_model.provider, model=summary_model.model_id):
+            res = await (retry or RetryStrategy()).call_async(lambda: rate_limited_generate_async(summary_model, options, rate_limiter))
+        return self._replace(messages, blocks, res.text or "")
@@ -0,0 +1,131 @@
+from typing import List, Optional, Set
+from .types import Message, SystemMessage, UserMessage
+from .language_model import LanguageModel, LanguageModelCallOptions
+from .tokens import TokenEstimator
+from .errors import AI_ContextWindowExceededError
+
+def _turns(messages: List[Message]) -> List[List[int]]:
+    """
+    Groups the indexes of the non-system messages into turns: a user message
+    with the assistant and tool messages that follow it. Turns are dropped as
+    a whole so tool results never lose their tool call.
+    """
+    turns: List[List[int]] = []
+    for index, message in enumerate(messages):
+        if isinstance(message, SystemMessage):
+            continue
+        if isinstance(message, UserMessage) or not turns:
+            turns.append([])
+        turns[-1].append(index)
+    return turns
+
+def _drop_oldest_turns(messages: List[Message], budget: int, estimator: TokenEstimator, dropped: Set[int]) -> None:
+    total = sum(estimator.count_message(message) for index, message in enumerate(messages) if index not in dropped)
+    # The last turn holds the current request, it is never dropped
+    for turn in _turns(messages)[:-1]:
+        if total <= budget:
+            break
+        kept = [index for index in turn if index not in dropped]
+        total -= sum(estimator.count_message(messages[index]) for index in kept)
+        dropped.update(kept)
+
+class ContextPolicy:
+    """
+    Fits the messages of a request into the model's context window before it
+    is sent, and sizes `max_tokens` to the room left. Used through the
+    `context_policy` argument of `generate_text` and `generate_object`; models
+    whose context window is unknown (see `register_context_window`) are left
+    alone.
+
+    Args:
+        estimator: Token estimator, defaults to the model's
+        margin: Fraction of the window kept free to absorb estimation errors
+        min_output_tokens: Smallest completion budget worth sending a request for
+    """
+    def __init__(
+        self,
+        estimator: Optional[TokenEstimator] = None,
+        margin: float = 0.05,
+        min_output_tokens: int = 256,
+    ):
+        self.estimator = estimator
+        self.margin = margin
+        self.min_output_tokens = min_output_tokens
+
+    def fit(self, messages: List[Message], budget: int, estimator: TokenEstimator) -> List[Message]:
+        """Returns the messages to send, ideally at most `budget` tokens."""
+        return messages
+
+class RejectOverflow(ContextPolicy):
+    """Sends the messages as they are and raises `AI_ContextWindowExceededError` when they do not fit."""
+
+class DropOldest(ContextPolicy):
+    """Drops the oldest turns until the messages fit, system messages and the current turn are always kept."""
+    def fit(self, messages: List[Message], budget: int, estimator: TokenEstimator) -> List[Message]:
+        dropped: Set[int] = set()
+        _drop_oldest_turns(messages, budget, estimator, dropped)
+        return [message for index, message in enumerate(messages) if index not in dropped]
+
+class KeepSystemAndLastN(ContextPolicy):
+    """
+    Keeps the system messages and the last `n` other messages, extended back
+    to the start of their turn, then drops the oldest turns if that is still
+    too long.
+    """
+    def __init__(self, n: int, **kwargs):
+        super().__init__(**kwargs)
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        self.n = n
+
+    def fit(self, messages: List[Message], budget: int, estimator: TokenEstimator) -> List[Message]:
+        others = [index for index, message in enumerate(messages) if not isinstance(message, SystemMessage)]
+        first_kept = others[-self.n] if len(others) >= self.n else 0
+
+        dropped: Set[int] = set()
+        for turn in _turns(messages):
+            if turn[-1] < first_kept:
+                dropped.update(turn)
+        _drop_oldest_turns(messages, budget, estimator, dropped)
+        return [message for index, message in enumerate(messages) if index not in dropped]
+
+def fit_context(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    policy: Optional[ContextPolicy]
+) -> LanguageModelCallOptions:
+    """
+    Returns the options of one request with the messages fitted by `policy` and
+    `max_tokens` capped to the room left in the context window (or set to it
+    when not given). `options` itself is not modified.
+
+    Raises:
+        AI_ContextWindowExceededError: If the prompt does not fit even after the policy was applied
+    """
+    if policy is None:
+        return options
+    window = model.context_window()
+    if window is None:
+        return options
+
+    estimator = policy.estimator or model.token_estimator()
+    available = int(window.context_window * (1 - policy.margin))
+    fixed = estimator.count_tools(options.tools)
+    if isinstance(options.response_format, type):
+        fixed += estimator.count_prompt([], response_format=options.response_format)
+    reserved = min(options.max_tokens or policy.min_output_tokens, window.max_output_tokens)
+
+    messages = policy.fit(options.messages, available - fixed - reserved, estimator)
+    prompt_tokens = fixed + estimator.count_messages(messages)
+    remaining = available - prompt_tokens
+    if remaining < min(policy.min_output_tokens, options.max_tokens or policy.min_output_tokens):
+        raise AI_ContextWindowExceededError(
+            model_id=model.model_id,
+            prompt_tokens=prompt_tokens,
+            context_window=available
+        )
+
+    max_tokens = min(options.max_tokens or window.max_output_tokens, window.max_output_tokens, remaining)
+    if len(messages) == len(options.messages) and max_tokens == options.max_tokens:
+        return options
+    return options.model_copy(update={"messages": messages, "max_tokens": max_tokens})
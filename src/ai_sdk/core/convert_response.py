@@ -1,8 +1,6 @@
 from typing import List, Optional, Dict, Any, Callable
 from .types import AssistantMessage, ResponseMessage, TextPart, ToolCallPart, ToolResultPart, ToolMessage
-import opik
 
-@opik.track
 def convert_to_response_messages(
     text: Optional[str] = "",
     tools: Dict[str, Any] = None,
@@ -32,13 +30,13 @@ def convert_to_response_messages(
         )
     )
 
-    # Add tool results if any exist
-    if tool_results:
+    # Add tool results if any exist, one message per tool call
+    for tool_result in tool_results:
         response_messages.append(
             ToolMessage(
                 role="tool",
-                content=tool_results,
-                id=generate_message_id()
+                content=tool_result.result,
+                tool_call_id=tool_result.tool_call_id
             )
         )
 
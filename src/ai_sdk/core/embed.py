@@ -0,0 +1,134 @@
+from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from .types import EmbedResult, EmbedManyResult, EmbeddingUsage
+from .embedding_model import EmbeddingModel, EmbeddingModelCallResult, require_numpy
+from .retry_strategy import RetryStrategy, resolve_retry_strategy
+from .tracing import track, update_current_span
+import asyncio
+import contextvars
+
+def split_into_chunks(values: List[str], model: EmbeddingModel, max_batch_size: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Returns the `(start, end)` ranges of the requests needed to embed `values`
+    within the model's batch limits. A single value above `max_tokens_per_call`
+    still gets a request of its own, the provider decides what to do with it.
+    """
+    max_size = min(max_batch_size or model.max_embeddings_per_call, model.max_embeddings_per_call)
+    if max_size < 1:
+        raise ValueError("max_batch_size must be at least 1")
+    max_tokens = model.max_tokens_per_call
+    estimator = model.token_estimator() if max_tokens is not None else None
+
+    chunks: List[Tuple[int, int]] = []
+    start = 0
+    tokens = 0
+    for index, value in enumerate(values):
+        value_tokens = estimator.count_text(value) if estimator is not None else 0
+        full = index - start >= max_size or (estimator is not None and tokens + value_tokens > max_tokens)
+        if full and index > start:
+            chunks.append((start, index))
+            start, tokens = index, 0
+        tokens += value_tokens
+    if start < len(values):
+        chunks.append((start, len(values)))
+    return chunks
+
+def _build_result(values: List[str], results: List[EmbeddingModelCallResult]) -> EmbedManyResult:
+    np = require_numpy()
+    if results:
+        embeddings = np.concatenate([res.embeddings for res in results]) if len(results) > 1 else results[0].embeddings
+    else:
+        embeddings = np.empty((0, 0), dtype=np.float32)
+    usage = EmbeddingUsage(tokens=sum(res.tokens for res in results))
+    update_current_span(usage={"prompt_tokens": usage.tokens, "completion_tokens": 0})
+    return EmbedManyResult(values=values, embeddings=embeddings, usage=usage)
+
+@track(kind="call")
+def embed_many(
+    model: EmbeddingModel,
+    values: List[str],
+    max_batch_size: Optional[int] = None,
+    max_concurrency: int = 4,
+    max_retries: int = 3,
+    retry_strategy: Optional[RetryStrategy] = None,
+) -> EmbedManyResult:
+    """
+    Embeds many values. The values are split into requests within the
+    provider's batch limits which run concurrently, each one retried on its own.
+
+    Args:
+        model: The embedding model to use
+        values: Texts to embed
+        max_batch_size: Maximum number of values per request, capped to the provider's limit
+        max_concurrency: Maximum number of requests in flight
+        max_retries: Maximum number of attempts per request, ignored when `retry_strategy` is set
+        retry_strategy: Retry policy of each request
+
+    Returns:
+        EmbedManyResult: The embeddings as a float32 NumPy array of shape
+        (len(values), dimensions), in input order.
+    """
+    require_numpy()
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    update_current_span(provider=model.provider, model=model.model_id)
+    retry = resolve_retry_strategy(retry_strategy, max_retries)
+    chunks = split_into_chunks(values, model, max_batch_size)
+
+    def run(chunk: Tuple[int, int]) -> EmbeddingModelCallResult:
+        return retry.call(lambda: model.do_embed(values[chunk[0]:chunk[1]]))
+
+    if len(chunks) <= 1 or max_concurrency == 1:
+        results = [run(chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(chunks)), thread_name_prefix="ai_sdk_embed") as executor:
+            # Each worker runs in a copy of the caller's context so attempt spans nest under the call
+            futures = [executor.submit(contextvars.copy_context().run, run, chunk) for chunk in chunks]
+            results = [future.result() for future in futures]
+
+    return _build_result(values, results)
+
+@track(kind="call")
+async def embed_many_async(
+    model: EmbeddingModel,
+    values: List[str],
+    max_batch_size: Optional[int] = None,
+    max_concurrency: int = 4,
+    max_retries: int = 3,
+    retry_strategy: Optional[RetryStrategy] = None,
+) -> EmbedManyResult:
+    """Async variant of `embed_many`."""
+    require_numpy()
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    update_current_span(provider=model.provider, model=model.model_id)
+    retry = resolve_retry_strategy(retry_strategy, max_retries)
+    chunks = split_into_chunks(values, model, max_batch_size)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(chunk: Tuple[int, int]) -> EmbeddingModelCallResult:
+        async with semaphore:
+            return await retry.call_async(lambda: model.do_embed_async(values[chunk[0]:chunk[1]]))
+
+    results = await asyncio.gather(*[run(chunk) for chunk in chunks])
+    return _build_result(values, list(results))
+
+def embed(
+    model: EmbeddingModel,
+    value: str,
+    max_retries: int = 3,
+    retry_strategy: Optional[RetryStrategy] = None,
+) -> EmbedResult:
+    """Embeds a single value, see `embed_many`."""
+    res = embed_many(model, [value], max_retries=max_retries, retry_strategy=retry_strategy)
+    return EmbedResult(value=value, embedding=res.embeddings[0], usage=res.usage)
+
+async def embed_async(
+    model: EmbeddingModel,
+    value: str,
+    max_retries: int = 3,
+    retry_strategy: Optional[RetryStrategy] = None,
+) -> EmbedResult:
+    """Async variant of `embed`."""
+    res = await embed_many_async(model, [value], max_retries=max_retries, retry_strategy=retry_strategy)
+    return EmbedResult(value=value, embedding=res.embeddings[0], usage=res.usage)
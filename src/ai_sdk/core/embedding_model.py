@@ -0,0 +1,81 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from .tokens import TokenEstimator, DEFAULT_TOKEN_ESTIMATOR
+import asyncio
+import base64
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on the installed extras
+    numpy = None
+
+def require_numpy() -> Any:
+    if numpy is None:
+        raise ImportError("Embeddings require the `numpy` package, install it with `pip install ai-sdk-py[embeddings]`")
+    return numpy
+
+def decode_embeddings(data: List[Dict[str, Any]]) -> Any:
+    """
+    Converts the `data` list of an OpenAI compatible embeddings response to a
+    float32 array of shape (inputs, dimensions), in input order. Embeddings
+    are either lists of floats or base64 encoded little-endian float32, which
+    is decoded without going through Python floats.
+    """
+    np = require_numpy()
+    rows = [None] * len(data)
+    for position, item in enumerate(data):
+        embedding = item["embedding"]
+        if isinstance(embedding, str):
+            row = np.frombuffer(base64.b64decode(embedding), dtype="<f4")
+        else:
+            row = np.asarray(embedding, dtype=np.float32)
+        rows[item.get("index", position)] = row
+    if not rows:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack(rows).astype(np.float32, copy=False)
+
+class EmbeddingModelCallResult(BaseModel):
+    embeddings: Any  # numpy array of shape (inputs, dimensions)
+    tokens: int = 0
+    headers: Optional[Dict[str, str]] = None
+
+class EmbeddingModel:
+    """
+    Base class of the embedding models. `embed_many` splits its inputs into
+    requests of at most `max_embeddings_per_call` values and, when set,
+    `max_tokens_per_call` estimated tokens.
+    """
+    required_attributes = {
+        'model_id',
+        'provider'
+    }
+
+    max_embeddings_per_call: int = 2048
+    max_tokens_per_call: Optional[int] = None
+
+    def __init__(self, model_id: str, provider: str):
+        self.model_id = model_id
+        self.provider = provider
+        self._validate_attributes()
+
+    def _validate_attributes(self) -> None:
+        missing = [attr for attr in self.required_attributes
+                  if not hasattr(self, attr)]
+        if missing:
+            raise AttributeError(
+                f"Missing required attributes: {', '.join(missing)}"
+            )
+
+    def token_estimator(self) -> TokenEstimator:
+        """Returns the estimator used to respect `max_tokens_per_call`."""
+        return DEFAULT_TOKEN_ESTIMATOR
+
+    def do_embed(self, values: List[str]) -> EmbeddingModelCallResult:
+        pass
+
+    async def do_embed_async(self, values: List[str]) -> EmbeddingModelCallResult:
+        """
+        Async variant of `do_embed`. Providers override this with a native
+        implementation, the default runs the blocking call in a worker thread.
+        """
+        return await asyncio.to_thread(self.do_embed, values)
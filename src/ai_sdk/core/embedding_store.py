@@ -0,0 +1,236 @@
+from typing import Any, Dict, List, Literal, Optional, Sequence, Union
+from pydantic import BaseModel
+from .embedding_model import require_numpy
+from . import fast_json
+import os
+import threading
+
+class SearchHit(BaseModel):
+    id: str
+    score: float
+    metadata: Optional[Dict[str, Any]] = None
+
+class EmbeddingStore:
+    """
+    Embeddings stored on disk in the `path` directory: the vectors in a raw
+    float32 file that is memory-mapped, not read, and the ids and metadata in
+    a JSON lines sidecar. Opening a store only reads its header, the sidecar
+    is loaded on the first `add` or `search`.
+
+    Search is a brute force matrix product over blocks of `block_size` rows,
+    which is fast up to a few million vectors and keeps the memory used by a
+    query bounded. With the `cosine` metric vectors are normalized when they
+    are added, so search is a plain dot product.
+
+    A store has a single writer; `add` is thread safe within a process.
+
+    Args:
+        path: Directory of the store, created if missing
+        dimensions: Size of the vectors, read from the store when it exists, else taken from the first `add`
+        metric: `cosine` or `dot`, fixed when the store is created
+        block_size: Number of rows scored at once by `search`
+    """
+    def __init__(
+        self,
+        path: str,
+        dimensions: Optional[int] = None,
+        metric: Literal["cosine", "dot"] = "cosine",
+        block_size: int = 65536,
+    ):
+        require_numpy()
+        if metric not in ("cosine", "dot"):
+            raise ValueError(f"Unknown metric {metric!r}, expected 'cosine' or 'dot'")
+        if block_size < 1:
+            raise ValueError("block_size must be at least 1")
+        self.path = os.path.expanduser(path)
+        self.block_size = block_size
+        os.makedirs(self.path, exist_ok=True)
+
+        self._header_path = os.path.join(self.path, "store.json")
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._records_path = os.path.join(self.path, "records.jsonl")
+        self._lock = threading.RLock()
+        self._records: Optional[List[Dict[str, Any]]] = None
+        self._rows_by_id: Optional[Dict[str, int]] = None
+        self._matrix: Any = None
+
+        if os.path.exists(self._header_path):
+            with open(self._header_path, "rb") as f:
+                header = fast_json.loads(f.read())
+            if dimensions is not None and dimensions != header["dimensions"]:
+                raise ValueError(f"The store at {self.path} has {header['dimensions']} dimensions, not {dimensions}")
+            if metric != header["metric"]:
+                raise ValueError(f"The store at {self.path} uses the {header['metric']} metric, not {metric}")
+            self.dimensions: Optional[int] = header["dimensions"]
+        else:
+            self.dimensions = dimensions
+        self.metric = metric
+
+    def _write_header(self) -> None:
+        with open(self._header_path, "wb") as f:
+            f.write(fast_json.dumps({"dimensions": self.dimensions, "metric": self.metric}))
+
+    def _row_bytes(self) -> int:
+        return self.dimensions * 4
+
+    def _vector_rows(self) -> int:
+        if not self.dimensions or not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // self._row_bytes()
+
+    def _truncate_vectors(self, rows: int) -> None:
+        """Cuts the vectors file to `rows` rows, dropping the whole or partial rows written by an interrupted `add`."""
+        if self.dimensions and os.path.exists(self._vectors_path):
+            if os.path.getsize(self._vectors_path) != rows * self._row_bytes():
+                with open(self._vectors_path, "r+b") as f:
+                    f.truncate(rows * self._row_bytes())
+
+    def _load_records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._records is None:
+                records: List[Dict[str, Any]] = []
+                if os.path.exists(self._records_path):
+                    with open(self._records_path, "rb") as f:
+                        records = [fast_json.loads(line) for line in f if line.strip()]
+                # Vectors are written before their records: bytes past the last record come from an
+                # interrupted `add` and would misalign the next append
+                del records[self._vector_rows():]
+                self._truncate_vectors(len(records))
+                self._records = records
+                self._rows_by_id = {record["id"]: row for row, record in enumerate(records)}
+            return self._records
+
+    def _vectors(self) -> Any:
+        """Returns the memory-mapped vectors, mapped again when rows were added since the last call."""
+        np = require_numpy()
+        rows = len(self._load_records())
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            if rows == 0:
+                self._matrix = np.empty((0, self.dimensions or 0), dtype=np.float32)
+            else:
+                self._matrix = np.memmap(self._vectors_path, dtype="<f4", mode="r", shape=(rows, self.dimensions))
+        return self._matrix
+
+    def _prepare(self, vectors: Any) -> Any:
+        np = require_numpy()
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if vectors.ndim != 2 or (self.dimensions is not None and vectors.shape[1] != self.dimensions):
+            raise ValueError(f"Expected vectors with {self.dimensions} dimensions, got shape {vectors.shape}")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors
+
+    def __len__(self) -> int:
+        if self._records is None:
+            return self._vector_rows()
+        return len(self._records)
+
+    def __contains__(self, id: str) -> bool:
+        self._load_records()
+        return id in self._rows_by_id
+
+    @property
+    def ids(self) -> List[str]:
+        return [record["id"] for record in self._load_records()]
+
+    def add(self, ids: Sequence[str], vectors: Any, metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None) -> None:
+        """
+        Appends `vectors` (shape `(len(ids), dimensions)`, for example the
+        `embeddings` of an `embed_many` result) under `ids`.
+
+        Raises:
+            ValueError: If the shapes do not match or an id is already in the store
+        """
+        np = require_numpy()
+        with self._lock:
+            vectors = self._prepare(vectors)
+            if len(ids) != vectors.shape[0] or (metadata is not None and len(metadata) != len(ids)):
+                raise ValueError("ids, vectors and metadata must have the same length")
+
+            self._load_records()
+            seen = set()
+            duplicates = []
+            for id in ids:
+                if id in seen or id in self._rows_by_id:
+                    duplicates.append(id)
+                seen.add(id)
+            if duplicates:
+                raise ValueError(f"Duplicate ids: {duplicates}")
+            if self.dimensions is None:
+                self.dimensions = int(vectors.shape[1])
+            if not os.path.exists(self._header_path):
+                self._write_header()
+
+            records = [
+                {"id": id, "metadata": metadata[index] if metadata is not None else None}
+                for index, id in enumerate(ids)
+            ]
+            self._truncate_vectors(len(self._records))
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors, dtype="<f4").tobytes())
+            with open(self._records_path, "ab") as f:
+                f.write(b"".join(fast_json.dumps(record) + b"\n" for record in records))
+
+            start = len(self._records)
+            self._records.extend(records)
+            self._rows_by_id.update({record["id"]: start + offset for offset, record in enumerate(records)})
+
+    def get(self, id: str) -> Optional[Any]:
+        """Returns a copy of the stored vector of `id` (normalized with the `cosine` metric), None when missing."""
+        self._load_records()
+        row = self._rows_by_id.get(id)
+        if row is None:
+            return None
+        return self._vectors()[row].copy()
+
+    def search(self, queries: Any, k: int = 10) -> Union[List[SearchHit], List[List[SearchHit]]]:
+        """
+        Returns the `k` stored vectors closest to each query, best first.
+        `queries` is one vector, or a 2D array of queries scored together in
+        one pass over the store; the result is then one list of hits per query.
+        """
+        np = require_numpy()
+        single = np.asarray(queries).ndim == 1
+        if self.dimensions is None:
+            return [] if single else [[] for _ in range(len(queries))]
+        queries = self._prepare(queries)
+
+        with self._lock:
+            matrix = self._vectors()
+            records = self._records
+
+        k = min(k, matrix.shape[0])
+        best_scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+        best_rows = np.empty((queries.shape[0], 0), dtype=np.int64)
+        if k > 0:
+            for start in range(0, matrix.shape[0], self.block_size):
+                block = matrix[start:start + self.block_size]
+                scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+                rows = np.concatenate([
+                    best_rows,
+                    np.broadcast_to(np.arange(start, start + block.shape[0]), (queries.shape[0], block.shape[0]))
+                ], axis=1)
+                if scores.shape[1] > k:
+                    # Partial selection of the running top k, the full sort happens once at the end
+                    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                    scores = np.take_along_axis(scores, top, axis=1)
+                    rows = np.take_along_axis(rows, top, axis=1)
+                best_scores, best_rows = scores, rows
+            order = np.argsort(-best_scores, axis=1, kind="stable")
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            best_rows = np.take_along_axis(best_rows, order, axis=1)
+
+        hits = [
+            [
+                SearchHit(id=records[row]["id"], score=float(score), metadata=records[row]["metadata"])
+                for score, row in zip(query_scores, query_rows)
+            ]
+            for query_scores, query_rows in zip(best_scores, best_rows)
+        ]
+        return hits[0] if single else hits
+
+    def close(self) -> None:
+        """Releases the memory map, the store can still be used afterwards."""
+        with self._lock:
+            self._matrix = None
@@ -120,4 +120,75 @@ class AI_ObjectValidationError(Exception):
         message: str
     ):
         self.message = message
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+
+class AI_BatchJobError(Exception):
+    """
+    Custom error class for provider batch job failures.
+
+    Attributes:
+        job_id (str): The provider id of the batch job
+        message (str): Error message
+        custom_id (str, optional): The id of the request within the job, for per-request failures
+        data (Any, optional): The error payload returned by the provider
+    """
+    def __init__(
+        self,
+        job_id: str,
+        message: str,
+        custom_id: Optional[str] = None,
+        data: Any = None
+    ):
+        self.job_id = job_id
+        self.message = message
+        self.custom_id = custom_id
+        self.data = data
+        super().__init__(message)
+
+    def __str__(self) -> str:
+        """Return a string representation of the error."""
+        if self.custom_id is not None:
+            return f"BatchJobError: {self.message} (job {self.job_id}, request {self.custom_id})"
+        return f"BatchJobError: {self.message} (job {self.job_id})"
+
+class AI_CircuitOpenError(Exception):
+    """
+    Custom error class raised when every model of a fallback chain is unavailable.
+
+    Attributes:
+        models (list): Identifiers of the models whose circuit breaker is open
+        message (str): Error message
+    """
+    def __init__(
+        self,
+        models: list,
+        message: Optional[str] = None
+    ):
+        self.models = models
+        self.message = message or f"No healthy model available, circuit open for: {', '.join(models)}"
+        super().__init__(self.message)
+
+class AI_ContextWindowExceededError(Exception):
+    """
+    Custom error class raised before sending a request whose prompt does not fit in the model's context window.
+
+    Attributes:
+        model_id (str): Identifier of the model
+        prompt_tokens (int): Estimated number of tokens of the prompt, after the context policy was applied
+        context_window (int): Number of tokens available for the prompt
+        message (str): Error message
+    """
+    def __init__(
+        self,
+        model_id: str,
+        prompt_tokens: int,
+        context_window: int,
+        message: Optional[str] = None
+    ):
+        self.model_id = model_id
+        self.prompt_tokens = prompt_tokens
+        self.context_window = context_window
+        self.message = message or (
+            f"The prompt of about {prompt_tokens} tokens does not fit in the {context_window} tokens available for {model_id}"
+        )
+        super().__init__(self.message)
@@ -0,0 +1,312 @@
+from typing import List, Optional, Dict, Tuple, Callable, Iterator, AsyncIterator, Awaitable, Union, Literal
+from collections import deque
+from .language_model import LanguageModel, LanguageModelCallOptions, LanguageModelCallResult, LanguageModelStreamPart
+from .errors import AI_APICallError, AI_UnsupportedFunctionalityError, AI_CircuitOpenError
+from .tokens import ContextWindow, TokenEstimator
+from .images import ImageLimits, most_restrictive_limits
+import httpx
+import threading
+import time
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+class CircuitBreaker:
+    """
+    Tracks the health of one model over its last `window_size` calls.
+
+    The circuit opens once at least `minimum_calls` calls were recorded and the
+    share of failed calls reaches `failure_rate_threshold`. Calls slower than
+    `slow_call_duration` seconds count as failures, so a model that degrades
+    into very high latency is skipped as well. After `reset_timeout` seconds a
+    single half-open probe is let through: the circuit closes again if it
+    succeeds and re-opens otherwise.
+    """
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        minimum_calls: int = 5,
+        window_size: int = 20,
+        slow_call_duration: Optional[float] = None,
+        reset_timeout: float = 30.0,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self._outcomes: deque = deque(maxlen=window_size)
+        self._state: CircuitState = "closed"
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return self._state
+
+    @property
+    def failure_rate(self) -> float:
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return sum(self._outcomes) / len(self._outcomes)
+
+    def allow_request(self) -> bool:
+        """Returns whether a call may be sent, claiming the probe when half-open."""
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = "half_open"
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def _open(self) -> None:
+        self._state = "open"
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def _record(self, failed: bool) -> None:
+        with self._lock:
+            if self._state == "half_open":
+                if failed:
+                    self._open()
+                else:
+                    self._state = "closed"
+                    self._probe_in_flight = False
+                    self._outcomes.clear()
+                return
+
+            self._outcomes.append(failed)
+            if (
+                self._state == "closed"
+                and len(self._outcomes) >= self.minimum_calls
+                and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate_threshold
+            ):
+                self._open()
+
+    def record_success(self, duration: float) -> None:
+        self._record(self.slow_call_duration is not None and duration > self.slow_call_duration)
+
+    def record_failure(self, duration: float) -> None:
+        self._record(True)
+
+    def release(self) -> None:
+        """Gives the half-open probe back when the call ended without telling anything about the model."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._probe_in_flight = False
+            self._outcomes.clear()
+
+_circuit_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(model: LanguageModel) -> CircuitBreaker:
+    """Returns the process-wide circuit breaker of a provider and model id."""
+    key = (model.provider, model.model_id)
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(key)
+        if breaker is None:
+            breaker = _circuit_breakers[key] = CircuitBreaker()
+        return breaker
+
+def is_provider_failure(error: Exception) -> bool:
+    """Default fallback predicate: retryable API errors (429, 5xx, ...) and network errors."""
+    if isinstance(error, AI_APICallError):
+        return error.is_retryable
+    return isinstance(error, httpx.TransportError)
+
+class FallbackModel(LanguageModel):
+    """
+    Sends each call to the first healthy model of an ordered chain, for example
+    Anthropic, then OpenAI, then OpenRouter. A provider failure (see
+    `fallback_on`) is recorded on the model's circuit breaker and the call moves
+    on to the next model; models whose circuit is open are skipped until their
+    half-open probe succeeds. Errors that are not provider failures, such as a
+    400 caused by the request itself, are raised straight away.
+
+    JSON mode and tool calls are only reported as supported when every model
+    of the chain supports them, so `generate_object` picks a mode that works
+    on all of them.
+
+    Args:
+        models: Models in order of preference
+        circuit_breakers: One breaker per model, defaults to the process-wide breaker of each provider and model id
+        fallback_on: Predicate deciding whether an exception moves the call to the next model
+    """
+    def __init__(
+        self,
+        models: List[LanguageModel],
+        circuit_breakers: Optional[List[CircuitBreaker]] = None,
+        fallback_on: Callable[[Exception], bool] = is_provider_failure,
+    ):
+        if not models:
+            raise ValueError("FallbackModel needs at least one model")
+        if circuit_breakers is not None and len(circuit_breakers) != len(models):
+            raise ValueError("circuit_breakers must contain one breaker per model")
+
+        self.models = list(models)
+        self.circuit_breakers = circuit_breakers or [get_circuit_breaker(model) for model in self.models]
+        self.fallback_on = fallback_on
+        self.default_object_generation_mode = self.models[0].default_object_generation_mode
+
+        super().__init__(
+            model_id=",".join(model.model_id for model in self.models),
+            provider="fallback"
+        )
+
+    def supports_json_mode(self) -> bool:
+        return all(model.supports_json_mode() for model in self.models)
+
+    def supports_tool_calls(self) -> bool:
+        return all(model.supports_tool_calls() for model in self.models)
+
+    def context_window(self) -> Optional[ContextWindow]:
+        """The smallest limits of the chain, so a fitted request works on every model."""
+        windows = [model.context_window() for model in self.models]
+        if any(window is None for window in windows):
+            return None
+        return ContextWindow(
+            context_window=min(window.context_window for window in windows),
+            max_output_tokens=min(window.max_output_tokens for window in windows)
+        )
+
+    def token_estimator(self) -> TokenEstimator:
+        return self.models[0].token_estimator()
+
+    def image_limits(self) -> Optional[ImageLimits]:
+        return most_restrictive_limits([model.image_limits() for model in self.models])
+
+    def _candidates(self) -> Iterator[Tuple[LanguageModel, CircuitBreaker]]:
+        skipped = []
+        for model, breaker in zip(self.models, self.circuit_breakers):
+            if breaker.allow_request():
+                yield model, breaker
+            else:
+                skipped.append(f"{model.provider}:{model.model_id}")
+        if len(skipped) == len(self.models):
+            raise AI_CircuitOpenError(models=skipped)
+
+    def _handle_error(self, error: Exception, breaker: CircuitBreaker, start: float) -> None:
+        """Records a failed call, re-raises `error` unless the chain should move on."""
+        if isinstance(error, AI_UnsupportedFunctionalityError):
+            # The model cannot serve this request, that says nothing about its health
+            breaker.release()
+            return
+        if not self.fallback_on(error):
+            breaker.release()
+            raise error
+        breaker.record_failure(time.monotonic() - start)
+
+    def call(self, send: Callable[[LanguageModel], LanguageModelCallResult]) -> LanguageModelCallResult:
+        """
+        Sends a call down the chain, `send` makes the call on one model. Entry
+        points use it to rate limit and cache each model of the chain on its own.
+        """
+        last_error: Optional[Exception] = None
+        for model, breaker in self._candidates():
+            start = time.monotonic()
+            try:
+                res = send(model)
+            except Exception as e:
+                self._handle_error(e, breaker, start)
+                last_error = e
+                continue
+            breaker.record_success(time.monotonic() - start)
+            return res
+        raise last_error
+
+    async def call_async(self, send: Callable[[LanguageModel], Awaitable[LanguageModelCallResult]]) -> LanguageModelCallResult:
+        """Async variant of `call`."""
+        last_error: Optional[Exception] = None
+        for model, breaker in self._candidates():
+            start = time.monotonic()
+            try:
+                res = await send(model)
+            except Exception as e:
+                self._handle_error(e, breaker, start)
+                last_error = e
+                continue
+            breaker.record_success(time.monotonic() - start)
+            return res
+        raise last_error
+
+    def stream(self, open_parts: Callable[[LanguageModel], Iterator[LanguageModelStreamPart]]) -> Iterator[LanguageModelStreamPart]:
+        """Streaming variant of `call`, `open_parts` opens the stream of one model."""
+        # Only falls back before the first part, the latency recorded is the time to first part
+        last_error: Optional[Exception] = None
+        for model, breaker in self._candidates():
+            start = time.monotonic()
+            parts = open_parts(model)
+            try:
+                first_part = next(parts, None)
+            except Exception as e:
+                self._handle_error(e, breaker, start)
+                last_error = e
+                continue
+            breaker.record_success(time.monotonic() - start)
+            try:
+                if first_part is not None:
+                    yield first_part
+                    yield from parts
+            finally:
+                parts.close()
+            return
+        raise last_error
+
+    async def stream_async(self, open_parts: Callable[[LanguageModel], AsyncIterator[LanguageModelStreamPart]]) -> AsyncIterator[LanguageModelStreamPart]:
+        """Async variant of `stream`."""
+        last_error: Optional[Exception] = None
+        for model, breaker in self._candidates():
+            start = time.monotonic()
+            parts = open_parts(model)
+            try:
+                first_part = await parts.__anext__()
+            except StopAsyncIteration:
+                first_part = None
+            except Exception as e:
+                self._handle_error(e, breaker, start)
+                last_error = e
+                continue
+            breaker.record_success(time.monotonic() - start)
+            try:
+                if first_part is not None:
+                    yield first_part
+                    async for part in parts:
+                        yield part
+            finally:
+                await parts.aclose()
+            return
+        raise last_error
+
+    def do_generate(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
+        return self.call(lambda model: model.do_generate(options))
+
+    async def do_generate_async(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
+        return await self.call_async(lambda model: model.do_generate_async(options))
+
+    def do_stream(self, options: LanguageModelCallOptions) -> Iterator[LanguageModelStreamPart]:
+        return self.stream(lambda model: model.do_stream(options))
+
+    async def do_stream_async(self, options: LanguageModelCallOptions) -> AsyncIterator[LanguageModelStreamPart]:
+        async for part in self.stream_async(lambda model: model.do_stream_async(options)):
+            yield part
+
+def resolve_model(model: Union[LanguageModel, List[LanguageModel]]) -> LanguageModel:
+    """Wraps an ordered list of models passed to an entry point in a `FallbackModel`."""
+    if isinstance(model, (list, tuple)):
+        if len(model) == 1:
+            return model[0]
+        return FallbackModel(list(model))
+    return model
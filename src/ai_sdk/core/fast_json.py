@@ -0,0 +1,47 @@
+from typing import Any, Dict, Optional, Union
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+# "orjson" when the optional `orjson` extra is installed, "json" otherwise
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+def dumps(value: Any) -> bytes:
+    """Encodes `value` to compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            # Integers over 64 bits, non-string keys, ... are left to the standard library
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def dumps_text(value: Any) -> str:
+    """Same as `dumps`, returning a `str`."""
+    return dumps(value).decode("utf-8")
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Decodes a JSON document, with orjson when it is installed. Raises `ValueError` on invalid JSON."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_request(headers: Dict[str, str], body: Any) -> Dict[str, Any]:
+    """
+    Keyword arguments of an httpx request sending `body` as JSON. The body is
+    encoded once here, httpx sends the bytes as they are.
+    """
+    return {
+        "headers": {**headers, "content-type": "application/json"},
+        "content": dumps(body),
+    }
+
+def request_text(response: Any) -> Optional[str]:
+    """Returns the body that was sent for `response`, without encoding the arguments again."""
+    try:
+        return response.request.content.decode("utf-8")
+    except Exception:
+        return None
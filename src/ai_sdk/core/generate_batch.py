@@ -0,0 +1,167 @@
+from typing import List, Optional, Union, Callable, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pydantic import BaseModel, ConfigDict
+from .types import Message, Usage, TextResult, ObjectResult
+from .language_model import LanguageModel
+from .generate_text import generate_text, generate_text_async
+from .generate_object import generate_object, generate_object_async
+import asyncio
+
+BatchInput = Union[str, List[Message]]
+
+class BatchItem(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: int
+    result: Optional[Union[TextResult, ObjectResult]] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class BatchResult(BaseModel):
+    items: List[BatchItem]
+    usage: Usage
+
+    @property
+    def results(self) -> List[Optional[Union[TextResult, ObjectResult]]]:
+        return [item.result for item in self.items]
+
+    @property
+    def errors(self) -> List[BatchItem]:
+        return [item for item in self.items if not item.ok]
+
+BatchProgressCallback = Callable[[int, int, BatchItem], None]
+
+def _input_kwargs(batch_input: BatchInput) -> dict:
+    if isinstance(batch_input, str):
+        return {"prompt": batch_input}
+    return {"messages": batch_input}
+
+def _build_batch_result(items: List[BatchItem]) -> BatchResult:
+    usage = Usage(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+    for item in items:
+        if item.result is not None:
+            usage = Usage(
+                prompt_tokens=usage.prompt_tokens + item.result.usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens + item.result.usage.completion_tokens,
+                total_tokens=usage.total_tokens + item.result.usage.total_tokens
+            )
+    return BatchResult(items=items, usage=usage)
+
+def _run_batch(
+    generate: Callable[..., Any],
+    inputs: List[BatchInput],
+    max_concurrency: int,
+    on_progress: Optional[BatchProgressCallback],
+    kwargs: dict
+) -> BatchResult:
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    items: List[Optional[BatchItem]] = [None] * len(inputs)
+
+    def run(index: int) -> BatchItem:
+        try:
+            return BatchItem(index=index, result=generate(**kwargs, **_input_kwargs(inputs[index])))
+        except Exception as e:
+            return BatchItem(index=index, error=e)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="ai_sdk_batch") as executor:
+        futures = [executor.submit(run, index) for index in range(len(inputs))]
+        for completed, future in enumerate(as_completed(futures), start=1):
+            item = future.result()
+            items[item.index] = item
+            if on_progress is not None:
+                on_progress(completed, len(inputs), item)
+
+    return _build_batch_result(items)
+
+async def _run_batch_async(
+    generate: Callable[..., Any],
+    inputs: List[BatchInput],
+    max_concurrency: int,
+    on_progress: Optional[BatchProgressCallback],
+    kwargs: dict
+) -> BatchResult:
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    items: List[Optional[BatchItem]] = [None] * len(inputs)
+    completed = 0
+
+    async def run(index: int) -> None:
+        nonlocal completed
+        async with semaphore:
+            try:
+                item = BatchItem(index=index, result=await generate(**kwargs, **_input_kwargs(inputs[index])))
+            except Exception as e:
+                item = BatchItem(index=index, error=e)
+        items[index] = item
+        completed += 1
+        if on_progress is not None:
+            on_progress(completed, len(inputs), item)
+
+    await asyncio.gather(*[run(index) for index in range(len(inputs))])
+    return _build_batch_result(items)
+
+def generate_text_batch(
+    model: LanguageModel,
+    inputs: List[BatchInput],
+    max_concurrency: int = 8,
+    on_progress: Optional[BatchProgressCallback] = None,
+    **kwargs: Any
+) -> BatchResult:
+    """
+    Runs `generate_text` over many inputs with bounded concurrency.
+
+    Args:
+        model: The language model to use
+        inputs: Prompts, or message lists, one per call
+        max_concurrency: Maximum number of calls in flight
+        on_progress: Called with `(completed, total, item)` after each call finishes
+        **kwargs: Forwarded to `generate_text` (system, tools, temperature, max_retries, cache, ...)
+
+    Returns:
+        BatchResult: One item per input in input order, failed calls carry the
+        exception in `error` instead of aborting the batch. `usage` is the sum
+        over the successful calls.
+    """
+    return _run_batch(generate_text, inputs, max_concurrency, on_progress, {"model": model, **kwargs})
+
+async def generate_text_batch_async(
+    model: LanguageModel,
+    inputs: List[BatchInput],
+    max_concurrency: int = 8,
+    on_progress: Optional[BatchProgressCallback] = None,
+    **kwargs: Any
+) -> BatchResult:
+    """Async variant of `generate_text_batch`."""
+    return await _run_batch_async(generate_text_async, inputs, max_concurrency, on_progress, {"model": model, **kwargs})
+
+def generate_object_batch(
+    model: LanguageModel,
+    schema: BaseModel,
+    inputs: List[BatchInput],
+    max_concurrency: int = 8,
+    on_progress: Optional[BatchProgressCallback] = None,
+    **kwargs: Any
+) -> BatchResult:
+    """
+    Runs `generate_object` over many inputs with bounded concurrency, see
+    `generate_text_batch` for the arguments and the result.
+    """
+    return _run_batch(generate_object, inputs, max_concurrency, on_progress, {"model": model, "schema": schema, **kwargs})
+
+async def generate_object_batch_async(
+    model: LanguageModel,
+    schema: BaseModel,
+    inputs: List[BatchInput],
+    max_concurrency: int = 8,
+    on_progress: Optional[BatchProgressCallback] = None,
+    **kwargs: Any
+) -> BatchResult:
+    """Async variant of `generate_object_batch`."""
+    return await _run_batch_async(generate_object_async, inputs, max_concurrency, on_progress, {"model": model, "schema": schema, **kwargs})
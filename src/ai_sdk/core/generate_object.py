@@ -1,16 +1,22 @@
-from .types import TextResult, Message, Usage, RequestMetadata, ResponseMetadata
+from .types import Message, Usage, RequestMetadata, ResponseMetadata, LazyResponseMetadata, TimingBreakdown
 from .utils import standardize_messages
-from typing import List, Optional, Dict
+from typing import Any, Callable, List, Optional, Dict, Tuple, Union
 from .language_model import LanguageModel, LanguageModelCallOptions, LanguageModelProviderMetadata, LanguageModelCallResult
-from .errors import AI_ObjectValidationError, AI_UnsupportedFunctionalityError, AI_APICallError
+from .errors import AI_ObjectValidationError, AI_UnsupportedFunctionalityError
 from .convert_response import convert_to_response_messages
-import time
 from pydantic import BaseModel
 from .types import Tool, ObjectResult
 import json
-import opik
+from .tracing import track, span, update_current_span, capture_payload
+from .cache import ResponseCache, cached_generate, cached_generate_async
+from .retry_strategy import RetryStrategy, resolve_retry_strategy
+from .rate_limit import RateLimiter
+from .fallback import resolve_model
+from .context_window import ContextPolicy, fit_context
+from .schema_cache import get_json_schema_text
+from .images import ImagePreprocessor
+from .timing import record_timing, timed
 
-@opik.track
 def _parse_responses(object_generation_mode: str, res: LanguageModelCallResult, schema: BaseModel) -> BaseModel:
     if object_generation_mode == "json" or object_generation_mode == "text":
         if res.text:
@@ -61,7 +67,6 @@ def _parse_responses(object_generation_mode: str, res: LanguageModelCallResult,
 
     return object
 
-@opik.track
 def _inject_json_schema(prompt: Optional[str], schema: BaseModel) -> str:
     DEFAULT_SCHEMA_PREFIX = 'JSON schema:'
     DEFAULT_SCHEMA_SUFFIX = "You MUST answer with a JSON object that matches the JSON schema above. Do not include any other text, only the JSON object and DO NOT return the data in markdown format."
@@ -70,33 +75,33 @@ def _inject_json_schema(prompt: Optional[str], schema: BaseModel) -> str:
         prompt if prompt and len(prompt) > 0 else None,
         '' if prompt and len(prompt) > 0 else None,  # newline after prompt if it exists
         DEFAULT_SCHEMA_PREFIX,
-        json.dumps(schema.model_json_schema()),
+        get_json_schema_text(schema),
         DEFAULT_SCHEMA_SUFFIX
     ]
     
     # Filter out None values and join with newlines
     return '\n'.join(line for line in components if line is not None)
 
-@opik.track
-def generate_object(
+def _create_options(
     model: LanguageModel,
     schema: BaseModel,
-    schema_name: Optional[str] = None,
-    schema_description: Optional[str] = None,
-    system: Optional[str] = None,
-    prompt: Optional[str] = None,
-    messages: Optional[List[Message]] = None,
-    max_tokens: Optional[int] = None,
-    temperature: Optional[float] = None,
-    top_p: Optional[float] = None,
-    top_k: Optional[int] = None,
-    presence_penalty: Optional[float] = None,
-    frequency_penalty: Optional[float] = None,
-    seed: Optional[int] = None,
-    max_retries: int = 3,
-    headers: Optional[Dict[str, str]] = None,
-    provider_options: Optional[LanguageModelProviderMetadata] = None,
-) -> TextResult:
+    schema_name: Optional[str],
+    schema_description: Optional[str],
+    system: Optional[str],
+    prompt: Optional[str],
+    messages: Optional[List[Message]],
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    top_p: Optional[float],
+    top_k: Optional[int],
+    presence_penalty: Optional[float],
+    frequency_penalty: Optional[float],
+    seed: Optional[int],
+    max_retries: int,
+    headers: Optional[Dict[str, str]],
+    provider_options: Optional[LanguageModelProviderMetadata],
+    lean: bool = False,
+) -> Tuple[LanguageModelCallOptions, str]:
     if not isinstance(model, LanguageModel):
         raise ValueError("model must be a LanguageModel")
     
@@ -106,7 +111,7 @@ def generate_object(
     #     )
 
     options = LanguageModelCallOptions(
-        messages=[], # Placeholder - This is updated below
+        messages=[], # Placeholder - This is updated below
         max_tokens=max_tokens,
         temperature=temperature,
         top_p=top_p,
@@ -119,6 +124,7 @@ def generate_object(
         tools=None,
         headers=headers,
         provider_metadata=provider_options,
+        lean=lean,
     )
 
     if model.supports_json_mode():
@@ -139,30 +145,17 @@ def generate_object(
 
     messages = standardize_messages(system, prompt, messages)
     options.messages = messages
-    
-    while True:
-        retry_count = 0
-        while retry_count < options.max_retries:
-            try:
-                res = model.do_generate(options)
-                object = _parse_responses(object_generation_mode, res, schema)
-                break
-            except AI_APICallError as e:
-                if not e.is_retryable:
-                    raise e
-                else:
-                    retry_count += 1
-                    if retry_count >= options.max_retries:
-                        raise e
-
-                    time.sleep(1.0 * (2 ** retry_count))
-                    continue
-            except AI_ObjectValidationError as e:
-                raise e
-            except Exception as e:
-                raise e
-            
-        break
+
+    return options, object_generation_mode
+
+def _build_object_result(
+    res: LanguageModelCallResult,
+    object: BaseModel,
+    options: LanguageModelCallOptions,
+    timing: Optional[TimingBreakdown] = None
+) -> ObjectResult:
+    if options.lean:
+        return _build_lean_object_result(res, object, options, timing)
 
     response_messages = convert_to_response_messages(
         res.text,
@@ -181,15 +174,171 @@ def generate_object(
             completion_tokens=res.usage.completion_tokens,
             total_tokens=res.usage.prompt_tokens + res.usage.completion_tokens
         ),
-        request=RequestMetadata(body=res.request.body),
+        request=RequestMetadata(body=res.request.body if res.request else None),
         response=ResponseMetadata(
             id=res.response.id,
             model=res.response.model_id,
             timestamp=res.response.timestamp,
             headers=res.response.headers,
             body=res.response.body,
-            messages=response_messages
+            messages=response_messages,
+            cache_hit=res.response.cache_hit
+        ),
+        warnings=res.warnings,
+        provider_metadata=res.provider_metadata,
+        timing=timing
+    )
+
+def _build_lean_object_result(
+    res: LanguageModelCallResult,
+    object: BaseModel,
+    options: LanguageModelCallOptions,
+    timing: Optional[TimingBreakdown] = None
+) -> ObjectResult:
+    """Builds the result without validation, the response messages are only built when accessed."""
+    response = None
+    if res.response is not None:
+        response = LazyResponseMetadata.model_construct(
+            id=res.response.id,
+            model=res.response.model_id,
+            timestamp=res.response.timestamp,
+            headers=res.response.headers,
+            body=res.response.body,
+            cache_hit=res.response.cache_hit
+        )
+        response._messages_factory = lambda: convert_to_response_messages(
+            res.text,
+            options.tools,
+            res.tool_calls,
+            [],
+            res.response.id,
+            lambda: res.response.id
+        )
+
+    return ObjectResult.model_construct(
+        object=object,
+        finish_reason=res.finish_reason,
+        usage=Usage.model_construct(
+            prompt_tokens=res.usage.prompt_tokens,
+            completion_tokens=res.usage.completion_tokens,
+            total_tokens=res.usage.prompt_tokens + res.usage.completion_tokens
         ),
+        request=None,
+        response=response,
         warnings=res.warnings,
-        provider_metadata=res.provider_metadata
+        timing=timing
+    )
+
+@track(kind="call")
+def generate_object(
+    model: Union[LanguageModel, List[LanguageModel]],
+    schema: BaseModel,
+    schema_name: Optional[str] = None,
+    schema_description: Optional[str] = None,
+    system: Optional[str] = None,
+    prompt: Optional[str] = None,
+    messages: Optional[List[Message]] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+    presence_penalty: Optional[float] = None,
+    frequency_penalty: Optional[float] = None,
+    seed: Optional[int] = None,
+    max_retries: int = 3,
+    headers: Optional[Dict[str, str]] = None,
+    provider_options: Optional[LanguageModelProviderMetadata] = None,
+    cache: Optional[ResponseCache] = None,
+    retry_strategy: Optional[RetryStrategy] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    lean: bool = False,
+    on_timing: Optional[Callable[[TimingBreakdown], Any]] = None,
+    context_policy: Optional[ContextPolicy] = None,
+    image_preprocessor: Optional[ImagePreprocessor] = None,
+) -> ObjectResult:
+    model = resolve_model(model)
+    update_current_span(provider=getattr(model, "provider", None), model=getattr(model, "model_id", None))
+    options, object_generation_mode = _create_options(
+        model, schema, schema_name, schema_description, system, prompt, messages, max_tokens, temperature,
+        top_p, top_k, presence_penalty, frequency_penalty, seed, max_retries, headers, provider_options, lean
+    )
+    
+    capture_payload(input=options.messages)
+    retry = resolve_retry_strategy(retry_strategy, max_retries)
+    with record_timing(on_timing) as recorder:
+        with span("step", "step", step=1):
+            recorder.start_step()
+            if image_preprocessor is not None:
+                with timed("image_preprocessing"):
+                    options.messages = image_preprocessor.process(options.messages, model.image_limits())
+            request_options = fit_context(model, options, context_policy)
+            # Responses that do not match the schema are not cached, they would fail every later call
+            validate = lambda res: _parse_responses(object_generation_mode, res, schema)
+            res = retry.call(lambda: cached_generate(model, request_options, cache, rate_limiter, validate))
+            recorder.record_headers(res.response.headers if res.response else None)
+            object = _parse_responses(object_generation_mode, res, schema)
+            recorder.end_step()
+
+        result = _build_object_result(res, object, options, recorder.breakdown)
+        update_current_span(usage={"prompt_tokens": res.usage.prompt_tokens, "completion_tokens": res.usage.completion_tokens})
+        capture_payload(output=object)
+        return result
+
+@track(kind="call")
+async def generate_object_async(
+    model: Union[LanguageModel, List[LanguageModel]],
+    schema: BaseModel,
+    schema_name: Optional[str] = None,
+    schema_description: Optional[str] = None,
+    system: Optional[str] = None,
+    prompt: Optional[str] = None,
+    messages: Optional[List[Message]] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+    presence_penalty: Optional[float] = None,
+    frequency_penalty: Optional[float] = None,
+    seed: Optional[int] = None,
+    max_retries: int = 3,
+    headers: Optional[Dict[str, str]] = None,
+    provider_options: Optional[LanguageModelProviderMetadata] = None,
+    cache: Optional[ResponseCache] = None,
+    retry_strategy: Optional[RetryStrategy] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    lean: bool = False,
+    on_timing: Optional[Callable[[TimingBreakdown], Any]] = None,
+    context_policy: Optional[ContextPolicy] = None,
+    image_preprocessor: Optional[ImagePreprocessor] = None,
+) -> ObjectResult:
+    """
+    Async variant of `generate_object`. Uses the model's `do_generate_async` and
+    waits between retries with `asyncio.sleep` so the event loop is never blocked.
+    """
+    model = resolve_model(model)
+    update_current_span(provider=getattr(model, "provider", None), model=getattr(model, "model_id", None))
+    options, object_generation_mode = _create_options(
+        model, schema, schema_name, schema_description, system, prompt, messages, max_tokens, temperature,
+        top_p, top_k, presence_penalty, frequency_penalty, seed, max_retries, headers, provider_options, lean
     )
+    
+    capture_payload(input=options.messages)
+    retry = resolve_retry_strategy(retry_strategy, max_retries)
+    with record_timing(on_timing) as recorder:
+        with span("step", "step", step=1):
+            recorder.start_step()
+            if image_preprocessor is not None:
+                with timed("image_preprocessing"):
+                    options.messages = image_preprocessor.process(options.messages, model.image_limits())
+            request_options = fit_context(model, options, context_policy)
+            # Responses that do not match the schema are not cached, they would fail every later call
+            validate = lambda res: _parse_responses(object_generation_mode, res, schema)
+            res = await retry.call_async(lambda: cached_generate_async(model, request_options, cache, rate_limiter, validate))
+            recorder.record_headers(res.response.headers if res.response else None)
+            object = _parse_responses(object_generation_mode, res, schema)
+            recorder.end_step()
+
+        result = _build_object_result(res, object, options, recorder.breakdown)
+        update_current_span(usage={"prompt_tokens": res.usage.prompt_tokens, "completion_tokens": res.usage.completion_tokens})
+        capture_payload(output=object)
+        return result
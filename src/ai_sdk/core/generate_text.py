@@ -1,16 +1,191 @@
-from .types import TextResult, Message, Usage, RequestMetadata, ResponseMetadata, AssistantMessage, Tool, ToolMessage
-from .utils import standardize_messages
-from typing import List, Optional, Dict, Literal
-from .language_model import LanguageModel, LanguageModelCallOptions, LanguageModelProviderMetadata
-from .tool_calls import execute_tool_calls
-from .errors import AI_APICallError
+from .types import TextResult, Message, Usage, RequestMetadata, ResponseMetadata, LazyResponseMetadata, AssistantMessage, Tool, ToolMessage, ToolResultPart, TimingBreakdown
+from .utils import standardize_messages, build_model
+from typing import Any, Callable, List, Optional, Dict, Literal, Union
+from .language_model import LanguageModel, LanguageModelCallOptions, LanguageModelProviderMetadata, LanguageModelCallResult
+from .tool_calls import execute_tool_calls, execute_tool_calls_async
 from .convert_response import convert_to_response_messages
-import time
-import opik
+from .tracing import track, span, update_current_span, capture_payload
+from .cache import ResponseCache, cached_generate, cached_generate_async
+from .retry_strategy import RetryStrategy, resolve_retry_strategy
+from .rate_limit import RateLimiter
+from .fallback import resolve_model
+from .context_window import ContextPolicy, fit_context
+from .compaction import CompactionStrategy
+from .images import ImagePreprocessor
+from .timing import record_timing, timed
 
-@opik.track
-def generate_text(
+def _add_usage(usage: Usage, res: LanguageModelCallResult, lean: bool = False) -> Usage:
+    return build_model(
+        Usage,
+        lean,
+        prompt_tokens=usage.prompt_tokens + res.usage.prompt_tokens,
+        completion_tokens=usage.completion_tokens + res.usage.completion_tokens,
+        total_tokens=usage.total_tokens + res.usage.prompt_tokens + res.usage.completion_tokens
+    )
+
+def _append_tool_messages(
+    options: LanguageModelCallOptions,
+    res: LanguageModelCallResult,
+    tool_results: List[ToolResultPart]
+) -> None:
+    options.messages.append(
+        AssistantMessage(
+            content="",
+            tool_calls=res.tool_calls
+        )
+    )
+    for tool_result in tool_results:
+        options.messages.append(
+            ToolMessage(
+                content=tool_result.result,
+                tool_call_id=tool_result.tool_call_id
+            )
+        )
+
+def _final_history(messages: List[Message], res: LanguageModelCallResult, tool_results: List[ToolResultPart]) -> List[Message]:
+    """The messages of the last step followed by its answer and tool results, the whole conversation to persist."""
+    history = list(messages)
+    history.append(AssistantMessage(content=res.text or "", tool_calls=res.tool_calls))
+    for tool_result in tool_results:
+        history.append(ToolMessage(content=tool_result.result, tool_call_id=tool_result.tool_call_id))
+    return history
+
+def _build_text_result(
+    res: LanguageModelCallResult,
+    tools: Optional[Dict[str, Tool]],
+    tool_results: List[ToolResultPart],
+    usage: Usage,
+    lean: bool = False,
+    timing: Optional[TimingBreakdown] = None,
+    history: Optional[List[Message]] = None
+) -> TextResult:
+    final_text = res.text or ''
+
+    if lean:
+        return _build_lean_text_result(res, tools, tool_results, usage, final_text, timing, history)
+
+    response_messages = convert_to_response_messages(
+        final_text,
+        tools,
+        res.tool_calls,
+        tool_results,
+        res.response.id,
+        lambda: res.response.id
+    )
+
+    return TextResult(
+        text=final_text,
+        finish_reason=res.finish_reason,
+        tool_calls=res.tool_calls or [],
+        tool_results=tool_results,
+        usage=usage,
+        request=RequestMetadata(body=res.request.body if res.request else None),
+        response=ResponseMetadata(
+            id=res.response.id,
+            model=res.response.model_id,
+            timestamp=res.response.timestamp,
+            headers=res.response.headers,
+            body=res.response.body,
+            messages=response_messages,
+            cache_hit=res.response.cache_hit
+        ),
+        warnings=res.warnings,
+        provider_metadata=res.provider_metadata,
+        timing=timing,
+        history=history
+    )
+
+def _build_lean_text_result(
+    res: LanguageModelCallResult,
+    tools: Optional[Dict[str, Tool]],
+    tool_results: List[ToolResultPart],
+    usage: Usage,
+    final_text: str,
+    timing: Optional[TimingBreakdown] = None,
+    history: Optional[List[Message]] = None
+) -> TextResult:
+    """Builds the result without validation, the response messages are only built when accessed."""
+    response = None
+    if res.response is not None:
+        response = LazyResponseMetadata.model_construct(
+            id=res.response.id,
+            model=res.response.model_id,
+            timestamp=res.response.timestamp,
+            headers=res.response.headers,
+            body=res.response.body,
+            cache_hit=res.response.cache_hit
+        )
+        response._messages_factory = lambda: convert_to_response_messages(
+            final_text,
+            tools,
+            res.tool_calls,
+            tool_results,
+            res.response.id,
+            lambda: res.response.id
+        )
+
+    return TextResult.model_construct(
+        text=final_text,
+        finish_reason=res.finish_reason,
+        tool_calls=res.tool_calls or [],
+        tool_results=tool_results,
+        usage=usage,
+        request=None,
+        response=response,
+        warnings=res.warnings,
+        provider_metadata=res.provider_metadata,
+        timing=timing,
+        history=history
+    )
+
+def _create_options(
     model: LanguageModel,
+    system: Optional[str],
+    prompt: Optional[str],
+    messages: Optional[List[Message]],
+    tools: Optional[Dict[str, Tool]],
+    tool_choice: Optional[Literal["auto", "none"]],
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    top_p: Optional[float],
+    top_k: Optional[int],
+    presence_penalty: Optional[float],
+    frequency_penalty: Optional[float],
+    stop_sequences: Optional[List[str]],
+    seed: Optional[int],
+    max_retries: int,
+    headers: Optional[Dict[str, str]],
+    provider_options: Optional[LanguageModelProviderMetadata],
+    lean: bool = False,
+) -> LanguageModelCallOptions:
+    if not isinstance(model, LanguageModel):
+        raise ValueError("model must be a LanguageModel")
+
+    messages = standardize_messages(system, prompt, messages)
+
+    if tool_choice == "none":
+        tools = None
+
+    return LanguageModelCallOptions(
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        top_p=top_p,
+        top_k=top_k,
+        presence_penalty=presence_penalty,
+        frequency_penalty=frequency_penalty,
+        stop_sequences=stop_sequences,
+        seed=seed,
+        max_retries=max_retries,
+        tools=tools,
+        headers=headers,
+        provider_metadata=provider_options,
+        lean=lean
+    )
+
+@track(kind="call")
+def generate_text(
+    model: Union[LanguageModel, List[LanguageModel]],
     system: Optional[str] = None,
     prompt: Optional[str] = None,
     messages: Optional[List[Message]] = None,
@@ -28,30 +203,28 @@ def generate_text(
     headers: Optional[Dict[str, str]] = None,
     max_steps: int = 1,
     provider_options: Optional[LanguageModelProviderMetadata] = None,
+    max_tool_concurrency: Optional[int] = None,
+    tool_timeout: Optional[float] = None,
+    cache: Optional[ResponseCache] = None,
+    retry_strategy: Optional[RetryStrategy] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    lean: bool = False,
+    on_timing: Optional[Callable[[TimingBreakdown], Any]] = None,
+    context_policy: Optional[ContextPolicy] = None,
+    compaction: Optional[CompactionStrategy] = None,
+    image_preprocessor: Optional[ImagePreprocessor] = None,
 ) -> TextResult:
-    if not isinstance(model, LanguageModel):
-        raise ValueError("model must be a LanguageModel")
-    
-    messages = standardize_messages(system, prompt, messages)
-
+    model = resolve_model(model)
+    update_current_span(provider=getattr(model, "provider", None), model=getattr(model, "model_id", None))
+    options = _create_options(
+        model, system, prompt, messages, tools, tool_choice, max_tokens, temperature, top_p, top_k,
+        presence_penalty, frequency_penalty, stop_sequences, seed, max_retries, headers, provider_options, lean
+    )
     if tool_choice == "none":
         tools = None
-    
-    options = LanguageModelCallOptions(
-        messages=messages,
-        max_tokens=max_tokens,
-        temperature=temperature,
-        top_p=top_p,
-        top_k=top_k,
-        presence_penalty=presence_penalty,
-        frequency_penalty=frequency_penalty,
-        stop_sequences=stop_sequences,
-        seed=seed,
-        max_retries=max_retries,
-        tools=tools,
-        headers=headers,
-        provider_metadata=provider_options
-    )
+    capture_payload(input=options.messages)
+    retry = resolve_retry_strategy(retry_strategy, max_retries)
+
     step = 0
     usage = Usage(
         prompt_tokens=0,
@@ -59,85 +232,135 @@ def generate_text(
         total_tokens=0
     )
 
-    while True:
-        retry_count = 0
-        while retry_count < options.max_retries:
-            try:
-                res = model.do_generate(options)
-                usage = Usage(
-                    prompt_tokens=usage.prompt_tokens + res.usage.prompt_tokens,
-                    completion_tokens=usage.completion_tokens + res.usage.completion_tokens,
-                    total_tokens=usage.total_tokens + res.usage.prompt_tokens + res.usage.completion_tokens
-                )
-                break
-            except AI_APICallError as e:
-                if not e.is_retryable:
-                    raise e
+    with record_timing(on_timing) as recorder:
+        while True:
+            with span("step", "step", step=step + 1):
+                recorder.start_step()
+                if image_preprocessor is not None and step == 0:
+                    with timed("image_preprocessing"):
+                        options.messages = image_preprocessor.process(options.messages, model.image_limits())
+                if compaction is not None:
+                    with timed("compaction"):
+                        options.messages = compaction.compact(options.messages, model, retry, rate_limiter)
+                request_options = fit_context(model, options, context_policy)
+                res = retry.call(lambda: cached_generate(model, request_options, cache, rate_limiter))
+                recorder.record_headers(res.response.headers if res.response else None)
+                usage = _add_usage(usage, res, lean)
+
+                step += 1
+
+                if res.tool_calls:
+                    with timed("tool_execution"):
+                        tool_results = execute_tool_calls(res.tool_calls, tools, max_tool_concurrency, tool_timeout)
+                    next_step_type = "tool-result"
                 else:
-                    retry_count += 1
-                    if retry_count >= options.max_retries:
-                        raise e
-
-                    time.sleep(1.0 * (2 ** retry_count))
-                    continue
-            except Exception as e:
-                raise e
-            
-        step += 1
-
-        if res.tool_calls:
-            tool_results = execute_tool_calls(res.tool_calls, tools)
-            next_step_type = "tool-result"
-        else:
-            tool_results = []
-            next_step_type = "done"
-        
-        if step >= max_steps:
-            break
-        else:
-            if next_step_type == "tool-result":
-                options.messages.append(
-                    AssistantMessage(
-                        content="",
-                        tool_calls=res.tool_calls
-                    )
-                )
-                for tool_result in tool_results:
-                    options.messages.append(
-                        ToolMessage(
-                            content=tool_result.result,
-                            tool_call_id=tool_result.tool_call_id
-                        )
-                    )
-            else:
+                    tool_results = []
+                    next_step_type = "done"
+                recorder.end_step()
+
+            if step >= max_steps:
                 break
-        
-    final_text = res.text or ''
+            else:
+                if next_step_type == "tool-result":
+                    _append_tool_messages(options, res, tool_results)
+                else:
+                    break
 
-    response_messages = convert_to_response_messages(
-        final_text,
-        tools,
-        res.tool_calls,
-        tool_results,
-        res.response.id,
-        lambda: res.response.id
+        history = _final_history(options.messages, res, tool_results) if compaction is not None else None
+        result = _build_text_result(res, tools, tool_results, usage, lean, recorder.breakdown, history)
+        update_current_span(usage={"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens})
+        capture_payload(output=result.text)
+        return result
+
+@track(kind="call")
+async def generate_text_async(
+    model: Union[LanguageModel, List[LanguageModel]],
+    system: Optional[str] = None,
+    prompt: Optional[str] = None,
+    messages: Optional[List[Message]] = None,
+    tools: Optional[Dict[str, Tool]] = None,
+    tool_choice: Optional[Literal["auto", "none"]] = "auto",
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+    presence_penalty: Optional[float] = None,
+    frequency_penalty: Optional[float] = None,
+    stop_sequences: Optional[List[str]] = None,
+    seed: Optional[int] = None,
+    max_retries: int = 3,
+    headers: Optional[Dict[str, str]] = None,
+    max_steps: int = 1,
+    provider_options: Optional[LanguageModelProviderMetadata] = None,
+    max_tool_concurrency: Optional[int] = None,
+    tool_timeout: Optional[float] = None,
+    cache: Optional[ResponseCache] = None,
+    retry_strategy: Optional[RetryStrategy] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    lean: bool = False,
+    on_timing: Optional[Callable[[TimingBreakdown], Any]] = None,
+    context_policy: Optional[ContextPolicy] = None,
+    compaction: Optional[CompactionStrategy] = None,
+    image_preprocessor: Optional[ImagePreprocessor] = None,
+) -> TextResult:
+    """
+    Async variant of `generate_text`. Uses the model's `do_generate_async` and
+    waits between retries with `asyncio.sleep` so the event loop is never blocked.
+    """
+    model = resolve_model(model)
+    update_current_span(provider=getattr(model, "provider", None), model=getattr(model, "model_id", None))
+    options = _create_options(
+        model, system, prompt, messages, tools, tool_choice, max_tokens, temperature, top_p, top_k,
+        presence_penalty, frequency_penalty, stop_sequences, seed, max_retries, headers, provider_options, lean
     )
+    if tool_choice == "none":
+        tools = None
+    capture_payload(input=options.messages)
+    retry = resolve_retry_strategy(retry_strategy, max_retries)
 
-    return TextResult(
-        text=final_text,
-        finish_reason=res.finish_reason,
-        tool_calls=res.tool_calls or [],
-        tool_results=tool_results,
-        usage=usage,
-        request=RequestMetadata(body=res.request.body),
-        response=ResponseMetadata(
-            id=res.response.id,
-            model=res.response.model_id,
-            timestamp=res.response.timestamp,
-            headers=res.response.headers,
-            body=res.response.body,
-            messages=response_messages
-        ),
-        warnings=res.warnings,
-        provider_metadata=res.provider_metadata
+    step = 0
+    usage = Usage(
+        prompt_tokens=0,
+        completion_tokens=0,
+        total_tokens=0
     )
+
+    with record_timing(on_timing) as recorder:
+        while True:
+            with span("step", "step", step=step + 1):
+                recorder.start_step()
+                if image_preprocessor is not None and step == 0:
+                    with timed("image_preprocessing"):
+                        options.messages = image_preprocessor.process(options.messages, model.image_limits())
+                if compaction is not None:
+                    with timed("compaction"):
+                        options.messages = await compaction.compact_async(options.messages, model, retry, rate_limiter)
+                request_options = fit_context(model, options, context_policy)
+                res = await retry.call_async(lambda: cached_generate_async(model, request_options, cache, rate_limiter))
+                recorder.record_headers(res.response.headers if res.response else None)
+                usage = _add_usage(usage, res, lean)
+
+                step += 1
+
+                if res.tool_calls:
+                    with timed("tool_execution"):
+                        tool_results = await execute_tool_calls_async(res.tool_calls, tools, max_tool_concurrency, tool_timeout)
+                    next_step_type = "tool-result"
+                else:
+                    tool_results = []
+                    next_step_type = "done"
+                recorder.end_step()
+
+            if step >= max_steps:
+                break
+            else:
+                if next_step_type == "tool-result":
+                    _append_tool_messages(options, res, tool_results)
+                else:
+                    break
+
+        history = _final_history(options.messages, res, tool_results) if compaction is not None else None
+        result = _build_text_result(res, tools, tool_results, usage, lean, recorder.breakdown, history)
+        update_current_span(usage={"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens})
+        capture_payload(output=result.text)
+        return result
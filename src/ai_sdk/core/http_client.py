@@ -0,0 +1,124 @@
+from typing import Any, Callable, Optional
+import asyncio
+import threading
+import weakref
+import httpx
+
+class HTTPClientPool:
+    """
+    Owns the long-lived HTTP clients of a provider so that every model created
+    by the provider reuses the same connection pool (and keep-alive connections)
+    across calls and retries.
+
+    The sync client is created lazily and shared by all threads. `httpx.AsyncClient`
+    connections are bound to the event loop that opened them, so one async client
+    is kept per running loop.
+
+    Attributes:
+        fetch (Callable): Factory used to build the sync client, called without arguments
+        fetch_async (Callable): Factory used to build the async clients, called without arguments
+        limits (httpx.Limits): Connection pool limits of the default clients
+        http2 (bool): Whether the default clients negotiate HTTP/2 (requires the `h2` package)
+
+    The pool settings only apply to the default `httpx.Client` and
+    `httpx.AsyncClient` factories, a custom factory configures its own client.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[..., Any] = httpx.Client,
+        fetch_async: Callable[..., Any] = httpx.AsyncClient,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry: Optional[float] = 5.0,
+        http2: bool = False,
+    ):
+        self.fetch = fetch
+        self.fetch_async = fetch_async
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._closed = False
+
+    def _build(self, factory: Optional[Callable[..., Any]], default: Callable[..., Any]) -> Any:
+        if factory is None or factory is default:
+            return default(limits=self.limits, http2=self.http2)
+        return factory()
+
+    def client(self) -> httpx.Client:
+        client = self._client
+        if client is not None:
+            return client
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("HTTP client pool has been closed")
+            if self._client is None:
+                self._client = self._build(self.fetch, httpx.Client)
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is not None:
+            return client
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("HTTP client pool has been closed")
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._build(self.fetch_async, httpx.AsyncClient)
+                self._async_clients[loop] = client
+            return client
+
+    def close(self) -> None:
+        """
+        Closes the sync client and the async clients. An async client whose
+        event loop is still running is closed on that loop, prefer `aclose`
+        from async code so the close is awaited.
+        """
+        with self._lock:
+            self._closed = True
+            client, self._client = self._client, None
+            async_clients = list(self._async_clients.items())
+            self._async_clients.clear()
+
+        if client is not None:
+            client.close()
+        for loop, async_client in async_clients:
+            _close_async_client(loop, async_client)
+
+    async def aclose(self) -> None:
+        """Closes the async client of the running event loop and the sync client."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.pop(loop, None)
+
+        if client is not None:
+            await client.aclose()
+        self.close()
+
+def _close_async_client(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+    """Closes `client` from outside of a coroutine, on its own event loop when that loop is still usable."""
+    if loop.is_closed():
+        # Its connections can no longer be closed, they are released when the loop is collected
+        return
+    if loop.is_running():
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(client.aclose())
+        else:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        return
+    loop.run_until_complete(client.aclose())
@@ -0,0 +1,207 @@
+from typing import Hashable, List, Optional, Tuple
+from collections import OrderedDict
+from pydantic import BaseModel
+from .types import Message, UserMessage, ImagePart, TextPart
+from .message_cache import convert_message
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import math
+import threading
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - depends on the installed extras
+    Image = None
+    ImageOps = None
+
+LOGGER = logging.getLogger(__name__)
+
+DUPLICATE_IMAGE_TEXT = "[Image omitted: identical to an earlier image in the conversation]"
+
+class ImageLimits(BaseModel):
+    """Largest image a model actually looks at, bigger images are downscaled by the provider."""
+    max_long_side: int
+    max_short_side: Optional[int] = None
+    max_pixels: Optional[int] = None
+
+    def scale(self, width: int, height: int) -> float:
+        """Returns the factor fitting a `width` x `height` image within the limits, at most 1."""
+        scale = min(1.0, self.max_long_side / max(width, height))
+        if self.max_short_side is not None:
+            scale = min(scale, self.max_short_side / min(width, height))
+        if self.max_pixels is not None:
+            scale = min(scale, math.sqrt(self.max_pixels / (width * height)))
+        return scale
+
+def most_restrictive_limits(limits: List[Optional[ImageLimits]]) -> Optional[ImageLimits]:
+    """Combines the limits of several models, models without known limits are ignored."""
+    known = [limit for limit in limits if limit is not None]
+    if not known:
+        return None
+
+    def smallest(values: List[Optional[int]]) -> Optional[int]:
+        values = [value for value in values if value is not None]
+        return min(values) if values else None
+
+    return ImageLimits(
+        max_long_side=min(limit.max_long_side for limit in known),
+        max_short_side=smallest([limit.max_short_side for limit in known]),
+        max_pixels=smallest([limit.max_pixels for limit in known])
+    )
+
+def _is_url(image: str) -> bool:
+    return image.startswith(("http://", "https://"))
+
+class ImagePreprocessor:
+    """
+    Shrinks the base64 images of a request before it is sent: images larger
+    than the model's `image_limits()` are downscaled to them and recompressed,
+    as JPEG or as PNG when they have transparency. Images that already fit and
+    are smaller than `max_unchanged_bytes` are sent as they are, and so is
+    any image the recompression would make larger. Image URLs are left to the
+    provider.
+
+    With `deduplicate`, an image repeated in the conversation is only sent
+    the first time, later copies are replaced with a short text. Results are
+    cached by content hash, so a conversation sent again on every turn is
+    only processed once. Requires the `images` extra (Pillow).
+
+    Args:
+        quality: JPEG quality of the recompressed images
+        max_unchanged_bytes: Size under which images that fit the limits are not recompressed
+        deduplicate: Whether to send repeated images only once
+        cache_size: Number of processed images kept in memory
+    """
+    def __init__(
+        self,
+        quality: int = 85,
+        max_unchanged_bytes: int = 512 * 1024,
+        deduplicate: bool = True,
+        cache_size: int = 128,
+    ):
+        if Image is None:
+            raise ImportError("Image preprocessing requires the `Pillow` package, install it with `pip install ai-sdk-py[images]`")
+        self.quality = quality
+        self.max_unchanged_bytes = max_unchanged_bytes
+        self.deduplicate = deduplicate
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, Hashable], Tuple[str, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _encode(self, data: bytes, limits: Optional[ImageLimits]) -> Optional[Tuple[bytes, str]]:
+        """Returns the recompressed image and its mime type, None to keep the original."""
+        try:
+            image = Image.open(io.BytesIO(data))
+        except Exception as e:
+            LOGGER.debug("Could not decode image, sending it as is: %s", e)
+            return None
+        if getattr(image, "n_frames", 1) > 1:
+            return None
+
+        width, height = image.size
+        scale = limits.scale(width, height) if limits is not None else 1.0
+        if scale >= 1.0 and len(data) <= self.max_unchanged_bytes:
+            return None
+
+        if scale < 1.0:
+            # JPEG decoders can downscale by 1/2 to 1/8 while decoding, much faster than decoding at full size
+            image.draft(None, (math.ceil(width * scale), math.ceil(height * scale)))
+        # Phone photos store their rotation in EXIF, which is dropped on save
+        image = ImageOps.exif_transpose(image)
+        if scale < 1.0:
+            # Rounded down so the result never exceeds the limits
+            long_side, short_side = (max(1, math.floor(side * scale + 1e-6)) for side in (max(width, height), min(width, height)))
+            target = (long_side, short_side) if image.size[0] >= image.size[1] else (short_side, long_side)
+            image = image.resize(target, Image.LANCZOS)
+
+        output = io.BytesIO()
+        if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+            image.save(output, format="PNG", optimize=True)
+            mime_type = "image/png"
+        else:
+            image.convert("RGB").save(output, format="JPEG", quality=self.quality, optimize=True)
+            mime_type = "image/jpeg"
+
+        encoded = output.getvalue()
+        if scale >= 1.0 and len(encoded) >= len(data):
+            return None
+        return encoded, mime_type
+
+    def _process_part(self, part: ImagePart, limits: Optional[ImageLimits]) -> Tuple[ImagePart, str]:
+        """Returns the processed part and the content hash of the original image."""
+        image_hash = hashlib.sha256(part.image.encode("ascii", "ignore")).hexdigest()
+        if _is_url(part.image):
+            return part, image_hash
+
+        key = (image_hash, limits.model_dump_json() if limits else None)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is None:
+            try:
+                data = base64.b64decode(part.image, validate=False)
+            except (binascii.Error, ValueError):
+                return part, image_hash
+            encoded = self._encode(data, limits)
+            cached = (base64.b64encode(encoded[0]).decode("ascii"), encoded[1]) if encoded is not None else (None, None)
+            with self._lock:
+                self._cache[key] = cached
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        image, mime_type = cached
+        if image is None:
+            return part, image_hash
+        return ImagePart(image=image, mime_type=mime_type, provider_options=part.provider_options), image_hash
+
+    def process_image(self, part: ImagePart, limits: Optional[ImageLimits]) -> ImagePart:
+        """Returns `part` shrunk to `limits`, or `part` itself when it is kept as is."""
+        return self._process_part(part, limits)[0]
+
+    def _process_message(self, message: Message, limits: Optional[ImageLimits]) -> Tuple[Message, List[str]]:
+        """Returns the message with its images processed, and the hashes of these images."""
+        if not isinstance(message, UserMessage) or isinstance(message.content, str):
+            return message, []
+
+        content = []
+        hashes = []
+        for part in message.content:
+            if isinstance(part, ImagePart):
+                part, image_hash = self._process_part(part, limits)
+                hashes.append(image_hash)
+            content.append(part)
+        if not hashes:
+            return message, []
+        if all(new is old for new, old in zip(content, message.content)):
+            return message, hashes
+        return message.model_copy(update={"content": content}), hashes
+
+    def process(self, messages: List[Message], limits: Optional[ImageLimits]) -> List[Message]:
+        """Returns `messages` with their images processed, messages without images are kept as they are."""
+        key = ("images", self.quality, self.max_unchanged_bytes, limits.model_dump_json() if limits else None)
+        processed = [convert_message(message, key, lambda message: self._process_message(message, limits)) for message in messages]
+        if not self.deduplicate:
+            return [message for message, _ in processed]
+
+        seen = set()
+        result = []
+        for message, hashes in processed:
+            if hashes and any(image_hash in seen for image_hash in hashes):
+                content = []
+                images = iter(hashes)
+                for part in message.content:
+                    if isinstance(part, ImagePart):
+                        image_hash = next(images)
+                        if image_hash in seen:
+                            part = TextPart(text=DUPLICATE_IMAGE_TEXT)
+                        seen.add(image_hash)
+                    content.append(part)
+                message = message.model_copy(update={"content": content})
+            else:
+                seen.update(hashes)
+            result.append(message)
+        return result
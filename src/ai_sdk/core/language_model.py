@@ -1,7 +1,11 @@
-from typing import Optional, List, Dict, Literal, Any
-from .types import Message, Warning, ToolCallPart, Tool, FinishReason
+from typing import Optional, List, Dict, Literal, Any, Iterator, AsyncIterator, Union
+from .types import Message, Warning, ToolCallPart, Tool, FinishReason, TextDeltaPart, ToolCallDeltaPart, ResponseMetadataPart, FinishPart, Usage
 from pydantic import BaseModel
+from .errors import AI_UnsupportedFunctionalityError
+from .tokens import ContextWindow, TokenEstimator, DEFAULT_TOKEN_ESTIMATOR, get_registered_context_window
+from .images import ImageLimits
 import datetime
+import asyncio
 
 class LanguageModelCallSettings(BaseModel):
     max_tokens: Optional[int] = None
@@ -22,6 +26,8 @@ class LanguageModelCallOptions(LanguageModelCallSettings):
     headers: Optional[Dict[str, str]] = None
     provider_metadata: Optional[LanguageModelProviderMetadata] = None
     max_retries: int = 3
+    # Skip validation and request / response body capture when building results
+    lean: bool = False
 
 class LanguageModelUsage(BaseModel):
     prompt_tokens: int
@@ -36,6 +42,7 @@ class LanguageModelResponse(BaseModel):
     headers: Optional[Dict[str, str]] = None
     model_id: Optional[str] = None
     body: Optional[str] = None
+    cache_hit: bool = False
 
 
 class LanguageModelCallResult(BaseModel):
@@ -48,6 +55,32 @@ class LanguageModelCallResult(BaseModel):
     warnings: Optional[List[Warning]] = None
     provider_metadata: Optional[LanguageModelProviderMetadata] = None
 
+LanguageModelStreamPart = Union[TextDeltaPart, ToolCallDeltaPart, ToolCallPart, ResponseMetadataPart, FinishPart]
+
+def call_result_to_stream_parts(res: LanguageModelCallResult) -> List[LanguageModelStreamPart]:
+    """Replays a buffered call result as stream parts."""
+    parts: List[LanguageModelStreamPart] = []
+    if res.response is not None:
+        parts.append(ResponseMetadataPart(
+            id=res.response.id,
+            model_id=res.response.model_id,
+            timestamp=res.response.timestamp,
+            headers=res.response.headers
+        ))
+    if res.text:
+        parts.append(TextDeltaPart(text_delta=res.text))
+    parts.extend(res.tool_calls or [])
+    parts.append(FinishPart(
+        finish_reason=res.finish_reason or "unknown",
+        usage=Usage(
+            prompt_tokens=res.usage.prompt_tokens,
+            completion_tokens=res.usage.completion_tokens,
+            total_tokens=res.usage.prompt_tokens + res.usage.completion_tokens
+        ),
+        warnings=res.warnings,
+        provider_metadata=res.provider_metadata
+    ))
+    return parts
 
 class LanguageModel:
     required_attributes = {
@@ -69,6 +102,21 @@ class LanguageModel:
                 f"Missing required attributes: {', '.join(missing)}"
             )
     
+    # Context window of each model id supported by the provider
+    context_windows: Dict[str, ContextWindow] = {}
+
+    def context_window(self) -> Optional[ContextWindow]:
+        """Returns the size limits of the model, None when they are unknown."""
+        return get_registered_context_window(self.model_id) or self.context_windows.get(self.model_id)
+
+    def token_estimator(self) -> TokenEstimator:
+        """Returns the estimator used to count the tokens of a prompt before it is sent."""
+        return DEFAULT_TOKEN_ESTIMATOR
+
+    def image_limits(self) -> Optional[ImageLimits]:
+        """Returns the largest image the model looks at, None when unknown or images are not supported."""
+        return None
+
     def supports_json_mode(self) -> bool:
         pass
 
@@ -77,4 +125,32 @@ class LanguageModel:
 
     def do_generate(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
         pass
-    
\ No newline at end of file
+
+    async def do_generate_async(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
+        """
+        Async variant of `do_generate`. Providers override this with a native
+        implementation, the default runs the blocking call in a worker thread.
+        """
+        return await asyncio.to_thread(self.do_generate, options)
+
+    def do_stream(self, options: LanguageModelCallOptions) -> Iterator[LanguageModelStreamPart]:
+        """
+        Streams the response as it is generated. Providers override this with a
+        native implementation, the default replays the buffered `do_generate` result.
+        """
+        yield from call_result_to_stream_parts(self.do_generate(options))
+
+    async def do_stream_async(self, options: LanguageModelCallOptions) -> AsyncIterator[LanguageModelStreamPart]:
+        """Async variant of `do_stream`."""
+        for part in call_result_to_stream_parts(await self.do_generate_async(options)):
+            yield part
+
+    def batch_api(self) -> Any:
+        """
+        Returns the provider's offline batch endpoints (a `core.batch_job.BatchAPI`)
+        used by `create_text_batch_job` and `create_object_batch_job`.
+        """
+        raise AI_UnsupportedFunctionalityError(
+            functionality="Batch jobs",
+            message=f"Batch jobs are not supported by {self.provider}"
+        )
@@ -0,0 +1,63 @@
+from typing import Any, Callable, Dict, Hashable, Set, Tuple, TypeVar
+from .types import Message
+import threading
+import weakref
+
+T = TypeVar("T")
+
+# Keyed by id() since pydantic models are not hashable, entries are dropped
+# by a finalizer when the message is garbage collected
+_entries: Dict[int, Dict[Hashable, Tuple[Tuple[Any, ...], Any]]] = {}
+_finalized: Set[int] = set()
+# Reentrant: a finalizer can run during a garbage collection triggered while the lock is held
+_lock = threading.RLock()
+
+def _forget(message_id: int) -> None:
+    with _lock:
+        _entries.pop(message_id, None)
+        _finalized.discard(message_id)
+
+def _fields(message: Message) -> Tuple[Any, ...]:
+    return tuple(vars(message).values())
+
+def _same_fields(cached: Tuple[Any, ...], current: Tuple[Any, ...]) -> bool:
+    return len(cached) == len(current) and all(a is b for a, b in zip(cached, current))
+
+def convert_message(message: Message, key: Hashable, convert: Callable[[Message], T]) -> T:
+    """
+    Returns `convert(message)`, memoized per message object and `key`, so the
+    history of a multi-step tool loop is converted to the provider format once
+    instead of on every step. `key` must identify everything else the
+    conversion depends on, typically the provider and model id.
+
+    An entry is reused while the message's fields are the same objects, so
+    assigning a new value to a field invalidates it. Modifying a field in place,
+    such as appending to `content`, is not detected: messages are expected not
+    to change once they were sent. The converted value is shared between calls
+    and must not be modified.
+    """
+    message_id = id(message)
+    fields = _fields(message)
+
+    entries = _entries.get(message_id)
+    if entries is not None:
+        entry = entries.get(key)
+        if entry is not None and _same_fields(entry[0], fields):
+            return entry[1]
+
+    converted = convert(message)
+    with _lock:
+        if message_id not in _finalized:
+            try:
+                weakref.finalize(message, _forget, message_id)
+            except TypeError:
+                return converted
+            _finalized.add(message_id)
+        entries = _entries.setdefault(message_id, {})
+        entries[key] = (fields, converted)
+    return converted
+
+def clear_message_cache() -> None:
+    """Drops every cached conversion."""
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,221 @@
+from typing import Any, List, Optional
+import json
+
+_LITERALS = ("true", "false", "null")
+
+_CLOSE_OBJECT_STATES = {
+    "INSIDE_OBJECT_START",
+    "INSIDE_OBJECT_KEY",
+    "INSIDE_OBJECT_AFTER_KEY",
+    "INSIDE_OBJECT_BEFORE_VALUE",
+    "INSIDE_OBJECT_AFTER_VALUE",
+    "INSIDE_OBJECT_AFTER_COMMA",
+}
+
+_CLOSE_ARRAY_STATES = {
+    "INSIDE_ARRAY_START",
+    "INSIDE_ARRAY_AFTER_VALUE",
+    "INSIDE_ARRAY_AFTER_COMMA",
+}
+
+class PartialJSONParser:
+    """
+    Parses a JSON document that is still being received.
+
+    Text is fed in chunks and scanned exactly once by a small state machine that
+    tracks the open containers and the last position at which the document can
+    be completed. `parse` closes the open strings, literals, arrays and objects
+    and returns the resulting value, so every call yields the most complete
+    object seen so far. Incomplete keys and numbers are dropped until they are
+    complete enough to be valid JSON.
+    """
+    def __init__(self):
+        self.text = ""
+        self._stack: List[str] = ["ROOT"]
+        self._last_valid_index = -1
+        self._literal_start: Optional[int] = None
+        self._unicode_digits = 0
+
+    def feed(self, chunk: str) -> None:
+        offset = len(self.text)
+        self.text += chunk
+        for i, char in enumerate(chunk, start=offset):
+            self._process(char, i)
+
+    def repaired(self) -> str:
+        """Returns the received text completed into a valid JSON document."""
+        result = self.text[:self._last_valid_index + 1]
+
+        for state in reversed(self._stack):
+            if state == "INSIDE_STRING":
+                result += '"'
+            elif state in _CLOSE_OBJECT_STATES:
+                result += "}"
+            elif state in _CLOSE_ARRAY_STATES:
+                result += "]"
+            elif state == "INSIDE_LITERAL":
+                partial_literal = self.text[self._literal_start:]
+                for literal in _LITERALS:
+                    if literal.startswith(partial_literal):
+                        result += literal[len(partial_literal):]
+                        break
+
+        return result
+
+    def parse(self) -> Optional[Any]:
+        """Returns the most complete value that can be built from the received text."""
+        repaired = self.repaired()
+        if not repaired:
+            return None
+        try:
+            return json.loads(repaired)
+        except ValueError:
+            return None
+
+    def _swap(self, state: str) -> None:
+        self._stack[-1] = state
+
+    def _process_value_start(self, char: str, i: int, swap_state: str) -> None:
+        if char == '"':
+            self._last_valid_index = i
+            self._swap(swap_state)
+            self._stack.append("INSIDE_STRING")
+        elif char in "ftn":
+            self._last_valid_index = i
+            self._literal_start = i
+            self._swap(swap_state)
+            self._stack.append("INSIDE_LITERAL")
+        elif char == "-":
+            self._swap(swap_state)
+            self._stack.append("INSIDE_NUMBER")
+        elif char.isdigit():
+            self._last_valid_index = i
+            self._swap(swap_state)
+            self._stack.append("INSIDE_NUMBER")
+        elif char == "{":
+            self._last_valid_index = i
+            self._swap(swap_state)
+            self._stack.append("INSIDE_OBJECT_START")
+        elif char == "[":
+            self._last_valid_index = i
+            self._swap(swap_state)
+            self._stack.append("INSIDE_ARRAY_START")
+
+    def _process_after_object_value(self, char: str, i: int) -> None:
+        if char == ",":
+            self._swap("INSIDE_OBJECT_AFTER_COMMA")
+        elif char == "}":
+            self._last_valid_index = i
+            self._stack.pop()
+
+    def _process_after_array_value(self, char: str, i: int) -> None:
+        if char == ",":
+            self._swap("INSIDE_ARRAY_AFTER_COMMA")
+        elif char == "]":
+            self._last_valid_index = i
+            self._stack.pop()
+
+    def _process_after_value(self, char: str, i: int) -> None:
+        if self._stack[-1] == "INSIDE_OBJECT_AFTER_VALUE":
+            self._process_after_object_value(char, i)
+        elif self._stack[-1] == "INSIDE_ARRAY_AFTER_VALUE":
+            self._process_after_array_value(char, i)
+
+    def _process(self, char: str, i: int) -> None:
+        state = self._stack[-1]
+
+        if state == "ROOT":
+            self._process_value_start(char, i, "FINISH")
+
+        elif state == "INSIDE_OBJECT_START":
+            if char == '"':
+                self._swap("INSIDE_OBJECT_KEY")
+            elif char == "}":
+                self._last_valid_index = i
+                self._stack.pop()
+
+        elif state == "INSIDE_OBJECT_AFTER_COMMA":
+            if char == '"':
+                self._swap("INSIDE_OBJECT_KEY")
+
+        elif state == "INSIDE_OBJECT_KEY":
+            if char == '"':
+                self._swap("INSIDE_OBJECT_AFTER_KEY")
+
+        elif state == "INSIDE_OBJECT_AFTER_KEY":
+            if char == ":":
+                self._swap("INSIDE_OBJECT_BEFORE_VALUE")
+
+        elif state == "INSIDE_OBJECT_BEFORE_VALUE":
+            self._process_value_start(char, i, "INSIDE_OBJECT_AFTER_VALUE")
+
+        elif state == "INSIDE_OBJECT_AFTER_VALUE":
+            self._process_after_object_value(char, i)
+
+        elif state == "INSIDE_STRING":
+            if char == '"':
+                self._stack.pop()
+                self._last_valid_index = i
+            elif char == "\\":
+                self._stack.append("INSIDE_STRING_ESCAPE")
+            else:
+                self._last_valid_index = i
+
+        elif state == "INSIDE_STRING_ESCAPE":
+            if char == "u":
+                # A `\uXXXX` escape is only valid once its four hex digits are in
+                self._swap("INSIDE_STRING_UNICODE_ESCAPE")
+                self._unicode_digits = 0
+            else:
+                self._stack.pop()
+                self._last_valid_index = i
+
+        elif state == "INSIDE_STRING_UNICODE_ESCAPE":
+            self._unicode_digits += 1
+            if self._unicode_digits == 4:
+                self._stack.pop()
+                self._last_valid_index = i
+
+        elif state == "INSIDE_ARRAY_START":
+            if char == "]":
+                self._last_valid_index = i
+                self._stack.pop()
+            else:
+                self._last_valid_index = i
+                self._process_value_start(char, i, "INSIDE_ARRAY_AFTER_VALUE")
+
+        elif state == "INSIDE_ARRAY_AFTER_VALUE":
+            if char == ",":
+                self._swap("INSIDE_ARRAY_AFTER_COMMA")
+            elif char == "]":
+                self._last_valid_index = i
+                self._stack.pop()
+            else:
+                self._last_valid_index = i
+
+        elif state == "INSIDE_ARRAY_AFTER_COMMA":
+            self._process_value_start(char, i, "INSIDE_ARRAY_AFTER_VALUE")
+
+        elif state == "INSIDE_NUMBER":
+            if char.isdigit():
+                self._last_valid_index = i
+            elif char in "eE-+.":
+                pass
+            else:
+                self._stack.pop()
+                if char in ",}]":
+                    self._process_after_value(char, i)
+
+        elif state == "INSIDE_LITERAL":
+            partial_literal = self.text[self._literal_start:i + 1]
+            if any(literal.startswith(partial_literal) for literal in _LITERALS):
+                self._last_valid_index = i
+            else:
+                self._stack.pop()
+                self._process_after_value(char, i)
+
+def parse_partial_json(text: str) -> Optional[Any]:
+    """Parses a possibly truncated JSON document, returns None if nothing can be recovered yet."""
+    parser = PartialJSONParser()
+    parser.feed(text)
+    return parser.parse()
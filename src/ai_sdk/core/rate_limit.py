@@ -0,0 +1,251 @@
+from typing import Dict, Optional, Tuple, Mapping
+from .language_model import LanguageModel, LanguageModelCallOptions, LanguageModelCallResult
+from .fallback import FallbackModel
+from .utils import get_header
+from .timing import timed
+from .tokens import TokenEstimator, DEFAULT_TOKEN_ESTIMATOR
+import asyncio
+import threading
+import time
+
+# Remaining and limit headers per quota, OpenAI first then Anthropic
+_QUOTA_HEADERS = {
+    "requests": [
+        ("x-ratelimit-limit-requests", "x-ratelimit-remaining-requests"),
+        ("anthropic-ratelimit-requests-limit", "anthropic-ratelimit-requests-remaining"),
+    ],
+    "tokens": [
+        ("x-ratelimit-limit-tokens", "x-ratelimit-remaining-tokens"),
+        ("anthropic-ratelimit-tokens-limit", "anthropic-ratelimit-tokens-remaining"),
+    ],
+}
+
+def estimate_prompt_tokens(options: LanguageModelCallOptions, estimator: Optional[TokenEstimator] = None) -> int:
+    """
+    Estimate of the prompt size used to reserve token budget before a request
+    is sent. Images count as a flat number of tokens, not as their base64 text.
+    """
+    estimator = estimator or DEFAULT_TOKEN_ESTIMATOR
+    response_format = options.response_format if isinstance(options.response_format, type) else None
+    return estimator.count_prompt(options.messages, options.tools, response_format)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `capacity / period` per second. A
+    request larger than the capacity is admitted once the bucket is full and
+    leaves it in debt, so oversized requests are slowed down but never blocked.
+    """
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.period = period
+        self.level = float(capacity)
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken, assumes `refill` was just called."""
+        needed = min(amount, self.capacity)
+        # Tolerates rounding errors, a wait shorter than the clock resolution would never end
+        if self.level >= needed - 1e-6:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def set_limit(self, limit: float, now: float) -> None:
+        self.refill(now)
+        if limit > 0 and limit != self.capacity:
+            self.level = min(self.level, limit)
+            self.capacity = float(limit)
+
+    def set_remaining(self, remaining: float, now: float) -> None:
+        # The provider sees the requests of every worker sharing the quota
+        self.refill(now)
+        self.level = min(self.level, float(remaining))
+
+class RateLimiter:
+    """
+    Client-side limiter enforcing requests and tokens per minute for each
+    provider and model. Calls wait locally (with `time.sleep` or `asyncio.sleep`)
+    until enough budget is available instead of being rejected with a 429.
+
+    The token budget of a call is reserved before sending, from the estimated
+    prompt tokens plus `max_tokens` (or `default_completion_tokens`), and
+    corrected with the actual usage once the response arrives. When
+    `adapt_to_headers` is set the limits and remaining quota reported in the
+    OpenAI and Anthropic rate limit headers are applied to the buckets, so
+    several processes sharing one quota converge on the provider's view of it.
+
+    Args:
+        requests_per_minute: Request quota, None to only learn it from the headers
+        tokens_per_minute: Token quota, None to only learn it from the headers
+        default_completion_tokens: Completion budget reserved when `max_tokens` is not set
+        adapt_to_headers: Whether to follow the provider's rate limit headers
+    """
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        default_completion_tokens: int = 1024,
+        adapt_to_headers: bool = True,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.default_completion_tokens = default_completion_tokens
+        self.adapt_to_headers = adapt_to_headers
+        self._buckets: Dict[Tuple[str, str], Dict[str, TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def _get_buckets(self, model: LanguageModel) -> Dict[str, TokenBucket]:
+        key = (model.provider, model.model_id)
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            buckets = {}
+            if self.requests_per_minute is not None:
+                buckets["requests"] = TokenBucket(self.requests_per_minute)
+            if self.tokens_per_minute is not None:
+                buckets["tokens"] = TokenBucket(self.tokens_per_minute)
+            self._buckets[key] = buckets
+        return buckets
+
+    def estimate(self, options: LanguageModelCallOptions, model: Optional[LanguageModel] = None) -> int:
+        """Tokens reserved for a call with `options`, counted with the token estimator of `model` when given."""
+        completion_tokens = options.max_tokens if options.max_tokens is not None else self.default_completion_tokens
+        estimator = model.token_estimator() if model is not None else None
+        return estimate_prompt_tokens(options, estimator) + completion_tokens
+
+    def _try_acquire(self, model: LanguageModel, tokens: int) -> float:
+        amounts = {"requests": 1, "tokens": tokens}
+        with self._lock:
+            buckets = self._get_buckets(model)
+            now = time.monotonic()
+            wait = 0.0
+            for name, bucket in buckets.items():
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amounts[name]))
+            if wait == 0.0:
+                for name, bucket in buckets.items():
+                    bucket.take(amounts[name])
+            return wait
+
+    def acquire(self, model: LanguageModel, tokens: int) -> None:
+        """Blocks until one request and `tokens` tokens can be taken."""
+        while True:
+            wait = self._try_acquire(model, tokens)
+            if wait == 0.0:
+                return
+            with timed("rate_limit_wait"):
+                time.sleep(wait)
+
+    async def acquire_async(self, model: LanguageModel, tokens: int) -> None:
+        """Async variant of `acquire`."""
+        while True:
+            wait = self._try_acquire(model, tokens)
+            if wait == 0.0:
+                return
+            with timed("rate_limit_wait"):
+                await asyncio.sleep(wait)
+
+    def update(
+        self,
+        model: LanguageModel,
+        headers: Optional[Mapping[str, str]],
+        reserved_tokens: Optional[int] = None,
+        used_tokens: Optional[int] = None
+    ) -> None:
+        """Reconciles the reserved budget with the actual usage and applies the rate limit headers."""
+        with self._lock:
+            buckets = self._get_buckets(model)
+            now = time.monotonic()
+
+            if reserved_tokens is not None and used_tokens is not None and "tokens" in buckets:
+                buckets["tokens"].refill(now)
+                buckets["tokens"].take(used_tokens - reserved_tokens)
+                buckets["tokens"].level = min(buckets["tokens"].level, buckets["tokens"].capacity)
+
+            if not self.adapt_to_headers or not headers:
+                return
+
+            for name, header_pairs in _QUOTA_HEADERS.items():
+                for limit_header, remaining_header in header_pairs:
+                    limit = _to_float(get_header(headers, limit_header))
+                    remaining = _to_float(get_header(headers, remaining_header))
+                    if limit is None and remaining is None:
+                        continue
+
+                    bucket = buckets.get(name)
+                    if bucket is None:
+                        if limit is None:
+                            continue
+                        bucket = buckets[name] = TokenBucket(limit)
+                    if limit is not None:
+                        bucket.set_limit(limit, now)
+                    if remaining is not None:
+                        bucket.set_remaining(remaining, now)
+                    break
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def _used_tokens(res: LanguageModelCallResult) -> int:
+    return res.usage.prompt_tokens + res.usage.completion_tokens
+
+def rate_limited_generate(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    rate_limiter: Optional[RateLimiter]
+) -> LanguageModelCallResult:
+    """Calls `model.do_generate` once `rate_limiter` has budget for it."""
+    if rate_limiter is None:
+        return model.do_generate(options)
+    if isinstance(model, FallbackModel):
+        # Each model of the chain has its own limits, its budget is only taken when the call reaches it
+        return model.call(lambda inner: rate_limited_generate(inner, options, rate_limiter))
+
+    tokens = rate_limiter.estimate(options, model)
+    rate_limiter.acquire(model, tokens)
+    try:
+        res = model.do_generate(options)
+    except Exception as e:
+        # A failed request used no tokens, its reservation is returned
+        rate_limiter.update(model, getattr(e, "response_headers", None), tokens, 0)
+        raise
+
+    rate_limiter.update(model, res.response.headers if res.response else None, tokens, _used_tokens(res))
+    return res
+
+async def rate_limited_generate_async(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    rate_limiter: Optional[RateLimiter]
+) -> LanguageModelCallResult:
+    """Async variant of `rate_limited_generate`."""
+    if rate_limiter is None:
+        return await model.do_generate_async(options)
+    if isinstance(model, FallbackModel):
+        return await model.call_async(lambda inner: rate_limited_generate_async(inner, options, rate_limiter))
+
+    tokens = rate_limiter.estimate(options, model)
+    await rate_limiter.acquire_async(model, tokens)
+    try:
+        res = await model.do_generate_async(options)
+    except Exception as e:
+        # A failed request used no tokens, its reservation is returned
+        rate_limiter.update(model, getattr(e, "response_headers", None), tokens, 0)
+        raise
+
+    rate_limiter.update(model, res.response.headers if res.response else None, tokens, _used_tokens(res))
+    return res
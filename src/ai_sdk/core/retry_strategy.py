@@ -0,0 +1,236 @@
+from typing import Any, Awaitable, Callable, Mapping, Optional, TypeVar
+from email.utils import parsedate_to_datetime
+from .errors import AI_APICallError
+from .timing import current_recorder, timed
+from .tracing import span
+from .utils import get_header
+import asyncio
+import datetime
+import random
+import re
+import time
+
+T = TypeVar("T")
+
+# Reset header of each rate limit with its remaining header. OpenAI reports resets as
+# durations ("1s", "6m0s", "20ms"), Anthropic as RFC 3339 timestamps
+RATE_LIMIT_RESET_HEADERS = [
+    ("x-ratelimit-reset-requests", "x-ratelimit-remaining-requests"),
+    ("x-ratelimit-reset-tokens", "x-ratelimit-remaining-tokens"),
+    ("anthropic-ratelimit-requests-reset", "anthropic-ratelimit-requests-remaining"),
+    ("anthropic-ratelimit-tokens-reset", "anthropic-ratelimit-tokens-remaining"),
+    ("anthropic-ratelimit-input-tokens-reset", "anthropic-ratelimit-input-tokens-remaining"),
+    ("anthropic-ratelimit-output-tokens-reset", "anthropic-ratelimit-output-tokens-remaining"),
+]
+
+def _is_exhausted(value: Optional[str]) -> bool:
+    try:
+        return value is not None and float(value) <= 0
+    except ValueError:
+        return False
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+def _parse_duration(value: str) -> Optional[float]:
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    matches = _DURATION_PATTERN.findall(value)
+    if not matches or "".join(number + unit for number, unit in matches) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in matches)
+
+def _parse_timestamp(value: str, now: datetime.datetime) -> Optional[float]:
+    try:
+        reset = datetime.datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            reset = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if reset.tzinfo is None:
+        reset = reset.replace(tzinfo=datetime.timezone.utc)
+    return (reset - now).total_seconds()
+
+def retry_after_from_headers(headers: Optional[Mapping[str, str]], status_code: Optional[int] = None) -> Optional[float]:
+    """
+    Returns the number of seconds the provider asks to wait before retrying,
+    based on `retry-after-ms`, `retry-after` and, for 429 responses, the reset
+    headers of the rate limits that are exhausted. Reset headers come with
+    every response, they say nothing about when a 5xx will clear.
+    """
+    if not headers:
+        return None
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    value = get_header(headers, "retry-after-ms")
+    if value is not None:
+        try:
+            return max(float(value) / 1000.0, 0.0)
+        except ValueError:
+            pass
+
+    value = get_header(headers, "retry-after")
+    if value is not None:
+        delay = _parse_duration(value)
+        if delay is None:
+            delay = _parse_timestamp(value, now)
+        if delay is not None:
+            return max(delay, 0.0)
+
+    if status_code != 429:
+        return None
+
+    delays = []
+    for name, remaining in RATE_LIMIT_RESET_HEADERS:
+        if not _is_exhausted(get_header(headers, remaining)):
+            continue
+        value = get_header(headers, name)
+        if value is None:
+            continue
+        delay = _parse_duration(value)
+        if delay is None:
+            delay = _parse_timestamp(value, now)
+        if delay is not None:
+            delays.append(max(delay, 0.0))
+
+    # Every exhausted limit has to reset before the request can succeed
+    return max(delays) if delays else None
+
+def is_retryable_error(error: Exception) -> bool:
+    """Default retry predicate: API errors flagged as retryable (408, 409, 429 and 5xx)."""
+    return isinstance(error, AI_APICallError) and error.is_retryable
+
+class RetryStrategy:
+    """
+    Retries failed provider calls with decorrelated jitter.
+
+    The delay before retry `n` is drawn uniformly between `base_delay` and three
+    times the previous delay, capped at `max_delay`, so concurrent workers that
+    hit the same 429 spread out instead of retrying in lockstep. When the error
+    carries `Retry-After`, or is a 429 with an exhausted rate limit, the
+    provider's delay is used instead, plus up to 10% jitter. A provider delay
+    longer than `max_delay` is not shortened: the error is raised instead, as
+    retrying earlier would only hit the limit again. No retry is attempted once
+    `max_elapsed` seconds would be exceeded.
+
+    Args:
+        max_attempts: Maximum number of calls, including the first one
+        base_delay: Minimum delay in seconds between two attempts
+        max_delay: Upper bound of the delays in seconds, the error is raised when the provider asks for longer
+        max_elapsed: Overall time budget in seconds for the call and its retries
+        retry_on: Predicate deciding whether an exception is retried
+        respect_headers: Whether to honour `Retry-After` and rate limit reset headers
+    """
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        max_elapsed: Optional[float] = None,
+        retry_on: Callable[[Exception], bool] = is_retryable_error,
+        respect_headers: bool = True,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_elapsed = max_elapsed
+        self.retry_on = retry_on
+        self.respect_headers = respect_headers
+
+    def compute_delay(self, error: Exception, previous_delay: Optional[float]) -> float:
+        """
+        Returns the delay in seconds before retrying after `error`. Only a
+        provider delay can be longer than `max_delay`, it is returned as is.
+        """
+        if self.respect_headers and isinstance(error, AI_APICallError):
+            delay = retry_after_from_headers(error.response_headers, error.status_code)
+            if delay is not None:
+                if delay > self.max_delay:
+                    return delay
+                return min(self.max_delay, delay + random.uniform(0, delay * 0.1))
+
+        upper = max((previous_delay or self.base_delay) * 3, self.base_delay)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+    def next_delay(self, error: Exception, attempt: int, elapsed: float, previous_delay: Optional[float]) -> Optional[float]:
+        """
+        Returns the delay before the next attempt after `attempt` (1-based) failed
+        with `error`, or None when the error must be raised.
+        """
+        if attempt >= self.max_attempts or not self.retry_on(error):
+            return None
+
+        delay = self.compute_delay(error, previous_delay)
+        if delay > self.max_delay:
+            return None
+        if self.max_elapsed is not None and elapsed + delay > self.max_elapsed:
+            return None
+        return delay
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Calls `fn` and retries it according to the strategy."""
+        start = time.monotonic()
+        attempt = 0
+        delay: Optional[float] = None
+
+        recorder = current_recorder()
+        while True:
+            attempt += 1
+            if recorder is not None:
+                recorder.start_attempt()
+            try:
+                with span("attempt", "llm", attempt=attempt):
+                    res = fn()
+            except Exception as e:
+                if recorder is not None:
+                    recorder.end_attempt(e)
+                delay = self.next_delay(e, attempt, time.monotonic() - start, delay)
+                if delay is None:
+                    raise
+            else:
+                if recorder is not None:
+                    recorder.end_attempt()
+                return res
+            with timed("retry_sleep"):
+                time.sleep(delay)
+
+    async def call_async(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Async variant of `call`, waits with `asyncio.sleep`."""
+        start = time.monotonic()
+        attempt = 0
+        delay: Optional[float] = None
+
+        recorder = current_recorder()
+        while True:
+            attempt += 1
+            if recorder is not None:
+                recorder.start_attempt()
+            try:
+                with span("attempt", "llm", attempt=attempt):
+                    res = await fn()
+            except Exception as e:
+                if recorder is not None:
+                    recorder.end_attempt(e)
+                delay = self.next_delay(e, attempt, time.monotonic() - start, delay)
+                if delay is None:
+                    raise
+            else:
+                if recorder is not None:
+                    recorder.end_attempt()
+                return res
+            with timed("retry_sleep"):
+                await asyncio.sleep(delay)
+
+def resolve_retry_strategy(retry_strategy: Optional[RetryStrategy], max_retries: int) -> RetryStrategy:
+    """Returns `retry_strategy`, or the default strategy for the `max_retries` argument of the entry points."""
+    if retry_strategy is not None:
+        return retry_strategy
+    return RetryStrategy(max_attempts=max(max_retries, 1))
@@ -0,0 +1,69 @@
+from typing import Any, Callable, Dict, Hashable, Type
+from pydantic import BaseModel
+import json
+import threading
+import weakref
+
+# Keyed by the pydantic model class, entries go away with the class
+_json_schemas: "weakref.WeakKeyDictionary[type, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+_json_schema_texts: "weakref.WeakKeyDictionary[type, str]" = weakref.WeakKeyDictionary()
+_payloads: "weakref.WeakKeyDictionary[type, Dict[Hashable, Any]]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+def get_json_schema(schema: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Returns `schema.model_json_schema()`, generated once per model class. The
+    returned dict is shared between calls and must not be modified.
+    """
+    try:
+        return _json_schemas[schema]
+    except KeyError:
+        pass
+    except TypeError:
+        return schema.model_json_schema()
+
+    json_schema = schema.model_json_schema()
+    with _lock:
+        return _json_schemas.setdefault(schema, json_schema)
+
+def get_json_schema_text(schema: Type[BaseModel]) -> str:
+    """Returns the serialized JSON schema of `schema`, generated once per model class."""
+    try:
+        return _json_schema_texts[schema]
+    except KeyError:
+        pass
+    except TypeError:
+        return json.dumps(schema.model_json_schema())
+
+    text = json.dumps(get_json_schema(schema))
+    with _lock:
+        return _json_schema_texts.setdefault(schema, text)
+
+def compile_schema_payload(schema: Type[BaseModel], key: Hashable, build: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Returns the provider payload built by `build` from the JSON schema of
+    `schema`, such as a tool definition or a response format. Payloads are
+    cached per model class and `key`, which must identify everything else the
+    payload depends on (provider, tool name, description, ...).
+
+    A shallow copy is returned so callers can add top-level fields, nested
+    values are shared and must not be modified.
+    """
+    try:
+        payloads = _payloads.get(schema)
+    except TypeError:
+        return build(schema.model_json_schema())
+
+    payload = payloads.get(key) if payloads is not None else None
+    if payload is None:
+        payload = build(get_json_schema(schema))
+        with _lock:
+            payload = _payloads.setdefault(schema, {}).setdefault(key, payload)
+    return dict(payload)
+
+def clear_schema_cache() -> None:
+    """Drops every cached schema, for example after a model was rebuilt with `model_rebuild`."""
+    with _lock:
+        _json_schemas.clear()
+        _json_schema_texts.clear()
+        _payloads.clear()
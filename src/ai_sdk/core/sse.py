@@ -0,0 +1,82 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+from pydantic import BaseModel
+
+class ServerSentEvent(BaseModel):
+    event: Optional[str] = None
+    data: str = ""
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+class SSEDecoder:
+    """
+    Incremental decoder for a `text/event-stream` body, fed one line at a time
+    (without the trailing newline). An event is dispatched on each blank line.
+    """
+    def __init__(self):
+        self._event: Optional[str] = None
+        self._data: list = []
+        self._id: Optional[str] = None
+        self._retry: Optional[int] = None
+
+    def decode(self, line: str) -> Optional[ServerSentEvent]:
+        if not line:
+            return self.flush()
+
+        if line.startswith(":"):
+            # Comment line, used by some providers as a keep-alive
+            return None
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            self._id = value
+        elif field == "retry":
+            try:
+                self._retry = int(value)
+            except ValueError:
+                pass
+
+        return None
+
+    def flush(self) -> Optional[ServerSentEvent]:
+        if not self._data and self._event is None:
+            return None
+
+        event = ServerSentEvent(
+            event=self._event,
+            data="\n".join(self._data),
+            id=self._id,
+            retry=self._retry
+        )
+        self._event = None
+        self._data = []
+        self._retry = None
+        return event
+
+def iter_sse_events(lines: Iterable[str]) -> Iterator[ServerSentEvent]:
+    decoder = SSEDecoder()
+    for line in lines:
+        event = decoder.decode(line)
+        if event is not None:
+            yield event
+
+    event = decoder.flush()
+    if event is not None:
+        yield event
+
+async def aiter_sse_events(lines: AsyncIterable[str]) -> AsyncIterator[ServerSentEvent]:
+    decoder = SSEDecoder()
+    async for line in lines:
+        event = decoder.decode(line)
+        if event is not None:
+            yield event
+
+    event = decoder.flush()
+    if event is not None:
+        yield event
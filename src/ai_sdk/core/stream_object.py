@@ -0,0 +1,283 @@
+from .types import Message, Usage, Warning, FinishReason, ResponseMetadataPart, ObjectPart, StreamPart
+from typing import List, Optional, Dict, Any, Iterator, AsyncIterator, Union
+from pydantic import BaseModel
+from .language_model import LanguageModel, LanguageModelCallOptions, LanguageModelProviderMetadata, LanguageModelCallResult, LanguageModelUsage
+from .generate_object import _create_options, _parse_responses
+from .stream_text import _StreamState, _start_stream, _start_stream_async
+from .partial_json import PartialJSONParser
+from .retry_strategy import RetryStrategy, resolve_retry_strategy
+from .rate_limit import RateLimiter
+from .fallback import resolve_model
+import json
+
+class _ObjectStreamState(_StreamState):
+    def __init__(self, object_generation_mode: str):
+        super().__init__()
+        self.object_generation_mode = object_generation_mode
+        self.parser = PartialJSONParser()
+        self.last_repaired: Optional[str] = None
+        self.object: Optional[BaseModel] = None
+
+    def object_delta(self, part: StreamPart) -> Optional[ObjectPart]:
+        """Feeds the JSON text carried by `part` and returns the partial object if it changed."""
+        if self.object_generation_mode == "tool_call":
+            delta = part.args_text_delta if part.type == "tool-call-delta" else None
+        else:
+            delta = part.text_delta if part.type == "text-delta" else None
+
+        if not delta:
+            return None
+
+        self.parser.feed(delta)
+        repaired = self.parser.repaired()
+        if not repaired or repaired == self.last_repaired:
+            return None
+        self.last_repaired = repaired
+
+        try:
+            return ObjectPart(object=json.loads(repaired))
+        except ValueError:
+            return None
+
+    def validate(self, schema: BaseModel) -> None:
+        res = LanguageModelCallResult(
+            text=self.text,
+            tool_calls=self.tool_calls,
+            finish_reason=self.finish_reason,
+            usage=LanguageModelUsage(
+                prompt_tokens=self.usage.prompt_tokens,
+                completion_tokens=self.usage.completion_tokens
+            )
+        )
+        self.object = _parse_responses(self.object_generation_mode, res, schema)
+
+def _run_object_stream(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    schema: BaseModel,
+    state: _ObjectStreamState,
+    retry: RetryStrategy,
+    rate_limiter: Optional[RateLimiter] = None
+) -> Iterator[StreamPart]:
+    state.start()
+    parts = _start_stream(model, options, retry, rate_limiter)
+
+    state.start_step()
+    for part in parts:
+        yield state.add(part)
+
+        object_part = state.object_delta(part)
+        if object_part is not None:
+            yield object_part
+
+    state.validate(schema)
+    yield state.finish()
+
+async def _run_object_stream_async(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    schema: BaseModel,
+    state: _ObjectStreamState,
+    retry: RetryStrategy,
+    rate_limiter: Optional[RateLimiter] = None
+) -> AsyncIterator[StreamPart]:
+    state.start()
+    parts = await _start_stream_async(model, options, retry, rate_limiter)
+
+    state.start_step()
+    async for part in parts:
+        yield state.add(part)
+
+        object_part = state.object_delta(part)
+        if object_part is not None:
+            yield object_part
+
+    state.validate(schema)
+    yield state.finish()
+
+class StreamObjectResult:
+    """
+    Result of `stream_object`. The request is only sent once the stream is iterated.
+    `partial_object_stream` yields progressively more complete (unvalidated) dicts,
+    call `close()` to abort the request early. The final object is validated
+    against the schema once the stream is exhausted, reading `object` or one of the
+    other aggregated fields consumes the rest of the stream.
+    """
+    def __init__(self, parts: Iterator[StreamPart], state: _ObjectStreamState):
+        self._parts = parts
+        self._state = state
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.partial_object_stream
+
+    @property
+    def partial_object_stream(self) -> Iterator[Dict[str, Any]]:
+        for part in self._parts:
+            if part.type == "object":
+                yield part.object
+
+    @property
+    def full_stream(self) -> Iterator[StreamPart]:
+        yield from self._parts
+
+    def consume(self) -> "StreamObjectResult":
+        for _ in self._parts:
+            pass
+        return self
+
+    def close(self) -> None:
+        """Stops the stream early and releases the underlying HTTP connection."""
+        self._parts.close()
+
+    def _consumed(self) -> _ObjectStreamState:
+        if not self._state.done:
+            self.consume()
+        return self._state
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds between the start of the stream and the first generated token."""
+        return self._state.time_to_first_token
+
+    @property
+    def object(self) -> BaseModel:
+        return self._consumed().object
+
+    @property
+    def finish_reason(self) -> FinishReason:
+        return self._consumed().finish_reason
+
+    @property
+    def usage(self) -> Usage:
+        return self._consumed().usage
+
+    @property
+    def response(self) -> Optional[ResponseMetadataPart]:
+        return self._consumed().response
+
+    @property
+    def warnings(self) -> Optional[List[Warning]]:
+        return self._consumed().warnings
+
+class AsyncStreamObjectResult:
+    """
+    Result of `stream_object_async`. Iterate it with `async for` to receive partial
+    objects, the validated object is available once the stream is exhausted (or
+    after `await result.consume()`).
+    """
+    def __init__(self, parts: AsyncIterator[StreamPart], state: _ObjectStreamState):
+        self._parts = parts
+        self._state = state
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self.partial_object_stream
+
+    @property
+    async def partial_object_stream(self) -> AsyncIterator[Dict[str, Any]]:
+        async for part in self._parts:
+            if part.type == "object":
+                yield part.object
+
+    @property
+    async def full_stream(self) -> AsyncIterator[StreamPart]:
+        async for part in self._parts:
+            yield part
+
+    async def consume(self) -> "AsyncStreamObjectResult":
+        async for _ in self._parts:
+            pass
+        return self
+
+    async def aclose(self) -> None:
+        """Stops the stream early and releases the underlying HTTP connection."""
+        await self._parts.aclose()
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds between the start of the stream and the first generated token."""
+        return self._state.time_to_first_token
+
+    @property
+    def object(self) -> Optional[BaseModel]:
+        return self._state.object
+
+    @property
+    def finish_reason(self) -> Optional[FinishReason]:
+        return self._state.finish_reason
+
+    @property
+    def usage(self) -> Usage:
+        return self._state.usage
+
+    @property
+    def response(self) -> Optional[ResponseMetadataPart]:
+        return self._state.response
+
+    @property
+    def warnings(self) -> Optional[List[Warning]]:
+        return self._state.warnings
+
+def stream_object(
+    model: Union[LanguageModel, List[LanguageModel]],
+    schema: BaseModel,
+    schema_name: Optional[str] = None,
+    schema_description: Optional[str] = None,
+    system: Optional[str] = None,
+    prompt: Optional[str] = None,
+    messages: Optional[List[Message]] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+    presence_penalty: Optional[float] = None,
+    frequency_penalty: Optional[float] = None,
+    seed: Optional[int] = None,
+    max_retries: int = 3,
+    headers: Optional[Dict[str, str]] = None,
+    provider_options: Optional[LanguageModelProviderMetadata] = None,
+    retry_strategy: Optional[RetryStrategy] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> StreamObjectResult:
+    """
+    Streams a structured object, parsing the JSON (or tool call arguments) as it
+    arrives. The final object is validated against `schema`.
+    """
+    model = resolve_model(model)
+    options, object_generation_mode = _create_options(
+        model, schema, schema_name, schema_description, system, prompt, messages, max_tokens, temperature,
+        top_p, top_k, presence_penalty, frequency_penalty, seed, max_retries, headers, provider_options
+    )
+
+    state = _ObjectStreamState(object_generation_mode)
+    return StreamObjectResult(_run_object_stream(model, options, schema, state, resolve_retry_strategy(retry_strategy, max_retries), rate_limiter), state)
+
+def stream_object_async(
+    model: Union[LanguageModel, List[LanguageModel]],
+    schema: BaseModel,
+    schema_name: Optional[str] = None,
+    schema_description: Optional[str] = None,
+    system: Optional[str] = None,
+    prompt: Optional[str] = None,
+    messages: Optional[List[Message]] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+    presence_penalty: Optional[float] = None,
+    frequency_penalty: Optional[float] = None,
+    seed: Optional[int] = None,
+    max_retries: int = 3,
+    headers: Optional[Dict[str, str]] = None,
+    provider_options: Optional[LanguageModelProviderMetadata] = None,
+    retry_strategy: Optional[RetryStrategy] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> AsyncStreamObjectResult:
+    """Async variant of `stream_object`, iterate the result with `async for`."""
+    model = resolve_model(model)
+    options, object_generation_mode = _create_options(
+        model, schema, schema_name, schema_description, system, prompt, messages, max_tokens, temperature,
+        top_p, top_k, presence_penalty, frequency_penalty, seed, max_retries, headers, provider_options
+    )
+
+    state = _ObjectStreamState(object_generation_mode)
+    return AsyncStreamObjectResult(_run_object_stream_async(model, options, schema, state, resolve_retry_strategy(retry_strategy, max_retries), rate_limiter), state)
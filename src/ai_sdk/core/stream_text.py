@@ -0,0 +1,514 @@
+from .types import Message, Usage, Tool, ToolCallPart, ToolResultPart, Warning, FinishReason, ResponseMetadataPart, StepFinishPart, FinishPart, StreamPart, AssistantMessage, ToolMessage
+from typing import List, Optional, Dict, Literal, Any, Iterator, AsyncIterator, Union
+from .language_model import LanguageModel, LanguageModelCallOptions, LanguageModelProviderMetadata, LanguageModelStreamPart
+from .generate_text import _create_options
+from .tool_calls import execute_tool_calls, execute_tool_calls_async, get_tool_execute
+from .retry_strategy import RetryStrategy, resolve_retry_strategy
+from .rate_limit import RateLimiter
+from .fallback import FallbackModel, resolve_model
+import time
+
+class _StreamState:
+    """Aggregates the parts of a (possibly multi-step) stream as they go by."""
+    def __init__(self):
+        self.start_time: Optional[float] = None
+        self.time_to_first_token: Optional[float] = None
+        self.text = ""
+        self.tool_calls: List[ToolCallPart] = []
+        self.tool_results: List[ToolResultPart] = []
+        self.finish_reason: Optional[FinishReason] = None
+        self.usage = Usage(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+        self.response: Optional[ResponseMetadataPart] = None
+        self.warnings: Optional[List[Warning]] = None
+        self.provider_metadata: Optional[Dict[str, Dict[str, Any]]] = None
+        self.done = False
+
+    def start(self) -> None:
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+
+    def start_step(self) -> None:
+        self.text = ""
+        self.tool_calls = []
+
+    def add(self, part: LanguageModelStreamPart) -> StreamPart:
+        if self.time_to_first_token is None and part.type in ("text-delta", "tool-call-delta", "tool-call"):
+            self.time_to_first_token = time.perf_counter() - self.start_time
+
+        if part.type == "text-delta":
+            self.text += part.text_delta
+        elif part.type == "tool-call":
+            self.tool_calls.append(part)
+        elif part.type == "response-metadata":
+            self.response = part
+        elif part.type == "finish":
+            self.finish_reason = part.finish_reason
+            self.usage = Usage(
+                prompt_tokens=self.usage.prompt_tokens + part.usage.prompt_tokens,
+                completion_tokens=self.usage.completion_tokens + part.usage.completion_tokens,
+                total_tokens=self.usage.total_tokens + part.usage.total_tokens
+            )
+            self.warnings = part.warnings
+            self.provider_metadata = part.provider_metadata
+            # The model finishes each step, the stream only finishes once
+            return StepFinishPart(
+                finish_reason=part.finish_reason,
+                usage=part.usage,
+                warnings=part.warnings,
+                provider_metadata=part.provider_metadata
+            )
+
+        return part
+
+    def finish(self) -> FinishPart:
+        self.done = True
+        return FinishPart(
+            finish_reason=self.finish_reason or "unknown",
+            usage=self.usage,
+            warnings=self.warnings,
+            provider_metadata=self.provider_metadata
+        )
+
+def _open_model_stream(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    rate_limiter: Optional[RateLimiter]
+) -> Iterator[LanguageModelStreamPart]:
+    """Streams `model` once `rate_limiter` has budget for it."""
+    tokens = 0
+    if rate_limiter is not None:
+        tokens = rate_limiter.estimate(options, model)
+        rate_limiter.acquire(model, tokens)
+    parts = model.do_stream(options)
+    try:
+        first_part = next(parts, None)
+    except Exception as e:
+        _refund_rate_limiter(model, rate_limiter, e, tokens)
+        raise
+    _update_rate_limiter(model, rate_limiter, first_part)
+    if first_part is not None:
+        for part in _chain(first_part, parts):
+            _settle_rate_limiter(model, rate_limiter, part, tokens)
+            yield part
+
+async def _open_model_stream_async(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    rate_limiter: Optional[RateLimiter]
+) -> AsyncIterator[LanguageModelStreamPart]:
+    """Async variant of `_open_model_stream`."""
+    tokens = 0
+    if rate_limiter is not None:
+        tokens = rate_limiter.estimate(options, model)
+        await rate_limiter.acquire_async(model, tokens)
+    parts = model.do_stream_async(options)
+    try:
+        first_part = await parts.__anext__()
+    except StopAsyncIteration:
+        return
+    except Exception as e:
+        _refund_rate_limiter(model, rate_limiter, e, tokens)
+        raise
+    _update_rate_limiter(model, rate_limiter, first_part)
+    async for part in _chain_async(first_part, parts):
+        _settle_rate_limiter(model, rate_limiter, part, tokens)
+        yield part
+
+def _update_rate_limiter(model: LanguageModel, rate_limiter: Optional[RateLimiter], first_part: Optional[LanguageModelStreamPart]) -> None:
+    if rate_limiter is not None and first_part is not None and first_part.type == "response-metadata":
+        rate_limiter.update(model, first_part.headers)
+
+def _settle_rate_limiter(model: LanguageModel, rate_limiter: Optional[RateLimiter], part: LanguageModelStreamPart, tokens: int) -> None:
+    # The reservation includes the whole completion budget, the finish part tells what was actually used
+    if rate_limiter is not None and part.type == "finish":
+        rate_limiter.update(model, None, tokens, part.usage.prompt_tokens + part.usage.completion_tokens)
+
+def _refund_rate_limiter(model: LanguageModel, rate_limiter: Optional[RateLimiter], error: Exception, tokens: int) -> None:
+    # A stream that failed to open used no tokens, its reservation is returned
+    if rate_limiter is not None:
+        rate_limiter.update(model, getattr(error, "response_headers", None), tokens, 0)
+
+def _start_stream(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    retry: RetryStrategy,
+    rate_limiter: Optional[RateLimiter] = None
+) -> Iterator[LanguageModelStreamPart]:
+    """
+    Opens the model stream and waits for its first part. Only the connection is
+    retried, once parts have been handed out the stream can no longer be replayed.
+    """
+    def open_stream():
+        if isinstance(model, FallbackModel):
+            # Each model of the chain is rate limited on its own
+            parts = model.stream(lambda inner: _open_model_stream(inner, options, rate_limiter))
+        else:
+            parts = _open_model_stream(model, options, rate_limiter)
+        return parts, next(parts, None)
+
+    parts, first_part = retry.call(open_stream)
+
+    if first_part is None:
+        return iter(())
+    return _chain(first_part, parts)
+
+def _chain(first_part: LanguageModelStreamPart, parts: Iterator[LanguageModelStreamPart]) -> Iterator[LanguageModelStreamPart]:
+    # Closing the chain (e.g. when the caller stops early) closes the HTTP stream
+    try:
+        yield first_part
+        yield from parts
+    finally:
+        parts.close()
+
+async def _start_stream_async(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    retry: RetryStrategy,
+    rate_limiter: Optional[RateLimiter] = None
+) -> AsyncIterator[LanguageModelStreamPart]:
+    """Async variant of `_start_stream`."""
+    async def open_stream():
+        if isinstance(model, FallbackModel):
+            parts = model.stream_async(lambda inner: _open_model_stream_async(inner, options, rate_limiter))
+        else:
+            parts = _open_model_stream_async(model, options, rate_limiter)
+        try:
+            return parts, await parts.__anext__()
+        except StopAsyncIteration:
+            return parts, None
+
+    parts, first_part = await retry.call_async(open_stream)
+
+    if first_part is None:
+        return _empty_stream()
+    return _chain_async(first_part, parts)
+
+async def _empty_stream() -> AsyncIterator[LanguageModelStreamPart]:
+    return
+    yield
+
+async def _chain_async(first_part: LanguageModelStreamPart, parts: AsyncIterator[LanguageModelStreamPart]) -> AsyncIterator[LanguageModelStreamPart]:
+    try:
+        yield first_part
+        async for part in parts:
+            yield part
+    finally:
+        await parts.aclose()
+
+def _can_execute(tool_calls: List[ToolCallPart], tools: Optional[Dict[str, Tool]]) -> bool:
+    if not tool_calls or not tools:
+        return False
+    return all(get_tool_execute(tools.get(tool_call.tool_name)) is not None for tool_call in tool_calls)
+
+def _append_tool_messages(
+    options: LanguageModelCallOptions,
+    tool_calls: List[ToolCallPart],
+    tool_results: List[ToolResultPart]
+) -> None:
+    options.messages.append(
+        AssistantMessage(
+            content="",
+            tool_calls=tool_calls
+        )
+    )
+    for tool_result in tool_results:
+        options.messages.append(
+            ToolMessage(
+                content=tool_result.result,
+                tool_call_id=tool_result.tool_call_id
+            )
+        )
+
+def _run_stream(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    tools: Optional[Dict[str, Tool]],
+    max_steps: int,
+    state: _StreamState,
+    retry: RetryStrategy,
+    max_tool_concurrency: Optional[int] = None,
+    tool_timeout: Optional[float] = None,
+    rate_limiter: Optional[RateLimiter] = None
+) -> Iterator[StreamPart]:
+    state.start()
+    step = 0
+
+    while True:
+        parts = _start_stream(model, options, retry, rate_limiter)
+
+        state.start_step()
+        for part in parts:
+            yield state.add(part)
+
+        step += 1
+
+        if _can_execute(state.tool_calls, tools):
+            tool_results = execute_tool_calls(state.tool_calls, tools, max_tool_concurrency, tool_timeout)
+            state.tool_results = tool_results
+            yield from tool_results
+        else:
+            tool_results = []
+
+        if step >= max_steps or not tool_results:
+            break
+
+        _append_tool_messages(options, state.tool_calls, tool_results)
+
+    yield state.finish()
+
+async def _run_stream_async(
+    model: LanguageModel,
+    options: LanguageModelCallOptions,
+    tools: Optional[Dict[str, Tool]],
+    max_steps: int,
+    state: _StreamState,
+    retry: RetryStrategy,
+    max_tool_concurrency: Optional[int] = None,
+    tool_timeout: Optional[float] = None,
+    rate_limiter: Optional[RateLimiter] = None
+) -> AsyncIterator[StreamPart]:
+    state.start()
+    step = 0
+
+    while True:
+        parts = await _start_stream_async(model, options, retry, rate_limiter)
+
+        state.start_step()
+        async for part in parts:
+            yield state.add(part)
+
+        step += 1
+
+        if _can_execute(state.tool_calls, tools):
+            tool_results = await execute_tool_calls_async(state.tool_calls, tools, max_tool_concurrency, tool_timeout)
+            state.tool_results = tool_results
+            for tool_result in tool_results:
+                yield tool_result
+        else:
+            tool_results = []
+
+        if step >= max_steps or not tool_results:
+            break
+
+        _append_tool_messages(options, state.tool_calls, tool_results)
+
+    yield state.finish()
+
+class StreamTextResult:
+    """
+    Result of `stream_text`. The request is only sent once the stream is iterated,
+    either through `full_stream` (every part) or `text_stream` (text deltas only).
+    The aggregated fields are filled in as the parts go by, reading one of them
+    before the stream is exhausted consumes the rest of it.
+    """
+    def __init__(self, parts: Iterator[StreamPart], state: _StreamState):
+        self._parts = parts
+        self._state = state
+
+    def __iter__(self) -> Iterator[StreamPart]:
+        return self.full_stream
+
+    @property
+    def full_stream(self) -> Iterator[StreamPart]:
+        yield from self._parts
+
+    @property
+    def text_stream(self) -> Iterator[str]:
+        for part in self._parts:
+            if part.type == "text-delta":
+                yield part.text_delta
+
+    def consume(self) -> "StreamTextResult":
+        for _ in self._parts:
+            pass
+        return self
+
+    def close(self) -> None:
+        """Stops the stream early and releases the underlying HTTP connection."""
+        self._parts.close()
+
+    def _consumed(self) -> _StreamState:
+        if not self._state.done:
+            self.consume()
+        return self._state
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds between the start of the stream and the first generated token."""
+        return self._state.time_to_first_token
+
+    @property
+    def text(self) -> str:
+        return self._consumed().text
+
+    @property
+    def tool_calls(self) -> List[ToolCallPart]:
+        return self._consumed().tool_calls
+
+    @property
+    def tool_results(self) -> List[ToolResultPart]:
+        return self._consumed().tool_results
+
+    @property
+    def finish_reason(self) -> FinishReason:
+        return self._consumed().finish_reason
+
+    @property
+    def usage(self) -> Usage:
+        return self._consumed().usage
+
+    @property
+    def response(self) -> Optional[ResponseMetadataPart]:
+        return self._consumed().response
+
+    @property
+    def warnings(self) -> Optional[List[Warning]]:
+        return self._consumed().warnings
+
+    @property
+    def provider_metadata(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self._consumed().provider_metadata
+
+class AsyncStreamTextResult:
+    """
+    Result of `stream_text_async`. Iterate it with `async for`, the aggregated fields
+    are available once the stream is exhausted (or after `await result.consume()`).
+    """
+    def __init__(self, parts: AsyncIterator[StreamPart], state: _StreamState):
+        self._parts = parts
+        self._state = state
+
+    def __aiter__(self) -> AsyncIterator[StreamPart]:
+        return self.full_stream
+
+    @property
+    async def full_stream(self) -> AsyncIterator[StreamPart]:
+        async for part in self._parts:
+            yield part
+
+    @property
+    async def text_stream(self) -> AsyncIterator[str]:
+        async for part in self._parts:
+            if part.type == "text-delta":
+                yield part.text_delta
+
+    async def consume(self) -> "AsyncStreamTextResult":
+        async for _ in self._parts:
+            pass
+        return self
+
+    async def aclose(self) -> None:
+        """Stops the stream early and releases the underlying HTTP connection."""
+        await self._parts.aclose()
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds between the start of the stream and the first generated token."""
+        return self._state.time_to_first_token
+
+    @property
+    def text(self) -> str:
+        return self._state.text
+
+    @property
+    def tool_calls(self) -> List[ToolCallPart]:
+        return self._state.tool_calls
+
+    @property
+    def tool_results(self) -> List[ToolResultPart]:
+        return self._state.tool_results
+
+    @property
+    def finish_reason(self) -> Optional[FinishReason]:
+        return self._state.finish_reason
+
+    @property
+    def usage(self) -> Usage:
+        return self._state.usage
+
+    @property
+    def response(self) -> Optional[ResponseMetadataPart]:
+        return self._state.response
+
+    @property
+    def warnings(self) -> Optional[List[Warning]]:
+        return self._state.warnings
+
+    @property
+    def provider_metadata(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self._state.provider_metadata
+
+def stream_text(
+    model: Union[LanguageModel, List[LanguageModel]],
+    system: Optional[str] = None,
+    prompt: Optional[str] = None,
+    messages: Optional[List[Message]] = None,
+    tools: Optional[Dict[str, Tool]] = None,
+    tool_choice: Optional[Literal["auto", "none"]] = "auto",
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+    presence_penalty: Optional[float] = None,
+    frequency_penalty: Optional[float] = None,
+    stop_sequences: Optional[List[str]] = None,
+    seed: Optional[int] = None,
+    max_retries: int = 3,
+    headers: Optional[Dict[str, str]] = None,
+    max_steps: int = 1,
+    provider_options: Optional[LanguageModelProviderMetadata] = None,
+    max_tool_concurrency: Optional[int] = None,
+    tool_timeout: Optional[float] = None,
+    retry_strategy: Optional[RetryStrategy] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> StreamTextResult:
+    """
+    Streams text deltas, tool call deltas, the finish reason and usage as the
+    provider generates them.
+    """
+    model = resolve_model(model)
+    options = _create_options(
+        model, system, prompt, messages, tools, tool_choice, max_tokens, temperature, top_p, top_k,
+        presence_penalty, frequency_penalty, stop_sequences, seed, max_retries, headers, provider_options
+    )
+    if tool_choice == "none":
+        tools = None
+
+    state = _StreamState()
+    return StreamTextResult(_run_stream(model, options, tools, max_steps, state, resolve_retry_strategy(retry_strategy, max_retries), max_tool_concurrency, tool_timeout, rate_limiter), state)
+
+def stream_text_async(
+    model: Union[LanguageModel, List[LanguageModel]],
+    system: Optional[str] = None,
+    prompt: Optional[str] = None,
+    messages: Optional[List[Message]] = None,
+    tools: Optional[Dict[str, Tool]] = None,
+    tool_choice: Optional[Literal["auto", "none"]] = "auto",
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+    presence_penalty: Optional[float] = None,
+    frequency_penalty: Optional[float] = None,
+    stop_sequences: Optional[List[str]] = None,
+    seed: Optional[int] = None,
+    max_retries: int = 3,
+    headers: Optional[Dict[str, str]] = None,
+    max_steps: int = 1,
+    provider_options: Optional[LanguageModelProviderMetadata] = None,
+    max_tool_concurrency: Optional[int] = None,
+    tool_timeout: Optional[float] = None,
+    retry_strategy: Optional[RetryStrategy] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> AsyncStreamTextResult:
+    """Async variant of `stream_text`, iterate the result with `async for`."""
+    model = resolve_model(model)
+    options = _create_options(
+        model, system, prompt, messages, tools, tool_choice, max_tokens, temperature, top_p, top_k,
+        presence_penalty, frequency_penalty, stop_sequences, seed, max_retries, headers, provider_options
+    )
+    if tool_choice == "none":
+        tools = None
+
+    state = _StreamState()
+    return AsyncStreamTextResult(_run_stream_async(model, options, tools, max_steps, state, resolve_retry_strategy(retry_strategy, max_retries), max_tool_concurrency, tool_timeout, rate_limiter), state)
@@ -0,0 +1,137 @@
+from typing import Any, Callable, Iterator, List, Mapping, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .types import AttemptTiming, StepTiming, TimingBreakdown
+from .errors import AI_APICallError
+from .utils import get_header
+import re
+import time
+
+# Headers carrying the time the provider spent on the request, in milliseconds
+SERVER_PROCESSING_HEADERS = ["openai-processing-ms", "x-envoy-upstream-service-time"]
+
+_SERVER_TIMING_DURATION = re.compile(r"dur=([\d.]+)")
+
+def server_processing_time(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Returns the processing time reported by the provider in seconds, if any."""
+    if not headers:
+        return None
+
+    for name in SERVER_PROCESSING_HEADERS:
+        value = get_header(headers, name)
+        if value is not None:
+            try:
+                return float(value) / 1000.0
+            except ValueError:
+                pass
+
+    value = get_header(headers, "server-timing")
+    if value is not None:
+        match = _SERVER_TIMING_DURATION.search(value)
+        if match:
+            return float(match.group(1)) / 1000.0
+    return None
+
+class TimingRecorder:
+    """
+    Collects the timing breakdown of one `generate_text` or `generate_object`
+    call. Phases are exclusive: the time of a phase nested in another one (such
+    as `convert_messages` inside `build_args`) is only counted in the inner one,
+    so the phases of an attempt add up to at most its duration.
+    """
+    def __init__(self):
+        self.breakdown = TimingBreakdown()
+        self._start = time.perf_counter()
+        self._step: Optional[StepTiming] = None
+        self._step_start = 0.0
+        self._attempt: Optional[AttemptTiming] = None
+        self._attempt_start = 0.0
+        self._children: List[float] = []
+
+    def start_step(self) -> None:
+        self._step = StepTiming(step=len(self.breakdown.steps) + 1)
+        self._step_start = time.perf_counter()
+        self.breakdown.steps.append(self._step)
+
+    def end_step(self) -> None:
+        if self._step is not None:
+            self._step.duration = time.perf_counter() - self._step_start
+            self._step = None
+
+    def start_attempt(self) -> None:
+        if self._step is None:
+            self.start_step()
+        self._attempt = AttemptTiming()
+        self._attempt_start = time.perf_counter()
+        self._step.attempts.append(self._attempt)
+
+    def end_attempt(self, error: Optional[Exception] = None) -> None:
+        if self._attempt is None:
+            return
+        self._attempt.duration = time.perf_counter() - self._attempt_start
+        if error is not None:
+            self._attempt.error = f"{type(error).__name__}: {error}"
+            if isinstance(error, AI_APICallError):
+                self._attempt.server_processing_time = server_processing_time(error.response_headers)
+        self._attempt = None
+
+    def record_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Stores the server processing time of the last attempt of the current step."""
+        step = self._step or (self.breakdown.steps[-1] if self.breakdown.steps else None)
+        if step is not None and step.attempts:
+            step.attempts[-1].server_processing_time = server_processing_time(headers)
+
+    def add(self, name: str, seconds: float) -> None:
+        if self._attempt is not None:
+            phases = self._attempt.phases
+        elif self._step is not None:
+            phases = self._step.phases
+        else:
+            return
+        phases[name] = phases.get(name, 0.0) + seconds
+
+    def finish(self) -> TimingBreakdown:
+        self.end_attempt()
+        self.end_step()
+        self.breakdown.duration = time.perf_counter() - self._start
+        return self.breakdown
+
+_current_recorder: ContextVar[Optional[TimingRecorder]] = ContextVar("ai_sdk_timing_recorder", default=None)
+
+def current_recorder() -> Optional[TimingRecorder]:
+    return _current_recorder.get()
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Adds the time spent in the block to `phase` of the current attempt (or step)."""
+    recorder = _current_recorder.get()
+    if recorder is None:
+        yield
+        return
+
+    recorder._children.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        children = recorder._children.pop()
+        recorder.add(phase, elapsed - children)
+        if recorder._children:
+            recorder._children[-1] += elapsed
+
+@contextmanager
+def record_timing(on_timing: Optional[Callable[[TimingBreakdown], Any]] = None) -> Iterator[TimingRecorder]:
+    """
+    Records the timing breakdown of the calls made in the block. `on_timing` is
+    called with the breakdown once the block exits, also when it raised.
+    """
+    recorder = TimingRecorder()
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+        recorder.finish()
+        if on_timing is not None:
+            on_timing(recorder.breakdown)
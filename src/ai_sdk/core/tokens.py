@@ -0,0 +1,159 @@
+from typing import Any, Dict, Hashable, List, Optional, Type
+from pydantic import BaseModel
+from .types import Message, AssistantMessage, TextPart, ImagePart, ToolCallPart
+from .message_cache import convert_message
+from .schema_cache import get_json_schema_text
+from . import fast_json
+import logging
+import math
+import threading
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - depends on the installed extras
+    tiktoken = None
+
+LOGGER = logging.getLogger(__name__)
+
+class ContextWindow(BaseModel):
+    """Size limits of a model, in tokens."""
+    context_window: int  # Prompt and completion together
+    max_output_tokens: int
+
+_registered_windows: Dict[str, ContextWindow] = {}
+
+def register_context_window(model_id: str, context_window: int, max_output_tokens: int) -> None:
+    """Sets the context window of `model_id`, for models missing from the provider tables or to override them."""
+    _registered_windows[model_id] = ContextWindow(context_window=context_window, max_output_tokens=max_output_tokens)
+
+def get_registered_context_window(model_id: str) -> Optional[ContextWindow]:
+    return _registered_windows.get(model_id)
+
+class TokenEstimator:
+    """
+    Counts the tokens of a prompt locally, before it is sent. Subclasses
+    implement `count_text`; messages add a fixed overhead for their role and
+    separators and images a flat estimate (providers bill between about 85
+    and 1600 tokens depending on the image size). Message counts are memoized
+    per message object, so the growing history of a tool loop is only counted
+    once.
+    """
+    message_overhead = 4
+    image_tokens = 1000
+
+    @property
+    def key(self) -> Hashable:
+        """Identifies the estimator in the per-message cache."""
+        return (type(self).__name__,)
+
+    def count_text(self, text: str) -> int:
+        raise NotImplementedError
+
+    def _count_parts(self, parts: List[Any]) -> int:
+        tokens = 0
+        for part in parts:
+            if isinstance(part, TextPart):
+                tokens += self.count_text(part.text)
+            elif isinstance(part, ImagePart):
+                tokens += self.image_tokens
+            elif isinstance(part, ToolCallPart):
+                tokens += self.count_text(part.tool_name) + self.count_text(fast_json.dumps_text(part.args))
+        return tokens
+
+    def _count_message(self, message: Message) -> int:
+        tokens = self.message_overhead
+        content = message.content
+        if isinstance(content, str):
+            tokens += self.count_text(content)
+        else:
+            tokens += self._count_parts(content)
+        if isinstance(message, AssistantMessage) and message.tool_calls:
+            tokens += self._count_parts(message.tool_calls)
+        return tokens
+
+    def count_message(self, message: Message) -> int:
+        return convert_message(message, ("tokens", self.key), self._count_message)
+
+    def count_messages(self, messages: List[Message]) -> int:
+        return sum(self.count_message(message) for message in messages)
+
+    def count_tools(self, tools: Optional[Dict[str, Any]]) -> int:
+        tokens = 0
+        for name, tool in (tools or {}).items():
+            if isinstance(tool, dict):
+                description, parameters = tool.get("description"), tool.get("parameters")
+            else:
+                description, parameters = tool.description, tool.parameters
+            tokens += self.count_text(name) + self.count_text(description or "")
+            if parameters is not None:
+                tokens += self.count_text(get_json_schema_text(parameters))
+        return tokens
+
+    def count_prompt(
+        self,
+        messages: List[Message],
+        tools: Optional[Dict[str, Any]] = None,
+        response_format: Optional[Type[BaseModel]] = None
+    ) -> int:
+        """Counts the messages, the tool definitions and the response format schema of a request."""
+        tokens = self.count_messages(messages) + self.count_tools(tools)
+        if response_format is not None:
+            tokens += self.count_text(get_json_schema_text(response_format))
+        return tokens
+
+class CharacterTokenEstimator(TokenEstimator):
+    """
+    Estimates tokens from the number of characters. Works for every provider
+    without any dependency, typical English text and JSON are around four
+    characters per token.
+    """
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+
+    @property
+    def key(self) -> Hashable:
+        return ("chars", self.chars_per_token)
+
+    def count_text(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+_encodings: Dict[str, Any] = {}
+_failed_encodings: Dict[str, str] = {}
+_encodings_lock = threading.Lock()
+
+def _get_encoding(name: str) -> Any:
+    if name in _encodings:
+        return _encodings[name]
+    if tiktoken is None or name in _failed_encodings:
+        return None
+    with _encodings_lock:
+        if name not in _encodings and name not in _failed_encodings:
+            try:
+                _encodings[name] = tiktoken.get_encoding(name)
+            except Exception as e:
+                # tiktoken downloads the encoding on first use, it is not available offline
+                _failed_encodings[name] = str(e)
+                LOGGER.warning("Could not load the %s encoding, falling back to character counts: %s", name, e)
+    return _encodings.get(name)
+
+class TiktokenTokenEstimator(TokenEstimator):
+    """
+    Exact token counts for OpenAI models with tiktoken (install the `tokens`
+    extra). Falls back to `fallback` when tiktoken is not installed or the
+    encoding cannot be loaded.
+    """
+    def __init__(self, encoding: str = "o200k_base", fallback: Optional[TokenEstimator] = None):
+        self.encoding = encoding
+        self.fallback = fallback or CharacterTokenEstimator()
+
+    @property
+    def key(self) -> Hashable:
+        return ("tiktoken", self.encoding)
+
+    def count_text(self, text: str) -> int:
+        encoding = _get_encoding(self.encoding)
+        if encoding is None:
+            return self.fallback.count_text(text)
+        return len(encoding.encode(text, disallowed_special=()))
+
+DEFAULT_TOKEN_ESTIMATOR = CharacterTokenEstimator()
@@ -1,32 +1,221 @@
-from typing import List, Dict
+from typing import List, Dict, Any, Callable, Optional
 from .types import ToolCallPart, ToolResultPart, Tool
 from .errors import AI_ToolExecutionError
+from .tracing import span, capture_payload
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+import asyncio
+import contextvars
+import inspect
 import json
-import opik
+import time
 
-@opik.track
-def execute_tool_calls(
-    tool_calls: List[ToolCallPart],
-    tools: Dict[str, Tool]
-) -> List[ToolResultPart]:
-    results = []
+# How often the pool is polled while a queued tool call with a timeout waits to start
+_TIMEOUT_POLL_INTERVAL = 0.05
 
-    try:
-        for tool_call in tool_calls:
-            tool = tools[tool_call.tool_name]
-            result = tool["execute"](**tool_call.args)
-            results.append(
-                ToolResultPart(
-                    tool_call_id=tool_call.tool_call_id,
-                    tool_name=tool_call.tool_name,
-                    result=json.dumps(result)
-                )
-            )
-    except Exception as e:
+def _get_tool_attribute(tool: Any, name: str) -> Any:
+    if tool is None:
+        return None
+    if isinstance(tool, dict):
+        return tool.get(name)
+    return getattr(tool, name, None)
+
+def get_tool_execute(tool: Any) -> Optional[Callable[..., Any]]:
+    """Returns the `execute` callable of a tool given either as a `Tool` or a dict."""
+    return _get_tool_attribute(tool, "execute")
+
+def _get_tool_timeout(tool: Any, default_timeout: Optional[float]) -> Optional[float]:
+    timeout = _get_tool_attribute(tool, "timeout")
+    return timeout if timeout is not None else default_timeout
+
+def _get_execute(tool_call: ToolCallPart, tools: Dict[str, Tool]) -> Callable[..., Any]:
+    execute = get_tool_execute(tools.get(tool_call.tool_name))
+    if execute is None:
         raise AI_ToolExecutionError(
             tool_name=tool_call.tool_name,
             tool_args=tool_call.args,
             tool_call_id=tool_call.tool_call_id,
+            message=f"Tool {tool_call.tool_name} has no execute function"
+        )
+    return execute
+
+def _to_result(tool_call: ToolCallPart, result: Any) -> ToolResultPart:
+    return ToolResultPart(
+        tool_call_id=tool_call.tool_call_id,
+        tool_name=tool_call.tool_name,
+        result=json.dumps(result)
+    )
+
+def _execution_error(tool_call: ToolCallPart, cause: BaseException, timeout: Optional[float] = None) -> AI_ToolExecutionError:
+    if isinstance(cause, AI_ToolExecutionError):
+        return cause
+    if isinstance(cause, (TimeoutError, asyncio.TimeoutError)):
+        return AI_ToolExecutionError(
+            tool_name=tool_call.tool_name,
+            tool_args=tool_call.args,
+            tool_call_id=tool_call.tool_call_id,
+            message=f"Tool {tool_call.tool_name} timed out after {timeout}s",
+            cause=cause
         )
-    
-    return results
\ No newline at end of file
+    return AI_ToolExecutionError(
+        tool_name=tool_call.tool_name,
+        tool_args=tool_call.args,
+        tool_call_id=tool_call.tool_call_id,
+        cause=cause
+    )
+
+class _Result:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+def _run_sync(execute: Callable[..., Any], args: Dict[str, Any]) -> Any:
+    result = execute(**args)
+    if inspect.isawaitable(result):
+        # Coroutine tools get their own event loop in the worker thread
+        return asyncio.run(_await(result))
+    return result
+
+async def _await(awaitable: Any) -> Any:
+    return await awaitable
+
+def _run_tool(tool_call: ToolCallPart, execute: Callable[..., Any]) -> Any:
+    with span(tool_call.tool_name, "tool", tool_call_id=tool_call.tool_call_id):
+        capture_payload(input=tool_call.args)
+        result = _run_sync(execute, tool_call.args)
+        capture_payload(output=result)
+        return result
+
+def execute_tool_calls(
+    tool_calls: List[ToolCallPart],
+    tools: Dict[str, Tool],
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> List[ToolResultPart]:
+    """
+    Executes the tool calls of a step concurrently on a thread pool and returns
+    the results in the order of the calls.
+
+    Args:
+        tool_calls: Tool calls returned by the model
+        tools: Tools available to the model, keyed by name
+        max_concurrency: Maximum number of tools running at the same time (defaults to all of them)
+        timeout: Default timeout in seconds for each tool call, a tool's own `timeout` takes precedence
+
+    Raises:
+        AI_ToolExecutionError: If a tool fails or times out, for the first such call in call order
+    """
+    if not tool_calls:
+        return []
+
+    executes = [_get_execute(tool_call, tools) for tool_call in tool_calls]
+    timeouts = [_get_tool_timeout(tools.get(tool_call.tool_name), timeout) for tool_call in tool_calls]
+
+    # A single call without a timeout does not need a thread
+    if len(tool_calls) == 1 and timeouts[0] is None:
+        try:
+            return [_to_result(tool_calls[0], _run_tool(tool_calls[0], executes[0]))]
+        except Exception as e:
+            raise _execution_error(tool_calls[0], e) from e
+
+    started: Dict[int, float] = {}
+
+    def run(index: int) -> Any:
+        started[index] = time.monotonic()
+        return _run_tool(tool_calls[index], executes[index])
+
+    max_workers = min(max_concurrency or len(tool_calls), len(tool_calls))
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai_sdk_tool")
+    try:
+        # Each worker runs in a copy of the caller's context so tool spans nest under the current step
+        futures: Dict[Future, int] = {
+            executor.submit(contextvars.copy_context().run, run, index): index for index in range(len(tool_calls))
+        }
+        outcomes: Dict[int, Any] = {}
+        pending = set(futures)
+
+        while pending:
+            now = time.monotonic()
+            deadlines = []
+            for future in list(pending):
+                index = futures[future]
+                if timeouts[index] is None or index not in started:
+                    continue
+                remaining = started[index] + timeouts[index] - now
+                if remaining <= 0:
+                    pending.discard(future)
+                    outcomes[index] = TimeoutError()
+                else:
+                    deadlines.append(remaining)
+
+            if not pending:
+                break
+
+            waiting_to_start = any(timeouts[futures[future]] is not None and futures[future] not in started for future in pending)
+            wait_timeout = min(deadlines) if deadlines else None
+            if waiting_to_start:
+                wait_timeout = min(wait_timeout or _TIMEOUT_POLL_INTERVAL, _TIMEOUT_POLL_INTERVAL)
+
+            done, pending = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                exception = future.exception()
+                outcomes[index] = exception if exception is not None else _Result(future.result())
+    finally:
+        # Timed out tools cannot be interrupted, do not wait for them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for index, tool_call in enumerate(tool_calls):
+        outcome = outcomes[index]
+        if isinstance(outcome, BaseException):
+            raise _execution_error(tool_call, outcome, timeouts[index]) from outcome
+        results.append(_to_result(tool_call, outcome.value))
+
+    return results
+
+async def execute_tool_calls_async(
+    tool_calls: List[ToolCallPart],
+    tools: Dict[str, Tool],
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> List[ToolResultPart]:
+    """
+    Async variant of `execute_tool_calls`. Coroutine tools are awaited directly
+    and sync tools run in worker threads, all of them concurrently through
+    `asyncio.gather`.
+    """
+    if not tool_calls:
+        return []
+
+    executes = [_get_execute(tool_call, tools) for tool_call in tool_calls]
+    timeouts = [_get_tool_timeout(tools.get(tool_call.tool_name), timeout) for tool_call in tool_calls]
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def call(index: int) -> Any:
+        execute = executes[index]
+        tool_call = tool_calls[index]
+        with span(tool_call.tool_name, "tool", tool_call_id=tool_call.tool_call_id):
+            capture_payload(input=tool_call.args)
+            if inspect.iscoroutinefunction(execute):
+                result = await execute(**tool_call.args)
+            else:
+                result = await asyncio.to_thread(_run_sync, execute, tool_call.args)
+            capture_payload(output=result)
+            return result
+
+    async def run(index: int) -> Any:
+        if semaphore is None:
+            return await asyncio.wait_for(call(index), timeouts[index])
+        async with semaphore:
+            return await asyncio.wait_for(call(index), timeouts[index])
+
+    outcomes = await asyncio.gather(*[run(index) for index in range(len(tool_calls))], return_exceptions=True)
+
+    results = []
+    for index, (tool_call, outcome) in enumerate(zip(tool_calls, outcomes)):
+        if isinstance(outcome, BaseException):
+            raise _execution_error(tool_call, outcome, timeouts[index]) from outcome
+        results.append(_to_result(tool_call, outcome))
+
+    return results
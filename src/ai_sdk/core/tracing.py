@@ -0,0 +1,363 @@
+from typing import Any, Callable, Dict, List, Optional
+from contextvars import ContextVar
+import datetime
+import functools
+import inspect
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+
+LOGGER = logging.getLogger(__name__)
+
+TRACING_ENV_VAR = "AI_SDK_TRACING"
+SAMPLE_RATE_ENV_VAR = "AI_SDK_TRACING_SAMPLE_RATE"
+
+class Span:
+    """
+    A span recorded in memory. Spans are only handed to the exporter, as a tree
+    under the root span, once the whole trace ended and was sampled.
+    """
+    __slots__ = ("name", "kind", "attributes", "input", "output", "error", "error_traceback", "start_time", "end_time", "children")
+
+    def __init__(self, name: str, kind: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.input: Optional[str] = None
+        self.output: Optional[str] = None
+        self.error: Optional[str] = None
+        self.error_traceback: Optional[str] = None
+        # Wall clock time in nanoseconds since the epoch, as OpenTelemetry expects
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+        self.children: List["Span"] = []
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+        self.error_traceback = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+
+    def has_error(self) -> bool:
+        return self.error is not None or any(child.has_error() for child in self.children)
+
+class SpanExporter:
+    """Receives the root span of every sampled trace."""
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+def _datetime(nanoseconds: Optional[int]) -> datetime.datetime:
+    if nanoseconds is None:
+        nanoseconds = time.time_ns()
+    return datetime.datetime.fromtimestamp(nanoseconds / 1e9, tz=datetime.timezone.utc)
+
+class OpikExporter(SpanExporter):
+    """Logs traces to Opik. The client is created, and opik imported, on the first export."""
+    _SPAN_TYPES = {"llm": "llm", "tool": "tool"}
+
+    def __init__(self, client: Any = None, project_name: Optional[str] = None):
+        self._client = client
+        self._project_name = project_name
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            try:
+                import opik
+            except ImportError as e:
+                raise ImportError("Opik tracing requires the `opik` package, install it with `pip install ai-sdk-py[opik]`") from e
+            self._client = opik.Opik(project_name=self._project_name)
+        return self._client
+
+    def _fields(self, span: Span) -> Dict[str, Any]:
+        fields = {
+            "name": span.name,
+            "start_time": _datetime(span.start_time),
+            "end_time": _datetime(span.end_time),
+            "metadata": dict(span.attributes),
+            "input": {"input": span.input} if span.input is not None else None,
+            "output": {"output": span.output} if span.output is not None else None,
+        }
+        if span.error is not None:
+            fields["error_info"] = {
+                "exception_type": span.error.split(":", 1)[0],
+                "message": span.error,
+                "traceback": span.error_traceback or "",
+            }
+        return fields
+
+    def _export_children(self, parent: Any, span: Span) -> None:
+        for child in span.children:
+            fields = self._fields(child)
+            fields["type"] = self._SPAN_TYPES.get(child.kind, "general")
+            if "usage" in child.attributes:
+                fields["usage"] = child.attributes["usage"]
+            self._export_children(parent.span(**fields), child)
+
+    def export(self, span: Span) -> None:
+        trace = self._get_client().trace(**self._fields(span))
+        # The root span is the trace itself, its children become the top-level spans
+        self._export_children(trace, span)
+
+class OpenTelemetryExporter(SpanExporter):
+    """
+    Replays traces into an OpenTelemetry tracer, with their original timestamps.
+    Requires the `otel` extra (`opentelemetry-api`); configure the tracer
+    provider, exporters and processors with the OpenTelemetry SDK as usual.
+    """
+    def __init__(self, tracer: Any = None):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetry tracing requires the `opentelemetry-api` package, install it with `pip install ai-sdk-py[otel]`"
+            ) from e
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("ai_sdk")
+
+    @staticmethod
+    def _attribute(value: Any) -> Any:
+        if isinstance(value, (str, bool, int, float)):
+            return value
+        return str(value)
+
+    def _attributes(self, span: Span) -> Dict[str, Any]:
+        attributes = {"ai_sdk.span.kind": span.kind}
+        for key, value in span.attributes.items():
+            if isinstance(value, dict):
+                for name, item in value.items():
+                    attributes[f"{key}.{name}"] = self._attribute(item)
+            elif value is not None:
+                attributes[key] = self._attribute(value)
+        if span.input is not None:
+            attributes["ai_sdk.input"] = span.input
+        if span.output is not None:
+            attributes["ai_sdk.output"] = span.output
+        return attributes
+
+    def _export(self, span: Span, context: Any) -> None:
+        otel_span = self._tracer.start_span(
+            span.name, context=context, attributes=self._attributes(span), start_time=span.start_time
+        )
+        if span.error is not None:
+            from opentelemetry.trace import Status, StatusCode
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+        child_context = self._trace.set_span_in_context(otel_span)
+        for child in span.children:
+            self._export(child, child_context)
+        otel_span.end(end_time=span.end_time or time.time_ns())
+
+    def export(self, span: Span) -> None:
+        self._export(span, None)
+
+class _TracingConfig:
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        sample_rate: float = 1.0,
+        errors_only: bool = False,
+        capture_payloads: bool = False,
+        max_payload_length: int = 1000,
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.errors_only = errors_only
+        self.capture_payloads = capture_payloads
+        self.max_payload_length = max_payload_length
+
+_lock = threading.Lock()
+_enabled: Optional[bool] = None
+_config: Optional[_TracingConfig] = None
+
+def configure_tracing(
+    enabled: bool = True,
+    exporter: Optional[SpanExporter] = None,
+    sample_rate: float = 1.0,
+    errors_only: bool = False,
+    capture_payloads: bool = False,
+    max_payload_length: int = 1000,
+) -> None:
+    """
+    Turns tracing of the SDK calls on or off. Tracing is off by default, it can
+    also be enabled by setting the `AI_SDK_TRACING` environment variable to
+    `opik` (or `true`) or `otel`.
+
+    Only coarse spans are recorded: the call, its steps, the attempts made to the
+    provider and the tool executions. They are kept in memory until the call
+    ends and then sent to `exporter` (Opik by default) in one go.
+
+    Args:
+        enabled: Whether to record traces
+        exporter: Where to send the traces, an `OpikExporter` when not given
+        sample_rate: Fraction of the calls that are traced, decided when the call starts
+        errors_only: Only export the traces in which a span failed, including retried attempts
+        capture_payloads: Record the messages, outputs and tool arguments, truncated to `max_payload_length` characters
+        max_payload_length: Maximum length of a captured payload
+    """
+    global _enabled, _config
+    config = _TracingConfig(exporter or OpikExporter(), sample_rate, errors_only, capture_payloads, max_payload_length)
+    with _lock:
+        _enabled = enabled
+        _config = config if enabled else None
+
+def _config_from_environment() -> Optional[_TracingConfig]:
+    value = os.getenv(TRACING_ENV_VAR, "").strip().lower()
+    if value in ("1", "true", "opik"):
+        if os.getenv("OPIK_TRACK_DISABLE", "").lower() == "true":
+            return None
+        exporter: SpanExporter = OpikExporter()
+    elif value in ("otel", "opentelemetry"):
+        exporter = OpenTelemetryExporter()
+    else:
+        return None
+    return _TracingConfig(exporter, sample_rate=float(os.getenv(SAMPLE_RATE_ENV_VAR, "1")))
+
+def is_tracing_enabled() -> bool:
+    global _enabled, _config
+    if _enabled is None:
+        with _lock:
+            if _enabled is None:
+                try:
+                    _config = _config_from_environment()
+                except Exception as e:
+                    # A bad setting disables tracing once instead of failing every call
+                    LOGGER.warning("Tracing disabled, invalid %s settings: %s", TRACING_ENV_VAR, e)
+                    _config = None
+                _enabled = _config is not None
+    return _enabled
+
+# Marks the calls that were not sampled, so their nested spans are skipped as well
+_NOT_SAMPLED = Span("not_sampled", "none", {})
+_current_span: ContextVar[Optional[Span]] = ContextVar("ai_sdk_current_span", default=None)
+
+def _export(span: Span, config: _TracingConfig) -> None:
+    if config.errors_only and not span.has_error():
+        return
+    try:
+        config.exporter.export(span)
+    except Exception:
+        # Tracing must never make a call fail
+        LOGGER.warning("Failed to export trace %s", span.name, exc_info=True)
+
+class _SpanContext:
+    __slots__ = ("_name", "_kind", "_attributes", "_config", "_span", "_parent", "_token")
+
+    def __init__(self, name: str, kind: str, attributes: Dict[str, Any], config: _TracingConfig, parent: Optional[Span]):
+        self._name = name
+        self._kind = kind
+        self._attributes = attributes
+        self._config = config
+        self._parent = parent
+        self._span: Optional[Span] = None
+
+    def __enter__(self) -> Optional[Span]:
+        if self._parent is None and random.random() >= self._config.sample_rate:
+            self._token = _current_span.set(_NOT_SAMPLED)
+            return None
+
+        self._span = Span(self._name, self._kind, self._attributes)
+        if self._parent is not None:
+            self._parent.children.append(self._span)
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        _current_span.reset(self._token)
+        span = self._span
+        if span is None:
+            return
+        span.end_time = time.time_ns()
+        if exc is not None:
+            span.record_error(exc)
+        if self._parent is None:
+            _export(span, self._config)
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        return None
+
+_NO_SPAN = _NoSpan()
+
+def span(name: str, kind: str = "general", **attributes: Any) -> Any:
+    """
+    Context manager recording a span named `name` under the current one, it
+    yields the `Span` or None when tracing is disabled or the call not sampled.
+    The sampling decision is made when a root span starts.
+    """
+    if not is_tracing_enabled():
+        return _NO_SPAN
+    parent = _current_span.get()
+    config = _config
+    if parent is _NOT_SAMPLED or config is None:
+        return _NO_SPAN
+    return _SpanContext(name, kind, attributes, config, parent)
+
+def track(func: Optional[Callable[..., Any]] = None, *, name: Optional[str] = None, kind: str = "general") -> Callable[..., Any]:
+    """
+    Records a span around each call of the decorated function. While tracing is
+    disabled the function is called directly.
+    """
+    if func is None:
+        return lambda func: track(func, name=name, kind=kind)
+
+    span_name = name or func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not is_tracing_enabled():
+                return await func(*args, **kwargs)
+            with span(span_name, kind):
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not is_tracing_enabled():
+            return func(*args, **kwargs)
+        with span(span_name, kind):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+def _current() -> Optional[Span]:
+    if not _enabled:
+        return None
+    current = _current_span.get()
+    return None if current is _NOT_SAMPLED else current
+
+def update_current_span(**attributes: Any) -> None:
+    """Sets attributes of the current span, if any."""
+    current = _current()
+    if current is not None:
+        current.attributes.update(attributes)
+
+def _payload(value: Any, max_length: int) -> str:
+    if not isinstance(value, str):
+        import pydantic_core
+        value = pydantic_core.to_json(value, fallback=str).decode("utf-8")
+    if len(value) > max_length:
+        return value[:max_length] + f"... ({len(value) - max_length} more characters)"
+    return value
+
+def capture_payload(input: Any = None, output: Any = None) -> None:
+    """
+    Records the input and/or output of the current span, truncated, when payload
+    capture is enabled. Nothing is serialized otherwise.
+    """
+    current = _current()
+    config = _config
+    if current is None or config is None or not config.capture_payloads:
+        return
+    if input is not None:
+        current.input = _payload(input, config.max_payload_length)
+    if output is not None:
+        current.output = _payload(output, config.max_payload_length)
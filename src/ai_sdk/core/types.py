@@ -1,5 +1,5 @@
 from typing import List, Optional, Literal, Union, Dict, Any, Type, Callable
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 import datetime
 
 FinishReason = Literal["stop", "length", "content-filter", "tool-calls", "error", "other", "unknown"]
@@ -7,6 +7,7 @@ FinishReason = Literal["stop", "length", "content-filter", "tool-calls", "error"
 class SystemMessage(BaseModel):
     role: Literal["system"] = "system"
     content: str
+    provider_options: Optional[Dict[str, Dict[str, Any]]] = None
 
 class ToolResultPart(BaseModel):
     type: Literal["tool-result"] = "tool-result"
@@ -19,10 +20,12 @@ class ToolMessage(BaseModel):
     role: Literal["tool"] = "tool"
     tool_call_id: str
     content: str
+    provider_options: Optional[Dict[str, Dict[str, Any]]] = None
 
 class TextPart(BaseModel):
     type: Literal["text"] = "text"
     text: str
+    provider_options: Optional[Dict[str, Dict[str, Any]]] = None
 
 class ToolCallPart(BaseModel):
     type: Literal["tool-call"] = "tool-call"
@@ -34,15 +37,18 @@ class ImagePart(BaseModel):
     type: Literal["image"] = "image"
     image: str
     mime_type: Optional[str] = None
+    provider_options: Optional[Dict[str, Dict[str, Any]]] = None
 
 class UserMessage(BaseModel):
     role: Literal["user"] = "user"
     content: Union[str, List[Union[TextPart, ImagePart]]]
+    provider_options: Optional[Dict[str, Dict[str, Any]]] = None
 
 class AssistantMessage(BaseModel):
     role: Literal["assistant"] = "assistant"
     content: Union[str, List[Union[TextPart, ToolCallPart]]]
     tool_calls: Optional[List[ToolCallPart]] = None
+    provider_options: Optional[Dict[str, Dict[str, Any]]] = None
 
 Message = Union[SystemMessage, UserMessage, AssistantMessage, ToolMessage]
 ResponseMessage = Union[AssistantMessage, ToolMessage]
@@ -57,6 +63,28 @@ class ResponseMetadata(BaseModel):
     headers: Optional[Dict[str, str]] = None
     body: Optional[Any] = None
     messages: List[ResponseMessage]
+    cache_hit: bool = False
+
+class LazyResponseMetadata(ResponseMetadata):
+    """
+    Response metadata of lean results: `messages` are only built when first
+    accessed. Built with `model_construct`, a result that was never accessed
+    leaves `messages` out when dumped as part of its parent.
+    """
+    _messages_factory: Optional[Callable[[], List[ResponseMessage]]] = PrivateAttr(default=None)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "messages":
+            factory = self._messages_factory
+            if factory is not None:
+                messages = factory()
+                self.__dict__["messages"] = messages
+                return messages
+        return super().__getattr__(name)
+
+    def model_dump(self, **kwargs: Any) -> Dict[str, Any]:
+        self.messages
+        return super().model_dump(**kwargs)
 
 class Usage(BaseModel):
     prompt_tokens: int
@@ -73,6 +101,34 @@ class OtherWarning(BaseModel):
 
 Warning = Union[UnsupportedSettingWarning, OtherWarning]
 
+class AttemptTiming(BaseModel):
+    """Time spent in one provider call attempt, by phase, in seconds."""
+    phases: Dict[str, float] = {}
+    duration: float = 0.0
+    error: Optional[str] = None
+    server_processing_time: Optional[float] = None
+
+class StepTiming(BaseModel):
+    """Time spent in one step: its attempts, plus retry sleeps and tool execution in `phases`."""
+    step: int
+    attempts: List[AttemptTiming] = []
+    phases: Dict[str, float] = {}
+    duration: float = 0.0
+
+class TimingBreakdown(BaseModel):
+    """Timing of a `generate_text` or `generate_object` call, see `TimingRecorder`."""
+    steps: List[StepTiming] = []
+    duration: float = 0.0
+
+    def phase_totals(self) -> Dict[str, float]:
+        """Sums each phase over every step and attempt."""
+        totals: Dict[str, float] = {}
+        for step in self.steps:
+            for phases in [step.phases] + [attempt.phases for attempt in step.attempts]:
+                for name, seconds in phases.items():
+                    totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
 class StepResult(BaseModel):
     step_type: Literal["initial", "continue", "tool-result"]
     text: str
@@ -95,6 +151,9 @@ class TextResult(BaseModel):
     response: Optional[ResponseMetadata] = None
     warnings: Optional[List[Warning]] = None
     provider_metadata: Optional[Dict[str, Dict[str, Any]]] = None
+    timing: Optional[TimingBreakdown] = None
+    # Compacted conversation including the last answer and tool results, only set when a compaction strategy is used
+    history: Optional[List[Message]] = None
 
 class ObjectResult(BaseModel):
     object: BaseModel
@@ -103,10 +162,63 @@ class ObjectResult(BaseModel):
     request: Optional[RequestMetadata] = None
     response: Optional[ResponseMetadata] = None
     warnings: Optional[List[Warning]] = None
+    timing: Optional[TimingBreakdown] = None
+
+class EmbeddingUsage(BaseModel):
+    tokens: int
+
+class EmbedResult(BaseModel):
+    value: str
+    embedding: Any  # numpy array of shape (dimensions,)
+    usage: EmbeddingUsage
+
+class EmbedManyResult(BaseModel):
+    values: List[str]
+    embeddings: Any  # numpy array of shape (len(values), dimensions), in input order
+    usage: EmbeddingUsage
+
+class TextDeltaPart(BaseModel):
+    type: Literal["text-delta"] = "text-delta"
+    text_delta: str
+
+class ToolCallDeltaPart(BaseModel):
+    type: Literal["tool-call-delta"] = "tool-call-delta"
+    tool_call_id: str
+    tool_name: str
+    args_text_delta: str
+
+class ResponseMetadataPart(BaseModel):
+    type: Literal["response-metadata"] = "response-metadata"
+    id: Optional[str] = None
+    model_id: Optional[str] = None
+    timestamp: Optional[datetime.datetime] = None
+    headers: Optional[Dict[str, str]] = None
+
+class StepFinishPart(BaseModel):
+    type: Literal["step-finish"] = "step-finish"
+    finish_reason: FinishReason
+    usage: Usage
+    warnings: Optional[List[Warning]] = None
+    provider_metadata: Optional[Dict[str, Dict[str, Any]]] = None
+
+class FinishPart(BaseModel):
+    type: Literal["finish"] = "finish"
+    finish_reason: FinishReason
+    usage: Usage
+    warnings: Optional[List[Warning]] = None
+    provider_metadata: Optional[Dict[str, Dict[str, Any]]] = None
+
+class ObjectPart(BaseModel):
+    type: Literal["object"] = "object"
+    object: Any
+
+StreamPart = Union[TextDeltaPart, ToolCallDeltaPart, ToolCallPart, ToolResultPart, ObjectPart, ResponseMetadataPart, StepFinishPart, FinishPart]
 
 class Tool(BaseModel):
     description: Optional[str] = None
     parameters: Type[BaseModel]
     execute: Optional[Callable[..., Any]] = None
+    timeout: Optional[float] = None
+    provider_options: Optional[Dict[str, Dict[str, Any]]] = None
 
 Mode = Literal["auto", "json", "tool"]
\ No newline at end of file
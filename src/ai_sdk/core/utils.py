@@ -1,12 +1,26 @@
-from typing import List, Optional, Tuple
+from typing import Any, List, Mapping, Optional, Type, TypeVar
+from pydantic import BaseModel
 from .types import Message, SystemMessage, UserMessage
 import os
-import opik
-import logging
 
-LOGGER = logging.getLogger(__name__)
+M = TypeVar("M", bound=BaseModel)
+
+def get_header(headers: Optional[Mapping[str, str]], name: str) -> Optional[str]:
+    """Returns the header `name` (lower case) of `headers`, which can be `httpx.Headers` or a plain dict."""
+    if headers is None:
+        return None
+    value = headers.get(name)
+    if value is None and isinstance(headers, dict):
+        # Plain dicts are case sensitive, httpx.Headers are not
+        value = next((value for key, value in headers.items() if key.lower() == name), None)
+    return value
+
+def build_model(model_class: Type[M], lean: bool, **values: Any) -> M:
+    """Instantiates `model_class`, skipping validation with `model_construct` in lean mode."""
+    if lean:
+        return model_class.model_construct(**values)
+    return model_class(**values)
 
-@opik.track
 def standardize_messages(
     system: Optional[str],
     prompt: Optional[str],
@@ -42,19 +56,3 @@ def load_api_key(
         raise ValueError(f"{description} API key is missing. Pass it using the '{api_key_parameter_name}' parameter or the {env_var_name} environment variable.")
     
     return api_key
-
-def is_opik_configured() -> Tuple[bool, Optional[str]]:
-    try:
-        import opik
-    except ImportError:
-        os.environ["OPIK_TRACK_DISABLE"] = "true"
-        return False
-    
-    _client = opik.Opik(_show_misconfiguration_message=False)
-
-    try:
-        _client.auth_check()
-        return True
-    except Exception as e:  # noqa: BLE001
-        LOGGER.warning("Opik is not configured, run `opik configure` in your terminal or call `opik.configure()` in your code.")
-        return False
@@ -1,3 +1,3 @@
-from .provider import openai, create_openai_provider, OpenAIProviderSettings
+from .provider import openai, openai_embedding, create_openai_provider, OpenAIProviderSettings
 
-__all__ = ["openai", "create_openai_provider", "OpenAIProviderSettings"]
\ No newline at end of file
+__all__ = ["openai", "openai_embedding", "create_openai_provider", "OpenAIProviderSettings"]
\ No newline at end of file
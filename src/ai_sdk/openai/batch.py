@@ -0,0 +1,124 @@
+from typing import List, Dict, Any, Iterator, Tuple, Optional, TYPE_CHECKING
+from ..core.batch_job import BatchAPI, BatchRequest, BatchJobStatus
+from ..core.errors import AI_APICallError, AI_BatchJobError
+from ..core import fast_json
+
+if TYPE_CHECKING:
+    from .chat_model import OpenAIChatModel
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+
+_STATUSES: Dict[str, BatchJobStatus] = {
+    "validating": "in_progress",
+    "in_progress": "in_progress",
+    "finalizing": "in_progress",
+    "cancelling": "in_progress",
+    "completed": "completed",
+    "failed": "failed",
+    "expired": "expired",
+    "cancelled": "cancelled",
+}
+
+def to_jsonl(requests: List[BatchRequest]) -> str:
+    """Serializes the requests as the JSONL input file expected by `/v1/batches`."""
+    return "".join(
+        fast_json.dumps_text({
+            "custom_id": request.custom_id,
+            "method": "POST",
+            "url": CHAT_COMPLETIONS_ENDPOINT,
+            "body": request.args
+        }) + "\n"
+        for request in requests
+    )
+
+class OpenAIBatchAPI(BatchAPI):
+    """Uploads the requests as a JSONL file and runs them through the `/v1/batches` endpoint."""
+    def __init__(self, model: "OpenAIChatModel", completion_window: str = "24h"):
+        self.model = model
+        self.completion_window = completion_window
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        url = self.model.config.url(path)
+        response = self.model.config.client().request(
+            method,
+            url = url,
+            headers = self.model.config.headers(),
+            timeout = 60,
+            **kwargs
+        )
+        if response.status_code != 200:
+            raise AI_APICallError(
+                url = url,
+                request_body_values = kwargs.get("json") or {},
+                status_code = response.status_code,
+                response_headers = response.headers,
+                response_body = response.text,
+                is_retryable = self.model._is_retryable(response.status_code)
+            )
+        return response
+
+    def submit(self, requests: List[BatchRequest]) -> Dict[str, Any]:
+        file = self._request(
+            "POST",
+            "/v1/files",
+            data = {"purpose": "batch"},
+            files = {"file": ("batch.jsonl", to_jsonl(requests).encode("utf-8"), "application/jsonl")}
+        ).json()
+
+        return self._request(
+            "POST",
+            "/v1/batches",
+            json = {
+                "input_file_id": file["id"],
+                "endpoint": CHAT_COMPLETIONS_ENDPOINT,
+                "completion_window": self.completion_window
+            }
+        ).json()
+
+    def retrieve(self, job_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/v1/batches/{job_id}").json()
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        return self._request("POST", f"/v1/batches/{job_id}/cancel").json()
+
+    def status(self, job: Dict[str, Any]) -> BatchJobStatus:
+        return _STATUSES.get(job["status"], "in_progress")
+
+    def request_count(self, job: Dict[str, Any]) -> Optional[int]:
+        return (job.get("request_counts") or {}).get("total")
+
+    def results(self, job: Dict[str, Any]) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]]:
+        # Successful requests are in the output file, failed ones in the error file
+        for file_id in (job.get("output_file_id"), job.get("error_file_id")):
+            if not file_id:
+                continue
+
+            content = self._request("GET", f"/v1/files/{file_id}/content").text
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                yield self._parse_line(job["id"], fast_json.loads(line))
+
+    def _parse_line(self, job_id: str, line: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]:
+        custom_id = line["custom_id"]
+        response = line.get("response") or {}
+
+        if line.get("error"):
+            return custom_id, None, AI_BatchJobError(
+                job_id = job_id,
+                message = line["error"].get("message", "Request failed"),
+                custom_id = custom_id,
+                data = line["error"]
+            )
+
+        if response.get("status_code") != 200:
+            return custom_id, None, AI_APICallError(
+                url = self.model.config.url(CHAT_COMPLETIONS_ENDPOINT),
+                request_body_values = {},
+                status_code = response.get("status_code"),
+                response_headers = {},
+                response_body = response.get("body"),
+                is_retryable = self.model._is_retryable(response.get("status_code") or 500)
+            )
+
+        return custom_id, response["body"], None
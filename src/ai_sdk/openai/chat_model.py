@@ -1,13 +1,21 @@
-from ..core.language_model import LanguageModel, LanguageModelCallOptions, LanguageModelCallResult, LanguageModelUsage, LanguageModelRequest, LanguageModelResponse
-from typing import Optional, Dict, Union, Any, List
+from ..core.language_model import LanguageModel, LanguageModelCallOptions, LanguageModelCallResult, LanguageModelUsage, LanguageModelRequest, LanguageModelResponse, LanguageModelStreamPart
+from typing import Optional, Dict, Union, Any, List, Iterator, AsyncIterator
 from pydantic import BaseModel
-from ..core.types import UnsupportedSettingWarning, Message, ToolCallPart, FinishReason
+from ..core.types import UnsupportedSettingWarning, Message, ToolCallPart, FinishReason, TextDeltaPart, ToolCallDeltaPart, ResponseMetadataPart, FinishPart, Usage
 from ..core.errors import AI_APICallError, AI_UnsupportedFunctionalityError
-import json
+from .batch import OpenAIBatchAPI
+from ..core.sse import iter_sse_events, aiter_sse_events
+from ..core.schema_cache import compile_schema_payload
+from ..core.message_cache import convert_message
+from ..core import fast_json
+from ..core.fast_json import json_request, request_text
+from ..core.timing import timed
+from ..core.tokens import ContextWindow, TokenEstimator, TiktokenTokenEstimator
+from ..core.images import ImageLimits
+from ..core.utils import build_model
 import datetime
 import validators
-import opik
-from opik import opik_context
+from ..core.tracing import update_current_span
 
 class OpenAIChatSettings(BaseModel):
     logit_bias: Optional[Dict[float, float]] = None
@@ -20,7 +28,8 @@ class OpenAIChatConfig(BaseModel):
     provider: str
     url: Any
     headers: Any
-    fetch: Any
+    client: Any
+    async_client: Any
 
 SUPPORTED_MODELS = [
     "gpt-4o",
@@ -63,6 +72,109 @@ UNSUPPORTED_SYSTEM_MESSAGES = [
     "o1-preview"
 ]
 
+# Images are fit within 2048x2048, then their short side is scaled down to 768 pixels
+IMAGE_LIMITS = ImageLimits(max_long_side=2048, max_short_side=768)
+
+CONTEXT_WINDOWS = {
+    "gpt-4o": ContextWindow(context_window=128000, max_output_tokens=16384),
+    "gpt-4o-mini": ContextWindow(context_window=128000, max_output_tokens=16384),
+    "gpt-4-turbo": ContextWindow(context_window=128000, max_output_tokens=4096),
+    "gpt-4": ContextWindow(context_window=8192, max_output_tokens=8192),
+    "gpt-3.5-turbo": ContextWindow(context_window=16385, max_output_tokens=4096),
+    "o1": ContextWindow(context_window=200000, max_output_tokens=100000),
+    "o1-mini": ContextWindow(context_window=128000, max_output_tokens=65536),
+    "o1-preview": ContextWindow(context_window=128000, max_output_tokens=32768),
+    "o3-mini": ContextWindow(context_window=200000, max_output_tokens=100000),
+    "chatgpt-4o-latest": ContextWindow(context_window=128000, max_output_tokens=16384)
+}
+
+# Models that predate the o200k_base encoding
+CL100K_MODELS = [
+    "gpt-4-turbo",
+    "gpt-4",
+    "gpt-3.5-turbo"
+]
+
+class OpenAIChatStreamState:
+    """Accumulates the chunks of a streamed chat completion into stream parts."""
+    def __init__(self, model: "OpenAIChatModel", headers: Dict[str, str], warnings: List[Any]):
+        self.model = model
+        self.headers = headers
+        self.warnings = warnings
+        self.metadata_sent = False
+        self.tool_calls: Dict[int, Dict[str, Any]] = {}
+        self.finish_reason: FinishReason = "unknown"
+        self.usage: Dict[str, Any] = {}
+
+    def process(self, chunk: Dict[str, Any]) -> List[LanguageModelStreamPart]:
+        parts = []
+
+        if not self.metadata_sent:
+            self.metadata_sent = True
+            parts.append(ResponseMetadataPart(
+                id=chunk.get("id"),
+                model_id=chunk.get("model"),
+                timestamp=datetime.datetime.fromtimestamp(chunk["created"]) if chunk.get("created") else None,
+                headers=self.headers
+            ))
+
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+
+        for choice in chunk.get("choices") or []:
+            delta = choice.get("delta") or {}
+
+            if delta.get("content"):
+                parts.append(TextDeltaPart(text_delta=delta["content"]))
+
+            for tool_call_delta in delta.get("tool_calls") or []:
+                function = tool_call_delta.get("function") or {}
+                tool_call = self.tool_calls.get(tool_call_delta["index"])
+                if tool_call is None:
+                    tool_call = {
+                        "id": tool_call_delta.get("id"),
+                        "name": function.get("name"),
+                        "arguments": ""
+                    }
+                    self.tool_calls[tool_call_delta["index"]] = tool_call
+
+                args_text_delta = function.get("arguments") or ""
+                tool_call["arguments"] += args_text_delta
+                parts.append(ToolCallDeltaPart(
+                    tool_call_id=tool_call["id"],
+                    tool_name=tool_call["name"],
+                    args_text_delta=args_text_delta
+                ))
+
+            if choice.get("finish_reason"):
+                self.finish_reason = self.model._convert_finish_reason(choice["finish_reason"])
+
+        return parts
+
+    def finish(self) -> List[LanguageModelStreamPart]:
+        parts = [
+            ToolCallPart(
+                tool_call_id=tool_call["id"],
+                tool_name=tool_call["name"],
+                args=fast_json.loads(tool_call["arguments"] or "{}")
+            )
+            for _, tool_call in sorted(self.tool_calls.items())
+        ]
+
+        prompt_tokens = self.usage.get("prompt_tokens", 0)
+        completion_tokens = self.usage.get("completion_tokens", 0)
+        parts.append(FinishPart(
+            finish_reason=self.finish_reason,
+            usage=Usage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            ),
+            warnings=self.warnings,
+            provider_metadata=self.model._get_provider_metadata({"usage": self.usage})
+        ))
+        return parts
+
 class OpenAIChatModel(LanguageModel):
     def __init__(self, model_id: str, settings: OpenAIChatSettings, config: OpenAIChatConfig):
         if model_id not in SUPPORTED_MODELS:
@@ -90,7 +202,8 @@ class OpenAIChatModel(LanguageModel):
 
         args = {}
         args["model"] = self.model_id
-        args["messages"] = self._convert_messages(options.messages)
+        with timed("convert_messages"):
+            args["messages"] = self._convert_messages(options.messages)
         if options.max_tokens is not None:
             args["max_completion_tokens"] = options.max_tokens
         if options.temperature is not None:
@@ -115,26 +228,34 @@ class OpenAIChatModel(LanguageModel):
                     "Tool calls",
                     f"This model does not support tool calls: {self.model_id}"
                 )
-            args["tools"] = [{
-                "type": "function",
-                "function": {
-                    "name": tool_name,
-                    "description": tool.description,
-                    "parameters": tool.parameters.model_json_schema()
+            args["tools"] = [compile_schema_payload(
+                tool.parameters,
+                ("openai.tool", tool_name, tool.description),
+                lambda schema, tool_name=tool_name, tool=tool: {
+                    "type": "function",
+                    "function": {
+                        "name": tool_name,
+                        "description": tool.description,
+                        "parameters": schema
+                    }
                 }
-            } for tool_name, tool in options.tools.items()]
+            ) for tool_name, tool in options.tools.items()]
         
         if options.seed is not None:
             args["seed"] = options.seed
 
         if options.response_format is not None:
-            args["response_format"] = {
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "json_schema",
-                    "schema": options.response_format.model_json_schema()
+            args["response_format"] = compile_schema_payload(
+                options.response_format,
+                "openai.response_format",
+                lambda schema: {
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": "json_schema",
+                        "schema": schema
+                    }
                 }
-            }
+            )
 
         return args, warnings
         
@@ -165,6 +286,14 @@ class OpenAIChatModel(LanguageModel):
         
         return False
 
+    context_windows = CONTEXT_WINDOWS
+
+    def token_estimator(self) -> TokenEstimator:
+        return TiktokenTokenEstimator("cl100k_base" if self.model_id in CL100K_MODELS else "o200k_base")
+
+    def image_limits(self) -> Optional[ImageLimits]:
+        return IMAGE_LIMITS if self.model_id in SUPPORTED_IMAGE_MODELS else None
+
     def supports_json_mode(self) -> bool:
         if self.model_id in SUPPORTED_JSON_MODELS:
             return True
@@ -175,7 +304,9 @@ class OpenAIChatModel(LanguageModel):
             return True
         return False
 
-    @opik.track
+    def batch_api(self) -> OpenAIBatchAPI:
+        return OpenAIBatchAPI(self)
+
     def _convert_tool_calls_to_openai_format(self, tool_calls: list[ToolCallPart]) -> list[Dict[str, Any]]:
         """
         Converts internal ToolCallPart format to OpenAI's tool_calls format.
@@ -200,88 +331,92 @@ class OpenAIChatModel(LanguageModel):
                 "type": "function",
                 "function": {
                     "name": tool_call.tool_name,
-                    "arguments": json.dumps(tool_call.args)
+                    "arguments": fast_json.dumps_text(tool_call.args)
                 }
             })
         
         return openai_tool_calls
 
-    @opik.track
     def _convert_messages(self, messages: List[Message]) -> List[Dict[str, Any]]:
+        key = (self.provider, self.model_id)
         res = []
-
         for message in messages:
-            if message.role == "system":
-                if self.model_id in UNSUPPORTED_SYSTEM_MESSAGES:
-                    res.append({
-                        "role": "assistant",
-                        "content":  message.content
-                    })
-                else:
-                    res.append({
-                        "role": "developer",
-                        "content": message.content
-                    })
-            elif message.role == "user":
-                if isinstance(message.content, str):
-                    res.append({
-                        "role": "user",
-                        "content": message.content
-                    })
-                else:
-                    content = []
-                    for part in message.content:
-                        if part.type == "text":
+            converted = convert_message(message, key, self._convert_message)
+            if converted is not None:
+                res.append(converted)
+        return res
+
+    def _convert_message(self, message: Message) -> Optional[Dict[str, Any]]:
+        if message.role == "system":
+            if self.model_id in UNSUPPORTED_SYSTEM_MESSAGES:
+                return {
+                    "role": "assistant",
+                    "content":  message.content
+                }
+            else:
+                return {
+                    "role": "developer",
+                    "content": message.content
+                }
+        elif message.role == "user":
+            if isinstance(message.content, str):
+                return {
+                    "role": "user",
+                    "content": message.content
+                }
+            else:
+                content = []
+                for part in message.content:
+                    if part.type == "text":
+                        content.append({
+                            "type": "text",
+                            "text": part.text
+                        })
+                    elif part.type == "image":
+                        if self.model_id not in SUPPORTED_IMAGE_MODELS:
+                            raise AI_UnsupportedFunctionalityError(
+                                "Image input",
+                                f"This model does not support image input: {self.model_id}"
+                            )
+                        if validators.url(part.image):
                             content.append({
-                                "type": "text",
-                                "text": part.text
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": part.image
+                                }
                             })
-                        elif part.type == "image":
-                            if self.model_id not in SUPPORTED_IMAGE_MODELS:
-                                raise AI_UnsupportedFunctionalityError(
-                                    "Image input",
-                                    f"This model does not support image input: {self.model_id}"
-                                )
-                            if validators.url(part.image):
-                                content.append({
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": part.image
-                                    }
-                                })
-                            else:
-                                content.append({
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/{part.mime_type or 'image/jpeg'};base64,{part.image}"
-                                    }
-                                })
-                            
-                    res.append({
-                        "role": "user",
-                        "content": content
-                    })
-            elif message.role == "assistant":
-                res.append({
-                    "role": "assistant",
-                    "content": message.content,
-                    "tool_calls": self._convert_tool_calls_to_openai_format(message.tool_calls or [])
-                })
-            elif message.role == "tool":
-                if self.model_id not in SUPPORTED_TOOL_MODELS:
-                    raise AI_UnsupportedFunctionalityError(
-                        "Tool calls",
-                        f"This model does not support tool calls: {self.model_id}"
-                    )
-
-                res.append({
-                    "role": "tool",
-                    "content": message.content,
-                    "tool_call_id": message.tool_call_id
-                })
-        return res
+                        else:
+                            content.append({
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:{part.mime_type or 'image/jpeg'};base64,{part.image}"
+                                }
+                            })
+                        
+                return {
+                    "role": "user",
+                    "content": content
+                }
+        elif message.role == "assistant":
+            return {
+                "role": "assistant",
+                "content": message.content,
+                "tool_calls": self._convert_tool_calls_to_openai_format(message.tool_calls or [])
+            }
+        elif message.role == "tool":
+            if self.model_id not in SUPPORTED_TOOL_MODELS:
+                raise AI_UnsupportedFunctionalityError(
+                    "Tool calls",
+                    f"This model does not support tool calls: {self.model_id}"
+                )
+
+            return {
+                "role": "tool",
+                "content": message.content,
+                "tool_call_id": message.tool_call_id
+            }
+        return None
 
-    @opik.track
     def _parse_tool_calls(self, result: Any) -> List[ToolCallPart]:
         tool_calls = []
 
@@ -289,7 +424,7 @@ class OpenAIChatModel(LanguageModel):
             if choice["finish_reason"] == "tool_calls":
                 for tool_call in choice["message"]["tool_calls"]:
                     # Parse the JSON string into a Python dict
-                    args_dict = json.loads(tool_call["function"]["arguments"])
+                    args_dict = fast_json.loads(tool_call["function"]["arguments"])
                     
                     tool_calls.append(ToolCallPart(
                         tool_call_id=tool_call["id"],
@@ -299,56 +434,158 @@ class OpenAIChatModel(LanguageModel):
                     ))
         return tool_calls
     
-    @opik.track(type="llm")
+    def _handle_response(self, args: Dict[str, Any], warnings: List[Any], response: Any, lean: bool = False) -> LanguageModelCallResult:
+        if response.status_code != 200:
+            raise AI_APICallError(
+                url = self.config.url("/v1/chat/completions"),
+                request_body_values = args,
+                status_code = response.status_code,
+                response_headers = response.headers,
+                response_body = response.text,
+                is_retryable = self._is_retryable(response.status_code)
+            )
+        
+        with timed("decode"):
+            result = fast_json.loads(response.content)
+        if lean:
+            return self._parse_result(args, warnings, result, dict(response.headers), lean=True)
+        return self._parse_result(args, warnings, result, response.headers, request_text(response), response.text)
+
+    def _parse_result(
+        self,
+        args: Dict[str, Any],
+        warnings: List[Any],
+        result: Dict[str, Any],
+        headers: Optional[Dict[str, str]],
+        request_body: Optional[str] = None,
+        response_body: Optional[str] = None,
+        lean: bool = False
+    ) -> LanguageModelCallResult:
+        """Converts a chat completion body, also used for the results of batch jobs."""
+        # Log the usage
+        update_current_span(
+            usage={
+                "prompt_tokens": result["usage"]["prompt_tokens"],
+                "completion_tokens": result["usage"]["completion_tokens"]
+            }
+        )
+
+        return build_model(
+            LanguageModelCallResult,
+            lean,
+            text = result["choices"][0]["message"]["content"],
+            finish_reason = self._convert_finish_reason(result["choices"][0]["finish_reason"]),
+            tool_calls = self._parse_tool_calls(result),
+            usage = build_model(
+                LanguageModelUsage,
+                lean,
+                prompt_tokens = result["usage"]["prompt_tokens"],
+                completion_tokens = result["usage"]["completion_tokens"]
+            ),
+            request = None if lean else LanguageModelRequest(
+                body = request_body if request_body is not None else fast_json.dumps_text(args)
+            ),
+            response = build_model(
+                LanguageModelResponse,
+                lean,
+                id = result["id"],
+                timestamp = datetime.datetime.fromtimestamp(result["created"]),
+                headers = headers,
+                model_id = result["model"],
+                body = None if lean else (response_body if response_body is not None else fast_json.dumps_text(result))
+            ),
+            warnings = warnings,
+            provider_metadata = self._get_provider_metadata(result)
+        )
+
     def do_generate(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
-        args, warnings = self._get_args(options)
+        with timed("build_args"):
+            args, warnings = self._get_args(options)
+        with timed("encode"):
+            request = json_request(self.config.headers(), args)
 
-        with self.config.fetch() as client:
-            response = client.post(
+        with timed("network"):
+            response = self.config.client().post(
                 url = self.config.url("/v1/chat/completions"),
-                headers = self.config.headers(),
-                json = args,
+                **request,
                 timeout = 60
             )
 
-            if response.status_code != 200:
-                raise AI_APICallError(
-                    url = self.config.url("/v1/chat/completions"),
-                    request_body_values = args,
-                    status_code = response.status_code,
-                    response_headers = response.headers,
-                    response_body = response.text,
-                    is_retryable = self._is_retryable(response.status_code)
-                )
-            
-            result = response.json()
-            
-            # Log the usage
-            opik_context.update_current_span(
-                usage={
-                    "prompt_tokens": result["usage"]["prompt_tokens"],
-                    "completion_tokens": result["usage"]["completion_tokens"]
-                }
+        with timed("parse"):
+            return self._handle_response(args, warnings, response, options.lean)
+
+    async def do_generate_async(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
+        with timed("build_args"):
+            args, warnings = self._get_args(options)
+        with timed("encode"):
+            request = json_request(self.config.headers(), args)
+
+        with timed("network"):
+            response = await self.config.async_client().post(
+                url = self.config.url("/v1/chat/completions"),
+                **request,
+                timeout = 60
             )
 
-            return LanguageModelCallResult(
-                text = result["choices"][0]["message"]["content"],
-                finish_reason = self._convert_finish_reason(result["choices"][0]["finish_reason"]),
-                tool_calls = self._parse_tool_calls(result),
-                usage = LanguageModelUsage(
-                    prompt_tokens = result["usage"]["prompt_tokens"],
-                    completion_tokens = result["usage"]["completion_tokens"]
-                ),
-                request = LanguageModelRequest(
-                    body = json.dumps(args)
-                ),
-                response = LanguageModelResponse(
-                    id = result["id"],
-                    timestamp = datetime.datetime.fromtimestamp(result["created"]),
-                    headers = response.headers,
-                    model_id = result["model"],
-                    body = json.dumps(result)
-                ),
-                warnings = warnings,
-                provider_metadata = self._get_provider_metadata(result)
-            )
\ No newline at end of file
+        with timed("parse"):
+            return self._handle_response(args, warnings, response, options.lean)
+
+    def _get_stream_args(self, options: LanguageModelCallOptions):
+        args, warnings = self._get_args(options)
+        args["stream"] = True
+        args["stream_options"] = {"include_usage": True}
+        return args, warnings
+
+    def _raise_stream_error(self, args: Dict[str, Any], response: Any) -> None:
+        raise AI_APICallError(
+            url = self.config.url("/v1/chat/completions"),
+            request_body_values = args,
+            status_code = response.status_code,
+            response_headers = response.headers,
+            response_body = response.text,
+            is_retryable = self._is_retryable(response.status_code)
+        )
+
+    def do_stream(self, options: LanguageModelCallOptions) -> Iterator[LanguageModelStreamPart]:
+        args, warnings = self._get_stream_args(options)
+
+        with self.config.client().stream(
+            "POST",
+            url = self.config.url("/v1/chat/completions"),
+            **json_request(self.config.headers(), args),
+            timeout = 60
+        ) as response:
+            if response.status_code != 200:
+                response.read()
+                self._raise_stream_error(args, response)
+
+            state = OpenAIChatStreamState(self, response.headers, warnings)
+            for event in iter_sse_events(response.iter_lines()):
+                if event.data == "[DONE]":
+                    break
+                yield from state.process(fast_json.loads(event.data))
+
+            yield from state.finish()
+
+    async def do_stream_async(self, options: LanguageModelCallOptions) -> AsyncIterator[LanguageModelStreamPart]:
+        args, warnings = self._get_stream_args(options)
+
+        async with self.config.async_client().stream(
+            "POST",
+            url = self.config.url("/v1/chat/completions"),
+            **json_request(self.config.headers(), args),
+            timeout = 60
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                self._raise_stream_error(args, response)
+
+            state = OpenAIChatStreamState(self, response.headers, warnings)
+            async for event in aiter_sse_events(response.aiter_lines()):
+                if event.data == "[DONE]":
+                    break
+                for part in state.process(fast_json.loads(event.data)):
+                    yield part
+
+            for part in state.finish():
+                yield part
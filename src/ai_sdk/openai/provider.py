@@ -1,8 +1,11 @@
 from pydantic import BaseModel
 from typing import Dict, Callable, Any, Optional
 from ..core.utils import load_api_key
+from ..core.http_client import HTTPClientPool
 from .chat_model import OpenAIChatModel, OpenAIChatSettings, OpenAIChatConfig
+from .embedding_model import OpenAIEmbeddingModel, OpenAIEmbeddingSettings, OpenAIEmbeddingConfig
 import httpx
+import threading
 from urllib.parse import urljoin, urlparse
 
 class OpenAIProviderSettings(BaseModel):
@@ -12,13 +15,27 @@ class OpenAIProviderSettings(BaseModel):
     organization: Optional[str] = None
     project: Optional[str] = None
     headers: Optional[Dict[str, str]] = None
-    fetch: Optional[Callable[[str], Any]] = httpx.Client
+    fetch: Optional[Callable[..., Any]] = httpx.Client
+    fetch_async: Optional[Callable[..., Any]] = httpx.AsyncClient
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    keepalive_expiry: Optional[float] = 5.0
+    http2: bool = False
 
 class OpenAIProvider:
     def __init__(self, settings: OpenAIProviderSettings):
         self.settings = settings
+        self.http_client = HTTPClientPool(
+            fetch=settings.fetch,
+            fetch_async=settings.fetch_async,
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+            http2=settings.http2
+        )
 
         self.chat = self.create_chat_model
+        self.embedding = self.create_embedding_model
     
     def _get_headers(self) -> Dict[str, str]:
         openai_headers = {
@@ -48,7 +65,7 @@ class OpenAIProvider:
 
         return base + path
     
-    def create_chat_model(self, model_id: str, settings: OpenAIChatSettings) -> OpenAIChatModel:
+    def create_chat_model(self, model_id: str, settings: OpenAIChatSettings = OpenAIChatSettings()) -> OpenAIChatModel:
         return OpenAIChatModel(
             model_id=model_id,
             settings=settings,
@@ -56,17 +73,62 @@ class OpenAIProvider:
                 provider=f"{self.settings.name}.chat",
                 url=self._join_url,
                 headers=self._get_headers,
-                fetch=self.settings.fetch
+                client=self.http_client.client,
+                async_client=self.http_client.async_client
             )
         )
     
-    def __call__(self, model_id: str, settings: OpenAIChatSettings) -> OpenAIChatModel:
+    def create_embedding_model(self, model_id: str, settings: OpenAIEmbeddingSettings = OpenAIEmbeddingSettings()) -> OpenAIEmbeddingModel:
+        return OpenAIEmbeddingModel(
+            model_id=model_id,
+            settings=settings,
+            config=OpenAIEmbeddingConfig(
+                provider=f"{self.settings.name}.embedding",
+                url=self._join_url,
+                headers=self._get_headers,
+                client=self.http_client.client,
+                async_client=self.http_client.async_client
+            )
+        )
+    
+    def close(self) -> None:
+        self.http_client.close()
+
+    async def aclose(self) -> None:
+        await self.http_client.aclose()
+
+    def __enter__(self) -> "OpenAIProvider":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "OpenAIProvider":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def __call__(self, model_id: str, settings: OpenAIChatSettings = OpenAIChatSettings()) -> OpenAIChatModel:
         return self.chat(model_id, settings)
 
+_default_provider: Optional[OpenAIProvider] = None
+_default_provider_lock = threading.Lock()
+
+def _get_default_provider() -> OpenAIProvider:
+    global _default_provider
+    if _default_provider is None:
+        with _default_provider_lock:
+            if _default_provider is None:
+                _default_provider = OpenAIProvider(settings=OpenAIProviderSettings())
+    return _default_provider
+
 def openai(model_id: str, settings: OpenAIChatSettings = OpenAIChatSettings()) -> OpenAIChatModel:
-    return OpenAIProvider(
-        settings=OpenAIProviderSettings()
-    ).chat(model_id, settings)
+    # Models created through the default provider share its connection pool
+    return _get_default_provider().chat(model_id, settings)
+
+def openai_embedding(model_id: str, settings: OpenAIEmbeddingSettings = OpenAIEmbeddingSettings()) -> OpenAIEmbeddingModel:
+    return _get_default_provider().embedding(model_id, settings)
 
 def create_openai_provider(settings: OpenAIProviderSettings) -> OpenAIProvider:
     return OpenAIProvider(settings)
\ No newline at end of file
@@ -1,3 +1,3 @@
-from .provider import openrouter, create_openrouter_provider, OpenRouterProviderSettings
+from .provider import openrouter, openrouter_embedding, create_openrouter_provider, OpenRouterProviderSettings
 
-__all__ = ["openrouter", "create_openrouter_provider", "OpenRouterProviderSettings"]
\ No newline at end of file
+__all__ = ["openrouter", "openrouter_embedding", "create_openrouter_provider", "OpenRouterProviderSettings"]
\ No newline at end of file
@@ -1,12 +1,20 @@
-from ..core.language_model import LanguageModel, LanguageModelCallOptions, LanguageModelCallResult, LanguageModelUsage, LanguageModelRequest, LanguageModelResponse
-from typing import Optional, Dict, Union, Any, List
+from ..core.language_model import LanguageModel, LanguageModelCallOptions, LanguageModelCallResult, LanguageModelUsage, LanguageModelRequest, LanguageModelResponse, LanguageModelStreamPart
+from typing import Optional, Dict, Union, Any, List, Iterator, AsyncIterator
 from pydantic import BaseModel
-from ..core.types import Message, ToolCallPart, FinishReason
+from ..core.types import Message, ToolCallPart, FinishReason, TextDeltaPart, ToolCallDeltaPart, ResponseMetadataPart, FinishPart, Usage
 from ..core.errors import AI_APICallError
-import json
+from ..core.sse import iter_sse_events, aiter_sse_events
+from ..core.schema_cache import compile_schema_payload
+from ..core.message_cache import convert_message
+from ..core import fast_json
+from ..core.fast_json import json_request, request_text
+from ..core.timing import timed
+from ..core.utils import build_model
+from ..core.images import ImageLimits
+from ..openai.chat_model import IMAGE_LIMITS as OPENAI_IMAGE_LIMITS
+from ..anthropic.chat_model import IMAGE_LIMITS as ANTHROPIC_IMAGE_LIMITS
 import datetime
 import validators
-import opik
 
 class OpenRouterChatSettings(BaseModel):
     logit_bias: Optional[Dict[float, float]] = None
@@ -19,7 +27,99 @@ class OpenRouterChatConfig(BaseModel):
     provider: str
     url: Any
     headers: Any
-    fetch: Any
+    client: Any
+    async_client: Any
+
+class OpenRouterChatStreamState:
+    """Accumulates the chunks of a streamed chat completion into stream parts."""
+    def __init__(self, model: "OpenRouterChatModel", args: Dict[str, Any], response: Any, warnings: List[Any]):
+        self.model = model
+        self.args = args
+        self.response = response
+        self.warnings = warnings
+        self.metadata_sent = False
+        self.tool_calls: Dict[int, Dict[str, Any]] = {}
+        self.finish_reason: FinishReason = "unknown"
+        self.usage: Dict[str, Any] = {}
+
+    def process(self, chunk: Dict[str, Any]) -> List[LanguageModelStreamPart]:
+        if chunk.get("error", None) is not None:
+            # OpenRouter reports errors that happen mid-stream as a chunk
+            raise AI_APICallError(
+                url = self.model.config.url("/v1/chat/completions"),
+                request_body_values = self.args,
+                status_code = self.response.status_code,
+                response_headers = self.response.headers,
+                response_body = chunk,
+                is_retryable = False
+            )
+
+        parts = []
+
+        if not self.metadata_sent:
+            self.metadata_sent = True
+            parts.append(ResponseMetadataPart(
+                id=chunk.get("id"),
+                model_id=chunk.get("model"),
+                timestamp=datetime.datetime.fromtimestamp(chunk["created"]) if chunk.get("created") else None,
+                headers=self.response.headers
+            ))
+
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+
+        for choice in chunk.get("choices") or []:
+            delta = choice.get("delta") or {}
+
+            if delta.get("content"):
+                parts.append(TextDeltaPart(text_delta=delta["content"]))
+
+            for tool_call_delta in delta.get("tool_calls") or []:
+                function = tool_call_delta.get("function") or {}
+                tool_call = self.tool_calls.get(tool_call_delta["index"])
+                if tool_call is None:
+                    tool_call = {
+                        "id": tool_call_delta.get("id"),
+                        "name": function.get("name"),
+                        "arguments": ""
+                    }
+                    self.tool_calls[tool_call_delta["index"]] = tool_call
+
+                args_text_delta = function.get("arguments") or ""
+                tool_call["arguments"] += args_text_delta
+                parts.append(ToolCallDeltaPart(
+                    tool_call_id=tool_call["id"],
+                    tool_name=tool_call["name"],
+                    args_text_delta=args_text_delta
+                ))
+
+            if choice.get("finish_reason"):
+                self.finish_reason = self.model._convert_finish_reason(choice["finish_reason"])
+
+        return parts
+
+    def finish(self) -> List[LanguageModelStreamPart]:
+        parts = [
+            ToolCallPart(
+                tool_call_id=tool_call["id"],
+                tool_name=tool_call["name"],
+                args=fast_json.loads(tool_call["arguments"] or "{}")
+            )
+            for _, tool_call in sorted(self.tool_calls.items())
+        ]
+
+        prompt_tokens = self.usage.get("prompt_tokens", 0)
+        completion_tokens = self.usage.get("completion_tokens", 0)
+        parts.append(FinishPart(
+            finish_reason=self.finish_reason,
+            usage=Usage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            ),
+            warnings=self.warnings
+        ))
+        return parts
 
 class OpenRouterChatModel(LanguageModel):
     def __init__(self, model_id: str, settings: OpenRouterChatSettings, config: OpenRouterChatConfig):
@@ -38,13 +138,13 @@ class OpenRouterChatModel(LanguageModel):
         else:
             return finish_reason
     
-    @opik.track
     def _get_args(self, options: LanguageModelCallOptions):
         warnings = []
 
         args = {}
         args["model"] = self.model_id
-        args["messages"] = self._convert_messages(options.messages)
+        with timed("convert_messages"):
+            args["messages"] = self._convert_messages(options.messages)
         if options.max_tokens is not None:
             args["max_tokens"] = options.max_tokens
         if options.temperature is not None:
@@ -61,14 +161,18 @@ class OpenRouterChatModel(LanguageModel):
             args["frequency_penalty"] = options.frequency_penalty
         
         if options.tools is not None:
-            args["tools"] = [{
-                "type": "function",
-                "function": {
-                    "name": tool_name,
-                    "description": tool.description,
-                    "parameters": tool.parameters.model_json_schema()
+            args["tools"] = [compile_schema_payload(
+                tool.parameters,
+                ("openrouter.tool", tool_name, tool.description),
+                lambda schema, tool_name=tool_name, tool=tool: {
+                    "type": "function",
+                    "function": {
+                        "name": tool_name,
+                        "description": tool.description,
+                        "parameters": schema
+                    }
                 }
-            } for tool_name, tool in options.tools.items()]
+            ) for tool_name, tool in options.tools.items()]
         
         if options.seed is not None:
             args["seed"] = options.seed
@@ -81,6 +185,14 @@ class OpenRouterChatModel(LanguageModel):
         
         return False
 
+    def image_limits(self) -> Optional[ImageLimits]:
+        # Limits of the upstream provider, OpenRouter passes images through
+        if self.model_id.startswith("openai/"):
+            return OPENAI_IMAGE_LIMITS
+        if self.model_id.startswith("anthropic/"):
+            return ANTHROPIC_IMAGE_LIMITS
+        return None
+
     def supports_json_mode(self) -> bool:
         return True
 
@@ -105,81 +217,86 @@ class OpenRouterChatModel(LanguageModel):
                 "type": "function",
                 "function": {
                     "name": tool_call.tool_name,
-                    "arguments": json.dumps(tool_call.args)
+                    "arguments": fast_json.dumps_text(tool_call.args)
                 }
             })
         
         return openrouter_tool_calls
 
     def _convert_messages(self, messages: List[Message]) -> List[Dict[str, Any]]:
+        key = (self.provider, self.model_id)
         res = []
-
         for message in messages:
-            if message.role == "system":
-                res.append({
-                    "role": "system",
-                    "content":  message.content
-                })
-            elif message.role == "developer":
-                res.append({
-                    "role": "developer",
+            converted = convert_message(message, key, self._convert_message)
+            if converted is not None:
+                res.append(converted)
+        return res
+
+    def _convert_message(self, message: Message) -> Optional[Dict[str, Any]]:
+        if message.role == "system":
+            return {
+                "role": "system",
+                "content":  message.content
+            }
+        elif message.role == "developer":
+            return {
+                "role": "developer",
+                "content": message.content
+            }
+        elif message.role == "assistant":
+            return {
+                "role": "assistant",
+                "content": message.content,
+                "tool_calls": self._convert_tool_calls_to_openrouter_format(message.tool_calls or [])
+            }
+        elif message.role == "user":
+            if isinstance(message.content, str):
+                return {
+                    "role": "user",
                     "content": message.content
-                })
-            elif message.role == "assistant":
-                res.append({
-                    "role": "assistant",
-                    "content": message.content,
-                    "tool_calls": self._convert_tool_calls_to_openrouter_format(message.tool_calls or [])
-                })
-            elif message.role == "user":
-                if isinstance(message.content, str):
-                    res.append({
-                        "role": "user",
-                        "content": message.content
-                    })
-                else:
-                    content = []
-                    for part in message.content:
-                        if part.type == "text":
+                }
+            else:
+                content = []
+                for part in message.content:
+                    if part.type == "text":
+                        content.append({
+                            "type": "text",
+                            "text": part.text
+                        })
+                    elif part.type == "image":
+                        if validators.url(part.image):
                             content.append({
-                                "type": "text",
-                                "text": part.text
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": part.image
+                                }
                             })
-                        elif part.type == "image":
-                            if validators.url(part.image):
-                                content.append({
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": part.image
-                                    }
-                                })
-                            else:
-                                content.append({
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/{part.mime_type or 'image/jpeg'};base64,{part.image}"
-                                    }
-                                })
-                            
-                    res.append({
-                        "role": "user",
-                        "content": content
-                    })
-            elif message.role == "assistant":
-                res.append({
-                    "role": "assistant",
-                    "content": message.content,
-                    "tool_calls": self._convert_tool_calls_to_openai_format(message.tool_calls or [])
-                })
-            elif message.role == "tool":
-                res.append({
-                    "role": "tool",
-                    "content": message.content,
-                    "tool_call_id": message.tool_call_id
-                })
-        return res
+                        else:
+                            content.append({
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:{part.mime_type or 'image/jpeg'};base64,{part.image}"
+                                }
+                            })
+                        
+                return {
+                    "role": "user",
+                    "content": content
+                }
+        elif message.role == "assistant":
+            return {
+                "role": "assistant",
+                "content": message.content,
+                "tool_calls": self._convert_tool_calls_to_openai_format(message.tool_calls or [])
+            }
+        elif message.role == "tool":
+            return {
+                "role": "tool",
+                "content": message.content,
+                "tool_call_id": message.tool_call_id
+            }
+        return None
 
-    @opik.track
     def _parse_tool_calls(self, result: Any) -> List[ToolCallPart]:
         tool_calls = []
 
@@ -187,7 +304,7 @@ class OpenRouterChatModel(LanguageModel):
             if choice["finish_reason"] == "tool_calls":
                 for tool_call in choice["message"]["tool_calls"]:
                     # Parse the JSON string into a Python dict
-                    args_dict = json.loads(tool_call["function"]["arguments"])
+                    args_dict = fast_json.loads(tool_call["function"]["arguments"])
                     
                     tool_calls.append(ToolCallPart(
                         tool_call_id=tool_call["id"],
@@ -197,57 +314,144 @@ class OpenRouterChatModel(LanguageModel):
                     ))
         return tool_calls
 
-    @opik.track(type="llm")
+    def _handle_response(self, args: Dict[str, Any], warnings: List[Any], response: Any, lean: bool = False) -> LanguageModelCallResult:
+        with timed("decode"):
+            result = fast_json.loads(response.content)
+        if response.status_code != 200:
+            raise AI_APICallError(
+                url = self.config.url("/v1/chat/completions"),
+                request_body_values = args,
+                status_code = response.status_code,
+                response_headers = response.headers,
+                response_body = result,
+                is_retryable = self._is_retryable(response.status_code)
+            )
+        
+        if result.get("error", None) is not None:
+            raise AI_APICallError(
+                url = self.config.url("/v1/chat/completions"),
+                request_body_values = args,
+                status_code = response.status_code,
+                response_headers = response.headers,
+                response_body = result,
+                is_retryable = self._is_retryable(response.status_code)
+            )
+        
+        return build_model(
+            LanguageModelCallResult,
+            lean,
+            text = result["choices"][0]["message"]["content"],
+            finish_reason = self._convert_finish_reason(result["choices"][0]["finish_reason"]),
+            tool_calls = self._parse_tool_calls(result),
+            usage = build_model(
+                LanguageModelUsage,
+                lean,
+                prompt_tokens = result.get("usage", {}).get("prompt_tokens", 0),
+                completion_tokens = result.get("usage", {}).get("completion_tokens", 0)
+            ),
+            request = None if lean else LanguageModelRequest(
+                body = request_text(response) or fast_json.dumps_text(args)
+            ),
+            response = build_model(
+                LanguageModelResponse,
+                lean,
+                id = result["id"],
+                timestamp = datetime.datetime.fromtimestamp(result["created"]),
+                headers = dict(response.headers) if lean else response.headers,
+                model_id = result["model"],
+                body = None if lean else response.text
+            ),
+            warnings = warnings
+        )
+
     def do_generate(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
-        args, warnings = self._get_args(options)
+        with timed("build_args"):
+            args, warnings = self._get_args(options)
+        with timed("encode"):
+            request = json_request(self.config.headers(), args)
+
+        with timed("network"):
+            response = self.config.client().post(
+                url = self.config.url("/v1/chat/completions"),
+                **request,
+                timeout = 60
+            )
+
+        with timed("parse"):
+            return self._handle_response(args, warnings, response, options.lean)
 
-        with self.config.fetch() as client:
-            print(self.config.url("/v1/chat/completions"))
-            response = client.post(
+    async def do_generate_async(self, options: LanguageModelCallOptions) -> LanguageModelCallResult:
+        with timed("build_args"):
+            args, warnings = self._get_args(options)
+        with timed("encode"):
+            request = json_request(self.config.headers(), args)
+
+        with timed("network"):
+            response = await self.config.async_client().post(
                 url = self.config.url("/v1/chat/completions"),
-                headers = self.config.headers(),
-                json = args,
+                **request,
                 timeout = 60
             )
 
-            result = response.json()
+        with timed("parse"):
+            return self._handle_response(args, warnings, response, options.lean)
+
+    def _get_stream_args(self, options: LanguageModelCallOptions):
+        args, warnings = self._get_args(options)
+        args["stream"] = True
+        args["stream_options"] = {"include_usage": True}
+        return args, warnings
+
+    def _raise_stream_error(self, args: Dict[str, Any], response: Any) -> None:
+        raise AI_APICallError(
+            url = self.config.url("/v1/chat/completions"),
+            request_body_values = args,
+            status_code = response.status_code,
+            response_headers = response.headers,
+            response_body = response.text,
+            is_retryable = self._is_retryable(response.status_code)
+        )
+
+    def do_stream(self, options: LanguageModelCallOptions) -> Iterator[LanguageModelStreamPart]:
+        args, warnings = self._get_stream_args(options)
+
+        with self.config.client().stream(
+            "POST",
+            url = self.config.url("/v1/chat/completions"),
+            **json_request(self.config.headers(), args),
+            timeout = 60
+        ) as response:
             if response.status_code != 200:
-                raise AI_APICallError(
-                    url = self.config.url("/v1/chat/completions"),
-                    request_body_values = args,
-                    status_code = response.status_code,
-                    response_headers = response.headers,
-                    response_body = result,
-                    is_retryable = self._is_retryable(response.status_code)
-                )
-            
-            if result.get("error", None) is not None:
-                raise AI_APICallError(
-                    url = self.config.url("/v1/chat/completions"),
-                    request_body_values = args,
-                    status_code = response.status_code,
-                    response_headers = response.headers,
-                    response_body = result,
-                    is_retryable = self._is_retryable(response.status_code)
-                )
-            
-            return LanguageModelCallResult(
-                text = result["choices"][0]["message"]["content"],
-                finish_reason = self._convert_finish_reason(result["choices"][0]["finish_reason"]),
-                tool_calls = self._parse_tool_calls(result),
-                usage = LanguageModelUsage(
-                    prompt_tokens = result.get("usage", {}).get("prompt_tokens", 0),
-                    completion_tokens = result.get("usage", {}).get("completion_tokens", 0)
-                ),
-                request = LanguageModelRequest(
-                    body = json.dumps(args)
-                ),
-                response = LanguageModelResponse(
-                    id = result["id"],
-                    timestamp = datetime.datetime.fromtimestamp(result["created"]),
-                    headers = response.headers,
-                    model_id = result["model"],
-                    body = json.dumps(result)
-                ),
-                warnings = warnings
-            )
\ No newline at end of file
+                response.read()
+                self._raise_stream_error(args, response)
+
+            state = OpenRouterChatStreamState(self, args, response, warnings)
+            for event in iter_sse_events(response.iter_lines()):
+                if event.data == "[DONE]":
+                    break
+                yield from state.process(fast_json.loads(event.data))
+
+            yield from state.finish()
+
+    async def do_stream_async(self, options: LanguageModelCallOptions) -> AsyncIterator[LanguageModelStreamPart]:
+        args, warnings = self._get_stream_args(options)
+
+        async with self.config.async_client().stream(
+            "POST",
+            url = self.config.url("/v1/chat/completions"),
+            **json_request(self.config.headers(), args),
+            timeout = 60
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                self._raise_stream_error(args, response)
+
+            state = OpenRouterChatStreamState(self, args, response, warnings)
+            async for event in aiter_sse_events(response.aiter_lines()):
+                if event.data == "[DONE]":
+                    break
+                for part in state.process(fast_json.loads(event.data)):
+                    yield part
+
+            for part in state.finish():
+                yield part
@@ -0,0 +1,95 @@
+from ..core.embedding_model import EmbeddingModel, EmbeddingModelCallResult, decode_embeddings
+from typing import Optional, Dict, Any, List
+from pydantic import BaseModel
+from ..core.errors import AI_APICallError
+from ..core import fast_json
+from ..core.fast_json import json_request
+from ..core.timing import timed
+from ..core.tracing import update_current_span
+
+class OpenRouterEmbeddingSettings(BaseModel):
+    dimensions: Optional[int] = None
+    user: Optional[str] = None
+
+class OpenRouterEmbeddingConfig(BaseModel):
+    provider: str
+    url: Any
+    headers: Any
+    client: Any
+    async_client: Any
+
+class OpenRouterEmbeddingModel(EmbeddingModel):
+    def __init__(self, model_id: str, settings: OpenRouterEmbeddingSettings, config: OpenRouterEmbeddingConfig):
+        self.model_id = model_id
+        self.settings = settings
+        self.config = config
+        self.provider = config.provider
+
+        super().__init__(model_id=model_id, provider=self.provider)
+
+    def _get_args(self, values: List[str]) -> Dict[str, Any]:
+        # Embeddings are requested as floats, not every upstream provider supports base64
+        args = {
+            "model": self.model_id,
+            "input": values,
+        }
+        if self.settings.dimensions is not None:
+            args["dimensions"] = self.settings.dimensions
+        if self.settings.user is not None:
+            args["user"] = self.settings.user
+        return args
+
+    def _is_retryable(self, response_code: int) -> bool:
+        if response_code in [408, 409, 429] or response_code >= 500:
+            return True
+
+        return False
+
+    def _handle_response(self, args: Dict[str, Any], response: Any) -> EmbeddingModelCallResult:
+        if response.status_code != 200:
+            raise AI_APICallError(
+                url = self.config.url("/v1/embeddings"),
+                request_body_values = args,
+                status_code = response.status_code,
+                response_headers = response.headers,
+                response_body = response.text,
+                is_retryable = self._is_retryable(response.status_code)
+            )
+
+        with timed("decode"):
+            result = fast_json.loads(response.content)
+            embeddings = decode_embeddings(result["data"])
+
+        tokens = (result.get("usage") or {}).get("prompt_tokens", 0)
+        update_current_span(usage={"prompt_tokens": tokens, "completion_tokens": 0})
+        return EmbeddingModelCallResult(embeddings=embeddings, tokens=tokens, headers=dict(response.headers))
+
+    def do_embed(self, values: List[str]) -> EmbeddingModelCallResult:
+        args = self._get_args(values)
+        with timed("encode"):
+            request = json_request(self.config.headers(), args)
+
+        with timed("network"):
+            response = self.config.client().post(
+                url = self.config.url("/v1/embeddings"),
+                **request,
+                timeout = 60
+            )
+
+        with timed("parse"):
+            return self._handle_response(args, response)
+
+    async def do_embed_async(self, values: List[str]) -> EmbeddingModelCallResult:
+        args = self._get_args(values)
+        with timed("encode"):
+            request = json_request(self.config.headers(), args)
+
+        with timed("network"):
+            response = await self.config.async_client().post(
+                url = self.config.url("/v1/embeddings"),
+                **request,
+                timeout = 60
+            )
+
+        with timed("parse"):
+            return self._handle_response(args, response)
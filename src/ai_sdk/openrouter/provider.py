@@ -1,8 +1,11 @@
 from pydantic import BaseModel
 from typing import Dict, Callable, Any, Optional
 from ..core.utils import load_api_key
+from ..core.http_client import HTTPClientPool
 from .chat_model import OpenRouterChatModel, OpenRouterChatSettings, OpenRouterChatConfig
+from .embedding_model import OpenRouterEmbeddingModel, OpenRouterEmbeddingSettings, OpenRouterEmbeddingConfig
 import httpx
+import threading
 from urllib.parse import urljoin
 
 class OpenRouterProviderSettings(BaseModel):
@@ -10,13 +13,27 @@ class OpenRouterProviderSettings(BaseModel):
     base_url: Optional[str] = "https://openrouter.ai/api"
     api_key: Optional[str] = None
     headers: Optional[Dict[str, str]] = None
-    fetch: Optional[Callable[[str], Any]] = httpx.Client
+    fetch: Optional[Callable[..., Any]] = httpx.Client
+    fetch_async: Optional[Callable[..., Any]] = httpx.AsyncClient
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    keepalive_expiry: Optional[float] = 5.0
+    http2: bool = False
 
 class OpenRouterProvider:
     def __init__(self, settings: OpenRouterProviderSettings):
         self.settings = settings
+        self.http_client = HTTPClientPool(
+            fetch=settings.fetch,
+            fetch_async=settings.fetch_async,
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+            http2=settings.http2
+        )
 
         self.chat = self.create_chat_model
+        self.embedding = self.create_embedding_model
     
     def _get_headers(self) -> Dict[str, str]:
         openrouter_headers = {
@@ -42,7 +59,7 @@ class OpenRouterProvider:
 
         return base + path
     
-    def create_chat_model(self, model_id: str, settings: OpenRouterChatSettings) -> OpenRouterChatModel:
+    def create_chat_model(self, model_id: str, settings: OpenRouterChatSettings = OpenRouterChatSettings()) -> OpenRouterChatModel:
         return OpenRouterChatModel(
             model_id=model_id,
             settings=settings,
@@ -50,17 +67,62 @@ class OpenRouterProvider:
                 provider=f"{self.settings.name}.chat",
                 url=self._join_url,
                 headers=self._get_headers,
-                fetch=self.settings.fetch
+                client=self.http_client.client,
+                async_client=self.http_client.async_client
             )
         )
     
-    def __call__(self, model_id: str, settings: OpenRouterChatSettings) -> OpenRouterChatModel:
+    def create_embedding_model(self, model_id: str, settings: OpenRouterEmbeddingSettings = OpenRouterEmbeddingSettings()) -> OpenRouterEmbeddingModel:
+        return OpenRouterEmbeddingModel(
+            model_id=model_id,
+            settings=settings,
+            config=OpenRouterEmbeddingConfig(
+                provider=f"{self.settings.name}.embedding",
+                url=self._join_url,
+                headers=self._get_headers,
+                client=self.http_client.client,
+                async_client=self.http_client.async_client
+            )
+        )
+    
+    def close(self) -> None:
+        self.http_client.close()
+
+    async def aclose(self) -> None:
+        await self.http_client.aclose()
+
+    def __enter__(self) -> "OpenRouterProvider":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "OpenRouterProvider":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def __call__(self, model_id: str, settings: OpenRouterChatSettings = OpenRouterChatSettings()) -> OpenRouterChatModel:
         return self.chat(model_id, settings)
 
+_default_provider: Optional[OpenRouterProvider] = None
+_default_provider_lock = threading.Lock()
+
+def _get_default_provider() -> OpenRouterProvider:
+    global _default_provider
+    if _default_provider is None:
+        with _default_provider_lock:
+            if _default_provider is None:
+                _default_provider = OpenRouterProvider(settings=OpenRouterProviderSettings())
+    return _default_provider
+
 def openrouter(model_id: str, settings: OpenRouterChatSettings = OpenRouterChatSettings()) -> OpenRouterChatModel:
-    return OpenRouterProvider(
-        settings=OpenRouterProviderSettings()
-    ).chat(model_id, settings)
+    # Models created through the default provider share its connection pool
+    return _get_default_provider().chat(model_id, settings)
+
+def openrouter_embedding(model_id: str, settings: OpenRouterEmbeddingSettings = OpenRouterEmbeddingSettings()) -> OpenRouterEmbeddingModel:
+    return _get_default_provider().embedding(model_id, settings)
 
 def create_openrouter_provider(settings: OpenRouterProviderSettings) -> OpenRouterProvider:
     return OpenRouterProvider(settings)
\ No newline at end of file
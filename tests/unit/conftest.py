@@ -0,0 +1,40 @@
+import os
+
+# Unit tests run fully offline against canned provider responses
+os.environ.setdefault("OPIK_TRACK_DISABLE", "true")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+os.environ.setdefault("OPENROUTER_API_KEY", "test-key")
+
+import pytest
+from typing import Any, Callable, Dict
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.openai.provider import OpenAIProvider
+from ai_sdk.openai.chat_model import OpenAIChatModel
+from ai_sdk.openai.embedding_model import OpenAIEmbeddingModel
+from .mock_provider import MockServer, client_factories as _client_factories
+
+
+@pytest.fixture
+def server() -> MockServer:
+    return MockServer()
+
+
+@pytest.fixture
+def client_factories(server: MockServer) -> Dict[str, Callable[..., Any]]:
+    return _client_factories(server.transport())
+
+
+@pytest.fixture
+def openai_provider(client_factories: Dict[str, Callable[..., Any]]) -> OpenAIProvider:
+    return create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+
+@pytest.fixture
+def openai_model(openai_provider: OpenAIProvider) -> OpenAIChatModel:
+    return openai_provider("gpt-4o")
+
+
+@pytest.fixture
+def openai_embedding_model(openai_provider: OpenAIProvider) -> OpenAIEmbeddingModel:
+    return openai_provider.embedding("text-embedding-3-small")
@@ -0,0 +1,288 @@
+"""
+Canned provider responses and an in-process mock HTTP server for offline tests.
+The payload builders are shared with the benchmarks.
+"""
+import json
+import httpx
+from typing import Any, Callable, Dict, List, Optional
+
+
+def openai_completion(
+    content: Optional[str] = "Hello!",
+    tool_calls: Optional[List[Dict[str, Any]]] = None,
+    finish_reason: str = "stop",
+    model: str = "gpt-4o"
+) -> Dict[str, Any]:
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [{
+            "id": tool_call["id"],
+            "type": "function",
+            "function": {
+                "name": tool_call["name"],
+                "arguments": json.dumps(tool_call["args"])
+            }
+        } for tool_call in tool_calls]
+        finish_reason = "tool_calls"
+
+    return {
+        "id": "chatcmpl-123",
+        "object": "chat.completion",
+        "created": 1700000000,
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    }
+
+
+def anthropic_message(
+    text: Optional[str] = "Hello!",
+    tool_calls: Optional[List[Dict[str, Any]]] = None,
+    model: str = "claude-3-5-sonnet-20241022"
+) -> Dict[str, Any]:
+    content = []
+    if text is not None:
+        content.append({"type": "text", "text": text})
+    for tool_call in tool_calls or []:
+        content.append({
+            "type": "tool_use",
+            "id": tool_call["id"],
+            "name": tool_call["name"],
+            "input": tool_call["args"]
+        })
+
+    return {
+        "id": "msg_123",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": content,
+        "stop_reason": "tool_use" if tool_calls else "end_turn",
+        "usage": {"input_tokens": 10, "output_tokens": 5}
+    }
+
+
+class MockServer:
+    """
+    Records every request and answers with the next queued response. A queued
+    entry is either a JSON body, an `httpx.Response` or a callable taking the
+    request and returning one of those.
+    """
+    def __init__(self):
+        self.requests: List[httpx.Request] = []
+        self.responses: List[Any] = []
+
+    def queue(self, *responses: Any) -> "MockServer":
+        self.responses.extend(responses)
+        return self
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if callable(response):
+            response = response(request)
+        if isinstance(response, httpx.Response):
+            return response
+        return httpx.Response(200, json=response)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+    def bodies(self) -> List[Dict[str, Any]]:
+        return [json.loads(request.content) for request in self.requests]
+
+
+def client_factories(transport: httpx.MockTransport) -> Dict[str, Callable[..., Any]]:
+    """Provider settings whose sync and async clients send every request to `transport`."""
+    return {
+        "fetch": lambda: httpx.Client(transport=transport),
+        "fetch_async": lambda: httpx.AsyncClient(transport=transport),
+    }
+
+
+def sse_response(events: List[Any], done: bool = False) -> httpx.Response:
+    """Builds a `text/event-stream` response, events are (event name, data) pairs or bare data."""
+    lines = []
+    for event in events:
+        name, data = event if isinstance(event, tuple) else (None, event)
+        if name is not None:
+            lines.append(f"event: {name}")
+        lines.append(f"data: {data if isinstance(data, str) else json.dumps(data)}")
+        lines.append("")
+    if done:
+        lines += ["data: [DONE]", ""]
+    return httpx.Response(200, headers={"content-type": "text/event-stream"}, content="\n".join(lines) + "\n")
+
+
+def openai_stream(
+    text_deltas: List[str] = (),
+    tool_calls: Optional[List[Dict[str, Any]]] = None,
+    model: str = "gpt-4o"
+) -> httpx.Response:
+    base = {"id": "chatcmpl-123", "object": "chat.completion.chunk", "created": 1700000000, "model": model}
+    chunks = [{**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}]
+    for text_delta in text_deltas:
+        chunks.append({**base, "choices": [{"index": 0, "delta": {"content": text_delta}, "finish_reason": None}]})
+    for index, tool_call in enumerate(tool_calls or []):
+        arguments = json.dumps(tool_call["args"])
+        middle = len(arguments) // 2
+        chunks.append({**base, "choices": [{"index": 0, "delta": {"tool_calls": [{
+            "index": index, "id": tool_call["id"], "type": "function",
+            "function": {"name": tool_call["name"], "arguments": arguments[:middle]}
+        }]}, "finish_reason": None}]})
+        chunks.append({**base, "choices": [{"index": 0, "delta": {"tool_calls": [{
+            "index": index, "function": {"arguments": arguments[middle:]}
+        }]}, "finish_reason": None}]})
+    chunks.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "tool_calls" if tool_calls else "stop"}]})
+    chunks.append({**base, "choices": [], "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}})
+    return sse_response(chunks, done=True)
+
+
+def anthropic_stream(
+    text_deltas: List[str] = (),
+    tool_calls: Optional[List[Dict[str, Any]]] = None,
+    model: str = "claude-3-5-sonnet-20241022"
+) -> httpx.Response:
+    events = [("message_start", {"type": "message_start", "message": {
+        "id": "msg_123", "type": "message", "role": "assistant", "model": model,
+        "content": [], "stop_reason": None, "usage": {"input_tokens": 10, "output_tokens": 1}
+    }})]
+    index = 0
+    if text_deltas:
+        events.append(("content_block_start", {"type": "content_block_start", "index": index, "content_block": {"type": "text", "text": ""}}))
+        events.append(("ping", {"type": "ping"}))
+        for text_delta in text_deltas:
+            events.append(("content_block_delta", {"type": "content_block_delta", "index": index, "delta": {"type": "text_delta", "text": text_delta}}))
+        events.append(("content_block_stop", {"type": "content_block_stop", "index": index}))
+        index += 1
+    for tool_call in tool_calls or []:
+        arguments = json.dumps(tool_call["args"])
+        middle = len(arguments) // 2
+        events.append(("content_block_start", {"type": "content_block_start", "index": index, "content_block": {
+            "type": "tool_use", "id": tool_call["id"], "name": tool_call["name"], "input": {}
+        }}))
+        for partial_json in [arguments[:middle], arguments[middle:]]:
+            events.append(("content_block_delta", {"type": "content_block_delta", "index": index, "delta": {"type": "input_json_delta", "partial_json": partial_json}}))
+        events.append(("content_block_stop", {"type": "content_block_stop", "index": index}))
+        index += 1
+    events.append(("message_delta", {"type": "message_delta", "delta": {"stop_reason": "tool_use" if tool_calls else "end_turn"}, "usage": {"output_tokens": 5}}))
+    events.append(("message_stop", {"type": "message_stop"}))
+    return sse_response(events)
+
+
+class OpenAIBatchServer:
+    """
+    Stand-in for the OpenAI files and batches endpoints. The job reports
+    `in_progress` for the first `polls` retrievals, then completes with one
+    response per request built by `respond(body)`. Requests whose last message
+    is "fail" end up in the error file, the last `expired` requests get no
+    result at all.
+    """
+    def __init__(self, respond: Callable[[Dict[str, Any]], Dict[str, Any]], polls: int = 1, expired: int = 0):
+        self.respond = respond
+        self.polls = polls
+        self.expired = expired
+        self.lines: List[Dict[str, Any]] = []
+
+    def _job(self, status: str) -> Dict[str, Any]:
+        job = {
+            "id": "batch_1",
+            "object": "batch",
+            "status": status,
+            "input_file_id": "file-in",
+            "request_counts": {"total": len(self.lines)}
+        }
+        if status == "completed":
+            job.update(output_file_id="file-out", error_file_id="file-err")
+        return job
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/v1/files":
+            content = request.read().decode()
+            self.lines = [json.loads(line) for line in content.splitlines() if line.startswith('{"custom_id"')]
+            return httpx.Response(200, json={"id": "file-in", "purpose": "batch"})
+        if path == "/v1/batches":
+            return httpx.Response(200, json=self._job("validating"))
+        if path == "/v1/batches/batch_1":
+            self.polls -= 1
+            return httpx.Response(200, json=self._job("in_progress" if self.polls >= 0 else "completed"))
+        if path in ("/v1/files/file-out/content", "/v1/files/file-err/content"):
+            failed = path == "/v1/files/file-err/content"
+            output = []
+            for line in self.lines[:len(self.lines) - self.expired]:
+                if (line["body"]["messages"][-1]["content"] == "fail") != failed:
+                    continue
+                if failed:
+                    response = {"status_code": 400, "body": {"error": {"message": "bad request"}}}
+                else:
+                    response = {"status_code": 200, "body": self.respond(line["body"])}
+                output.append(json.dumps({"id": "resp", "custom_id": line["custom_id"], "response": response, "error": None}))
+            return httpx.Response(200, text="\n".join(output))
+        return httpx.Response(404, json={"error": "not found"})
+
+
+class AnthropicBatchServer:
+    """Stand-in for the Anthropic Message Batches endpoints, see `OpenAIBatchServer`."""
+    def __init__(self, respond: Callable[[Dict[str, Any]], Dict[str, Any]], polls: int = 1, expired: int = 0):
+        self.respond = respond
+        self.polls = polls
+        self.expired = expired
+        self.requests: List[Dict[str, Any]] = []
+
+    def _job(self, status: str) -> Dict[str, Any]:
+        job = {"id": "msgbatch_1", "type": "message_batch", "processing_status": status, "results_url": None}
+        ended = len(self.requests) if status == "ended" else 0
+        job["request_counts"] = {
+            "processing": len(self.requests) - ended,
+            "succeeded": ended - self.expired,
+            "errored": 0,
+            "canceled": 0,
+            "expired": self.expired
+        }
+        if status == "ended":
+            job["results_url"] = "https://api.anthropic.com/v1/messages/batches/msgbatch_1/results"
+        return job
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/v1/messages/batches":
+            self.requests = json.loads(request.content)["requests"]
+            return httpx.Response(200, json=self._job("in_progress"))
+        if path == "/v1/messages/batches/msgbatch_1":
+            self.polls -= 1
+            return httpx.Response(200, json=self._job("in_progress" if self.polls >= 0 else "ended"))
+        if path == "/v1/messages/batches/msgbatch_1/results":
+            output = []
+            for request in self.requests[:len(self.requests) - self.expired]:
+                if '"fail"' in json.dumps(request["params"]["messages"][-1]):
+                    result = {"type": "errored", "error": {"type": "error", "error": {"type": "invalid_request_error", "message": "bad request"}}}
+                else:
+                    result = {"type": "succeeded", "message": self.respond(request["params"])}
+                output.append(json.dumps({"custom_id": request["custom_id"], "result": result}))
+            return httpx.Response(200, text="\n".join(output))
+        return httpx.Response(404, json={"error": "not found"})
+
+
+def embeddings_response(request: httpx.Request) -> httpx.Response:
+    """
+    Answers an embeddings request with `[len(value), position]` for each
+    input, base64 encoded when the request asks for it.
+    """
+    import base64
+    import struct
+
+    body = json.loads(request.content)
+    data = []
+    for index, value in enumerate(body["input"]):
+        embedding = [float(len(value)), float(index)]
+        if body.get("encoding_format") == "base64":
+            embedding = base64.b64encode(struct.pack("<2f", *embedding)).decode()
+        data.append({"object": "embedding", "index": index, "embedding": embedding})
+    tokens = sum(len(value) for value in body["input"])
+    return httpx.Response(200, json={
+        "object": "list",
+        "data": data,
+        "model": body["model"],
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+    })
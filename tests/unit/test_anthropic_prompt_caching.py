@@ -0,0 +1,109 @@
+import httpx
+from pydantic import BaseModel
+from ai_sdk import generate_text, stream_text
+from ai_sdk.core.types import SystemMessage, UserMessage, AssistantMessage, TextPart, Tool
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings, AnthropicChatSettings
+from .mock_provider import anthropic_message, anthropic_stream, sse_response
+
+EPHEMERAL = {"anthropic": {"cache_control": {"type": "ephemeral"}}}
+
+
+class Weather(BaseModel):
+    location: str
+
+
+def _model(client_factories, **settings):
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+    return provider("claude-3-5-sonnet-20241022", AnthropicChatSettings(**settings))
+
+
+def test_explicit_breakpoints(server, client_factories):
+    server.queue(anthropic_message())
+    generate_text(
+        model=_model(client_factories),
+        messages=[
+            SystemMessage(content="Long instructions", provider_options=EPHEMERAL),
+            UserMessage(content=[
+                TextPart(text="Long document", provider_options=EPHEMERAL),
+                TextPart(text="Question"),
+            ]),
+        ],
+        tools={"weather": Tool(description="Get the weather", parameters=Weather, provider_options=EPHEMERAL)},
+        max_steps=1
+    )
+
+    body = server.bodies()[0]
+    assert body["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert body["tools"][0]["cache_control"] == {"type": "ephemeral"}
+    content = body["messages"][0]["content"]
+    assert content[0]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in content[1]
+
+
+def test_auto_mode_caches_stable_prefix(server, client_factories):
+    server.queue(anthropic_message())
+    generate_text(
+        model=_model(client_factories, prompt_caching="auto"),
+        messages=[
+            SystemMessage(content="Long instructions"),
+            UserMessage(content="First question"),
+            AssistantMessage(content="First answer"),
+            UserMessage(content="Second question"),
+        ],
+        tools={"weather": Tool(description="Get the weather", parameters=Weather)},
+        max_steps=1
+    )
+
+    body = server.bodies()[0]
+    assert body["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert body["system"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert body["messages"][-2]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in body["messages"][-1]["content"][-1]
+
+
+def test_auto_mode_respects_breakpoint_limit(server, client_factories):
+    server.queue(anthropic_message())
+    generate_text(
+        model=_model(client_factories, prompt_caching="auto"),
+        messages=[
+            SystemMessage(content="Long instructions"),
+            UserMessage(content="a", provider_options=EPHEMERAL),
+            AssistantMessage(content="b", provider_options=EPHEMERAL),
+            UserMessage(content="c", provider_options=EPHEMERAL),
+            AssistantMessage(content="d"),
+            UserMessage(content="e"),
+        ],
+        max_steps=1
+    )
+
+    body = server.bodies()[0]
+    breakpoints = [block for block in body["system"] if "cache_control" in block]
+    for message in body["messages"]:
+        breakpoints += [block for block in message["content"] if "cache_control" in block]
+    assert len(breakpoints) == 4
+    assert body["system"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in body["messages"][-2]["content"][-1]
+
+
+def test_cache_usage_reported_in_provider_metadata(server, client_factories):
+    message = anthropic_message()
+    message["usage"].update({"cache_creation_input_tokens": 1200, "cache_read_input_tokens": 0})
+    server.queue(message)
+
+    res = generate_text(model=_model(client_factories), prompt="Hi")
+
+    assert res.provider_metadata["anthropic"] == {"cache_creation_input_tokens": 1200, "cache_read_input_tokens": 0}
+
+
+def test_cache_usage_reported_when_streaming(server, client_factories):
+    def respond(request: httpx.Request) -> httpx.Response:
+        response = anthropic_stream(["Hel", "lo"])
+        text = response.text.replace('"input_tokens": 10', '"input_tokens": 10, "cache_read_input_tokens": 900')
+        return httpx.Response(200, content=text.encode(), headers=response.headers)
+
+    server.queue(respond)
+    res = stream_text(model=_model(client_factories), prompt="Hi")
+    text = "".join(res.text_stream)
+
+    assert text == "Hello"
+    assert res.provider_metadata["anthropic"] == {"cache_read_input_tokens": 900}
@@ -0,0 +1,126 @@
+import pytest
+from pydantic import BaseModel
+from ai_sdk import create_text_batch_job, create_object_batch_job, resume_batch_job
+from ai_sdk.core import batch_job
+from ai_sdk.core.errors import AI_APICallError, AI_BatchJobError, AI_UnsupportedFunctionalityError
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from ai_sdk.openrouter import create_openrouter_provider, OpenRouterProviderSettings
+from .mock_provider import OpenAIBatchServer, AnthropicBatchServer, openai_completion, anthropic_message
+
+
+class Answer(BaseModel):
+    value: int
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(batch_job.time, "sleep", delays.append)
+    return delays
+
+
+def test_openai_text_batch_job(server, client_factories, sleeps):
+    batch_server = OpenAIBatchServer(lambda body: openai_completion(body["messages"][-1]["content"].upper()), polls=2)
+    server.queue(batch_server.handler)
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    job = create_text_batch_job(provider("gpt-4o"), ["a", "fail", "c"], temperature=0)
+    batch = job.wait(poll_interval=1, backoff=2)
+
+    assert job.id == "batch_1" and job.status == "completed"
+    assert [line["custom_id"] for line in batch_server.lines] == ["request-0", "request-1", "request-2"]
+    assert batch_server.lines[0]["body"]["temperature"] == 0
+    assert batch.results[0].text == "A" and batch.results[2].text == "C"
+    assert isinstance(batch.items[1].error, AI_APICallError)
+    assert batch.usage.total_tokens == 30
+    assert sleeps == [1, 2]
+
+
+def test_openai_batch_job_resume(server, client_factories, sleeps):
+    batch_server = OpenAIBatchServer(lambda body: openai_completion('{"value": 7}'), polls=0)
+    server.queue(batch_server.handler)
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    create_object_batch_job(provider("gpt-4o"), Answer, ["one", "two"])
+
+    job = resume_batch_job(provider("gpt-4o"), "batch_1", schema=Answer)
+    batch = job.wait()
+
+    assert [result.object.value for result in batch.results] == [7, 7]
+    assert sleeps == []
+
+
+def test_resumed_batch_job_reports_missing_requests(server, client_factories, sleeps):
+    batch_server = OpenAIBatchServer(lambda body: openai_completion("ok"), polls=0, expired=1)
+    server.queue(batch_server.handler)
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    create_text_batch_job(provider("gpt-4o"), ["a", "b", "c"])
+
+    batch = resume_batch_job(provider("gpt-4o"), "batch_1").wait()
+
+    assert [result.text for result in batch.results[:2]] == ["ok", "ok"]
+    assert len(batch.items) == 3
+    assert isinstance(batch.items[2].error, AI_BatchJobError)
+    assert batch.items[2].error.custom_id == "request-2"
+
+
+def test_resumed_anthropic_batch_job_reports_missing_requests(server, client_factories, sleeps):
+    batch_server = AnthropicBatchServer(lambda params: anthropic_message("ok"), polls=0, expired=2)
+    server.queue(batch_server.handler)
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+    create_text_batch_job(provider("claude-3-5-sonnet-20241022"), ["a", "b", "c"])
+
+    batch = resume_batch_job(provider("claude-3-5-sonnet-20241022"), "msgbatch_1").wait()
+
+    assert batch.results[0].text == "ok"
+    assert [item.ok for item in batch.items] == [True, False, False]
+
+
+def test_batch_job_skips_unknown_custom_ids(server, client_factories):
+    class ForeignBatchAPI(batch_job.BatchAPI):
+        def status(self, job):
+            return "completed"
+
+        def results(self, job):
+            error = AI_BatchJobError(job_id=job["id"], message="Request expired")
+            yield "request-0", None, error
+            yield "my-own-id", None, error
+            yield "request-", None, error
+
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    job = batch_job.BatchJob(provider("gpt-4o"), {"id": "batch_1"})
+    job.api = ForeignBatchAPI()
+
+    assert [item.index for item in job.results().items] == [0]
+
+
+def test_batch_job_results_before_completion(server, client_factories):
+    server.queue(OpenAIBatchServer(lambda body: openai_completion(), polls=5).handler)
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    job = create_text_batch_job(provider("gpt-4o"), ["a"])
+
+    with pytest.raises(AI_BatchJobError):
+        job.results()
+
+
+def test_anthropic_object_batch_job(server, client_factories, sleeps):
+    tool_call = {"id": "toolu_1", "name": "json_object", "args": {"value": 3}}
+    batch_server = AnthropicBatchServer(lambda params: anthropic_message(text=None, tool_calls=[tool_call]))
+    server.queue(batch_server.handler)
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+
+    job = create_object_batch_job(provider("claude-3-5-sonnet-20241022"), Answer, ["one", "fail"])
+    batch = job.wait(poll_interval=0.5)
+
+    assert batch_server.requests[0]["params"]["tools"][0]["name"] == "json_object"
+    assert batch.results[0].object.value == 3
+    assert isinstance(batch.items[1].error, AI_BatchJobError)
+    assert sleeps == [0.5]
+
+
+def test_batch_job_unsupported_provider(server, client_factories):
+    provider = create_openrouter_provider(OpenRouterProviderSettings(**client_factories))
+
+    with pytest.raises(AI_UnsupportedFunctionalityError):
+        create_text_batch_job(provider("openai/gpt-4o"), ["a"])
@@ -0,0 +1,48 @@
+import pytest
+from benchmarks import fixtures
+from benchmarks.run import CASES, LARGE_RESPONSE_BYTES, measure
+
+
+def _text(expected):
+    return lambda result: result.text == expected
+
+
+def _recipe(result):
+    return result.object == fixtures.Recipe(**fixtures.RECIPE)
+
+
+def _request_args(model_id, messages):
+    return lambda result: result[0]["model"] == model_id and len(result[0]["messages"]) == messages
+
+
+EXPECTED = {
+    "generate_text.single": _text("Hello!"),
+    "generate_text.single.lean": _text("Hello!"),
+    "generate_text.large_response": _text("x" * LARGE_RESPONSE_BYTES),
+    "generate_text.large_response.lean": _text("x" * LARGE_RESPONSE_BYTES),
+    "generate_text.multi_step": _text("Done"),
+    "generate_object.json": _recipe,
+    "generate_object.tool_call": _recipe,
+    "generate_object.text": _recipe,
+    # The system prompt is sent as a separate parameter to Anthropic
+    "conversion.openai.cold": _request_args("gpt-4o", 43),
+    "conversion.openai.warm": _request_args("gpt-4o", 43),
+    "conversion.anthropic.cold": _request_args("claude-3-5-sonnet-20241022", 42),
+    "conversion.anthropic.warm": _request_args("claude-3-5-sonnet-20241022", 42),
+    "conversion.openrouter.cold": _request_args("openai/gpt-4o", 43),
+    "conversion.openrouter.warm": _request_args("openai/gpt-4o", 43),
+    "image.openai": _text("A cat"),
+    "image.anthropic": _text("A cat"),
+}
+
+
+def test_every_case_has_an_expected_result():
+    assert sorted(CASES) == sorted(EXPECTED)
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_benchmark_case_runs(name):
+    fn = CASES[name]()
+    assert EXPECTED[name](fn())
+    stats = measure(fn, iterations=2, memory_iterations=1, warmup=1)
+    assert stats["median_us"] > 0
@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from pydantic import BaseModel
+from ai_sdk import generate_text, generate_text_async, generate_object, MemoryCache, SQLiteCache, TieredCache
+from ai_sdk.core.cache import cache_key
+from ai_sdk.core.errors import AI_ObjectValidationError
+from ai_sdk.core.language_model import LanguageModelCallOptions, LanguageModelCallResult, LanguageModelUsage
+from ai_sdk.core.types import UserMessage
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from .mock_provider import openai_completion
+
+
+def _result(text):
+    return LanguageModelCallResult(text=text, usage=LanguageModelUsage(prompt_tokens=1, completion_tokens=1))
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_size=2)
+    cache.set("a", _result("a"))
+    cache.set("b", _result("b"))
+    cache.get("a")
+    cache.set("c", _result("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a").text == "a"
+    assert cache.get("c").text == "c"
+
+
+def test_memory_cache_ttl(monkeypatch):
+    import ai_sdk.core.cache as cache_module
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+
+    cache = MemoryCache(ttl=10)
+    cache.set("a", _result("a"))
+    now[0] += 11
+
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteCache(path).set("a", _result("persisted"))
+
+    assert SQLiteCache(path).get("a").text == "persisted"
+
+
+def test_tiered_cache_backfills_faster_tiers(tmp_path):
+    memory = MemoryCache()
+    sqlite = SQLiteCache(str(tmp_path / "cache.sqlite"))
+    sqlite.set("a", _result("a"))
+
+    assert TieredCache(memory, sqlite).get("a").text == "a"
+    assert memory.get("a").text == "a"
+
+
+def test_cache_key_ignores_headers_and_retries(client_factories):
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    model = provider("gpt-4o")
+    messages = [UserMessage(content="Hello")]
+
+    key = cache_key(model, LanguageModelCallOptions(messages=messages, temperature=0))
+
+    assert key == cache_key(model, LanguageModelCallOptions(messages=messages, temperature=0, headers={"x": "y"}, max_retries=1))
+    assert key != cache_key(model, LanguageModelCallOptions(messages=messages, temperature=0.5))
+    assert key != cache_key(provider("gpt-4o-mini"), LanguageModelCallOptions(messages=messages, temperature=0))
+
+
+def test_generate_text_cache_hit(server, client_factories):
+    server.queue(openai_completion("cached answer"))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    cache = MemoryCache()
+
+    first = generate_text(model=provider("gpt-4o"), prompt="Hello", temperature=0, cache=cache)
+    second = generate_text(model=provider("gpt-4o"), prompt="Hello", temperature=0, cache=cache)
+    third = asyncio.run(generate_text_async(model=provider("gpt-4o"), prompt="Hello", temperature=0, cache=cache))
+
+    assert len(server.bodies()) == 1
+    assert not first.response.cache_hit
+    assert second.response.cache_hit and third.response.cache_hit
+    assert first.text == second.text == third.text == "cached answer"
+
+
+def test_lean_and_full_results_are_cached_separately(server, client_factories):
+    server.queue(openai_completion("answer"))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    cache = MemoryCache()
+
+    lean = generate_text(model=provider("gpt-4o"), prompt="Hello", cache=cache, lean=True)
+    full = generate_text(model=provider("gpt-4o"), prompt="Hello", cache=cache)
+
+    assert lean.text == full.text == "answer"
+    assert len(server.bodies()) == 2
+    assert full.request.body is not None and not full.response.cache_hit
+
+
+def test_generate_object_cache_hit(server, client_factories, tmp_path):
+    class Answer(BaseModel):
+        value: int
+
+    server.queue(openai_completion('{"value": 42}'))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"))
+
+    generate_object(model=provider("gpt-4o"), schema=Answer, prompt="Answer", cache=cache)
+    result = generate_object(model=provider("gpt-4o"), schema=Answer, prompt="Answer", cache=cache)
+
+    assert len(server.bodies()) == 1
+    assert result.response.cache_hit
+    assert result.object.value == 42
+
+
+def test_invalid_objects_are_not_cached(server, client_factories):
+    class Answer(BaseModel):
+        value: int
+
+    server.queue(openai_completion('{"value": "many"}'), openai_completion('{"value": 42}'))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    cache = MemoryCache()
+
+    with pytest.raises(AI_ObjectValidationError):
+        generate_object(model=provider("gpt-4o"), schema=Answer, prompt="Answer", cache=cache)
+    results = [generate_object(model=provider("gpt-4o"), schema=Answer, prompt="Answer", cache=cache) for _ in range(2)]
+
+    assert len(server.bodies()) == 2
+    assert [result.object.value for result in results] == [42, 42]
+    assert results[1].response.cache_hit
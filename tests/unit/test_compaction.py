@@ -0,0 +1,154 @@
+import asyncio
+import httpx
+from pydantic import BaseModel
+from ai_sdk import generate_text, generate_text_async, CollapseToolResults, RollingWindow, SummarizeHistory, RateLimiter, RetryStrategy
+from ai_sdk.core.compaction import is_summary
+from ai_sdk.core.tokens import CharacterTokenEstimator
+from ai_sdk.core.types import Tool
+from .mock_provider import openai_completion
+
+
+class Lookup(BaseModel):
+    i: int
+
+
+def _tool_steps(server, steps):
+    server.queue(*[
+        openai_completion(content=None, tool_calls=[{"id": f"call_{i}", "name": "lookup", "args": {"i": i}}])
+        for i in range(steps)
+    ], openai_completion("Done"))
+
+
+TOOLS = {"lookup": Tool(parameters=Lookup, execute=lambda i: "r" * 500)}
+
+
+def test_collapse_tool_results(server, openai_model):
+    _tool_steps(server, 3)
+
+    res = generate_text(
+        model=openai_model,
+        prompt="Look things up",
+        tools=TOOLS,
+        max_steps=4,
+        compaction=CollapseToolResults(keep_last=1)
+    )
+
+    last = server.bodies()[-1]["messages"]
+    tool_contents = [message["content"] for message in last if message["role"] == "tool"]
+    assert tool_contents[:2] == ["[Result of lookup omitted to save context]"] * 2
+    assert len(tool_contents[2]) > 500
+    assert [message.role for message in res.history] == ["user"] + ["assistant", "tool"] * 3 + ["assistant"]
+    assert res.history[-1].content == res.text
+    assert "compaction" in res.timing.steps[-1].phases
+
+
+def test_rolling_window(server, openai_model):
+    _tool_steps(server, 4)
+
+    res = generate_text(
+        model=openai_model,
+        system="Be brief.",
+        prompt="Look things up",
+        tools=TOOLS,
+        max_steps=5,
+        compaction=RollingWindow(keep_last=2)
+    )
+
+    last = server.bodies()[-1]["messages"]
+    assert [message["role"] for message in last] == ["developer", "user", "assistant", "tool", "assistant", "tool"]
+    assert [message["tool_calls"][0]["id"] for message in last if message["role"] == "assistant"] == ["call_2", "call_3"]
+    assert len(res.history) == len(last) + 1
+
+
+def test_summarize_history_with_threshold(server, openai_model, openai_provider):
+    summarizer = openai_provider("gpt-4o-mini")
+    server.queue(
+        openai_completion(content=None, tool_calls=[{"id": "call_0", "name": "lookup", "args": {"i": 0}}]),
+        openai_completion(content=None, tool_calls=[{"id": "call_1", "name": "lookup", "args": {"i": 1}}]),
+        openai_completion("Lookup 0 returned many r's."),
+        openai_completion("Done")
+    )
+
+    res = generate_text(
+        model=openai_model,
+        prompt="Look things up",
+        tools=TOOLS,
+        max_steps=3,
+        compaction=SummarizeHistory(
+            model=summarizer, keep_last=1, trigger_tokens=200, estimator=CharacterTokenEstimator()
+        )
+    )
+
+    bodies = server.bodies()
+    # Step 2 is under the threshold, the summary request comes before step 3
+    assert [body["model"] for body in bodies] == ["gpt-4o", "gpt-4o", "gpt-4o-mini", "gpt-4o"]
+    assert "Tool result (call_0)" in bodies[2]["messages"][1]["content"]
+    assert [message["role"] for message in bodies[3]["messages"]] == ["user", "user", "assistant", "tool"]
+    assert bodies[3]["messages"][1]["content"] == "Summary of earlier steps: Lookup 0 returned many r's."
+    assert res.text == "Done"
+    assert is_summary(res.history[1])
+
+
+def test_summary_requests_are_retried_and_rate_limited(server, openai_model, openai_provider):
+    summarizer = openai_provider("gpt-4o-mini")
+    server.queue(
+        openai_completion(content=None, tool_calls=[{"id": "call_0", "name": "lookup", "args": {"i": 0}}]),
+        openai_completion(content=None, tool_calls=[{"id": "call_1", "name": "lookup", "args": {"i": 1}}]),
+        httpx.Response(500, json={"error": "server error"}),
+        openai_completion("Lookup 0 returned many r's."),
+        openai_completion("Done")
+    )
+    limiter = RateLimiter(requests_per_minute=100)
+
+    res = generate_text(
+        model=openai_model,
+        prompt="Look things up",
+        tools=TOOLS,
+        max_steps=3,
+        retry_strategy=RetryStrategy(base_delay=0, max_delay=0),
+        rate_limiter=limiter,
+        compaction=SummarizeHistory(
+            model=summarizer, keep_last=1, trigger_tokens=200, estimator=CharacterTokenEstimator()
+        )
+    )
+
+    assert [body["model"] for body in server.bodies()] == ["gpt-4o", "gpt-4o", "gpt-4o-mini", "gpt-4o-mini", "gpt-4o"]
+    assert res.text == "Done"
+    assert (summarizer.provider, "gpt-4o-mini") in limiter._buckets
+
+
+def test_history_keeps_the_tool_results_of_the_last_step(server, openai_model):
+    _tool_steps(server, 3)
+
+    res = generate_text(
+        model=openai_model,
+        prompt="Look things up",
+        tools=TOOLS,
+        max_steps=2,
+        compaction=RollingWindow(keep_last=1)
+    )
+
+    assert [message.role for message in res.history] == ["user", "assistant", "tool", "assistant", "tool"]
+    assert res.history[-1].tool_call_id == "call_1"
+
+
+def test_no_compaction_leaves_history_unset(server, openai_model):
+    server.queue(openai_completion("Hi"))
+
+    res = generate_text(model=openai_model, prompt="Hi")
+
+    assert res.history is None
+
+
+def test_compaction_async(server, openai_model):
+    _tool_steps(server, 3)
+
+    res = asyncio.run(generate_text_async(
+        model=openai_model,
+        prompt="Look things up",
+        tools=TOOLS,
+        max_steps=4,
+        compaction=RollingWindow(keep_last=1)
+    ))
+
+    assert [message.role for message in res.history] == ["user", "assistant", "tool", "assistant"]
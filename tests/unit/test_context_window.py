@@ -0,0 +1,130 @@
+import pytest
+from ai_sdk import generate_text, DropOldest, KeepSystemAndLastN, RejectOverflow
+from ai_sdk.core import tokens
+from ai_sdk.core.errors import AI_ContextWindowExceededError
+from ai_sdk.core.tokens import CharacterTokenEstimator, TiktokenTokenEstimator, ContextWindow
+from ai_sdk.core.types import SystemMessage, UserMessage, AssistantMessage, ToolMessage, ToolCallPart, ImagePart
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from .mock_provider import openai_completion, anthropic_message
+
+ESTIMATOR = CharacterTokenEstimator()
+
+
+def _openai(client_factories, context_window=1000, max_output_tokens=500):
+    model = create_openai_provider(OpenAIProviderSettings(**client_factories))("gpt-4o")
+    model.context_window = lambda: ContextWindow(context_window=context_window, max_output_tokens=max_output_tokens)
+    return model
+
+
+def _history(turns):
+    messages = [SystemMessage(content="Be brief.")]
+    for i in range(turns):
+        messages.append(UserMessage(content=f"Question {i} " + "x" * 400))
+        messages.append(AssistantMessage(content="", tool_calls=[
+            ToolCallPart(tool_call_id=f"call_{i}", tool_name="lookup", args={"i": i})
+        ]))
+        messages.append(ToolMessage(tool_call_id=f"call_{i}", content="y" * 400))
+    messages.append(UserMessage(content="Last question"))
+    return messages
+
+
+def test_character_estimator():
+    assert ESTIMATOR.count_text("abcd" * 10) == 10
+    assert ESTIMATOR.count_message(UserMessage(content="abcd" * 10)) == 10 + ESTIMATOR.message_overhead
+    image = UserMessage(content=[ImagePart(image="a" * 100000, mime_type="image/png")])
+    assert ESTIMATOR.count_message(image) == ESTIMATOR.image_tokens + ESTIMATOR.message_overhead
+
+
+def test_tiktoken_estimator_falls_back_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(tokens, "tiktoken", None)
+
+    assert TiktokenTokenEstimator().count_text("abcd" * 10) == 10
+
+
+def test_drop_oldest_keeps_system_and_whole_turns(server, client_factories):
+    server.queue(openai_completion("ok"))
+
+    generate_text(
+        model=_openai(client_factories),
+        messages=_history(turns=5),
+        context_policy=DropOldest(estimator=ESTIMATOR)
+    )
+
+    [body] = server.bodies()
+    roles = [message["role"] for message in body["messages"]]
+    assert roles[0] == "developer"
+    assert roles[1] == "user"
+    assert roles[-1] == "user" and body["messages"][-1]["content"] == "Last question"
+    assert len(roles) < 1 + 5 * 3 + 1
+    # Every tool result kept its tool call
+    call_ids = {call["id"] for message in body["messages"] for call in message.get("tool_calls", [])}
+    assert all(message["tool_call_id"] in call_ids for message in body["messages"] if message["role"] == "tool")
+    assert 0 < body["max_completion_tokens"] <= 500
+
+
+def test_keep_system_and_last_n(server, client_factories):
+    server.queue(openai_completion("ok"))
+
+    generate_text(
+        model=_openai(client_factories, context_window=100000),
+        messages=_history(turns=5),
+        context_policy=KeepSystemAndLastN(2, estimator=ESTIMATOR)
+    )
+
+    messages = server.bodies()[0]["messages"]
+    # The last two messages are the last tool result and the new question, the tool result pulls in its turn
+    assert [message["role"] for message in messages] == ["developer", "user", "assistant", "tool", "user"]
+    assert messages[1]["content"].startswith("Question 4")
+
+
+def test_reject_overflow(server, client_factories):
+    server.queue(openai_completion("ok"))
+
+    with pytest.raises(AI_ContextWindowExceededError) as error:
+        generate_text(
+            model=_openai(client_factories),
+            messages=_history(turns=5),
+            context_policy=RejectOverflow(estimator=ESTIMATOR)
+        )
+
+    assert error.value.prompt_tokens > error.value.context_window
+    assert server.requests == []
+
+
+def test_fitting_messages_are_left_alone(server, client_factories):
+    server.queue(openai_completion("ok"))
+    messages = _history(turns=1)
+
+    generate_text(
+        model=_openai(client_factories, context_window=100000),
+        messages=messages,
+        max_tokens=100,
+        context_policy=DropOldest(estimator=ESTIMATOR)
+    )
+
+    body = server.bodies()[0]
+    assert len(body["messages"]) == len(messages)
+    assert body["max_completion_tokens"] == 100
+
+
+def test_anthropic_max_tokens_sized_to_window(server, client_factories):
+    server.queue(anthropic_message("ok"))
+    model = create_anthropic_provider(AnthropicProviderSettings(**client_factories))("claude-3-5-sonnet-20241022")
+
+    generate_text(model=model, prompt="Hi", context_policy=DropOldest())
+    assert server.bodies()[0]["max_tokens"] == 8192
+
+    model.context_window = lambda: ContextWindow(context_window=3000, max_output_tokens=8192)
+    generate_text(model=model, prompt="Hi", context_policy=DropOldest())
+    assert server.bodies()[1]["max_tokens"] < 3000
+
+
+def test_unknown_context_window_is_ignored(server, client_factories):
+    server.queue(openai_completion("ok"))
+    model = _openai(client_factories)
+    model.context_window = lambda: None
+
+    generate_text(model=model, messages=_history(turns=5), context_policy=RejectOverflow(estimator=ESTIMATOR))
+
+    assert "max_completion_tokens" not in server.bodies()[0]
@@ -0,0 +1,72 @@
+import asyncio
+import httpx
+import pytest
+from ai_sdk import embed, embed_many, embed_many_async
+from ai_sdk.core.embed import split_into_chunks
+from ai_sdk.core.retry_strategy import RetryStrategy
+from ai_sdk.core.tokens import CharacterTokenEstimator
+from ai_sdk.openrouter import create_openrouter_provider, OpenRouterProviderSettings
+from .mock_provider import embeddings_response
+
+np = pytest.importorskip("numpy")
+
+
+def test_embed(server, openai_embedding_model):
+    server.queue(embeddings_response)
+
+    res = embed(openai_embedding_model, "hello")
+
+    assert res.embedding.dtype == np.float32
+    assert res.embedding.tolist() == [5.0, 0.0]
+    assert res.usage.tokens == 5
+    [body] = server.bodies()
+    assert body == {"model": "text-embedding-3-small", "input": ["hello"], "encoding_format": "base64"}
+    assert str(server.requests[0].url) == "https://api.openai.com/v1/embeddings"
+
+
+def test_embed_many_splits_into_batches(server, openai_embedding_model):
+    server.queue(embeddings_response)
+    values = ["x" * i for i in range(1, 11)]
+
+    res = embed_many(openai_embedding_model, values, max_batch_size=3, max_concurrency=4)
+
+    assert res.embeddings.shape == (10, 2)
+    # Rows are in input order, the second column is the position inside each request
+    assert res.embeddings[:, 0].tolist() == [float(i) for i in range(1, 11)]
+    assert res.embeddings[:, 1].tolist() == [0, 1, 2, 0, 1, 2, 0, 1, 2, 0]
+    assert sorted(len(body["input"]) for body in server.bodies()) == [1, 3, 3, 3]
+    assert res.usage.tokens == sum(range(1, 11))
+
+
+def test_chunks_respect_token_limit(openai_embedding_model):
+    model = openai_embedding_model
+    model.max_tokens_per_call = 10
+    model.token_estimator = lambda: CharacterTokenEstimator(chars_per_token=1)
+
+    assert split_into_chunks(["a" * 4, "b" * 4, "c" * 4, "d" * 20, "e"], model) == [(0, 2), (2, 3), (3, 4), (4, 5)]
+    assert split_into_chunks([], model) == []
+
+
+def test_embed_many_retries_failed_batches(server, openai_embedding_model):
+    server.queue(httpx.Response(429, text="slow down"), embeddings_response)
+
+    res = embed_many(
+        openai_embedding_model,
+        ["a", "b"],
+        retry_strategy=RetryStrategy(base_delay=0, max_delay=0)
+    )
+
+    assert res.embeddings.shape == (2, 2)
+    assert len(server.requests) == 2
+
+
+def test_embed_many_async_openrouter(server, client_factories):
+    server.queue(embeddings_response)
+    provider = create_openrouter_provider(OpenRouterProviderSettings(**client_factories))
+    model = provider.embedding("openai/text-embedding-3-small")
+
+    res = asyncio.run(embed_many_async(model, ["ab", "abc", "abcd"], max_batch_size=2))
+
+    assert res.embeddings[:, 0].tolist() == [2.0, 3.0, 4.0]
+    assert all("encoding_format" not in body for body in server.bodies())
+    assert str(server.requests[0].url) == "https://openrouter.ai/api/v1/embeddings"
@@ -0,0 +1,99 @@
+import pytest
+from ai_sdk import EmbeddingStore
+
+np = pytest.importorskip("numpy")
+
+
+def _vectors(n, dimensions=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dimensions)).astype(np.float32)
+
+
+def test_search_matches_brute_force(tmp_path):
+    vectors = _vectors(1000)
+    store = EmbeddingStore(str(tmp_path / "store"), block_size=128)
+    store.add([f"doc-{i}" for i in range(1000)], vectors)
+
+    queries = _vectors(3, seed=1)
+    hits = store.search(queries, k=5)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T, axis=1)[:, :5]
+    assert [[hit.id for hit in query_hits] for query_hits in hits] == [[f"doc-{i}" for i in row] for row in expected]
+    assert all(query_hits[0].score >= query_hits[-1].score for query_hits in hits)
+    assert store.search(queries[0], k=1)[0].id == hits[0][0].id
+
+
+def test_reopen_and_append(tmp_path):
+    path = str(tmp_path / "store")
+    store = EmbeddingStore(path, metric="dot")
+    store.add(["a", "b"], np.array([[1, 0], [0, 1]]), metadata=[{"title": "A"}, None])
+
+    reopened = EmbeddingStore(path, metric="dot")
+    assert len(reopened) == 2 and reopened.dimensions == 2
+    reopened.add(["c"], np.array([[3, 3]]))
+
+    [hit] = reopened.search(np.array([1, 0]), k=1)
+    assert (hit.id, hit.score) == ("c", 3.0)
+    assert reopened.search(np.array([1, -1]), k=1)[0].metadata == {"title": "A"}
+    assert reopened.get("b").tolist() == [0, 1]
+    assert reopened.ids == ["a", "b", "c"]
+
+
+def test_rejects_invalid_input(tmp_path):
+    path = str(tmp_path / "store")
+    store = EmbeddingStore(path, dimensions=2)
+
+    with pytest.raises(ValueError):
+        store.add(["a"], np.array([[1, 2, 3]]))
+    store.add(["a"], np.array([[1, 2]]))
+    with pytest.raises(ValueError):
+        store.add(["a"], np.array([[1, 2]]))
+    with pytest.raises(ValueError):
+        EmbeddingStore(path, dimensions=3)
+    with pytest.raises(ValueError):
+        EmbeddingStore(path, metric="dot")
+
+
+def test_interrupted_add_is_discarded(tmp_path):
+    path = tmp_path / "store"
+    EmbeddingStore(str(path)).add(["a"], np.array([[1.0, 0.0]]))
+    # Vectors written without their records, as after a crash in the middle of `add`
+    with open(path / "vectors.f32", "ab") as f:
+        f.write(np.array([[0.0, 1.0]], dtype="<f4").tobytes())
+
+    store = EmbeddingStore(str(path))
+    store.add(["b"], np.array([[0.0, 2.0]]))
+
+    assert store.get("b").tolist() == [0.0, 1.0]
+    assert len(store) == 2
+
+
+def test_partial_row_is_discarded(tmp_path):
+    path = tmp_path / "store"
+    EmbeddingStore(str(path), metric="dot").add(["a"], np.array([[5.0, 0.0]]))
+    with open(path / "vectors.f32", "ab") as f:
+        f.write(b"\x00" * 4)
+
+    EmbeddingStore(str(path), metric="dot").add(["b"], np.array([[0.0, 2.0]]))
+
+    store = EmbeddingStore(str(path), metric="dot")
+    assert store.get("a").tolist() == [5.0, 0.0]
+    assert store.get("b").tolist() == [0.0, 2.0]
+
+
+def test_rejected_first_add_does_not_set_dimensions(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store"))
+
+    with pytest.raises(ValueError):
+        store.add(["a", "b"], np.array([[1, 2, 3]]))
+    store.add(["a"], np.array([[1, 2]]))
+
+    assert store.dimensions == 2
+
+
+def test_empty_store(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store"))
+
+    assert len(store) == 0
+    assert store.search(np.zeros(4), k=3) == []
+    assert store.search(np.zeros((2, 4)), k=3) == [[], []]
@@ -0,0 +1,142 @@
+import httpx
+import pytest
+from ai_sdk import generate_text, stream_text, FallbackModel, CircuitBreaker, MemoryCache, RateLimiter
+from ai_sdk.core import fallback
+from ai_sdk.core.errors import AI_APICallError, AI_CircuitOpenError
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from .mock_provider import MockServer, openai_completion, anthropic_message, openai_stream
+
+
+def _factories(server):
+    transport = server.transport()
+    return {
+        "fetch": lambda: httpx.Client(transport=transport),
+        "fetch_async": lambda: httpx.AsyncClient(transport=transport),
+    }
+
+
+@pytest.fixture
+def servers():
+    return MockServer(), MockServer()
+
+
+@pytest.fixture
+def models(servers):
+    anthropic_server, openai_server = servers
+    anthropic = create_anthropic_provider(AnthropicProviderSettings(**_factories(anthropic_server)))
+    openai = create_openai_provider(OpenAIProviderSettings(**_factories(openai_server)))
+    return anthropic("claude-3-5-sonnet-20241022"), openai("gpt-4o")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    state = {"now": 1000.0}
+    monkeypatch.setattr(fallback.time, "monotonic", lambda: state["now"])
+    return state
+
+
+def test_falls_back_on_provider_failure(servers, models):
+    anthropic_server, openai_server = servers
+    anthropic_server.queue(httpx.Response(529, json={"error": "overloaded"}))
+    openai_server.queue(openai_completion("from openai"))
+    breakers = [CircuitBreaker(), CircuitBreaker()]
+
+    result = generate_text(model=FallbackModel(list(models), breakers), prompt="Hello")
+
+    assert result.text == "from openai"
+    assert breakers[0].failure_rate == 1.0
+    assert breakers[1].failure_rate == 0.0
+
+
+def test_circuit_opens_and_recovers_with_half_open_probe(servers, models, clock):
+    anthropic_server, openai_server = servers
+    anthropic_server.queue(httpx.Response(503, json={"error": "unavailable"}))
+    openai_server.queue(openai_completion("from openai"))
+    breaker = CircuitBreaker(minimum_calls=2, reset_timeout=30)
+    model = FallbackModel(list(models), [breaker, CircuitBreaker()])
+
+    for _ in range(3):
+        generate_text(model=model, prompt="Hello", max_retries=1)
+
+    assert breaker.state == "open"
+    assert len(anthropic_server.requests) == 2
+
+    clock["now"] += 31
+    anthropic_server.responses = [anthropic_message("recovered")]
+    result = generate_text(model=model, prompt="Hello", max_retries=1)
+
+    assert result.text == "recovered"
+    assert breaker.state == "closed"
+
+
+def test_request_errors_are_not_retried_on_other_models(servers, models):
+    anthropic_server, openai_server = servers
+    anthropic_server.queue(httpx.Response(400, json={"error": "bad request"}))
+
+    with pytest.raises(AI_APICallError):
+        generate_text(model=FallbackModel(list(models), [CircuitBreaker(), CircuitBreaker()]), prompt="Hello")
+
+    assert openai_server.requests == []
+
+
+def test_all_circuits_open(models, clock):
+    breakers = [CircuitBreaker(minimum_calls=1), CircuitBreaker(minimum_calls=1)]
+    for breaker in breakers:
+        breaker.record_failure(1.0)
+
+    with pytest.raises(AI_CircuitOpenError):
+        generate_text(model=FallbackModel(list(models), breakers), prompt="Hello")
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(minimum_calls=2, slow_call_duration=5.0)
+    breaker.record_success(1.0)
+    breaker.record_success(10.0)
+
+    assert breaker.state == "open"
+
+
+def test_model_list_and_stream_fallback(servers, models):
+    anthropic_server, openai_server = servers
+    anthropic_server.queue(httpx.Response(500, json={"error": "internal"}))
+    openai_server.queue(openai_completion("listed"))
+
+    assert generate_text(model=list(models), prompt="Hello").text == "listed"
+
+    openai_server.responses = [openai_stream(["stre", "amed"])]
+    assert stream_text(model=list(models), prompt="Hello").text == "streamed"
+
+
+def test_capabilities_require_every_model(models):
+    model = FallbackModel(list(models))
+
+    assert not model.supports_json_mode()
+    assert model.supports_tool_calls()
+
+
+def test_rate_limits_follow_the_model_that_served_the_call(servers, models):
+    anthropic_server, openai_server = servers
+    anthropic_server.queue(httpx.Response(529, json={"error": "overloaded"}))
+    openai_server.queue(httpx.Response(200, json=openai_completion("from openai"), headers={"x-ratelimit-limit-requests": "500"}))
+    limiter = RateLimiter(requests_per_minute=100)
+
+    generate_text(model=FallbackModel(list(models), [CircuitBreaker(), CircuitBreaker()]), prompt="Hello", rate_limiter=limiter)
+
+    anthropic_key, openai_key = [(model.provider, model.model_id) for model in models]
+    assert set(limiter._buckets) == {anthropic_key, openai_key}
+    assert limiter._buckets[openai_key]["requests"].capacity == 500
+    assert limiter._buckets[anthropic_key]["requests"].capacity == 100
+
+
+def test_cache_entries_are_keyed_by_the_model_that_served_the_call(servers, models):
+    anthropic_server, openai_server = servers
+    anthropic_server.queue(httpx.Response(529, json={"error": "overloaded"}))
+    openai_server.queue(openai_completion("from openai"))
+    cache = MemoryCache()
+
+    generate_text(model=FallbackModel(list(models), [CircuitBreaker(), CircuitBreaker()]), prompt="Hello", cache=cache)
+    result = generate_text(model=models[1], prompt="Hello", cache=cache)
+
+    assert result.text == "from openai"
+    assert len(openai_server.requests) == 1
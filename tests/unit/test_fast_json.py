@@ -0,0 +1,59 @@
+import json
+import pytest
+from ai_sdk import generate_text
+from ai_sdk.core import fast_json
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from .mock_provider import openai_completion, anthropic_message
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    elif fast_json.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_round_trip(backend):
+    value = {"text": "héllo", "numbers": [1, 2.5, None], "nested": {"ok": True}}
+    encoded = fast_json.dumps(value)
+
+    assert isinstance(encoded, bytes)
+    assert fast_json.loads(encoded) == value
+    assert fast_json.loads(fast_json.dumps_text(value)) == value
+
+
+def test_values_unsupported_by_orjson_fall_back(backend):
+    value = {1: 2 ** 70}
+    assert json.loads(fast_json.dumps(value)) == {"1": 2 ** 70}
+
+
+def test_invalid_json_raises_value_error(backend):
+    with pytest.raises(ValueError):
+        fast_json.loads(b"{not json")
+
+
+def test_openai_bodies_reuse_wire_bytes(backend, server, client_factories):
+    server.queue(openai_completion("Hello!"))
+    model = create_openai_provider(OpenAIProviderSettings(**client_factories))("gpt-4o")
+
+    res = generate_text(model=model, prompt="Hi")
+
+    request = server.requests[0]
+    assert request.headers["content-type"] == "application/json"
+    assert res.request.body == request.content.decode("utf-8")
+    assert json.loads(res.request.body)["messages"][0]["content"] == "Hi"
+    assert json.loads(res.response.body) == openai_completion("Hello!")
+
+
+def test_anthropic_bodies_reuse_wire_bytes(backend, server, client_factories):
+    server.queue(anthropic_message("Hello!"))
+    model = create_anthropic_provider(AnthropicProviderSettings(**client_factories))("claude-3-5-sonnet-20241022")
+
+    res = generate_text(model=model, prompt="Hi")
+
+    assert res.text == "Hello!"
+    assert res.request.body == server.requests[0].content.decode("utf-8")
+    assert json.loads(res.response.body) == anthropic_message("Hello!")
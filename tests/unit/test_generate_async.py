@@ -0,0 +1,85 @@
+import asyncio
+import httpx
+from typing import List
+from pydantic import BaseModel
+from ai_sdk import generate_text, generate_text_async, generate_object_async
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from .mock_provider import openai_completion, anthropic_message
+
+
+def test_generate_text_async(server, client_factories):
+    server.queue(openai_completion("Hi there"))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    result = asyncio.run(generate_text_async(model=provider("gpt-4o"), prompt="Hello"))
+
+    assert result.text == "Hi there"
+    assert result.usage.total_tokens == 15
+    assert server.bodies()[0]["messages"] == [{"role": "user", "content": "Hello"}]
+
+
+def test_generate_text_async_matches_sync(server, client_factories):
+    server.queue(openai_completion("Same"))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    sync_result = generate_text(model=provider("gpt-4o"), prompt="Hello")
+    async_result = asyncio.run(generate_text_async(model=provider("gpt-4o"), prompt="Hello"))
+
+    assert sync_result.text == async_result.text
+    assert server.bodies()[0] == server.bodies()[1]
+
+
+def test_generate_text_async_retries_with_asyncio_sleep(server, client_factories, monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    server.queue(httpx.Response(429, json={"error": "rate limited"}), openai_completion("ok"))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    result = asyncio.run(generate_text_async(model=provider("gpt-4o"), prompt="Hello"))
+
+    assert result.text == "ok"
+    assert len(server.requests) == 2
+    assert len(sleeps) == 1
+
+
+def test_generate_object_async_tool_mode(server, client_factories):
+    class Recipe(BaseModel):
+        name: str
+        ingredients: List[str]
+
+    server.queue(anthropic_message(text=None, tool_calls=[{
+        "id": "toolu_1",
+        "name": "json_object",
+        "args": {"name": "Lasagna", "ingredients": ["pasta"]}
+    }]))
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+
+    result = asyncio.run(generate_object_async(
+        model=provider("claude-3-5-sonnet-20241022"),
+        schema=Recipe,
+        prompt="A lasagna recipe"
+    ))
+
+    assert result.object == Recipe(name="Lasagna", ingredients=["pasta"])
+    assert server.bodies()[0]["tools"][0]["name"] == "json_object"
+
+
+def test_concurrent_calls_share_one_event_loop(server, client_factories):
+    server.queue(openai_completion("ok"))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    model = provider("gpt-4o")
+
+    async def run():
+        return await asyncio.gather(*[
+            generate_text_async(model=model, prompt=f"Prompt {i}") for i in range(20)
+        ])
+
+    results = asyncio.run(run())
+
+    assert [result.text for result in results] == ["ok"] * 20
+    assert len(server.requests) == 20
@@ -0,0 +1,59 @@
+import asyncio
+import json
+import httpx
+from pydantic import BaseModel
+from ai_sdk import generate_text_batch, generate_text_batch_async, generate_object_batch
+from ai_sdk.core.errors import AI_APICallError
+from ai_sdk.core.types import UserMessage
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from .mock_provider import openai_completion
+
+
+def _echo(request):
+    prompt = json.loads(request.content)["messages"][-1]["content"]
+    if prompt == "fail":
+        return httpx.Response(400, json={"error": "bad request"})
+    return openai_completion(prompt.upper())
+
+
+def test_generate_text_batch_keeps_input_order_and_captures_errors(server, client_factories):
+    server.queue(_echo)
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    progress = []
+
+    batch = generate_text_batch(
+        model=provider("gpt-4o"),
+        inputs=["a", "fail", [UserMessage(content="c")]],
+        max_concurrency=2,
+        on_progress=lambda completed, total, item: progress.append((completed, total)),
+    )
+
+    assert [item.index for item in batch.items] == [0, 1, 2]
+    assert batch.results[0].text == "A" and batch.results[2].text == "C"
+    assert batch.results[1] is None
+    assert isinstance(batch.errors[0].error, AI_APICallError)
+    assert batch.usage.total_tokens == 30
+    assert sorted(progress) == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_generate_text_batch_async(server, client_factories):
+    server.queue(_echo)
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    batch = asyncio.run(generate_text_batch_async(model=provider("gpt-4o"), inputs=["x", "y"], system="Be brief"))
+
+    assert [result.text for result in batch.results] == ["X", "Y"]
+    assert all(body["messages"][0]["content"] == "Be brief" for body in server.bodies())
+
+
+def test_generate_object_batch(server, client_factories):
+    class Answer(BaseModel):
+        value: int
+
+    server.queue(openai_completion('{"value": 1}'))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    batch = generate_object_batch(model=provider("gpt-4o"), schema=Answer, inputs=["one", "two"])
+
+    assert [result.object.value for result in batch.results] == [1, 1]
+    assert not batch.errors
@@ -0,0 +1,101 @@
+import asyncio
+import httpx
+import pytest
+from ai_sdk import generate_text, generate_text_async
+from ai_sdk.core.http_client import HTTPClientPool
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from .mock_provider import openai_completion
+
+
+def counting_factories(server):
+    created = {"sync": [], "async": []}
+    transport = server.transport()
+
+    def fetch():
+        client = httpx.Client(transport=transport)
+        created["sync"].append(client)
+        return client
+
+    def fetch_async():
+        client = httpx.AsyncClient(transport=transport)
+        created["async"].append(client)
+        return client
+
+    return created, {"fetch": fetch, "fetch_async": fetch_async}
+
+
+def test_client_is_reused_across_calls_and_models(server):
+    server.queue(openai_completion("ok"))
+    created, factories = counting_factories(server)
+    provider = create_openai_provider(OpenAIProviderSettings(**factories))
+
+    for model_id in ["gpt-4o", "gpt-4o-mini", "gpt-4o"]:
+        generate_text(model=provider(model_id), prompt="Hello")
+
+    assert len(server.requests) == 3
+    assert len(created["sync"]) == 1
+
+
+def test_pool_settings_are_passed_to_the_default_client():
+    pool = HTTPClientPool(max_connections=7, max_keepalive_connections=3, keepalive_expiry=30.0)
+
+    connections = pool.client()._transport._pool
+    assert (connections._max_connections, connections._max_keepalive_connections, connections._keepalive_expiry) == (7, 3, 30.0)
+    pool.close()
+
+
+def test_custom_factories_are_called_without_arguments(server):
+    server.queue(openai_completion("ok"))
+    transport = server.transport()
+    provider = create_openai_provider(OpenAIProviderSettings(
+        max_connections=7,
+        fetch=lambda: httpx.Client(transport=transport),
+        fetch_async=lambda: httpx.AsyncClient(transport=transport),
+    ))
+    model = provider("gpt-4o")
+
+    assert generate_text(model=model, prompt="Hello").text == "ok"
+    assert asyncio.run(generate_text_async(model=model, prompt="Hello")).text == "ok"
+
+
+def test_close_closes_async_clients(server):
+    server.queue(openai_completion("ok"))
+    created, factories = counting_factories(server)
+    provider = create_openai_provider(OpenAIProviderSettings(**factories))
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(generate_text_async(model=provider("gpt-4o"), prompt="Hello"))
+        provider.close()
+    finally:
+        loop.close()
+
+    assert created["async"][0].is_closed
+
+
+def test_one_async_client_per_event_loop(server):
+    server.queue(openai_completion("ok"))
+    created, factories = counting_factories(server)
+    provider = create_openai_provider(OpenAIProviderSettings(**factories))
+    model = provider("gpt-4o")
+
+    async def run():
+        await asyncio.gather(*[generate_text_async(model=model, prompt="Hello") for _ in range(5)])
+        await provider.aclose()
+
+    asyncio.run(run())
+    provider2 = create_openai_provider(OpenAIProviderSettings(**factories))
+    asyncio.run(generate_text_async(model=provider2("gpt-4o"), prompt="Hello"))
+
+    assert len(created["async"]) == 2
+
+
+def test_closed_provider_rejects_calls(server):
+    server.queue(openai_completion("ok"))
+    _, factories = counting_factories(server)
+
+    with create_openai_provider(OpenAIProviderSettings(**factories)) as provider:
+        model = provider("gpt-4o")
+        generate_text(model=model, prompt="Hello")
+
+    with pytest.raises(RuntimeError, match="closed"):
+        generate_text(model=model, prompt="Hello")
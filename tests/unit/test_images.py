@@ -0,0 +1,113 @@
+import base64
+import io
+import pytest
+from ai_sdk import generate_text, ImagePreprocessor, ImageLimits, FallbackModel
+from ai_sdk.core.images import DUPLICATE_IMAGE_TEXT
+from ai_sdk.core.types import UserMessage, ImagePart, TextPart
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from .mock_provider import openai_completion, anthropic_message
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _image(size, format="JPEG", mode="RGB", exif=None):
+    image = Image.radial_gradient("L").resize(size).convert(mode)
+    output = io.BytesIO()
+    image.save(output, format=format, **({"exif": exif} if exif is not None else {}))
+    return base64.b64encode(output.getvalue()).decode()
+
+
+def _decode(data):
+    return Image.open(io.BytesIO(base64.b64decode(data)))
+
+
+def _sent_images(server):
+    urls = [
+        part["image_url"]["url"]
+        for message in server.bodies()[-1]["messages"] if isinstance(message["content"], list)
+        for part in message["content"] if part["type"] == "image_url"
+    ]
+    return [(url.split(";")[0], _decode(url.split(",", 1)[1])) for url in urls]
+
+
+def test_downscales_to_openai_limits(server, openai_model):
+    server.queue(openai_completion("A gradient"))
+    photo = _image((4000, 3000))
+
+    res = generate_text(
+        model=openai_model,
+        messages=[UserMessage(content=[TextPart(text="What is this?"), ImagePart(image=photo)])],
+        image_preprocessor=ImagePreprocessor()
+    )
+
+    [(prefix, image)] = _sent_images(server)
+    assert prefix == "data:image/jpeg"
+    assert image.size == (1024, 768)
+    assert "image_preprocessing" in res.timing.steps[0].phases
+
+
+def test_downscales_to_anthropic_limits(server, client_factories):
+    server.queue(anthropic_message("A gradient"))
+    model = create_anthropic_provider(AnthropicProviderSettings(**client_factories))("claude-3-5-sonnet-20241022")
+
+    generate_text(
+        model=model,
+        messages=[UserMessage(content=[ImagePart(image=_image((3000, 2000)), mime_type="image/jpeg")])],
+        image_preprocessor=ImagePreprocessor()
+    )
+
+    [source] = [part["source"] for part in server.bodies()[0]["messages"][0]["content"] if part["type"] == "image"]
+    width, height = _decode(source["data"]).size
+    assert source["media_type"] == "image/jpeg"
+    assert max(width, height) <= 1568 and width * height <= 1150000
+    assert width / height == pytest.approx(1.5, rel=0.01)
+
+
+def test_applies_exif_orientation():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotated 90 degrees
+    part = ImagePart(image=_image((3000, 1000), exif=exif))
+
+    processed = ImagePreprocessor().process_image(part, ImageLimits(max_long_side=2048, max_short_side=768))
+
+    assert _decode(processed.image).size == (682, 2048)
+
+
+def test_keeps_small_images_and_transparency():
+    preprocessor = ImagePreprocessor()
+    limits = ImageLimits(max_long_side=512)
+    small = ImagePart(image=_image((100, 100), format="PNG"), mime_type="image/png")
+    url = ImagePart(image="https://example.com/cat.png")
+
+    assert preprocessor.process_image(small, limits) is small
+    assert preprocessor.process_image(url, limits) is url
+    processed = preprocessor.process_image(ImagePart(image=_image((1000, 1000), format="PNG", mode="RGBA")), limits)
+    assert (processed.mime_type, _decode(processed.image).mode, _decode(processed.image).size) == ("image/png", "RGBA", (512, 512))
+
+
+def test_deduplicates_and_caches(monkeypatch):
+    preprocessor = ImagePreprocessor()
+    encode = preprocessor._encode
+    calls = []
+    monkeypatch.setattr(preprocessor, "_encode", lambda *args: calls.append(args) or encode(*args))
+    photo = _image((2000, 2000))
+    limits = ImageLimits(max_long_side=256)
+
+    messages = preprocessor.process([
+        UserMessage(content=[ImagePart(image=photo), TextPart(text="Describe it")]),
+        UserMessage(content=[TextPart(text="And this one?"), ImagePart(image=photo)]),
+    ], limits)
+
+    assert isinstance(messages[0].content[0], ImagePart)
+    assert messages[1].content[1] == TextPart(text=DUPLICATE_IMAGE_TEXT)
+    # The same image in new message objects is not encoded again
+    preprocessor.process([UserMessage(content=[ImagePart(image=photo)])], limits)
+    assert len(calls) == 1
+
+
+def test_fallback_uses_most_restrictive_limits(client_factories, openai_model):
+    anthropic_model = create_anthropic_provider(AnthropicProviderSettings(**client_factories))("claude-3-5-sonnet-20241022")
+
+    limits = FallbackModel([openai_model, anthropic_model]).image_limits()
+
+    assert (limits.max_long_side, limits.max_short_side, limits.max_pixels) == (1568, 768, 1150000)
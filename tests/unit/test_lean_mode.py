@@ -0,0 +1,85 @@
+from pydantic import BaseModel
+from ai_sdk import generate_text, generate_object
+from ai_sdk.core import generate_text as generate_text_module
+from ai_sdk.core.types import Tool, TextResult, ObjectResult
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from .mock_provider import openai_completion, anthropic_message
+
+
+class Weather(BaseModel):
+    location: str
+
+
+def test_lean_text_result(server, openai_model, monkeypatch):
+    server.queue(openai_completion("Hello!"))
+    conversions = []
+    original = generate_text_module.convert_to_response_messages
+    monkeypatch.setattr(
+        generate_text_module,
+        "convert_to_response_messages",
+        lambda *args: conversions.append(1) or original(*args)
+    )
+
+    res = generate_text(model=openai_model, prompt="Hi", lean=True)
+
+    assert isinstance(res, TextResult)
+    assert res.text == "Hello!"
+    assert res.usage.total_tokens == 15
+    assert res.request is None
+    assert res.response.body is None
+    assert res.response.headers["content-type"] == "application/json"
+    assert conversions == []
+
+    assert res.response.messages[0].content[0].text == "Hello!"
+    assert res.response.messages is res.response.messages
+    assert conversions == [1]
+
+
+def test_default_mode_keeps_bodies(server, openai_model):
+    server.queue(openai_completion("Hello!"))
+
+    res = generate_text(model=openai_model, prompt="Hi")
+
+    assert res.request.body is not None
+    assert res.response.body is not None
+
+
+def test_lean_tool_loop(server, openai_model):
+    server.queue(
+        openai_completion(content=None, tool_calls=[{"id": "call_1", "name": "weather", "args": {"location": "Paris"}}]),
+        openai_completion("Sunny")
+    )
+
+    res = generate_text(
+        model=openai_model,
+        prompt="Weather?",
+        tools={"weather": Tool(description="Get the weather", parameters=Weather, execute=lambda location: "sunny")},
+        max_steps=2,
+        lean=True
+    )
+
+    assert res.text == "Sunny"
+    assert res.usage.total_tokens == 30
+
+
+def test_lean_object_result_is_validated(server, openai_model):
+    server.queue(openai_completion('{"location": "Paris"}'))
+
+    res = generate_object(model=openai_model, schema=Weather, prompt="Weather?", lean=True)
+
+    assert isinstance(res, ObjectResult)
+    assert isinstance(res.object, Weather)
+    assert res.object.location == "Paris"
+    assert res.request is None
+    assert res.response.messages[0].content[0].text == '{"location": "Paris"}'
+
+
+def test_lean_anthropic(server, client_factories):
+    server.queue(anthropic_message("Hello!"))
+    model = create_anthropic_provider(AnthropicProviderSettings(**client_factories))("claude-3-5-sonnet-20241022")
+
+    res = generate_text(model=model, prompt="Hi", lean=True)
+
+    assert res.text == "Hello!"
+    assert res.response.body is None
+    assert res.response.model_dump()["messages"][0]["content"][0]["text"] == "Hello!"
@@ -0,0 +1,98 @@
+from pydantic import BaseModel
+from ai_sdk import generate_text
+from ai_sdk.core.types import Tool, SystemMessage, UserMessage
+from ai_sdk.core.message_cache import convert_message
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings, AnthropicChatSettings
+from .mock_provider import openai_completion, anthropic_message
+
+
+class Weather(BaseModel):
+    location: str
+
+
+def _weather_tool():
+    def weather(location: str) -> str:
+        return f"Sunny in {location}"
+    return {"weather": Tool(description="Get the weather", parameters=Weather, execute=weather)}
+
+
+def _count_conversions(monkeypatch, model):
+    converted = []
+    original = model._convert_message
+
+    def _convert_message(message):
+        converted.append(message)
+        return original(message)
+
+    monkeypatch.setattr(model, "_convert_message", _convert_message)
+    return converted
+
+
+def _tool_call(index):
+    return {"id": f"call_{index}", "name": "weather", "args": {"location": f"City {index}"}}
+
+
+def test_openai_history_converted_once(server, client_factories, monkeypatch):
+    server.queue(
+        openai_completion(content=None, tool_calls=[_tool_call(1)]),
+        openai_completion(content=None, tool_calls=[_tool_call(2)]),
+        openai_completion("Done")
+    )
+    model = create_openai_provider(OpenAIProviderSettings(**client_factories))("gpt-4o")
+    converted = _count_conversions(monkeypatch, model)
+
+    res = generate_text(model=model, system="Be brief", prompt="Weather?", tools=_weather_tool(), max_steps=3)
+
+    assert res.text == "Done"
+    # system + user, then one assistant and one tool message per step
+    assert len(converted) == 6
+    bodies = server.bodies()
+    assert [message["role"] for message in bodies[-1]["messages"]] == [
+        "developer", "user", "assistant", "tool", "assistant", "tool"
+    ]
+    assert bodies[-1]["messages"][:4] == bodies[1]["messages"]
+
+
+def test_anthropic_history_converted_once(server, client_factories, monkeypatch):
+    server.queue(
+        anthropic_message(text=None, tool_calls=[_tool_call(1)]),
+        anthropic_message(text=None, tool_calls=[_tool_call(2)]),
+        anthropic_message("Done")
+    )
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+    model = provider("claude-3-5-sonnet-20241022", AnthropicChatSettings(prompt_caching="auto"))
+    converted = _count_conversions(monkeypatch, model)
+
+    generate_text(model=model, system="Be brief", prompt="Weather?", tools=_weather_tool(), max_steps=3)
+
+    assert len(converted) == 6
+    for body in server.bodies():
+        breakpoints = [block for block in body["system"] if "cache_control" in block]
+        for message in body["messages"]:
+            breakpoints += [block for block in message["content"] if "cache_control" in block]
+        # Automatic breakpoints are added to copies and do not pile up across steps
+        assert len(breakpoints) <= 2
+
+
+def test_reassigned_field_invalidates_entry():
+    message = UserMessage(content="first")
+    assert convert_message(message, "key", lambda m: m.content.upper()) == "FIRST"
+    assert convert_message(message, "key", lambda m: "unused") == "FIRST"
+
+    message.content = "second"
+    assert convert_message(message, "key", lambda m: m.content.upper()) == "SECOND"
+    assert convert_message(message, "other", lambda m: m.content) == "second"
+
+
+def test_models_do_not_share_conversions(server, client_factories):
+    server.queue(openai_completion())
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    messages = [SystemMessage(content="Be brief"), UserMessage(content="Hi")]
+
+    generate_text(model=provider("gpt-4o"), messages=messages)
+    generate_text(model=provider("o1-mini"), messages=messages)
+
+    first, second = server.bodies()
+    assert first["messages"][0]["role"] == "developer"
+    assert second["messages"][0]["role"] == "assistant"
@@ -0,0 +1,125 @@
+import httpx
+import pytest
+from ai_sdk import generate_text, stream_text, RateLimiter
+from ai_sdk.core import rate_limit
+from ai_sdk.core.language_model import LanguageModelCallOptions
+from ai_sdk.core.errors import AI_APICallError
+from ai_sdk.core.types import UserMessage, ImagePart
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from .mock_provider import openai_completion, openai_stream
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock, sleeping advances it instead of blocking."""
+    state = {"now": 1000.0, "sleeps": []}
+
+    def sleep(delay):
+        state["sleeps"].append(delay)
+        state["now"] += delay
+
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: state["now"])
+    monkeypatch.setattr(rate_limit.time, "sleep", sleep)
+    return state
+
+
+@pytest.fixture
+def model(client_factories):
+    return create_openai_provider(OpenAIProviderSettings(**client_factories))("gpt-4o")
+
+
+def test_requests_per_minute(clock, model):
+    limiter = RateLimiter(requests_per_minute=2)
+
+    limiter.acquire(model, 0)
+    limiter.acquire(model, 0)
+    limiter.acquire(model, 0)
+
+    assert clock["sleeps"] == [pytest.approx(30.0)]
+
+
+def test_tokens_per_minute_with_reconciliation(clock, model):
+    limiter = RateLimiter(tokens_per_minute=600)
+
+    limiter.acquire(model, 500)
+    limiter.update(model, None, reserved_tokens=500, used_tokens=100)
+    limiter.acquire(model, 500)
+
+    assert clock["sleeps"] == []
+
+
+def test_limits_are_per_model(clock, client_factories, model):
+    limiter = RateLimiter(requests_per_minute=1)
+    other = create_openai_provider(OpenAIProviderSettings(**client_factories))("gpt-4o-mini")
+
+    limiter.acquire(model, 0)
+    limiter.acquire(other, 0)
+
+    assert clock["sleeps"] == []
+
+
+def test_adapts_to_rate_limit_headers(clock, model):
+    limiter = RateLimiter()
+
+    limiter.update(model, httpx.Headers({
+        "x-ratelimit-limit-requests": "60",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-limit-tokens": "10000",
+        "x-ratelimit-remaining-tokens": "9000",
+    }))
+    limiter.acquire(model, 100)
+
+    assert clock["sleeps"] == [pytest.approx(1.0)]
+
+
+def test_estimate_includes_max_tokens():
+    limiter = RateLimiter(default_completion_tokens=100)
+    options = LanguageModelCallOptions(messages=[UserMessage(content="x" * 400)])
+
+    assert limiter.estimate(options) > 200
+    assert limiter.estimate(options.model_copy(update={"max_tokens": 10})) == limiter.estimate(options) - 90
+
+
+def test_estimate_counts_images_flat():
+    limiter = RateLimiter(default_completion_tokens=0)
+    photo = LanguageModelCallOptions(messages=[UserMessage(content=[ImagePart(image="a" * 4_000_000)])])
+
+    assert limiter.estimate(photo) < 2000
+
+
+def test_failed_request_returns_its_reservation(clock, server, client_factories):
+    server.queue(httpx.Response(400, text="bad request"))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    limiter = RateLimiter(tokens_per_minute=2000, default_completion_tokens=1500)
+
+    for _ in range(3):
+        with pytest.raises(AI_APICallError):
+            generate_text(model=provider("gpt-4o"), prompt="Hello", rate_limiter=limiter)
+
+    assert clock["sleeps"] == []
+
+
+def test_streams_return_their_unused_reservation(clock, server, client_factories):
+    server.queue(openai_stream(["Hel", "lo"]))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    limiter = RateLimiter(tokens_per_minute=2000, default_completion_tokens=1500)
+
+    for _ in range(3):
+        assert stream_text(model=provider("gpt-4o"), prompt="Hello", rate_limiter=limiter).text == "Hello"
+
+    assert clock["sleeps"] == []
+
+
+def test_generate_text_with_rate_limiter(clock, server, client_factories):
+    server.queue(httpx.Response(200, json=openai_completion("ok"), headers={
+        "x-ratelimit-limit-requests": "120",
+        "x-ratelimit-remaining-requests": "0",
+    }))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    limiter = RateLimiter()
+
+    generate_text(model=provider("gpt-4o"), prompt="Hello", rate_limiter=limiter)
+    generate_text(model=provider("gpt-4o"), prompt="Hello", rate_limiter=limiter)
+
+    assert clock["sleeps"] == [pytest.approx(0.5)]
+    assert len(server.requests) == 2
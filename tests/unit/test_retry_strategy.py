@@ -0,0 +1,143 @@
+import asyncio
+import httpx
+import pytest
+from ai_sdk import generate_text, generate_text_async, RetryStrategy
+from ai_sdk.core import retry_strategy
+from ai_sdk.core.errors import AI_APICallError
+from ai_sdk.core.retry_strategy import retry_after_from_headers
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from .mock_provider import openai_completion
+
+
+def _error(status_code=429, headers=None, is_retryable=True):
+    return AI_APICallError(
+        url="https://api.openai.com/v1/chat/completions",
+        request_body_values={},
+        status_code=status_code,
+        response_headers=httpx.Headers(headers or {}),
+        response_body="",
+        is_retryable=is_retryable
+    )
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(retry_strategy.time, "sleep", delays.append)
+    return delays
+
+
+def test_retry_after_headers():
+    assert retry_after_from_headers(httpx.Headers({"retry-after": "3"})) == 3
+    assert retry_after_from_headers(httpx.Headers({"retry-after-ms": "250"})) == 0.25
+    limits = httpx.Headers({
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "1m30s",
+        "x-ratelimit-remaining-tokens": "1000",
+        "x-ratelimit-reset-tokens": "6m0s"
+    })
+    # Only the exhausted limit counts, and only on a 429
+    assert retry_after_from_headers(limits, 429) == 90
+    assert retry_after_from_headers(limits, 500) is None
+    assert retry_after_from_headers(httpx.Headers({"content-type": "application/json"})) is None
+
+
+def test_reset_headers_do_not_delay_server_errors():
+    headers = {"x-ratelimit-remaining-tokens": "0", "x-ratelimit-reset-tokens": "6m0s"}
+    strategy = RetryStrategy(base_delay=1, max_delay=10)
+
+    assert 1 <= strategy.compute_delay(_error(status_code=500, headers=headers), None) <= 3
+    assert strategy.compute_delay(_error(status_code=429, headers=headers), None) == 360
+
+
+def test_decorrelated_jitter_stays_within_bounds():
+    strategy = RetryStrategy(base_delay=1, max_delay=10)
+    delay = None
+    for _ in range(20):
+        upper = min(10, max((delay or 1) * 3, 1))
+        delay = strategy.compute_delay(_error(), delay)
+        assert 1 <= delay <= upper
+
+
+def test_retry_uses_header_delay(sleeps):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            raise _error(headers={"retry-after": "2"})
+        return "ok"
+
+    assert RetryStrategy().call(fn) == "ok"
+    assert 2 <= sleeps[0] <= 2.2
+
+
+def test_retry_stops_on_non_retryable_and_budget(sleeps):
+    def fail():
+        raise _error(status_code=400, is_retryable=False)
+
+    with pytest.raises(AI_APICallError):
+        RetryStrategy().call(fail)
+    assert sleeps == []
+
+    def rate_limited():
+        raise _error(headers={"retry-after": "30"})
+
+    with pytest.raises(AI_APICallError):
+        RetryStrategy(max_attempts=5, max_elapsed=10).call(rate_limited)
+    assert sleeps == []
+
+
+def test_provider_delay_longer_than_max_delay_is_raised(sleeps):
+    calls = []
+
+    def rate_limited():
+        calls.append(1)
+        raise _error(headers={"retry-after": "120"})
+
+    with pytest.raises(AI_APICallError):
+        RetryStrategy(max_attempts=5, max_delay=60).call(rate_limited)
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_retry_on_predicate(sleeps):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise httpx.ConnectError("connection reset")
+        return "ok"
+
+    strategy = RetryStrategy(retry_on=lambda error: isinstance(error, httpx.TransportError))
+    assert strategy.call(flaky) == "ok"
+    assert len(sleeps) == 2
+
+
+def test_generate_text_with_retry_strategy(server, client_factories, sleeps):
+    server.queue(httpx.Response(503, text="unavailable"), httpx.Response(503, text="unavailable"), openai_completion("ok"))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    with pytest.raises(AI_APICallError):
+        generate_text(model=provider("gpt-4o"), prompt="Hello", retry_strategy=RetryStrategy(max_attempts=2))
+
+    result = generate_text(model=provider("gpt-4o"), prompt="Hello", retry_strategy=RetryStrategy(max_attempts=2))
+    assert result.text == "ok"
+    assert len(server.requests) == 3
+
+
+def test_generate_text_async_with_retry_strategy(server, client_factories, monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    server.queue(httpx.Response(429, headers={"retry-after-ms": "500"}, text="slow down"), openai_completion("ok"))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    result = asyncio.run(generate_text_async(model=provider("gpt-4o"), prompt="Hello"))
+
+    assert result.text == "ok"
+    assert 0.5 <= delays[0] <= 0.55
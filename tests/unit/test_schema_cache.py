@@ -0,0 +1,86 @@
+from pydantic import BaseModel
+from ai_sdk import generate_text, generate_object
+from ai_sdk.core.types import Tool, SystemMessage, UserMessage
+from ai_sdk.core.schema_cache import get_json_schema, compile_schema_payload
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings, AnthropicChatSettings
+from .mock_provider import openai_completion, anthropic_message
+
+
+def _counting_schema(calls):
+    class Weather(BaseModel):
+        location: str
+
+    original = Weather.model_json_schema
+
+    def model_json_schema(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    Weather.model_json_schema = model_json_schema
+    return Weather
+
+
+def test_tool_schemas_generated_once_across_steps(server, client_factories):
+    calls = []
+    Weather = _counting_schema(calls)
+    server.queue(
+        openai_completion(content=None, tool_calls=[{"id": "call_1", "name": "weather", "args": {"location": "Paris"}}]),
+        openai_completion(content=None, tool_calls=[{"id": "call_2", "name": "weather", "args": {"location": "Rome"}}]),
+        openai_completion("Sunny")
+    )
+    model = create_openai_provider(OpenAIProviderSettings(**client_factories))("gpt-4o")
+
+    generate_text(
+        model=model,
+        prompt="Weather?",
+        tools={"weather": Tool(description="Get the weather", parameters=Weather, execute=lambda location: "sunny")},
+        max_steps=3
+    )
+
+    bodies = server.bodies()
+    assert len(bodies) == 3
+    assert all(body["tools"][0]["function"]["parameters"]["required"] == ["location"] for body in bodies)
+    assert len(calls) == 1
+
+
+def test_response_format_schema_reused(server, client_factories):
+    calls = []
+    Weather = _counting_schema(calls)
+    server.queue(openai_completion('{"location": "Paris"}'))
+    model = create_openai_provider(OpenAIProviderSettings(**client_factories))("gpt-4o")
+
+    for _ in range(3):
+        res = generate_object(model=model, schema=Weather, prompt="Weather?")
+
+    assert res.object.location == "Paris"
+    assert server.bodies()[-1]["response_format"]["json_schema"]["schema"] == get_json_schema(Weather)
+    assert len(calls) == 1
+
+
+def test_payload_mutations_do_not_leak_between_requests(server, client_factories):
+    class Weather(BaseModel):
+        location: str
+
+    server.queue(anthropic_message())
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+    tools = {"weather": Tool(description="Get the weather", parameters=Weather)}
+    messages = [SystemMessage(content="Instructions"), UserMessage(content="Hi")]
+
+    generate_text(model=provider("claude-3-5-sonnet-20241022", AnthropicChatSettings(prompt_caching="auto")), messages=messages, tools=tools, max_steps=1)
+    generate_text(model=provider("claude-3-5-sonnet-20241022"), messages=messages, tools=tools, max_steps=1)
+
+    first, second = server.bodies()
+    assert "cache_control" in first["tools"][0]
+    assert "cache_control" not in second["tools"][0]
+
+
+def test_payloads_keyed_by_caller_key():
+    class Weather(BaseModel):
+        location: str
+
+    first = compile_schema_payload(Weather, ("tool", "a"), lambda schema: {"name": "a", "schema": schema})
+    second = compile_schema_payload(Weather, ("tool", "b"), lambda schema: {"name": "b", "schema": schema})
+
+    assert first["name"] == "a" and second["name"] == "b"
+    assert first["schema"] is second["schema"]
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import pytest
+from typing import List
+from pydantic import BaseModel
+from ai_sdk import stream_object, stream_object_async
+from ai_sdk.core.errors import AI_ObjectValidationError
+from ai_sdk.core.partial_json import PartialJSONParser, parse_partial_json
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from .mock_provider import openai_stream, anthropic_stream
+
+
+class Recipe(BaseModel):
+    name: str
+    ingredients: List[str]
+    servings: int
+
+
+RECIPE = {"name": "Lasagna \"classic\"", "ingredients": ["pasta", "tomato", "cheese"], "servings": 4}
+
+
+def test_parse_partial_json_every_prefix():
+    document = json.dumps({**RECIPE, "vegetarian": False, "rating": -4.5e1, "notes": None})
+
+    values = [parse_partial_json(document[:i]) for i in range(1, len(document) + 1)]
+
+    assert all(value is not None for value in values)
+    assert values[-1] == json.loads(document)
+    assert parse_partial_json('{"name": "Las') == {"name": "Las"}
+    assert parse_partial_json('{"ingredients": ["pasta", "tom') == {"ingredients": ["pasta", "tom"]}
+    assert parse_partial_json('{"vegetarian": fa') == {"vegetarian": False}
+    assert parse_partial_json('{"na') == {}
+
+
+def test_parse_partial_json_unicode_escapes():
+    document = json.dumps({"name": "Crème brûlée \u2615"})
+
+    values = [parse_partial_json(document[:i]) for i in range(1, len(document) + 1)]
+
+    assert all(value is not None for value in values)
+    assert values[-1] == json.loads(document)
+    assert parse_partial_json('{"a": "x\\u00') == {"a": "x"}
+    assert parse_partial_json('{"a": "x\\u00e9') == {"a": "x\u00e9"}
+
+
+def test_parser_is_incremental():
+    document = json.dumps(RECIPE)
+    parser = PartialJSONParser()
+
+    for char in document:
+        parser.feed(char)
+
+    assert parser.parse() == RECIPE
+
+
+def test_stream_object_json_mode(server, client_factories):
+    document = json.dumps(RECIPE)
+    server.queue(openai_stream([document[i:i + 7] for i in range(0, len(document), 7)]))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    result = stream_object(model=provider("gpt-4o"), schema=Recipe, prompt="A recipe")
+    partials = list(result.partial_object_stream)
+
+    assert partials[-1] == RECIPE
+    assert len(partials) > 3
+    assert all(len(partial.get("ingredients", [])) <= 3 for partial in partials)
+    assert result.object == Recipe(**RECIPE)
+    assert server.bodies()[0]["response_format"]["type"] == "json_schema"
+
+
+def test_stream_object_tool_mode(server, client_factories):
+    server.queue(anthropic_stream(tool_calls=[{"id": "toolu_1", "name": "json_object", "args": RECIPE}]))
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+
+    result = stream_object(model=provider("claude-3-5-sonnet-20241022"), schema=Recipe, prompt="A recipe")
+
+    assert list(result)[-1] == RECIPE
+    assert result.object == Recipe(**RECIPE)
+
+
+def test_stream_object_validates_final_object(server, client_factories):
+    server.queue(openai_stream([json.dumps({"name": "Soup"})]))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    result = stream_object(model=provider("gpt-4o"), schema=Recipe, prompt="A recipe")
+
+    with pytest.raises(AI_ObjectValidationError):
+        result.consume()
+
+
+def test_stream_object_early_abort(server, client_factories):
+    document = json.dumps(RECIPE)
+    server.queue(openai_stream([document[i:i + 5] for i in range(0, len(document), 5)]))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    result = stream_object(model=provider("gpt-4o"), schema=Recipe, prompt="A recipe")
+    for partial in result.partial_object_stream:
+        if partial.get("name"):
+            break
+    result.close()
+
+    assert result.object is None
+
+
+def test_stream_object_async(server, client_factories):
+    server.queue(anthropic_stream(tool_calls=[{"id": "toolu_1", "name": "json_object", "args": RECIPE}]))
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+
+    async def run():
+        result = stream_object_async(model=provider("claude-3-5-sonnet-20241022"), schema=Recipe, prompt="A recipe")
+        partials = [partial async for partial in result]
+        return partials, result
+
+    partials, result = asyncio.run(run())
+
+    assert partials[-1] == RECIPE
+    assert result.object == Recipe(**RECIPE)
@@ -0,0 +1,119 @@
+import asyncio
+import httpx
+from pydantic import BaseModel
+from ai_sdk import stream_text, stream_text_async
+from ai_sdk.core.sse import iter_sse_events
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from ai_sdk.anthropic import create_anthropic_provider, AnthropicProviderSettings
+from ai_sdk.openrouter import create_openrouter_provider, OpenRouterProviderSettings
+from .mock_provider import openai_stream, anthropic_stream
+
+
+def test_sse_decoder():
+    lines = [": keep-alive", "event: update", "data: first", "data: second", "", "data: {\"a\": 1}", "", "data: tail"]
+
+    events = list(iter_sse_events(lines))
+
+    assert [(event.event, event.data) for event in events] == [
+        ("update", "first\nsecond"),
+        (None, '{"a": 1}'),
+        (None, "tail"),
+    ]
+
+
+def test_stream_text_openai(server, client_factories):
+    server.queue(openai_stream(["Hel", "lo", "!"]))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    result = stream_text(model=provider("gpt-4o"), prompt="Hello")
+
+    assert list(result.text_stream) == ["Hel", "lo", "!"]
+    assert result.text == "Hello!"
+    assert result.finish_reason == "stop"
+    assert result.usage.total_tokens == 15
+    assert result.time_to_first_token is not None
+    assert result.response.id == "chatcmpl-123"
+    assert server.bodies()[0]["stream"] is True
+
+
+def test_stream_text_openrouter(server, client_factories):
+    server.queue(openai_stream(["a", "b"], model="openai/gpt-4o"))
+    provider = create_openrouter_provider(OpenRouterProviderSettings(**client_factories))
+
+    result = stream_text(model=provider("openai/gpt-4o"), prompt="Hello")
+
+    assert result.text == "ab"
+    assert result.usage.total_tokens == 15
+
+
+def test_stream_text_anthropic_tool_calls(server, client_factories):
+    server.queue(anthropic_stream(["Let me check"], tool_calls=[{"id": "toolu_1", "name": "weather", "args": {"location": "Paris"}}]))
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+
+    class WeatherTool(BaseModel):
+        location: str
+
+    result = stream_text(
+        model=provider("claude-3-5-sonnet-20241022"),
+        prompt="Weather in Paris?",
+        tools={"weather": {"description": "Get the weather", "parameters": WeatherTool}}
+    )
+    parts = list(result.full_stream)
+    types = [part.type for part in parts]
+
+    assert types[0] == "response-metadata"
+    assert types.count("tool-call-delta") == 2
+    assert types[-2:] == ["step-finish", "finish"]
+    assert "".join(part.args_text_delta for part in parts if part.type == "tool-call-delta") == '{"location": "Paris"}'
+    assert result.tool_calls[0].args == {"location": "Paris"}
+    assert result.usage.completion_tokens == 5
+
+
+def test_stream_text_executes_tools_between_steps(server, client_factories):
+    server.queue(
+        openai_stream(tool_calls=[{"id": "call_1", "name": "add", "args": {"a": 1, "b": 2}}]),
+        openai_stream(["The answer is 3"])
+    )
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    class AddTool(BaseModel):
+        a: int
+        b: int
+
+    result = stream_text(
+        model=provider("gpt-4o"),
+        prompt="What is 1 + 2?",
+        max_steps=2,
+        tools={"add": {"description": "Add numbers", "parameters": AddTool, "execute": lambda a, b: a + b}}
+    )
+
+    assert result.text == "The answer is 3"
+    assert result.usage.total_tokens == 30
+    assert server.bodies()[1]["messages"][-1] == {"role": "tool", "content": "3", "tool_call_id": "call_1"}
+
+
+def test_stream_text_retries_before_first_part(server, client_factories, monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda delay: None)
+    server.queue(httpx.Response(503, text="unavailable"), openai_stream(["ok"]))
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+
+    result = stream_text(model=provider("gpt-4o"), prompt="Hello")
+
+    assert result.text == "ok"
+    assert len(server.requests) == 2
+
+
+def test_stream_text_async(server, client_factories):
+    server.queue(anthropic_stream(["Hi", " there"]))
+    provider = create_anthropic_provider(AnthropicProviderSettings(**client_factories))
+
+    async def run():
+        result = stream_text_async(model=provider("claude-3-5-sonnet-20241022"), prompt="Hello")
+        deltas = [delta async for delta in result.text_stream]
+        return deltas, result
+
+    deltas, result = asyncio.run(run())
+
+    assert deltas == ["Hi", " there"]
+    assert result.text == "Hi there"
+    assert result.finish_reason == "stop"
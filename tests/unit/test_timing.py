@@ -0,0 +1,107 @@
+import asyncio
+import httpx
+import pytest
+from pydantic import BaseModel
+from ai_sdk import generate_text, generate_text_async, generate_object
+from ai_sdk.core.errors import AI_APICallError
+from ai_sdk.core.retry_strategy import RetryStrategy
+from ai_sdk.core.timing import server_processing_time
+from ai_sdk.core.types import Tool
+from .mock_provider import openai_completion
+
+
+class Weather(BaseModel):
+    location: str
+
+
+def test_single_call_phases(server, openai_model):
+    server.queue(openai_completion("Hello!"))
+
+    res = generate_text(model=openai_model, prompt="Hi")
+
+    assert len(res.timing.steps) == 1
+    attempt = res.timing.steps[0].attempts[0]
+    for phase in ["build_args", "convert_messages", "encode", "network", "decode", "parse"]:
+        assert attempt.phases[phase] >= 0
+    assert sum(attempt.phases.values()) <= attempt.duration
+    assert attempt.duration <= res.timing.steps[0].duration <= res.timing.duration
+    assert attempt.error is None
+
+
+def test_tool_loop_steps(server, openai_model):
+    server.queue(
+        httpx.Response(
+            200,
+            json=openai_completion(content=None, tool_calls=[{"id": "call_1", "name": "weather", "args": {"location": "Paris"}}]),
+            headers={"openai-processing-ms": "250"}
+        ),
+        openai_completion("Sunny")
+    )
+
+    res = generate_text(
+        model=openai_model,
+        prompt="Weather?",
+        tools={"weather": Tool(parameters=Weather, execute=lambda location: "sunny")},
+        max_steps=2
+    )
+
+    assert [step.step for step in res.timing.steps] == [1, 2]
+    assert "tool_execution" in res.timing.steps[0].phases
+    assert "tool_execution" not in res.timing.steps[1].phases
+    assert res.timing.steps[0].attempts[0].server_processing_time == 0.25
+    assert res.timing.steps[1].attempts[0].server_processing_time is None
+    assert set(res.timing.phase_totals()) >= {"network", "tool_execution"}
+
+
+def test_retried_attempts(server, openai_model):
+    server.queue(httpx.Response(500, text="boom"), openai_completion("ok"))
+
+    res = generate_text(
+        model=openai_model,
+        prompt="Hi",
+        retry_strategy=RetryStrategy(base_delay=0, max_delay=0)
+    )
+
+    step = res.timing.steps[0]
+    assert len(step.attempts) == 2
+    assert step.attempts[0].error.startswith("AI_APICallError")
+    assert step.attempts[1].error is None
+    assert "retry_sleep" in step.phases
+
+
+def test_hook_called_on_failure(server, openai_model):
+    server.queue(httpx.Response(400, text="bad request"))
+    timings = []
+
+    with pytest.raises(AI_APICallError):
+        generate_text(model=openai_model, prompt="Hi", on_timing=timings.append)
+
+    assert len(timings) == 1
+    assert timings[0].steps[0].attempts[0].error is not None
+    assert timings[0].duration > 0
+
+
+def test_generate_object_timing(server, openai_model):
+    server.queue(openai_completion('{"location": "Paris"}'))
+    timings = []
+
+    res = generate_object(model=openai_model, schema=Weather, prompt="Paris", on_timing=timings.append)
+
+    assert res.object.location == "Paris"
+    assert timings == [res.timing]
+    assert "network" in res.timing.steps[0].attempts[0].phases
+
+
+def test_async_timing(server, openai_model):
+    server.queue(openai_completion("Hello!"))
+
+    res = asyncio.run(generate_text_async(model=openai_model, prompt="Hi"))
+
+    assert "network" in res.timing.steps[0].attempts[0].phases
+
+
+def test_server_processing_time():
+    assert server_processing_time({"OpenAI-Processing-Ms": "120"}) == 0.12
+    assert server_processing_time({"server-timing": "upstream;dur=42.5"}) == 0.0425
+    assert server_processing_time({"content-type": "application/json"}) is None
+    assert server_processing_time(None) is None
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+import pytest
+from pydantic import BaseModel
+from ai_sdk import generate_text, generate_text_async
+from ai_sdk.core.types import Tool, ToolCallPart
+from ai_sdk.core.errors import AI_ToolExecutionError
+from ai_sdk.core.tool_calls import execute_tool_calls, execute_tool_calls_async
+from ai_sdk.openai import create_openai_provider, OpenAIProviderSettings
+from .mock_provider import openai_completion
+
+
+class LookupParams(BaseModel):
+    key: str
+
+
+def _calls(*keys):
+    return [ToolCallPart(tool_call_id=f"call_{key}", tool_name="lookup", args={"key": key}) for key in keys]
+
+
+def test_tool_calls_run_concurrently_in_call_order():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def lookup(key):
+        barrier.wait()
+        time.sleep(0.05 if key == "a" else 0)
+        return key.upper()
+
+    tools = {"lookup": Tool(parameters=LookupParams, execute=lookup)}
+    results = execute_tool_calls(_calls("a", "b", "c"), tools)
+
+    assert [result.tool_call_id for result in results] == ["call_a", "call_b", "call_c"]
+    assert [result.result for result in results] == ['"A"', '"B"', '"C"']
+
+
+def test_tool_calls_respect_max_concurrency():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def lookup(key):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return key
+
+    tools = {"lookup": {"parameters": LookupParams, "execute": lookup}}
+    results = execute_tool_calls(_calls("a", "b", "c", "d"), tools, max_concurrency=2)
+
+    assert len(results) == 4
+    assert peak == 2
+
+
+def test_tool_call_timeout():
+    tools = {"lookup": Tool(parameters=LookupParams, execute=lambda key: time.sleep(1), timeout=0.05)}
+
+    start = time.monotonic()
+    with pytest.raises(AI_ToolExecutionError, match="timed out"):
+        execute_tool_calls(_calls("a"), tools)
+    assert time.monotonic() - start < 0.5
+
+
+def test_tool_calls_async_mix_coroutine_and_sync_tools():
+    async def slow(key):
+        await asyncio.sleep(0.05)
+        return f"async {key}"
+
+    tools = {
+        "lookup": Tool(parameters=LookupParams, execute=slow),
+        "sync_lookup": Tool(parameters=LookupParams, execute=lambda key: f"sync {key}"),
+    }
+    tool_calls = _calls("a") + [ToolCallPart(tool_call_id="call_b", tool_name="sync_lookup", args={"key": "b"})]
+
+    results = asyncio.run(execute_tool_calls_async(tool_calls, tools))
+
+    assert [result.result for result in results] == ['"async a"', '"sync b"']
+
+
+def test_tool_calls_async_timeout():
+    async def hang(key):
+        await asyncio.sleep(1)
+
+    tools = {"lookup": Tool(parameters=LookupParams, execute=hang)}
+
+    with pytest.raises(AI_ToolExecutionError, match="timed out"):
+        asyncio.run(execute_tool_calls_async(_calls("a", "b"), tools, max_concurrency=1, timeout=0.05))
+
+
+def test_generate_text_executes_parallel_tool_calls(server, client_factories):
+    server.queue(
+        openai_completion(tool_calls=[
+            {"id": "call_1", "name": "lookup", "args": {"key": "x"}},
+            {"id": "call_2", "name": "lookup", "args": {"key": "y"}},
+        ]),
+        openai_completion("done"),
+    )
+    provider = create_openai_provider(OpenAIProviderSettings(**client_factories))
+    tools = {"lookup": {"description": "Looks up a key", "parameters": LookupParams, "execute": lambda key: key * 2}}
+
+    result = generate_text(model=provider("gpt-4o"), prompt="Hi", tools=tools, max_steps=2, max_tool_concurrency=2)
+    async_result = asyncio.run(generate_text_async(model=provider("gpt-4o"), prompt="Hi", tools=tools, max_steps=2))
+
+    tool_messages = [message for message in server.bodies()[1]["messages"] if message["role"] == "tool"]
+    assert [message["content"] for message in tool_messages] == ['"xx"', '"yy"']
+    assert result.text == async_result.text == "done"
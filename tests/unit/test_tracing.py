@@ -0,0 +1,208 @@
+import subprocess
+import sys
+import httpx
+import pytest
+from pydantic import BaseModel
+from ai_sdk import generate_text
+from ai_sdk.core import tracing
+from ai_sdk.core.errors import AI_APICallError
+from ai_sdk.core.retry_strategy import RetryStrategy
+from ai_sdk.core.types import Tool
+from .mock_provider import openai_completion
+
+
+class Weather(BaseModel):
+    location: str
+
+
+class RecordingExporter(tracing.SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter():
+    exporter = RecordingExporter()
+    yield exporter
+    tracing.configure_tracing(False)
+
+
+def _tree(span):
+    return (span.name, [_tree(child) for child in span.children])
+
+
+def test_import_does_not_load_opik():
+    code = "import sys, ai_sdk; print('opik' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == "False"
+
+
+def test_disabled_tracing_calls_function_directly(exporter):
+    tracing.configure_tracing(False, exporter=exporter)
+
+    @tracing.track(kind="llm")
+    def add(a, b):
+        return a + b
+
+    assert add(1, 2) == 3
+    assert exporter.spans == []
+
+
+def test_enabled_tracing_records_span(exporter):
+    @tracing.track(kind="llm")
+    def add(a, b):
+        tracing.update_current_span(usage={"prompt_tokens": 1})
+        return a + b
+
+    tracing.configure_tracing(True, exporter=exporter)
+
+    assert add(1, 2) == 3
+    [span] = exporter.spans
+    assert (span.name, span.kind, span.attributes) == ("add", "llm", {"usage": {"prompt_tokens": 1}})
+    assert span.end_time >= span.start_time
+
+
+def test_tracing_enabled_from_environment(monkeypatch):
+    monkeypatch.setattr(tracing, "_enabled", None)
+    monkeypatch.setenv("AI_SDK_TRACING", "opik")
+    monkeypatch.delenv("OPIK_TRACK_DISABLE", raising=False)
+
+    assert tracing.is_tracing_enabled() is True
+    assert isinstance(tracing._config.exporter, tracing.OpikExporter)
+
+
+@pytest.mark.parametrize("settings", [
+    {"AI_SDK_TRACING": "otel"},
+    {"AI_SDK_TRACING": "opik", "AI_SDK_TRACING_SAMPLE_RATE": "abc"},
+    {"AI_SDK_TRACING": "opik", "AI_SDK_TRACING_SAMPLE_RATE": "2"},
+])
+def test_invalid_environment_disables_tracing(monkeypatch, server, openai_model, settings):
+    server.queue(openai_completion("Hi"))
+    monkeypatch.setattr(tracing, "_enabled", None)
+    monkeypatch.setattr(tracing, "_config", None)
+    # Makes the OpenTelemetry import fail even where the package is installed
+    monkeypatch.setitem(sys.modules, "opentelemetry", None)
+    monkeypatch.delenv("OPIK_TRACK_DISABLE", raising=False)
+    for name, value in settings.items():
+        monkeypatch.setenv(name, value)
+
+    assert generate_text(model=openai_model, prompt="Hello").text == "Hi"
+    assert generate_text(model=openai_model, prompt="Hello").text == "Hi"
+    assert tracing._enabled is False
+
+
+def test_generate_text_span_tree(server, openai_model, exporter):
+    tracing.configure_tracing(exporter=exporter)
+    server.queue(
+        openai_completion(content=None, tool_calls=[{"id": "call_1", "name": "weather", "args": {"location": "Paris"}}]),
+        openai_completion("Sunny")
+    )
+
+    generate_text(
+        model=openai_model,
+        prompt="Weather?",
+        tools={"weather": Tool(parameters=Weather, execute=lambda location: "sunny")},
+        max_steps=2
+    )
+
+    [call] = exporter.spans
+    assert _tree(call) == ("generate_text", [
+        ("step", [("attempt", []), ("weather", [])]),
+        ("step", [("attempt", [])]),
+    ])
+    assert call.attributes["model"] == "gpt-4o"
+    assert call.attributes["usage"] == {"prompt_tokens": 20, "completion_tokens": 10}
+    assert call.children[0].children[0].attributes["usage"] == {"prompt_tokens": 10, "completion_tokens": 5}
+    assert call.input is None and call.output is None
+
+
+def test_head_sampling(server, openai_model, exporter):
+    tracing.configure_tracing(exporter=exporter, sample_rate=0.0)
+    server.queue(openai_completion("Hello!"))
+
+    generate_text(model=openai_model, prompt="Hi")
+
+    assert exporter.spans == []
+
+
+def test_errors_only(server, openai_model, exporter):
+    tracing.configure_tracing(exporter=exporter, errors_only=True)
+    retry = RetryStrategy(base_delay=0, max_delay=0)
+
+    server.queue(openai_completion("Hello!"))
+    generate_text(model=openai_model, prompt="Hi")
+    assert exporter.spans == []
+
+    server.responses = [httpx.Response(500, text="boom"), openai_completion("ok")]
+    generate_text(model=openai_model, prompt="Hi", retry_strategy=retry)
+    [retried] = exporter.spans
+    attempts = retried.children[0].children
+    assert attempts[0].error.startswith("AI_APICallError")
+    assert attempts[1].error is None
+
+    server.responses = [httpx.Response(400, text="bad request")]
+    with pytest.raises(AI_APICallError):
+        generate_text(model=openai_model, prompt="Hi")
+    assert exporter.spans[-1].error.startswith("AI_APICallError")
+
+
+def test_payload_capture_is_truncated(server, openai_model, exporter):
+    tracing.configure_tracing(exporter=exporter, capture_payloads=True, max_payload_length=20)
+    server.queue(openai_completion("A rather long answer to the question"))
+
+    generate_text(model=openai_model, prompt="Hi")
+
+    [call] = exporter.spans
+    assert call.input.startswith('[{"role":"user"')
+    assert call.output.startswith("A rather long answer... (")
+
+
+def test_exporter_failure_does_not_fail_the_call(server, openai_model):
+    class FailingExporter(tracing.SpanExporter):
+        def export(self, span):
+            raise RuntimeError("collector down")
+
+    tracing.configure_tracing(exporter=FailingExporter())
+    server.queue(openai_completion("Hello!"))
+    try:
+        assert generate_text(model=openai_model, prompt="Hi").text == "Hello!"
+    finally:
+        tracing.configure_tracing(False)
+
+
+def test_opik_exporter(server, openai_model):
+    class FakeNode:
+        def __init__(self, **fields):
+            self.fields = fields
+            self.children = []
+
+        def span(self, **fields):
+            self.children.append(FakeNode(**fields))
+            return self.children[-1]
+
+    class FakeClient:
+        traces = []
+
+        def trace(self, **fields):
+            self.traces.append(FakeNode(**fields))
+            return self.traces[-1]
+
+    client = FakeClient()
+    tracing.configure_tracing(exporter=tracing.OpikExporter(client=client))
+    server.queue(openai_completion("Hello!"))
+    try:
+        generate_text(model=openai_model, prompt="Hi")
+    finally:
+        tracing.configure_tracing(False)
+
+    [trace] = client.traces
+    assert trace.fields["name"] == "generate_text"
+    assert trace.fields["end_time"] >= trace.fields["start_time"]
+    [step] = trace.children
+    [attempt] = step.children
+    assert attempt.fields["type"] == "llm"
+    assert attempt.fields["usage"] == {"prompt_tokens": 10, "completion_tokens": 5}